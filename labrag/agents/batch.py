@@ -0,0 +1,95 @@
+"""Run many chat turns through the compiled graph with bounded concurrency."""
+
+import asyncio
+import time
+from collections import defaultdict
+from collections.abc import AsyncIterator
+from typing import Any
+
+from langchain_core.messages import HumanMessage
+from langgraph.graph.state import CompiledStateGraph
+from loguru import logger
+
+from labrag.agents.deadline import make_deadline
+from labrag.agents.state import SessionState
+
+
+async def _run_turn(
+    graph: CompiledStateGraph,
+    session_id: str,
+    message: str,
+    deadline_seconds: float | None,
+    answer_tier: str | None,
+) -> tuple[str, str | None]:
+    """Run a single chat turn and return the assistant reply and answer tier
+    (None for casual chat)"""
+    state = SessionState(messages=[HumanMessage(content=message)])
+    config = {
+        "configurable": {
+            "thread_id": session_id,
+            "deadline": make_deadline(deadline_seconds),
+            "answer_tier": answer_tier,
+        }
+    }
+    response = await graph.ainvoke(state, config=config)
+    tier = response.get("tier") if response.get("intent") == "research" else None
+    return response.get("messages", [])[-1].content, tier
+
+
+async def run_batch(
+    graph: CompiledStateGraph,
+    items: list[tuple[str, str]],
+    concurrency: int = 4,
+    deadline_seconds: float | None = None,
+    answer_tier: str | None = None,
+) -> AsyncIterator[dict[str, Any]]:
+    """Run (session_id, message) items and yield results as they complete.
+
+    Turns sharing a session_id run sequentially in input order, so follow-up
+    questions see the earlier answers; distinct sessions run concurrently.
+
+    Args:
+        graph: The compiled LangGraph workflow (with a checkpointer)
+        items: The (session_id, message) pairs to run
+        concurrency: Maximum number of turns in flight at once
+        deadline_seconds: Optional per-turn time budget
+        answer_tier: "fast", "full" or "auto" (the default: picked per turn)
+
+    Yields:
+        One result dict per item with its input index, session_id, response
+        and tier or error, and elapsed_seconds
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    results: asyncio.Queue[dict[str, Any]] = asyncio.Queue()
+
+    sessions: dict[str, list[tuple[int, str]]] = defaultdict(list)
+    for index, (session_id, message) in enumerate(items):
+        sessions[session_id].append((index, message))
+
+    async def run_session(session_id: str, turns: list[tuple[int, str]]) -> None:
+        for index, message in turns:
+            result = {"index": index, "session_id": session_id}
+            start = time.perf_counter()
+            async with semaphore:
+                try:
+                    result["response"], result["tier"] = await _run_turn(
+                        graph, session_id, message, deadline_seconds, answer_tier
+                    )
+                except Exception as e:
+                    logger.error(f"Batch item {index} ({session_id}) failed: {e}")
+                    result["error"] = str(e)
+            result["elapsed_seconds"] = round(time.perf_counter() - start, 3)
+            await results.put(result)
+
+    tasks = [
+        asyncio.create_task(run_session(session_id, turns))
+        for session_id, turns in sessions.items()
+    ]
+    try:
+        for _ in range(len(items)):
+            yield await results.get()
+    finally:
+        # The consumer may stop early (e.g. the HTTP client went away)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
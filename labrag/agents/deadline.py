@@ -0,0 +1,89 @@
+"""Request deadline helpers for the agentic workflow."""
+
+import asyncio
+import time
+from collections.abc import Awaitable
+
+from langchain_core.runnables import RunnableConfig
+
+
+class DeadlineExceededError(TimeoutError):
+    """Raised when a node cannot finish within the request deadline."""
+
+
+def make_deadline(budget_seconds: float | None) -> float | None:
+    """Convert a relative time budget into an absolute monotonic deadline.
+
+    Args:
+        budget_seconds: Seconds the caller is willing to wait, or None for no limit
+
+    Returns:
+        The deadline as a `time.monotonic()` timestamp, or None
+    """
+    if budget_seconds is None:
+        return None
+    return time.monotonic() + budget_seconds
+
+
+def get_remaining_time(config: RunnableConfig | None) -> float | None:
+    """Get the seconds left before the request deadline.
+
+    Args:
+        config: The LangGraph run config, with the deadline stored under
+            `configurable.deadline`
+
+    Returns:
+        Remaining seconds (may be negative), or None if there is no deadline
+    """
+    deadline = (config or {}).get("configurable", {}).get("deadline")
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def ensure_time_left(config: RunnableConfig | None, node: str) -> float | None:
+    """Fail fast if the request deadline has already passed.
+
+    Args:
+        config: The LangGraph run config
+        node: Name of the calling node, used in the error message
+
+    Returns:
+        Remaining seconds, or None if there is no deadline
+
+    Raises:
+        DeadlineExceededError: If no time is left
+    """
+    remaining = get_remaining_time(config)
+    if remaining is not None and remaining <= 0:
+        raise DeadlineExceededError(f"Deadline exceeded before {node} started")
+    return remaining
+
+
+async def run_with_deadline[T](
+    awaitable: Awaitable[T], config: RunnableConfig | None, node: str
+) -> T:
+    """Await a call, cancelling it when the request deadline is reached.
+
+    Args:
+        awaitable: The call to run (typically an LLM invocation)
+        config: The LangGraph run config
+        node: Name of the calling node, used in the error message
+
+    Returns:
+        The result of the awaitable
+
+    Raises:
+        DeadlineExceededError: If the deadline passes before the call finishes
+    """
+    try:
+        remaining = ensure_time_left(config, node)
+    except DeadlineExceededError:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()  # avoid "coroutine was never awaited" warnings
+        raise
+
+    try:
+        return await asyncio.wait_for(awaitable, timeout=remaining)
+    except TimeoutError as e:
+        raise DeadlineExceededError(f"Deadline exceeded during {node}") from e
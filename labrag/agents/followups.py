@@ -0,0 +1,227 @@
+"""Retrieval reuse across the turns of a session.
+
+Follow-up questions ("and what about the methods?") usually need the chunks the
+previous research turn retrieved. The retriever keeps that turn's query vector
+in the session state (`SessionState.retrieval`) and compares the new query
+vector with it: a near-identical query reuses the previous chunks without
+searching, a related one extends them with a smaller search, and anything else
+(or a reloaded index) runs a fresh search.
+
+Relational or cross-document questions about entities of the index's entity
+graph also get the few chunks the graph picks for them, on top of the vector
+search results.
+"""
+
+import math
+import time
+from typing import Literal
+
+from langchain_core.documents import Document
+from loguru import logger
+from pydantic import BaseModel
+
+from labrag.agents.state import RetrievalMemory, SessionState
+from labrag.ingestion.loaders.vector_store import VectorStore
+from labrag.metrics import metrics
+
+# Cosine similarity between consecutive research queries at or above which the
+# previous chunks are reused as they are, or extended with a search for a third
+# as many
+REUSE_SIMILARITY = 0.9
+EXTEND_SIMILARITY = 0.6
+EXTEND_FRACTION = 1 / 3
+
+# With parent/child chunking, small chunks searched per parent wanted
+CHILDREN_PER_PARENT = 4
+
+# Chunks picked through the entity graph, added to the k vector search results
+GRAPH_CHUNKS = 6
+
+RetrievalMode = Literal["reuse", "extend", "refresh"]
+
+
+class TurnRetrieval(BaseModel):
+    """The chunks retrieved for a turn and how they were obtained"""
+
+    docs: list[Document]
+    mode: RetrievalMode
+    similarity: float | None = None
+    # Entities the entity graph matched (empty for a vector-only search)
+    entities: list[str] = []
+    # Scores of the vector search results the docs came from, best first
+    scores: list[float] = []
+    memory: RetrievalMemory
+
+
+class SearchResult(BaseModel):
+    """Documents found for a query vector"""
+
+    docs: list[Document]
+    # Entities the entity graph matched (empty for a vector-only search)
+    entities: list[str] = []
+    # Inner products of the vector search results (chunks on a parent/child
+    # index), best first
+    scores: list[float] = []
+    # Documents the entity graph added beyond the k wanted
+    graph_docs: int = 0
+
+
+def cosine_similarity(a: list[float], b: list[float]) -> float:
+    """Cosine similarity of two vectors (0.0 if either is zero or sizes differ)"""
+    if len(a) != len(b):
+        return 0.0
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    if norm == 0:
+        return 0.0
+    return sum(x * y for x, y in zip(a, b, strict=True)) / norm
+
+
+def choose_mode(
+    state: SessionState, query_vector: list[float], k: int, snapshot: str | None
+) -> tuple[RetrievalMode, float | None]:
+    """Decide how to retrieve for a new query given the session's last search
+
+    Returns:
+        tuple: The mode and the similarity to the previous query (None when
+            there is nothing to compare with)
+    """
+    memory = state.retrieval
+    if memory is None or not state.docs or memory.snapshot != snapshot:
+        return "refresh", None
+
+    similarity = cosine_similarity(query_vector, memory.query_vector)
+    # The previous turn may have retrieved fewer chunks (low time budget)
+    if similarity >= REUSE_SIMILARITY and memory.k >= k:
+        return "reuse", similarity
+    if similarity >= EXTEND_SIMILARITY:
+        return "extend", similarity
+    return "refresh", similarity
+
+
+def _doc_key(doc: Document) -> tuple[str | None, str]:
+    return doc.metadata.get("source"), doc.page_content
+
+
+def merge_results(
+    fresh: list[Document], previous: list[Document], k: int
+) -> list[Document]:
+    """New results first, then the previous ones not among them, up to k"""
+    merged, seen = [], set()
+    for doc in [*fresh, *previous]:
+        if (key := _doc_key(doc)) not in seen:
+            seen.add(key)
+            merged.append(doc)
+    return merged[:k]
+
+
+async def search(
+    vector_store: VectorStore,
+    query_vector: list[float],
+    k: int,
+    query: str | None = None,
+) -> SearchResult:
+    """The k best documents for a query vector
+
+    On a parent/child index the small chunks are searched and their parent
+    pages or sections are returned instead. For a relational question about
+    entities of the entity graph, up to `GRAPH_CHUNKS` chunks the graph picks
+    come first, followed by all k vector search results.
+
+    Returns:
+        SearchResult: The documents, the entities the graph matched and the
+            vector search scores
+    """
+    graph = vector_store.entity_graph if query else None
+    hits = graph.search(query, GRAPH_CHUNKS) if graph is not None else None
+    if hits is not None and hits.docs:
+        metrics.increment("retrieval.graph")
+    else:
+        hits = None
+
+    if vector_store.has_parents:
+        scored = await vector_store.asearch_with_scores_by_vector(
+            query_vector, k=k * CHILDREN_PER_PARENT
+        )
+        children = [doc for doc, _ in scored]
+        scores = [score for _, score in scored]
+        if hits is None:
+            return SearchResult(
+                docs=vector_store.parents_of(children)[:k], scores=scores
+            )
+        graph_parents = vector_store.parents_of(hits.docs)
+        docs = vector_store.parents_of([*hits.docs, *children])
+        docs = docs[: k + len(graph_parents)]
+    else:
+        scored = await vector_store.asearch_with_scores_by_vector(query_vector, k=k)
+        docs = [doc for doc, _ in scored]
+        scores = [score for _, score in scored]
+        if hits is None:
+            return SearchResult(docs=docs, scores=scores)
+        docs = merge_results(hits.docs, docs, k + len(hits.docs))
+
+    return SearchResult(
+        docs=docs,
+        entities=hits.entities,
+        scores=scores,
+        graph_docs=max(0, len(docs) - k),
+    )
+
+
+async def retrieve_for_turn(
+    state: SessionState, vector_store: VectorStore, query: str, k: int
+) -> TurnRetrieval:
+    """Retrieve chunks for the latest query, reusing the session's last results
+    when the query continues the same topic
+
+    Args:
+        state: The session state (previous docs and retrieval memory)
+        vector_store: The index to search
+        query: The latest user message
+        k: The number of documents wanted (chunks, or parents on a
+            parent/child index)
+
+    Returns:
+        TurnRetrieval: The chunks, the mode used and what to remember
+    """
+    query_vector = await vector_store.aembed_query(query)
+    snapshot = vector_store.snapshot
+    mode, similarity = choose_mode(state, query_vector, k, snapshot)
+
+    entities = []
+    if mode == "reuse":
+        # Keeping any chunks the entity graph added beyond k
+        docs = state.docs if state.retrieval.k == k else state.docs[:k]
+        scores = state.retrieval.scores
+        search_seconds = state.retrieval.search_seconds
+        metrics.increment("retrieval.saved_seconds", search_seconds)
+    else:
+        start = time.perf_counter()
+        if mode == "extend":
+            extend_k = max(1, round(k * EXTEND_FRACTION))
+            result = await search(vector_store, query_vector, extend_k, query)
+            docs = merge_results(result.docs, state.docs, k + result.graph_docs)
+        else:
+            result = await search(vector_store, query_vector, k, query)
+            docs = result.docs
+        entities, scores = result.entities, result.scores
+        search_seconds = time.perf_counter() - start
+        metrics.record(f"retrieval.{mode}", search_seconds)
+
+    metrics.increment(f"retrieval.{mode}")
+    logger.debug(f"Retrieval mode {mode} (similarity {similarity})")
+
+    return TurnRetrieval(
+        docs=docs,
+        mode=mode,
+        similarity=similarity,
+        entities=entities,
+        scores=scores,
+        memory=RetrievalMemory(
+            query_vector=query_vector,
+            k=k,
+            snapshot=snapshot,
+            scores=scores,
+            # Reused results keep the cost of the search that produced them
+            search_seconds=search_seconds,
+        ),
+    )
@@ -1,33 +1,69 @@
 import json
+import time
 from typing import Any
 
-from langchain.chat_models import init_chat_model
 from langchain.schema import AIMessage
+from langchain_core.runnables import RunnableConfig
 from loguru import logger
 
+from labrag.agents.deadline import ensure_time_left, run_with_deadline
+from labrag.agents.followups import retrieve_for_turn
+from labrag.agents.prompts import build_prompt, order_documents, record_prompt_usage
 from labrag.agents.state import SessionState
+from labrag.agents.tiers import TIERS, choose_tier, get_tier_mode, record_usage
 from labrag.agents.utils import (
     format_document_context,
     format_sources_with_pages,
     get_chat_history,
 )
-from labrag.config import load_prompt_templates
 from labrag.ingestion.loaders.vector_store import VectorStore
-
-
-async def intent_classifier_node(state: SessionState) -> dict[str, Any]:
+from labrag.metrics import timed
+from labrag.providers import get_chat_model
+
+# Degradation thresholds: below these remaining budgets (in seconds) nodes switch
+# to cheaper settings instead of risking a response nobody will read
+RETRIEVAL_K = 30
+LOW_BUDGET_RETRIEVAL_K = 10
+# Parent/child indexes return whole pages or sections: fewer are needed
+PARENT_RETRIEVAL_K = 8
+LOW_BUDGET_PARENT_RETRIEVAL_K = 4
+LOW_BUDGET_RETRIEVAL_SECONDS = 20.0
+LOW_BUDGET_SYNTHESIS_SECONDS = 15.0
+LOW_BUDGET_CHAT_SECONDS = 5.0
+
+
+def _pick_model(
+    remaining: float | None, threshold: float, model: str, fallback: str
+) -> str:
+    """Choose the cheaper fallback model when the time budget runs low."""
+    if remaining is not None and remaining < threshold:
+        logger.warning(
+            f"Only {remaining:.1f}s left, degrading from {model} to {fallback}"
+        )
+        return fallback
+    return model
+
+
+@timed("node.intent_classifier")
+async def intent_classifier_node(
+    state: SessionState, config: RunnableConfig
+) -> dict[str, Any]:
     """Classify user intent: research or casual chat."""
     logger.info("Intent Classifier Node")
-    llm = init_chat_model("gpt-4.1-mini", model_provider="openai", temperature=0)
+    llm = get_chat_model("gpt-4.1-mini", temperature=0)
 
-    prompt = load_prompt_templates()["route_intent_system_prompt"].format(
+    prompt = build_prompt(
+        "route_intent_system_prompt",
         conversation_context=get_chat_history(state.messages),
         latest_message=state.messages[-1].content if state.messages else "",
     )
 
     logger.debug(f"Intent classifier prompt: {prompt}")
 
-    response = await llm.ainvoke(prompt)
+    response = await run_with_deadline(
+        llm.ainvoke(prompt), config, "intent classification"
+    )
+    record_prompt_usage("route_intent_system_prompt", response)
     try:
         result = json.loads(response.content)
         intent = result.get("intent", "chat")
@@ -41,30 +77,39 @@ async def intent_classifier_node(state: SessionState) -> dict[str, Any]:
     }
 
 
-async def chat_agent_node(state: SessionState) -> dict[str, Any]:
+@timed("node.chat_agent")
+async def chat_agent_node(
+    state: SessionState, config: RunnableConfig
+) -> dict[str, Any]:
     """Handle casual conversation with session memory."""
     logger.info("Chat Agent Node")
+    remaining = ensure_time_left(config, "chat agent")
     latest_message = state.messages[-1].content if state.messages else ""
 
     # Get conversation history for context
     conversation_context = get_chat_history(state.messages)
 
-    llm = init_chat_model("gpt-4.1", model_provider="openai", temperature=0.5)
+    model = _pick_model(remaining, LOW_BUDGET_CHAT_SECONDS, "gpt-4.1", "gpt-4.1-mini")
+    llm = get_chat_model(model, temperature=0.5)
 
-    prompt = load_prompt_templates()["chat_agent_system_prompt"].format(
-        conversation_context=conversation_context, latest_message=latest_message
+    prompt = build_prompt(
+        "chat_agent_system_prompt",
+        conversation_context=conversation_context,
+        latest_message=latest_message,
     )
 
     logger.debug(f"Chat Agent prompt: {prompt}")
 
-    response = await llm.ainvoke(prompt)
+    response = await run_with_deadline(llm.ainvoke(prompt), config, "chat agent")
+    record_prompt_usage("chat_agent_system_prompt", response)
     ai_message = AIMessage(content=response.content)
 
     return {"messages": [ai_message]}
 
 
+@timed("node.retriever")
 async def retriever_node(
-    state: SessionState, vector_store: VectorStore
+    state: SessionState, config: RunnableConfig, vector_store: VectorStore
 ) -> dict[str, Any]:
     """Document Retrieval"""
     logger.info("Document Retrieval Node")
@@ -72,50 +117,104 @@ async def retriever_node(
 
     logger.debug(f"Document retrieval query: {latest_message[:50]}...")
 
-    docs = await vector_store.asearch(latest_message, k=30)
+    # Fewer chunks means a shorter synthesis prompt when the budget runs low
+    remaining = ensure_time_left(config, "document retrieval")
+    parents = vector_store.has_parents
+    k = PARENT_RETRIEVAL_K if parents else RETRIEVAL_K
+    if remaining is not None and remaining < LOW_BUDGET_RETRIEVAL_SECONDS:
+        k = LOW_BUDGET_PARENT_RETRIEVAL_K if parents else LOW_BUDGET_RETRIEVAL_K
+        logger.warning(f"Only {remaining:.1f}s left, retrieving k={k} chunks")
+
+    # Follow-ups on the same topic reuse (or extend) the previous turn's docs
+    retrieval = await run_with_deadline(
+        retrieve_for_turn(state, vector_store, latest_message, k),
+        config,
+        "document retrieval",
+    )
+    # Simple questions get a fast answer from the top few documents
+    decision = choose_tier(
+        get_tier_mode(config), latest_message, retrieval.docs, retrieval.scores, parents
+    )
+    memory = retrieval.memory
+    limit = TIERS[decision.tier].limit(parents)
+    docs = retrieval.docs[:limit]
+    if limit is not None and limit < memory.k:
+        # A later full-tier follow-up must not reuse the truncated docs as is
+        memory = memory.model_copy(update={"k": limit})
     sources = format_sources_with_pages(docs)
 
     logger.debug(
-        f"Document retrieval result: Found {len(docs)} "
+        f"Document retrieval result ({retrieval.mode}): Found {len(docs)} "
         f"documents from {len(sources)} sources"
     )
 
+    action = {
+        "reuse": "Reused",
+        "extend": "Extended the previous turn's results to",
+        "refresh": "Retrieved",
+    }[retrieval.mode]
+    through = ""
+    if retrieval.entities:
+        through = f" through the entity graph ({', '.join(retrieval.entities[:5])})"
+    estimate = ""
+    if decision.complexity is not None:
+        estimate = f" (complexity {decision.complexity:.2f})"
     reasoning = (
-        state.reasoning + f"**Step 2. Document Retrieval** — Retrieved {len(docs)} "
-        f"documents chunks from {len(sources)} sources\n"
+        state.reasoning + f"**Step 2. Document Retrieval** — {action} {len(docs)} "
+        f"documents chunks from {len(sources)} sources{through}; "
+        f"{decision.tier} answer{estimate}\n"
     )
 
     return {
         "docs": docs,
         "sources": sources,
         "reasoning": reasoning,
+        "retrieval": memory,
+        "tier": decision.tier,
+        "complexity": decision.complexity,
     }
 
 
-async def synthesizer_node(state: SessionState) -> dict[str, Any]:
+@timed("node.synthesizer")
+async def synthesizer_node(
+    state: SessionState, config: RunnableConfig
+) -> dict[str, Any]:
     """Response Synthesis"""
     logger.info("Response Synthesis Node")
+    remaining = ensure_time_left(config, "response synthesis")
     latest_message = state.messages[-1].content if state.messages else ""
 
-    # Get context from retrieved documents
-    context = format_document_context(state.docs)
+    # Get context from retrieved documents, in a stable order (not by score)
+    # so the same documents always make the same prompt prefix
+    context = format_document_context(order_documents(state.docs))
 
     # Get conversation history
     conversation_context = get_chat_history(state.messages)
 
-    llm = init_chat_model(
-        "gpt-4.1", model_provider="openai", temperature=0.7
-    ).with_structured_output(method="json_mode")
+    tier_name = state.tier or "full"
+    tier = TIERS[tier_name]
+    model = _pick_model(
+        remaining, LOW_BUDGET_SYNTHESIS_SECONDS, tier.model, "gpt-4.1-mini"
+    )
+    # The raw message is kept for its token usage
+    llm = get_chat_model(model, temperature=0.7).with_structured_output(
+        method="json_mode", include_raw=True
+    )
 
-    prompt_template = load_prompt_templates()["research_synthesis_prompt"]
-    prompt = prompt_template.format(
-        query=latest_message,
-        context=context,
+    prompt = build_prompt(
+        tier.prompt,
         conversation_context=conversation_context,
-        sources=state.sources,
+        latest_message=latest_message,
+        documents=context,
     )
 
-    response = await llm.ainvoke(prompt)
+    start = time.perf_counter()
+    output = await run_with_deadline(llm.ainvoke(prompt), config, "response synthesis")
+    record_usage(tier_name, time.perf_counter() - start, output["raw"])
+    record_prompt_usage(tier.prompt, output["raw"])
+    if output["parsing_error"] is not None:
+        raise output["parsing_error"]
+    response = output["parsed"]
     logger.debug(f"Synthesis response: {response}")
 
     final_answer = response.get("main_answer", "")
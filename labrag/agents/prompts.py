@@ -0,0 +1,114 @@
+"""Prompt assembly with stable prefixes.
+
+Providers cache the prompt prefixes they have seen recently (OpenAI does it
+automatically for prompts of 1024 tokens or more, in 128-token steps): a
+cached prefix lowers the time to first token and costs less. Only a prefix
+identical to an earlier prompt's hits, so prompts are assembled from the most
+to the least stable part:
+
+1. the static instructions, as the system message
+2. the retrieved documents, ordered by source and position in the source
+   rather than by score, so the same documents (e.g. a follow-up reusing the
+   previous turn's retrieval) always give the same text
+3. the conversation history
+4. the latest user message
+
+The input and cached tokens the provider reports are counted per prompt
+(`prompt_cache.<prompt>.input_tokens` and `.cached_tokens`).
+"""
+
+import re
+from typing import Any
+
+from langchain_core.documents import Document
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+
+from labrag.config import load_prompt_templates
+from labrag.metrics import metrics
+
+# The position in the ID of chunks ("{index}-{source}") and parents
+# ("parent-{index}-{source}") without a chunk_index
+ID_POSITION = re.compile(r"^(?:parent-)?(\d+)-")
+
+
+def document_order(doc: Document) -> tuple[str, int, int, str]:
+    """Sort key of a document: source, page, position in the source, ID"""
+    metadata = doc.metadata
+    page = metadata.get("page")
+    position = metadata.get("chunk_index")
+    if position is None:
+        match = ID_POSITION.match(doc.id or "")
+        position = int(match.group(1)) if match else -1
+    return (
+        str(metadata.get("source", "")),
+        page if isinstance(page, int) else -1,
+        position,
+        doc.id or "",
+    )
+
+
+def order_documents(docs: list[Document]) -> list[Document]:
+    """Documents in a deterministic order, independent of their scores"""
+    return sorted(docs, key=document_order)
+
+
+def build_prompt(
+    name: str,
+    conversation_context: str,
+    latest_message: str,
+    documents: str | None = None,
+) -> list[BaseMessage]:
+    """Assemble a prompt, static instructions first
+
+    Args:
+        name: The instructions' key in configs/prompts.yml
+        conversation_context: The formatted conversation history
+        latest_message: The user's latest message
+        documents: The formatted documents, for prompts that use them
+
+    Returns:
+        list[BaseMessage]: The system message (instructions) and the user
+            message (documents, history and latest message, in that order)
+    """
+    instructions = load_prompt_templates()[name].strip()
+    sections = []
+    if documents is not None:
+        sections.append(f"**RETRIEVED DOCUMENTS:**\n{documents}")
+    sections.append(f"**CONVERSATION HISTORY (if any):**\n{conversation_context}")
+    sections.append(f"**CURRENT USER MESSAGE:**\n{latest_message}")
+    return [SystemMessage(instructions), HumanMessage("\n\n".join(sections))]
+
+
+def record_prompt_usage(name: str, message: Any) -> None:  # noqa: ANN401
+    """Count a call's input tokens and those read from the provider's cache
+
+    Args:
+        name: The prompt's name
+        message: The model response (its `usage_metadata`, when the provider
+            reports it, holds the token counts)
+    """
+    usage = getattr(message, "usage_metadata", None) or {}
+    details = usage.get("input_token_details") or {}
+    metrics.increment(f"prompt_cache.{name}.input_tokens", usage.get("input_tokens", 0))
+    metrics.increment(
+        f"prompt_cache.{name}.cached_tokens", details.get("cache_read") or 0
+    )
+
+
+def cached_token_ratios(counters: dict[str, float] | None = None) -> dict[str, float]:
+    """Share of input tokens read from the provider's cache, per prompt
+
+    Args:
+        counters: A metrics counters snapshot (default: the current one)
+
+    Returns:
+        dict: Prompt name to cached/input token ratio
+    """
+    counters = metrics.counters() if counters is None else counters
+    ratios = {}
+    for key, input_tokens in counters.items():
+        if key.startswith("prompt_cache.") and key.endswith(".input_tokens"):
+            name = key.removeprefix("prompt_cache.").removesuffix(".input_tokens")
+            cached = counters.get(f"prompt_cache.{name}.cached_tokens", 0)
+            ratios[name] = round(cached / input_tokens, 3) if input_tokens else 0.0
+    return ratios
@@ -19,6 +19,23 @@ def add_reasoning(existing: str, new: str) -> str:
     return existing + new
 
 
+class RetrievalMemory(BaseModel):
+    """What the last research turn searched for, kept for follow-ups."""
+
+    # embedding of the query that produced the session's current docs
+    query_vector: list[float]
+
+    # number of chunks retrieved, and the index snapshot they came from
+    k: int
+    snapshot: str | None = None
+
+    # vector search scores of those chunks, best first
+    scores: list[float] = []
+
+    # duration of the last fresh search (what reusing its results saves)
+    search_seconds: float = 0.0
+
+
 class SessionState(BaseModel):
     """State of the session."""
 
@@ -32,6 +49,14 @@ class SessionState(BaseModel):
     docs: list[Document] = []
     sources: list[str] = []
 
+    # answer tier of the research turn, and the complexity estimate behind it
+    # (None when the tier was requested explicitly)
+    tier: Literal["fast", "full"] | None = None
+    complexity: float | None = None
+
+    # last research query, to reuse its docs for follow-up questions
+    retrieval: RetrievalMemory | None = None
+
     # internal reasoning (for research branch only) - accumulates text
     reasoning: str = ""
 
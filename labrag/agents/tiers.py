@@ -0,0 +1,156 @@
+"""Answer tiers: how much synthesis a research question gets.
+
+The full tier sends every retrieved chunk to gpt-4.1 and asks for an analysis
+of each chunk it cites. Output tokens dominate synthesis latency, and that
+analysis grows with the number of chunks, so simple questions go to a fast
+tier instead: fewer chunks, a smaller model, and an answer with references
+only.
+
+With `auto` (the default), a cheap estimate made after retrieval picks the
+tier. It averages three signals, each between 0 and 1:
+
+- the length of the question
+- how flat the vector scores are: one clear best match suggests a lookup,
+  many similar scores a synthesis across chunks
+- how many sources the top results come from
+
+Callers can force a tier per request (`answer_tier` in the run config).
+"""
+
+from typing import Any, Literal
+
+from langchain_core.documents import Document
+from langchain_core.runnables import RunnableConfig
+from loguru import logger
+from pydantic import BaseModel
+
+from labrag.metrics import metrics
+
+AnswerTier = Literal["fast", "full"]
+TierMode = Literal["auto", "fast", "full"]
+
+# Questions of this many words count as fully complex on length alone
+LONG_QUERY_WORDS = 25
+# Relative drop from the best score to the last one considered at which the
+# results count as concentrated on a few chunks
+CONCENTRATED_SPREAD = 0.15
+# Distinct sources among the top results that count as a broad question
+MANY_SOURCES = 4
+# Complexity from which questions get the full tier
+FULL_TIER_COMPLEXITY = 0.5
+
+
+class TierSettings(BaseModel):
+    """Synthesis settings of a tier"""
+
+    model: str
+    # Documents sent to synthesis (None: everything retrieved); parents are
+    # whole pages or sections, so fewer are needed
+    k: int | None
+    parent_k: int | None
+    prompt: str
+
+    def limit(self, parents: bool) -> int | None:
+        """Documents sent to synthesis for a flat or parent/child index"""
+        return self.parent_k if parents else self.k
+
+
+TIERS: dict[AnswerTier, TierSettings] = {
+    "fast": TierSettings(
+        model="gpt-4.1-mini", k=8, parent_k=3, prompt="research_fast_prompt"
+    ),
+    "full": TierSettings(
+        model="gpt-4.1", k=None, parent_k=None, prompt="research_synthesis_prompt"
+    ),
+}
+
+
+class TierDecision(BaseModel):
+    """The tier picked for a turn"""
+
+    tier: AnswerTier
+    # The estimate (None when the tier was requested explicitly)
+    complexity: float | None = None
+
+
+def get_tier_mode(config: RunnableConfig | None) -> TierMode:
+    """The tier requested for a run (`configurable.answer_tier`, default auto)"""
+    return (config or {}).get("configurable", {}).get("answer_tier") or "auto"
+
+
+def estimate_complexity(query: str, docs: list[Document], scores: list[float]) -> float:
+    """How much synthesis a question needs, from 0 (lookup) to 1
+
+    Args:
+        query: The question
+        docs: The top documents, best first
+        scores: The top vector search scores, best first
+
+    Returns:
+        float: The mean of the length, flatness and breadth signals
+    """
+    length = min(1.0, len(query.split()) / LONG_QUERY_WORDS)
+
+    flatness = 1.0
+    if len(scores) > 1 and scores[0] > 0:
+        spread = (scores[0] - scores[-1]) / scores[0]
+        flatness = 1.0 - min(1.0, spread / CONCENTRATED_SPREAD)
+
+    sources = len({doc.metadata.get("source") for doc in docs})
+    breadth = min(1.0, max(0, sources - 1) / (MANY_SOURCES - 1))
+
+    return round((length + flatness + breadth) / 3, 3)
+
+
+def choose_tier(
+    mode: TierMode,
+    query: str,
+    docs: list[Document],
+    scores: list[float],
+    parents: bool,
+) -> TierDecision:
+    """Pick the tier of a research turn
+
+    Args:
+        mode: The requested tier, or "auto"
+        query: The question
+        docs: The retrieved documents, best first
+        scores: Their vector search scores, best first
+        parents: Whether the documents are parents (parent/child index)
+
+    Returns:
+        TierDecision: The tier and, for "auto", the complexity estimate
+
+    Raises:
+        ValueError: Unknown tier
+    """
+    if mode != "auto" and mode not in TIERS:
+        raise ValueError(f"Unknown answer tier: {mode}")
+    if mode != "auto":
+        return TierDecision(tier=mode)
+
+    # Look at what the fast tier would keep; scores are the chunks' even on
+    # a parent/child index, so as many of them as the flat k are compared
+    fast = TIERS["fast"]
+    complexity = estimate_complexity(
+        query, docs[: fast.limit(parents)], scores[: fast.k]
+    )
+    tier: AnswerTier = "full" if complexity >= FULL_TIER_COMPLEXITY else "fast"
+    logger.debug(f"Answer tier {tier} (complexity {complexity})")
+    return TierDecision(tier=tier, complexity=complexity)
+
+
+def record_usage(tier: AnswerTier, seconds: float, message: Any) -> None:  # noqa: ANN401
+    """Record a synthesis call's latency and token usage under its tier
+
+    Args:
+        tier: The tier the call was made for
+        seconds: The call's duration
+        message: The raw model response (its `usage_metadata`, when the
+            provider reports it, holds the token counts)
+    """
+    metrics.record(f"synthesis.{tier}", seconds)
+    metrics.increment(f"synthesis.{tier}.turns")
+    usage = getattr(message, "usage_metadata", None) or {}
+    for key in ("input_tokens", "output_tokens"):
+        metrics.increment(f"synthesis.{tier}.{key}", usage.get(key, 0))
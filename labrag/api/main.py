@@ -1,11 +1,60 @@
+import asyncio
+import contextlib
+import os
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 from fastapi import APIRouter, FastAPI
 
-from labrag.api.routes import chat, health
+from labrag.api.resources import ApiResources
+from labrag.api.routes import chat, documents, health
+
+# The config listing the sources that uploads are added to
+CONFIG_PATH = os.getenv("LABRAG_CONFIG", "configs/default.yml")
+# How often to check for index snapshots committed by builds or the source
+# watcher (0 disables reloading)
+INDEX_RELOAD_SECONDS = float(os.getenv("LABRAG_INDEX_RELOAD_SECONDS", "5"))
+# Run the ingestion worker inside the API (disable when scripts/ingest_worker.py
+# drains the queue instead)
+INGEST_WORKER = os.getenv("LABRAG_INGEST_WORKER", "1") != "0"
+# Search once and open the provider connections before reporting ready
+WARMUP = os.getenv("LABRAG_WARMUP", "1") != "0"
+# Serve a knowledge-base bundle in place, read-only (no snapshot reloading or
+# uploads); LABRAG_BUNDLE_VERIFY=1 checks its checksums before serving
+BUNDLE = os.getenv("LABRAG_BUNDLE") or None
+BUNDLE_VERIFY = os.getenv("LABRAG_BUNDLE_VERIFY", "0") != "0"
+# Answer tier of chat requests that don't set one: auto (picked per question),
+# fast or full
+ANSWER_TIER = os.getenv("LABRAG_ANSWER_TIER", "auto")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    resources = ApiResources(
+        CONFIG_PATH,
+        reload_seconds=INDEX_RELOAD_SECONDS,
+        ingest_worker=INGEST_WORKER,
+        warmup=WARMUP,
+        bundle=BUNDLE,
+        verify_bundle=BUNDLE_VERIFY,
+        answer_tier=ANSWER_TIER,
+    )
+    app.state.resources = resources
+    # Load in the background: the server starts answering /api/health (and
+    # /api/ready with 503) right away
+    startup = asyncio.create_task(resources.start())
+    yield
+    startup.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await startup
+    await resources.stop()
+
 
-app = FastAPI(docs_url="/api/docs", openapi_url="/api/openapi.json")
+app = FastAPI(docs_url="/api/docs", openapi_url="/api/openapi.json", lifespan=lifespan)
 
 api_router = APIRouter()
 api_router.include_router(chat.router, prefix="/chat", tags=["chat"])
+api_router.include_router(documents.router, tags=["documents"])
 api_router.include_router(health.router, tags=["health"])
 
 app.include_router(api_router, prefix="/api")
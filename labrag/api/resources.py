@@ -0,0 +1,246 @@
+"""Heavy API resources, created after the server starts.
+
+Loading the index, creating the provider clients and compiling the graph take
+a while, so they happen in the FastAPI lifespan instead of at import time: the
+server answers `/api/health` immediately, while `/api/ready` and the routes
+that need the resources return 503 until loading and the warmup pass are done.
+The heavy modules are imported lazily, on a worker thread.
+"""
+
+import asyncio
+import time
+from typing import Any, Literal
+
+from fastapi import HTTPException, Request
+from loguru import logger
+
+from labrag.metrics import metrics
+
+# The intent classifier's model, which every chat turn calls first
+WARMUP_CHAT_MODEL = "gpt-4.1-mini"
+
+ResourceStatus = Literal["starting", "ready", "failed"]
+
+
+class ApiResources:
+    """The vector store, graph and ingestion queue shared by the routes"""
+
+    def __init__(
+        self,
+        config_path: str = "configs/default.yml",
+        reload_seconds: float = 5.0,
+        ingest_worker: bool = True,
+        warmup: bool = True,
+        bundle: str | None = None,
+        verify_bundle: bool = False,
+        answer_tier: str = "auto",
+    ) -> None:
+        """Initialize the container (nothing is loaded until `start`)
+
+        Args:
+            config_path: The config file (sources, ingestion settings)
+            reload_seconds: How often to check for new index snapshots (0
+                disables reloading)
+            ingest_worker: Run the upload ingestion worker in this process
+            warmup: Run a search and prime the provider clients before
+                reporting ready
+            bundle: Serve this knowledge-base bundle read-only instead of the
+                index snapshots (disables reloading and the ingest worker)
+            verify_bundle: Check the bundle's checksums before serving it
+            answer_tier: Answer tier of requests that don't pick one ("auto",
+                "fast" or "full")
+        """
+        self.config_path = config_path
+        self.reload_seconds = reload_seconds
+        self.ingest_worker = ingest_worker
+        self.warmup = warmup
+        self.bundle = bundle
+        self.verify_bundle = verify_bundle
+        self.answer_tier = answer_tier
+
+        self.config: dict[str, Any] = {}
+        self.vector_store: Any = None
+        self.graph: Any = None
+        self.job_queue: Any = None
+        self.worker: Any = None
+
+        self.status: ResourceStatus = "starting"
+        self.error: str | None = None
+        self.warm = False
+        self.load_seconds: float | None = None
+        self.warmup_seconds: float | None = None
+        self.startup_seconds: float | None = None
+        self.first_request_seconds: float | None = None
+        self._started = time.perf_counter()
+        self._reload_task: asyncio.Task | None = None
+
+    @classmethod
+    def from_components(
+        cls,
+        vector_store: Any,  # noqa: ANN401
+        graph: Any,  # noqa: ANN401
+    ) -> "ApiResources":
+        """Ready-made resources around an existing store and compiled graph
+        (benchmarks and in-process clients, which don't run the lifespan)"""
+        resources = cls(reload_seconds=0, ingest_worker=False, warmup=False)
+        resources.vector_store, resources.graph = vector_store, graph
+        resources.status = "ready"
+        return resources
+
+    async def start(self) -> None:
+        """Load everything, warm up, then start the background tasks"""
+        try:
+            with metrics.timer("api.startup.load"):
+                start = time.perf_counter()
+                await asyncio.to_thread(self._load)
+                self.load_seconds = time.perf_counter() - start
+        except Exception as e:
+            self.status, self.error = "failed", repr(e)
+            logger.exception(f"API resources failed to load: {e}")
+            return
+
+        if self.warmup:
+            await self._warm_up()
+
+        if self.reload_seconds > 0 and self.bundle is None:
+            self._reload_task = asyncio.create_task(
+                self.vector_store.follow(self.reload_seconds)
+            )
+        if self.worker is not None:
+            self.worker.start()
+
+        self.startup_seconds = time.perf_counter() - self._started
+        self.status = "ready"
+        logger.success(
+            f"API ready in {self.startup_seconds:.2f}s (index loaded in "
+            f"{self.load_seconds:.2f}s, {self.vector_store.chunk_count} chunks)"
+        )
+
+    def _load(self) -> None:
+        """Import and create the heavy objects (runs on a worker thread)"""
+        from langgraph.checkpoint.memory import InMemorySaver
+
+        from labrag.agents.graph import create_graph
+        from labrag.cassette import cassette_from_env, install_cassette
+        from labrag.config import load_config
+        from labrag.ingestion.jobs import IngestionWorker, JobQueue
+        from labrag.ingestion.loaders.bundle import KnowledgeBundle
+        from labrag.ingestion.loaders.vector_store import VectorStore
+
+        # Record or replay provider traffic when LABRAG_CASSETTE_MODE is set
+        if (cassette := cassette_from_env()) is not None:
+            install_cassette(cassette)
+
+        self.config = load_config(self.config_path)
+        if self.bundle is not None:
+            # Read in place: no deserialization, however large the index
+            bundle = KnowledgeBundle(self.bundle, verify=self.verify_bundle)
+            self.vector_store = VectorStore(bundle=bundle)
+        else:
+            self.vector_store = VectorStore()
+        # Concurrent requests (and batch items) share query-embedding calls
+        self.vector_store.enable_query_batching(max_batch_size=64, max_wait_ms=10)
+        vector_store_config = self.config.get("vector_store", {})
+        if top_documents := vector_store_config.get("route_documents"):
+            # Large corpora: pick the closest sources first, then their chunks
+            self.vector_store.enable_routing(
+                top_documents, vector_store_config.get("route_min_documents", 50)
+            )
+        if self.config.get("entity_graph", {}).get("enabled", False):
+            # Questions naming genes, populations, ... start from their chunks
+            self.vector_store.enable_entity_graph()
+        # In-memory checkpoint so each session/thread keeps its own state
+        self.graph = create_graph(self.vector_store).compile(
+            checkpointer=InMemorySaver()
+        )
+
+        self.job_queue = JobQueue()
+        if self.ingest_worker and self.bundle is None:
+            self.worker = IngestionWorker.from_config(self.job_queue, self.config)
+
+    async def _warm_up(self) -> None:
+        """Touch the index and open the provider connections
+
+        Failures are logged, not fatal: the first requests then pay the cost.
+        """
+        start = time.perf_counter()
+        try:
+            with metrics.timer("api.startup.warmup"):
+                # Embeds a query (connecting the embeddings client) and pages
+                # the index into memory
+                if self.vector_store.vector_store is not None:
+                    await self.vector_store.asearch("warmup", k=1)
+                else:
+                    await self.vector_store.embeddings.aembed_query("warmup")
+                await self._prime_chat_client()
+            self.warm = True
+        except Exception as e:
+            logger.warning(f"Warmup failed, continuing cold: {e!r}")
+        self.warmup_seconds = time.perf_counter() - start
+
+    @staticmethod
+    async def _prime_chat_client() -> None:
+        """Create the chat model and open its HTTP connection without a
+        completion (models.list costs nothing)"""
+        from labrag.providers import get_chat_model
+
+        llm = get_chat_model(WARMUP_CHAT_MODEL, temperature=0)
+        client = getattr(llm, "root_async_client", None)
+        if client is not None:
+            await client.models.list()
+
+    async def stop(self) -> None:
+        """Stop the background tasks"""
+        if self._reload_task is not None:
+            self._reload_task.cancel()
+        if self.worker is not None:
+            # Let the batch in progress commit (interrupted jobs are requeued)
+            await asyncio.to_thread(self.worker.stop, 30)
+
+    def served(self) -> None:
+        """Record the first request answered since startup"""
+        if self.first_request_seconds is None:
+            self.first_request_seconds = time.perf_counter() - self._started
+            logger.info(
+                f"First request served {self.first_request_seconds:.2f}s after startup"
+            )
+
+    def report(self) -> dict[str, Any]:
+        """Readiness details for /api/ready"""
+        index = None
+        if self.vector_store is not None:
+            graph = self.vector_store.entity_graph
+            index = {
+                "snapshot": self.vector_store.snapshot,
+                "chunks": self.vector_store.chunk_count,
+                "embedding_model": self.vector_store.embedding_model,
+                "dimensions": self.vector_store.dimensions,
+                "route_documents": self.vector_store.route_documents,
+                "entities": graph.entity_count if graph is not None else None,
+                "bundle": self.bundle,
+            }
+        return {
+            "status": self.status,
+            "error": self.error,
+            "index": index,
+            "warm": self.warm,
+            "load_seconds": self.load_seconds,
+            "warmup_seconds": self.warmup_seconds,
+            "startup_seconds": self.startup_seconds,
+            "first_request_seconds": self.first_request_seconds,
+            "uptime_seconds": round(time.perf_counter() - self._started, 3),
+            "ingest_worker": self.worker is not None,
+        }
+
+
+def get_resources(request: Request) -> ApiResources:
+    """Route dependency: the app's resources, or 503 until they are ready"""
+    resources: ApiResources | None = getattr(request.app.state, "resources", None)
+    if resources is None or resources.status != "ready":
+        status = resources.status if resources else "starting"
+        raise HTTPException(
+            status_code=503,
+            detail=f"Service {status}, see /api/ready",
+            headers={"Retry-After": "5"},
+        )
+    return resources
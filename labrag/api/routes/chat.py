@@ -1,49 +1,192 @@
 """Chat API routes."""
 
-from fastapi import APIRouter
-from langchain_core.messages import HumanMessage
-from langgraph.checkpoint.memory import InMemorySaver
+import asyncio
+import json
+from collections.abc import AsyncIterator
+from typing import Annotated, Any, Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from loguru import logger
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
-from labrag.agents.graph import create_graph
-from labrag.agents.state import SessionState
-from labrag.ingestion.loaders.vector_store import VectorStore
+from labrag.agents.deadline import (
+    DeadlineExceededError,
+    get_remaining_time,
+    make_deadline,
+)
+from labrag.api.resources import ApiResources, get_resources
+from labrag.metrics import timed
 
 router = APIRouter()
 
-# Initialize the vector store, memory checkpointer, and LangGraph graph once on startup
-vector_store = VectorStore()
-# In-memory checkpoint so each session/thread keeps its own state automatically
-memory = InMemorySaver()
+# How often to check whether the client is still waiting for the answer
+DISCONNECT_POLL_INTERVAL = 0.5
+
+# Non-standard status used by nginx for "client closed request"
+CLIENT_CLOSED_REQUEST = 499
+
+# Upper bound on graph runs in flight for a single batch request
+MAX_BATCH_CONCURRENCY = 16
+
 
-graph = create_graph(vector_store).compile(checkpointer=memory)
+# "auto" picks the answer tier per question (see labrag.agents.tiers)
+TierMode = Literal["auto", "fast", "full"]
+TIER_DESCRIPTION = (
+    "Answer tier: fast (smaller model, fewer documents, answer and references), "
+    "full, or auto (picked per question); defaults to the server's setting"
+)
 
 
 class ChatRequest(BaseModel):
     message: str
     session_id: str
+    deadline_seconds: float | None = Field(
+        default=None,
+        gt=0,
+        description="Time budget in seconds; nodes degrade or fail fast past it",
+    )
+    answer_tier: TierMode | None = Field(default=None, description=TIER_DESCRIPTION)
 
 
 class ChatResponse(BaseModel):
     response: str
     session_id: str
+    # The tier that answered (None for casual chat)
+    tier: str | None = None
+
+
+class BatchChatItem(BaseModel):
+    message: str
+    session_id: str
+
+
+class BatchChatRequest(BaseModel):
+    items: list[BatchChatItem] = Field(..., min_length=1)
+    concurrency: int = Field(default=4, ge=1, le=MAX_BATCH_CONCURRENCY)
+    deadline_seconds: float | None = Field(
+        default=None, gt=0, description="Time budget in seconds for each turn"
+    )
+    answer_tier: TierMode | None = Field(default=None, description=TIER_DESCRIPTION)
+
+
+async def _run_until_done_or_abandoned(
+    task: asyncio.Task, http_request: Request, thread_config: dict[str, Any]
+) -> dict[str, Any]:
+    """Wait for the graph task, cancelling it if the client leaves or time runs out.
+
+    Args:
+        task: The running graph invocation
+        http_request: The incoming request, polled for client disconnects
+        thread_config: The LangGraph run config holding the deadline
+
+    Returns:
+        The final graph state
+    """
+    try:
+        while not task.done():
+            remaining = get_remaining_time(thread_config)
+            if remaining is not None and remaining <= 0:
+                raise DeadlineExceededError("Request deadline exceeded")
+
+            timeout = DISCONNECT_POLL_INTERVAL
+            if remaining is not None:
+                timeout = min(timeout, remaining)
+            await asyncio.wait({task}, timeout=timeout)
+
+            if not task.done() and await http_request.is_disconnected():
+                raise HTTPException(
+                    status_code=CLIENT_CLOSED_REQUEST, detail="Client disconnected"
+                )
+    finally:
+        # Stop paying for LLM calls nobody will read
+        if not task.done():
+            logger.warning("Cancelling graph run for abandoned request")
+            task.cancel()
+            # Let the run clean up (and its errors be retrieved) before the
+            # handler returns
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                logger.warning(f"Cancelled graph run failed: {e!r}")
+
+    return task.result()
 
 
 @router.post("/", response_model=ChatResponse)
-async def chat(request: ChatRequest) -> ChatResponse:
+@timed("api.chat")
+async def chat(
+    request: ChatRequest,
+    http_request: Request,
+    resources: Annotated[ApiResources, Depends(get_resources)],
+) -> ChatResponse:
     """Chat endpoint backed by LangGraph agent."""
+    # Imported by the startup thread already, kept out of the module import
+    from langchain_core.messages import HumanMessage
+
+    from labrag.agents.state import SessionState
+
     # Prepare LangGraph state with the new human message
     logger.debug(f"Session ID: {request.session_id}")
     state = SessionState(messages=[HumanMessage(content=request.message)])
 
-    # Each unique session_id becomes the LangGraph thread_id
-    thread_config = {"configurable": {"thread_id": request.session_id}}
+    # Each unique session_id becomes the LangGraph thread_id; the deadline travels
+    # with the run config so every node can check its remaining budget
+    thread_config = {
+        "configurable": {
+            "thread_id": request.session_id,
+            "deadline": make_deadline(request.deadline_seconds),
+            "answer_tier": request.answer_tier or resources.answer_tier,
+        }
+    }
 
     # Run graph asynchronously and obtain updated state
-    response = await graph.ainvoke(state, config=thread_config)
+    task = asyncio.create_task(resources.graph.ainvoke(state, config=thread_config))
+    try:
+        response = await _run_until_done_or_abandoned(task, http_request, thread_config)
+    except DeadlineExceededError as e:
+        logger.warning(f"Session {request.session_id}: {e}")
+        raise HTTPException(status_code=504, detail=str(e)) from e
 
     # The assistant reply is the last message in the conversation history
     last_reply = response.get("messages", [])[-1].content
+    resources.served()
+
+    return ChatResponse(
+        response=last_reply,
+        session_id=request.session_id,
+        tier=response.get("tier") if response.get("intent") == "research" else None,
+    )
+
+
+@router.post("/batch")
+async def chat_batch(
+    request: BatchChatRequest,
+    resources: Annotated[ApiResources, Depends(get_resources)],
+) -> StreamingResponse:
+    """Run many chat turns and stream NDJSON results as they complete.
+
+    Each line is a JSON object with the item's input `index`, `session_id`,
+    `elapsed_seconds` and either `response` (with the answer `tier`) or
+    `error`.
+    """
+    from labrag.agents.batch import run_batch
+
+    logger.info(
+        f"Batch chat: {len(request.items)} items, concurrency {request.concurrency}"
+    )
+    items = [(item.session_id, item.message) for item in request.items]
+
+    async def stream_results() -> AsyncIterator[str]:
+        async for result in run_batch(
+            resources.graph,
+            items,
+            request.concurrency,
+            request.deadline_seconds,
+            request.answer_tier or resources.answer_tier,
+        ):
+            yield json.dumps(result) + "\n"
 
-    return ChatResponse(response=last_reply, session_id=request.session_id)
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
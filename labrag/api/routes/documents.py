@@ -0,0 +1,122 @@
+"""Document upload and ingestion job routes."""
+
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Annotated
+from urllib.parse import urlparse
+
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, UploadFile
+from fastapi.concurrency import run_in_threadpool
+
+from labrag.api.resources import ApiResources, get_resources
+from labrag.ingestion.jobs import Job
+from labrag.ingestion.sync import append_url
+
+router = APIRouter()
+
+Resources = Annotated[ApiResources, Depends(get_resources)]
+
+
+def _safe_filename(filename: str) -> str:
+    """The base name of an uploaded file, without path or unusual characters"""
+    name = re.sub(r"[^\w.\- ]", "_", Path(filename).name).strip(" .")
+    if not name.lower().endswith(".pdf"):
+        raise HTTPException(status_code=400, detail="Only PDF files are accepted")
+    return name
+
+
+async def _read_upload(file: UploadFile, max_mb: float) -> bytes:
+    """The uploaded content, rejecting files over the size limit"""
+    data = bytearray()
+    while block := await file.read(1 << 20):
+        data += block
+        if len(data) > max_mb * 2**20:
+            raise HTTPException(status_code=413, detail=f"File exceeds {max_mb} MB")
+    if not data.startswith(b"%PDF"):
+        raise HTTPException(status_code=400, detail="File is not a PDF")
+    return bytes(data)
+
+
+def _write_pdf(papers_dir: str, name: str, data: bytes) -> str:
+    """Save a PDF into papers_dir atomically (watchers never see half a file)
+
+    Raises:
+        FileExistsError: papers_dir already has a file with that name
+    """
+    os.makedirs(papers_dir, exist_ok=True)
+    path = os.path.join(papers_dir, name)
+    fd, tmp = tempfile.mkstemp(dir=papers_dir, suffix=".upload")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        # Unlike a rename, a hard link never replaces an existing file
+        os.link(tmp, path)
+    finally:
+        os.unlink(tmp)
+    return path
+
+
+@router.post("/documents", response_model=Job, status_code=202)
+async def upload_document(
+    resources: Resources,
+    file: Annotated[UploadFile | None, File(description="A PDF to ingest")] = None,
+    url: Annotated[str | None, Form(description="A web page to ingest")] = None,
+) -> Job:
+    """Add a PDF or URL to the knowledge base in the background
+
+    The source is saved with the others (papers_dir or urls_file) and queued;
+    poll GET /api/jobs/{job_id} for progress.
+    """
+    if (file is None) == (url is None):
+        raise HTTPException(status_code=400, detail="Send either a file or a url")
+    if resources.vector_store.read_only:
+        raise HTTPException(
+            status_code=409, detail="The index is served from a read-only bundle"
+        )
+
+    data_sources = resources.config.get("data_sources", {})
+    job_queue = resources.job_queue
+    if file is not None:
+        name = _safe_filename(file.filename or "")
+        max_mb = resources.config.get("ingestion", {}).get("upload_max_mb", 50)
+        data = await _read_upload(file, max_mb)
+        papers_dir = data_sources.get("papers_dir", "data/raw/papers")
+        try:
+            path = await run_in_threadpool(_write_pdf, papers_dir, name, data)
+        except FileExistsError as e:
+            raise HTTPException(
+                status_code=409,
+                detail=f"{name} already exists; rename the file to upload it",
+            ) from e
+        job = await run_in_threadpool(job_queue.enqueue, "pdf", path)
+    else:
+        url = url.strip()
+        parsed = urlparse(url)
+        if parsed.scheme not in ("http", "https") or not parsed.netloc:
+            raise HTTPException(status_code=400, detail="Invalid http(s) URL")
+        urls_file = data_sources.get("urls_file", "data/raw/urls.txt")
+        await run_in_threadpool(append_url, urls_file, url)
+        job = await run_in_threadpool(job_queue.enqueue, "url", url)
+
+    if resources.worker is not None:
+        resources.worker.notify()
+    return job
+
+
+@router.get("/jobs", response_model=list[Job])
+async def list_jobs(
+    resources: Resources, limit: Annotated[int, Query(ge=1, le=200)] = 20
+) -> list[Job]:
+    """The most recent ingestion jobs, newest first"""
+    return await run_in_threadpool(resources.job_queue.recent, limit)
+
+
+@router.get("/jobs/{job_id}", response_model=Job)
+async def get_job(job_id: str, resources: Resources) -> Job:
+    """Status, current stage and per-stage timings of an ingestion job"""
+    job = await run_in_threadpool(resources.job_queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
@@ -1,11 +1,29 @@
 """Health check routes for the LabRAG API."""
 
-from fastapi import APIRouter
+from typing import Any
+
+from fastapi import APIRouter, Request, Response
 
 router = APIRouter()
 
 
 @router.get("/health")
 async def health_check() -> dict:
-    """Basic health check."""
+    """Liveness check: the server is up (it may still be loading)."""
     return {"status": "healthy"}
+
+
+@router.get("/ready")
+async def readiness_check(request: Request, response: Response) -> dict[str, Any]:
+    """Readiness check: 200 once the index is loaded and warmed up, 503 before.
+
+    Reports the index size, load and warmup times, and the time from startup
+    to the first answered chat request.
+    """
+    resources = getattr(request.app.state, "resources", None)
+    if resources is None:
+        response.status_code = 503
+        return {"status": "starting"}
+    if resources.status != "ready":
+        response.status_code = 503
+    return resources.report()
@@ -0,0 +1,169 @@
+"""Document routing vs. flat search on synthetic corpora.
+
+Chunk vectors are generated with topical structure: sources belong to fields,
+each source has a topic around its field, and its chunks scatter around the
+topic. Queries are drawn like chunks of a random source. For each corpus size,
+flat search (every chunk) and routed search (the chunks of the closest
+`top_documents` sources) are timed on the same queries, and routed results
+are scored against the exact flat top-k (recall@k).
+"""
+
+import math
+import tempfile
+import time
+from typing import Any
+
+import numpy as np
+from langchain_core.documents import Document
+from loguru import logger
+from pydantic import BaseModel
+
+from labrag.benchmarks.stubs import HashEmbeddings
+from labrag.ingestion.loaders.vector_store import VectorStore
+from labrag.metrics import percentile
+
+
+class RoutingBenchmarkConfig(BaseModel):
+    """Knobs for a routing benchmark run"""
+
+    document_counts: list[int] = [50, 200, 1000]
+    top_documents: list[int] = [5, 10, 20]
+    chunks_per_document: int = 40
+    dims: int = 384
+    queries: int = 200
+    k: int = 30
+    fields: int = 20
+    # Spread of topics around their field and of chunks around their topic
+    topic_spread: float = 0.8
+    chunk_spread: float = 1.2
+    seed: int = 0
+
+
+def _unit(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.linalg.norm(vectors, axis=-1, keepdims=True)
+
+
+def synthetic_corpus(
+    config: RoutingBenchmarkConfig, documents: int, rng: np.random.Generator
+) -> tuple[np.ndarray, np.ndarray]:
+    """Topic vectors per source and chunk vectors (sources in order)
+
+    Returns:
+        tuple: (documents x dims) topics and (chunks x dims) chunk vectors
+    """
+    dims = config.dims
+    fields = _unit(rng.standard_normal((config.fields, dims)))
+    noise = rng.standard_normal((documents, dims)) / math.sqrt(dims)
+    topics = _unit(
+        fields[rng.integers(config.fields, size=documents)]
+        + config.topic_spread * noise
+    )
+    chunk_noise = rng.standard_normal(
+        (documents, config.chunks_per_document, dims)
+    ) / math.sqrt(dims)
+    chunks = _unit(topics[:, None, :] + config.chunk_spread * chunk_noise)
+    return topics, chunks.reshape(-1, dims).astype(np.float32)
+
+
+def _store(
+    config: RoutingBenchmarkConfig, chunks: np.ndarray, workdir: str
+) -> VectorStore:
+    """An in-memory store over the synthetic chunk vectors"""
+    store = VectorStore(workdir, embeddings=HashEmbeddings(dims=config.dims))
+    documents = [
+        Document(
+            id=f"{i}-doc-{i // config.chunks_per_document}",
+            page_content=f"chunk {i}",
+            metadata={"source": f"doc-{i // config.chunks_per_document}"},
+        )
+        for i in range(len(chunks))
+    ]
+    store.add_embedded_documents(documents, chunks.tolist(), persist=False)
+    return store
+
+
+def _latency(values: list[float]) -> dict[str, float]:
+    return {
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "mean_ms": round(sum(values) / len(values) * 1000, 3),
+    }
+
+
+async def _bench_corpus(
+    config: RoutingBenchmarkConfig, documents: int, rng: np.random.Generator
+) -> list[dict[str, Any]]:
+    """Flat vs. routed search at one corpus size"""
+    topics, chunks = synthetic_corpus(config, documents, rng)
+    origins = rng.integers(documents, size=config.queries)
+    query_noise = rng.standard_normal((config.queries, config.dims))
+    queries = _unit(
+        topics[origins] + config.chunk_spread * query_noise / math.sqrt(config.dims)
+    ).tolist()
+
+    with tempfile.TemporaryDirectory(prefix="labrag-routing-") as workdir:
+        store = _store(config, chunks, workdir)
+
+        flat_seconds, exact = [], []
+        for query in queries:
+            start = time.perf_counter()
+            docs = await store.asearch_by_vector(query, k=config.k)
+            flat_seconds.append(time.perf_counter() - start)
+            exact.append({doc.id for doc in docs})
+
+        flat = {
+            "documents": documents,
+            "chunks": len(chunks),
+            "mode": "flat",
+            "top_documents": None,
+            "recall_at_k": 1.0,
+            "latency": _latency(flat_seconds),
+        }
+        results = [flat]
+
+        store.enable_routing(min_documents=0)
+        build_seconds = store.router.build_seconds
+        for top_documents in config.top_documents:
+            if top_documents >= documents:
+                continue
+            store.route_documents = top_documents
+            routed_seconds, recalls = [], []
+            for query, expected in zip(queries, exact, strict=True):
+                start = time.perf_counter()
+                docs = await store.asearch_by_vector(query, k=config.k)
+                routed_seconds.append(time.perf_counter() - start)
+                recalls.append(len(expected & {doc.id for doc in docs}) / config.k)
+
+            latency = _latency(routed_seconds)
+            results.append(
+                {
+                    "documents": documents,
+                    "chunks": len(chunks),
+                    "mode": "routed",
+                    "top_documents": top_documents,
+                    "recall_at_k": round(sum(recalls) / len(recalls), 4),
+                    "latency": latency,
+                    "speedup_p50": round(
+                        flat["latency"]["p50_ms"] / max(latency["p50_ms"], 1e-6), 2
+                    ),
+                    "router_build_seconds": round(build_seconds, 4),
+                }
+            )
+    return results
+
+
+async def run_routing_benchmark(config: RoutingBenchmarkConfig) -> dict[str, Any]:
+    """Compare flat and routed search as the corpus grows
+
+    Returns:
+        dict: The config and one result per (corpus size, mode, top_documents)
+    """
+    rng = np.random.default_rng(config.seed)
+    results = []
+    for documents in config.document_counts:
+        logger.info(
+            f"Routing benchmark: {documents} sources x "
+            f"{config.chunks_per_document} chunks"
+        )
+        results += await _bench_corpus(config, documents, rng)
+    return {"config": config.model_dump(), "results": results}
@@ -0,0 +1,215 @@
+"""Burst benchmark of the Slack integration against a local fake Slack.
+
+A fake Slack Web API (served on a local port, since the Slack client speaks
+real HTTP) records placeholder posts and updates, and a fake LabRAG API answers
+chat requests after a fixed latency. A burst of signed events, including
+redeliveries of some of them, is sent to the Slack service, measuring how fast
+events are acknowledged and answered and that redeliveries are dropped.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import json
+import socket
+import time
+from typing import Any
+from urllib.parse import parse_qsl
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+from pydantic import BaseModel
+from slack_bolt.adapter.starlette.async_handler import AsyncSlackRequestHandler
+from slack_sdk.web.async_client import AsyncWebClient
+
+from labrag.integrations.slack.app import (
+    SlackResponder,
+    create_app,
+    create_service,
+)
+from labrag.metrics import metrics, percentile
+
+SIGNING_SECRET = "bench-signing-secret"
+BOT_TOKEN = "xoxb-bench"
+
+
+class SlackBurstConfig(BaseModel):
+    """Knobs for a Slack burst run"""
+
+    events: int = 200
+    duplicate_fraction: float = 0.2
+    chat_latency: float = 1.0
+    concurrency: int = 16
+    timeout: float = 300.0
+
+
+class FakeSlack:
+    """Slack Web API methods used by the integration, recorded in memory"""
+
+    def __init__(self) -> None:
+        self.posts: dict[str, dict[str, Any]] = {}
+        self.updates: dict[str, dict[str, Any]] = {}
+        self.app = FastAPI()
+        self.app.post("/api/{method}")(self.handle)
+        self._ts = 0
+
+    async def handle(self, method: str, request: Request) -> dict[str, Any]:
+        body = await request.body()
+        if request.headers.get("content-type", "").startswith("application/json"):
+            params = json.loads(body or b"{}")
+        else:
+            params = dict(parse_qsl(body.decode()))
+
+        if method == "auth.test":
+            return {"ok": True, "user_id": "UBOT", "bot_id": "BBOT", "team_id": "T1"}
+        if method == "chat.postMessage":
+            self._ts += 1
+            ts = f"1700000000.{self._ts:06d}"
+            self.posts[ts] = params
+            return {"ok": True, "channel": params.get("channel"), "ts": ts}
+        if method == "chat.update":
+            self.updates[params["ts"]] = params
+            return {"ok": True, "channel": params.get("channel"), "ts": params["ts"]}
+        return {"ok": False, "error": "unknown_method"}
+
+
+def _fake_api(latency: float) -> tuple[FastAPI, list[str]]:
+    """A LabRAG API stand-in answering every chat request after `latency`"""
+    app = FastAPI()
+    calls: list[str] = []
+
+    @app.post("/api/chat/")
+    async def chat(request: Request) -> dict[str, str]:
+        payload = await request.json()
+        calls.append(payload["session_id"])
+        await asyncio.sleep(latency)
+        return {"response": "Answer", "session_id": payload["session_id"]}
+
+    return app, calls
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _signed_event(index: int, retry: bool = False) -> tuple[bytes, dict[str, str]]:
+    """A signed app_mention delivery, as Slack would send it"""
+    body = json.dumps(
+        {
+            "type": "event_callback",
+            "team_id": "T1",
+            "api_app_id": "A1",
+            "event_id": f"Ev{index:06d}",
+            "event_time": int(time.time()),
+            "event": {
+                "type": "app_mention",
+                "channel": f"C{index % 8}",
+                "user": "U1",
+                "text": f"<@UBOT> Question {index}?",
+                "ts": f"1690000000.{index:06d}",
+            },
+        }
+    ).encode()
+    timestamp = str(int(time.time()))
+    signature = hmac.new(
+        SIGNING_SECRET.encode(), f"v0:{timestamp}:".encode() + body, hashlib.sha256
+    ).hexdigest()
+    headers = {
+        "content-type": "application/json",
+        "x-slack-request-timestamp": timestamp,
+        "x-slack-signature": f"v0={signature}",
+    }
+    if retry:
+        headers.update({"x-slack-retry-num": "1", "x-slack-retry-reason": "timeout"})
+    return body, headers
+
+
+def _summary(values: list[float]) -> dict[str, float]:
+    return {
+        "p50": round(percentile(values, 50), 4),
+        "p95": round(percentile(values, 95), 4),
+        "max": round(max(values), 4),
+    }
+
+
+async def run_slack_burst(config: SlackBurstConfig) -> dict[str, Any]:
+    """Send a burst of events and measure acknowledgements and answers
+
+    Returns:
+        dict: Counts, acknowledgement and answer latency percentiles, and the
+            burst throughput (answered events per second)
+    """
+    fake_slack = FakeSlack()
+    port = _free_port()
+    server = uvicorn.Server(
+        uvicorn.Config(fake_slack.app, port=port, log_level="warning")
+    )
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    api_app, api_calls = _fake_api(config.chat_latency)
+    responder = SlackResponder(
+        concurrency=config.concurrency,
+        http_client=httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=api_app), base_url="http://api"
+        ),
+    )
+    slack_app = create_app(
+        responder,
+        signing_secret=SIGNING_SECRET,
+        client=AsyncWebClient(BOT_TOKEN, base_url=f"http://127.0.0.1:{port}/api/"),
+    )
+    service = create_service(AsyncSlackRequestHandler(slack_app), responder)
+
+    n_duplicates = int(config.events * config.duplicate_fraction)
+    deliveries = [(i, False) for i in range(config.events)]
+    deliveries += [(i, True) for i in range(n_duplicates)]
+    ack_seconds: list[float] = []
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=service), base_url="http://slack"
+    ) as client:
+
+        async def deliver(index: int, retry: bool) -> None:
+            body, headers = _signed_event(index, retry)
+            start = time.perf_counter()
+            response = await client.post("/slack/events", content=body, headers=headers)
+            ack_seconds.append(time.perf_counter() - start)
+            response.raise_for_status()
+
+        metrics.reset()
+        start = time.perf_counter()
+        await asyncio.gather(*(deliver(i, retry) for i, retry in deliveries))
+        acked = time.perf_counter() - start
+
+        while len(fake_slack.updates) < config.events:
+            if time.perf_counter() - start > config.timeout:
+                break
+            await asyncio.sleep(0.01)
+        elapsed = time.perf_counter() - start
+
+    await responder.aclose()
+    server.should_exit = True
+    await server_task
+
+    stages = metrics.latency_summary()
+    return {
+        "events": config.events,
+        "redeliveries": n_duplicates,
+        "chat_latency": config.chat_latency,
+        "concurrency": config.concurrency,
+        "chat_requests": len(api_calls),
+        "placeholders": len(fake_slack.posts),
+        "answered": len(fake_slack.updates),
+        "duplicates_dropped": int(metrics.counters().get("slack.duplicate_events", 0)),
+        "all_acked_seconds": round(acked, 4),
+        "ack_seconds": _summary(ack_seconds),
+        "placeholder_seconds": stages.get("slack.placeholder"),
+        "answer_seconds": stages.get("slack.answer"),
+        "elapsed_seconds": round(elapsed, 4),
+        "throughput_per_second": round(len(fake_slack.updates) / elapsed, 2),
+    }
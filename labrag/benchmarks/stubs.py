@@ -0,0 +1,282 @@
+"""Deterministic local stand-ins for OpenAI, LandingAI and Firecrawl.
+
+The stubs keep the same interfaces as the real providers, so the graph, the
+vector store and the knowledge base builder run unchanged, offline and for free.
+"""
+
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.output_parsers import JsonOutputParser
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import Runnable, RunnableLambda
+
+from labrag.ingestion.parsers.models import PDFParseResult, URLParseResult
+from labrag.providers import set_chat_model_factory, set_embeddings_factory
+
+# Small vocabulary so generated text looks like (very dull) research prose
+_WORDS = [
+    *("gene", "population", "adaptation", "selection", "variant", "immune"),
+    *("response", "amazon", "ancestry", "genome", "chagas", "infection"),
+    *("signal", "haplotype", "frequency", "cohort", "analysis", "method"),
+    *("sample", "evidence", "region", "pathway", "expression"),
+]
+
+
+def _seed(text: str) -> int:
+    """Stable 64-bit seed derived from text"""
+    return int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], "little")
+
+
+def fake_text(seed_text: str, n_words: int) -> str:
+    """Generate deterministic pseudo-prose with roughly `n_words` tokens"""
+    rng = np.random.default_rng(_seed(seed_text))
+    return " ".join(_WORDS[i] for i in rng.integers(0, len(_WORDS), n_words))
+
+
+class HashEmbeddings(Embeddings):
+    """Unit vectors seeded by a hash of the text (same text, same vector)"""
+
+    # Queries are embedded like documents (see embeds_queries_as_documents)
+    symmetric_queries = True
+
+    def __init__(self, dims: int = 1536, latency_seconds: float = 0.0) -> None:
+        """Initialize the fake embeddings
+
+        Args:
+            dims: The embedding dimension
+            latency_seconds: Simulated latency per provider call
+        """
+        self.dims = dims
+        self.latency_seconds = latency_seconds
+
+    def _embed(self, text: str) -> list[float]:
+        vector = np.random.default_rng(_seed(text)).standard_normal(self.dims)
+        return (vector / np.linalg.norm(vector)).astype(np.float32).tolist()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        time.sleep(self.latency_seconds)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        await asyncio.sleep(self.latency_seconds)
+        return [self._embed(text) for text in texts]
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return (await self.aembed_documents([text]))[0]
+
+
+class PromptPrefixCache:
+    """Provider-side prompt caching as OpenAI does it: the longest prefix seen
+    before, of at least 1024 tokens and in 128-token steps, is cached (tokens
+    counted as 4 characters, like the stub's usage)"""
+
+    MIN_TOKENS = 1024
+    STEP_TOKENS = 128
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._seen: set[bytes] = set()
+
+    def lookup(self, prompt: str) -> int:
+        """Cached tokens of a prompt, which is then cached in turn"""
+        step = self.STEP_TOKENS * 4
+        digest, digests = hashlib.sha1(), []
+        for end in range(step, len(prompt) + 1, step):
+            digest.update(prompt[end - step : end].encode())
+            if end >= self.MIN_TOKENS * 4:
+                digests.append((end, digest.copy().digest()))
+
+        with self._lock:
+            cached = max((end for end, d in digests if d in self._seen), default=0)
+            self._seen.update(d for _, d in digests)
+        return cached // 4
+
+    def clear(self) -> None:
+        with self._lock:
+            self._seen.clear()
+
+
+_prompt_cache = PromptPrefixCache()
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model with configurable latency and output size.
+
+    Recognizes the LabRAG prompts and answers in the expected format: an intent
+    JSON for the classifier, a synthesis JSON for research turns, no entities
+    for entity extraction and plain text otherwise.
+    """
+
+    model_name: str = "fake"
+    latency_seconds: float = 0.0
+    output_tokens: int = 50
+    intent: str = "research"
+
+    @property
+    def _llm_type(self) -> str:
+        return "labrag-fake-chat"
+
+    def _respond(self, messages: list[BaseMessage]) -> AIMessage:
+        prompt = "\n".join(str(m.content) for m in messages)
+        answer = fake_text(prompt, self.output_tokens)
+
+        if '"intent"' in prompt:
+            content = json.dumps({"intent": self.intent})
+        elif '"chunks"' in prompt:
+            content = json.dumps({"chunks": {}})
+        elif "main_answer" in prompt:
+            content = json.dumps(
+                {"main_answer": answer, "references": [], "document_analysis": []}
+            )
+        else:
+            content = answer
+
+        return AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": len(prompt) // 4,
+                "output_tokens": self.output_tokens,
+                "total_tokens": len(prompt) // 4 + self.output_tokens,
+                "input_token_details": {"cache_read": _prompt_cache.lookup(prompt)},
+            },
+        )
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: Any = None,  # noqa: ANN401
+        **kwargs: Any,  # noqa: ANN401
+    ) -> ChatResult:
+        time.sleep(self.latency_seconds)
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: Any = None,  # noqa: ANN401
+        **kwargs: Any,  # noqa: ANN401
+    ) -> ChatResult:
+        await asyncio.sleep(self.latency_seconds)
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
+
+    def with_structured_output(
+        self,
+        schema: Any = None,  # noqa: ANN401
+        **kwargs: Any,  # noqa: ANN401
+    ) -> Runnable:
+        """Only JSON mode is supported: parse the generated JSON"""
+        if kwargs.get("include_raw"):
+            return self | RunnableLambda(
+                lambda message: {
+                    "raw": message,
+                    "parsed": JsonOutputParser().invoke(message),
+                    "parsing_error": None,
+                }
+            )
+        return self | JsonOutputParser()
+
+
+class FakePDFParser:
+    """Stand-in for PDFParser producing deterministic page-tagged chunks"""
+
+    def __init__(
+        self,
+        chunks_per_document: int = 20,
+        words_per_chunk: int = 150,
+        latency_seconds: float = 0.0,
+    ) -> None:
+        self.chunks_per_document = chunks_per_document
+        self.words_per_chunk = words_per_chunk
+        self.latency_seconds = latency_seconds
+
+    def parse(self, pdf_path: str | Path) -> PDFParseResult:
+        time.sleep(self.latency_seconds)
+        name = Path(pdf_path).name
+        chunks = [
+            {
+                "content": fake_text(f"{name}-{i}", self.words_per_chunk),
+                "page": i // 4 + 1,
+            }
+            for i in range(self.chunks_per_document)
+        ]
+        metadata = {
+            "source": name,
+            "source_type": "pdf",
+            "total_chunks": len(chunks),
+            "parsing_method": "fake",
+        }
+        return PDFParseResult(
+            content="\n\n".join(c["content"] for c in chunks),
+            metadata=metadata,
+            chunks=chunks,
+        )
+
+
+class FakeURLParser:
+    """Stand-in for URLParser returning a deterministic article"""
+
+    def __init__(self, words: int = 3000, latency_seconds: float = 0.0) -> None:
+        self.words = words
+        self.latency_seconds = latency_seconds
+
+    async def parse(self, url: str, clean_article: bool = True) -> URLParseResult:
+        await asyncio.sleep(self.latency_seconds)
+        content = fake_text(url, self.words)
+        metadata = {
+            "source": url,
+            "source_type": "url",
+            "title": url.rsplit("/", 1)[-1],
+            "parsing_method": "fake",
+        }
+        return URLParseResult(content=content, raw_content=content, metadata=metadata)
+
+
+@contextmanager
+def stubbed_providers(
+    chat_latency: float = 0.0,
+    output_tokens: int = 50,
+    embedding_dims: int = 1536,
+    embedding_latency: float = 0.0,
+    intent: str = "research",
+) -> Iterator[None]:
+    """Route every chat model and embedding request to the local stubs"""
+
+    def chat_factory(model: str, **kwargs: Any) -> BaseChatModel:  # noqa: ANN401
+        return FakeChatModel(
+            model_name=model,
+            latency_seconds=chat_latency,
+            output_tokens=output_tokens,
+            intent=intent,
+        )
+
+    def embeddings_factory(model: str, **kwargs: Any) -> Embeddings:  # noqa: ANN401
+        return HashEmbeddings(
+            dims=kwargs.get("dimensions") or embedding_dims,
+            latency_seconds=embedding_latency,
+        )
+
+    _prompt_cache.clear()
+    previous_chat = set_chat_model_factory(chat_factory)
+    previous_embeddings = set_embeddings_factory(embeddings_factory)
+    try:
+        yield
+    finally:
+        set_chat_model_factory(previous_chat)
+        set_embeddings_factory(previous_embeddings)
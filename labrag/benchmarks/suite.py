@@ -0,0 +1,234 @@
+"""Offline end-to-end latency benchmarks.
+
+Drives the knowledge base builder, the vector store, the compiled graph and the
+FastAPI app against the local stubs at several corpus sizes and concurrency
+levels, and reports per-stage latency percentiles and throughput.
+"""
+
+import asyncio
+import platform
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+import httpx
+import yaml
+from langgraph.checkpoint.memory import InMemorySaver
+from loguru import logger
+from pydantic import BaseModel
+
+from labrag.agents.batch import run_batch
+from labrag.agents.graph import create_graph
+from labrag.agents.prompts import cached_token_ratios
+from labrag.benchmarks.stubs import (
+    FakePDFParser,
+    FakeURLParser,
+    fake_text,
+    stubbed_providers,
+)
+from labrag.ingestion.artifacts import ArtifactStore
+from labrag.ingestion.knowledge_base import KnowledgeBaseBuilder
+from labrag.ingestion.loaders.vector_store import VectorStore
+from labrag.ingestion.parsers.cache import DocumentCache
+from labrag.metrics import metrics
+
+
+class BenchmarkConfig(BaseModel):
+    """Knobs for a benchmark run"""
+
+    corpus_sizes: list[int] = [10, 50]
+    concurrency_levels: list[int] = [1, 4, 16]
+    queries: int = 32
+    chunks_per_document: int = 20
+    url_fraction: float = 0.25
+    parse_latency: float = 0.0
+    chat_latency: float = 0.05
+    output_tokens: int = 200
+    embedding_dims: int = 1536
+    embedding_latency: float = 0.01
+
+
+def _result(
+    scenario: str,
+    corpus_size: int,
+    requests: int,
+    elapsed: float,
+    concurrency: int | None = None,
+) -> dict[str, Any]:
+    """Package the current metrics snapshot as one benchmark result"""
+    return {
+        "scenario": scenario,
+        "corpus_size": corpus_size,
+        "concurrency": concurrency,
+        "requests": requests,
+        "elapsed_seconds": round(elapsed, 4),
+        "throughput_per_second": round(requests / elapsed, 2) if elapsed else None,
+        "stages": metrics.latency_summary(),
+        "counters": metrics.counters(),
+        "cached_token_ratios": cached_token_ratios(),
+    }
+
+
+def _questions(n: int) -> list[str]:
+    return [
+        f"What does the evidence say about {fake_text(str(i), 6)}?" for i in range(n)
+    ]
+
+
+async def _bench_ingestion(
+    config: BenchmarkConfig, corpus_size: int, workdir: Path
+) -> tuple[dict[str, Any], VectorStore]:
+    """Build a fresh knowledge base of `corpus_size` documents"""
+    n_urls = int(corpus_size * config.url_fraction)
+    papers_dir = workdir / "papers"
+    papers_dir.mkdir()
+    for i in range(corpus_size - n_urls):
+        # Distinct content: parse artifacts are keyed by the file's hash
+        (papers_dir / f"paper-{i}.pdf").write_bytes(f"paper {i}".encode())
+
+    config_path = workdir / "config.yml"
+    config_path.write_text(
+        yaml.safe_dump(
+            {
+                "data_sources": {
+                    "papers_dir": str(papers_dir),
+                    "media_urls": [
+                        f"https://example.org/news/{i}" for i in range(n_urls)
+                    ],
+                }
+            }
+        )
+    )
+
+    builder = KnowledgeBaseBuilder(
+        config={"vector_store": {"store_path": str(workdir / "vector_store")}},
+        pdf_parser=FakePDFParser(
+            config.chunks_per_document, latency_seconds=config.parse_latency
+        ),
+        url_parser=FakeURLParser(latency_seconds=config.parse_latency),
+        cache=DocumentCache(workdir / "cache.db"),
+        # Never reuse parses from another run (or the working directory)
+        artifacts=ArtifactStore(workdir / "artifacts"),
+    )
+
+    metrics.reset()
+    start = time.perf_counter()
+    await builder.build_from_config(str(config_path))
+    elapsed = time.perf_counter() - start
+
+    return _result("ingestion", corpus_size, corpus_size, elapsed), builder.vector_store
+
+
+async def _bench_search(
+    config: BenchmarkConfig, corpus_size: int, vector_store: VectorStore
+) -> dict[str, Any]:
+    """Sequential vector searches against the built index"""
+    metrics.reset()
+    start = time.perf_counter()
+    for question in _questions(config.queries):
+        await vector_store.asearch(question, k=30)
+    elapsed = time.perf_counter() - start
+    return _result("search", corpus_size, config.queries, elapsed, concurrency=1)
+
+
+async def _bench_graph(
+    config: BenchmarkConfig,
+    corpus_size: int,
+    vector_store: VectorStore,
+    concurrency: int,
+) -> dict[str, Any]:
+    """Research turns through the compiled graph"""
+    graph = create_graph(vector_store).compile(checkpointer=InMemorySaver())
+    items = [(f"bench-{i}", q) for i, q in enumerate(_questions(config.queries))]
+
+    metrics.reset()
+    start = time.perf_counter()
+    async for result in run_batch(graph, items, concurrency):
+        if "error" in result:
+            logger.warning(f"Benchmark turn failed: {result['error']}")
+    elapsed = time.perf_counter() - start
+    return _result("graph", corpus_size, len(items), elapsed, concurrency)
+
+
+async def _bench_api(
+    config: BenchmarkConfig,
+    corpus_size: int,
+    vector_store: VectorStore,
+    concurrency: int,
+) -> dict[str, Any]:
+    """Research turns through the FastAPI app (in-process ASGI transport)"""
+    from labrag.api.main import app
+    from labrag.api.resources import ApiResources
+
+    vector_store.enable_query_batching()
+    graph = create_graph(vector_store).compile(checkpointer=InMemorySaver())
+    app.state.resources = ApiResources.from_components(vector_store, graph)
+
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as c:
+
+        async def send(i: int, question: str) -> None:
+            async with semaphore:
+                payload = {"message": question, "session_id": f"bench-api-{i}"}
+                response = await c.post("/api/chat/", json=payload, timeout=None)
+                response.raise_for_status()
+
+        metrics.reset()
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(send(i, q) for i, q in enumerate(_questions(config.queries)))
+        )
+        elapsed = time.perf_counter() - start
+
+    vector_store.query_batcher = None
+    return _result("api", corpus_size, config.queries, elapsed, concurrency)
+
+
+async def run_benchmarks(config: BenchmarkConfig) -> dict[str, Any]:
+    """Run every scenario and return machine-readable results
+
+    Args:
+        config: The benchmark configuration
+
+    Returns:
+        dict: Run metadata and one result per (scenario, corpus size, concurrency)
+    """
+    results = []
+    with stubbed_providers(
+        chat_latency=config.chat_latency,
+        output_tokens=config.output_tokens,
+        embedding_dims=config.embedding_dims,
+        embedding_latency=config.embedding_latency,
+    ):
+        for corpus_size in config.corpus_sizes:
+            with tempfile.TemporaryDirectory(prefix="labrag-bench-") as tmp:
+                logger.info(f"Benchmarking corpus of {corpus_size} documents")
+                ingestion, vector_store = await _bench_ingestion(
+                    config, corpus_size, Path(tmp)
+                )
+                results.append(ingestion)
+                results.append(await _bench_search(config, corpus_size, vector_store))
+
+                for concurrency in config.concurrency_levels:
+                    results.append(
+                        await _bench_graph(
+                            config, corpus_size, vector_store, concurrency
+                        )
+                    )
+                    results.append(
+                        await _bench_api(config, corpus_size, vector_store, concurrency)
+                    )
+
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "config": config.model_dump(),
+        },
+        "results": results,
+    }
@@ -0,0 +1,276 @@
+"""Retrieval parameter sweep with a recall/latency Pareto frontier.
+
+Re-chunks cached parse results under a grid of chunking settings, embedding
+dimensions, FAISS index types and k, then scores each combination on a labelled
+question set (recall@k, MRR) and measures build time, index size and query
+latency.
+
+Eval set format (JSONL), one question per line:
+
+    {"question": "...", "relevant": [{"source": "paper.pdf", "page": 3},
+                                     {"source": "https://...", "text": "snippet"}]}
+
+A retrieved chunk matches a label when its source is equal and, if given, its
+page is equal and it contains the text snippet (case-insensitive).
+"""
+
+import json
+import math
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Literal
+
+import faiss
+import numpy as np
+from langchain_core.documents import Document
+from loguru import logger
+from pydantic import BaseModel
+
+from labrag.cassette import Cassette
+from labrag.ingestion.loaders.document_loader import DocumentLoader
+from labrag.ingestion.parsers.models import (
+    ParsedDocument,
+    PDFParseResult,
+    URLParseResult,
+)
+from labrag.metrics import percentile
+from labrag.providers import DEFAULT_EMBEDDING_MODEL, get_embeddings
+
+IndexType = Literal["flat", "hnsw", "ivf"]
+
+
+class EvalQuestion(BaseModel):
+    """A question with the chunks that should be retrieved for it"""
+
+    question: str
+    relevant: list[dict[str, Any]]
+
+
+class SweepConfig(BaseModel):
+    """The parameter grid"""
+
+    chunk_sizes: list[int] = [1000, 2500, 5000]
+    chunk_overlaps: list[int] = [0, 200]
+    pdf_chunking: list[Literal["landing_ai", "recursive"]] = ["landing_ai"]
+    embedding_model: str = DEFAULT_EMBEDDING_MODEL
+    embedding_dims: list[int] = [512, 1536]
+    index_types: list[IndexType] = ["flat", "hnsw", "ivf"]
+    ks: list[int] = [5, 10, 30]
+    query_repeats: int = 3
+
+
+def load_eval_set(path: str | Path) -> list[EvalQuestion]:
+    """Load labelled questions from a JSONL file"""
+    with open(path) as f:
+        return [EvalQuestion(**json.loads(line)) for line in f if line.strip()]
+
+
+def load_parse_results(cassette: Cassette) -> list[ParsedDocument]:
+    """Load the PDF and URL parse results recorded in a cassette"""
+    results: list[ParsedDocument] = [
+        PDFParseResult(**r) for r in cassette.iter_responses("pdf_parse")
+    ]
+    results += [URLParseResult(**r) for r in cassette.iter_responses("url_parse")]
+    return results
+
+
+def _split_pdf_by_page(
+    loader: DocumentLoader, result: PDFParseResult
+) -> list[Document]:
+    """Re-split a PDF page by page, ignoring the LandingAI chunk boundaries"""
+    pages: dict[int, list[str]] = defaultdict(list)
+    for chunk in result.chunks:
+        pages[chunk["page"]].append(chunk["content"])
+
+    documents = []
+    for page, contents in sorted(pages.items()):
+        for text in loader.text_splitter.split_text("\n\n".join(contents)):
+            metadata = {"source": result.metadata["source"], "page": page}
+            documents.append(Document(page_content=text, metadata=metadata))
+    return documents
+
+
+def chunk_corpus(
+    parse_results: list[ParsedDocument],
+    chunk_size: int,
+    chunk_overlap: int,
+    pdf_chunking: str = "landing_ai",
+) -> list[Document]:
+    """Chunk every parse result with the given settings"""
+    loader = DocumentLoader(None, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    documents = []
+    for result in parse_results:
+        if isinstance(result, URLParseResult):
+            documents += loader.build_url_documents(result)
+        elif pdf_chunking == "recursive":
+            documents += _split_pdf_by_page(loader, result)
+        else:
+            documents += loader.build_pdf_documents(result)
+    return documents
+
+
+def build_index(index_type: IndexType, vectors: np.ndarray) -> faiss.Index:
+    """Build an inner-product FAISS index over normalized vectors"""
+    dims = vectors.shape[1]
+    if index_type == "flat":
+        index = faiss.IndexFlatIP(dims)
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dims, 32, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efSearch = 64
+    elif index_type == "ivf":
+        nlist = max(1, int(math.sqrt(len(vectors))))
+        quantizer = faiss.IndexFlatIP(dims)
+        index = faiss.IndexIVFFlat(quantizer, dims, nlist, faiss.METRIC_INNER_PRODUCT)
+        index.train(vectors)
+        index.nprobe = min(8, nlist)
+    else:
+        raise ValueError(f"Unknown index type: {index_type}")
+
+    index.add(vectors)
+    return index
+
+
+def _matches(doc: Document, label: dict[str, Any]) -> bool:
+    if doc.metadata.get("source") != label.get("source"):
+        return False
+    if "page" in label and doc.metadata.get("page") != label["page"]:
+        return False
+    return "text" not in label or label["text"].lower() in doc.page_content.lower()
+
+
+def score_ranking(
+    ranked: list[Document], labels: list[dict[str, Any]], k: int
+) -> tuple[float, float]:
+    """Recall@k and reciprocal rank of the first relevant chunk within k
+
+    Returns:
+        The (recall, reciprocal rank) pair
+    """
+    top = ranked[:k]
+    found = sum(any(_matches(doc, label) for doc in top) for label in labels)
+    recall = found / len(labels) if labels else 0.0
+
+    for rank, doc in enumerate(top, start=1):
+        if any(_matches(doc, label) for label in labels):
+            return recall, 1 / rank
+    return recall, 0.0
+
+
+def pareto_frontier(
+    rows: list[dict[str, Any]],
+    maximize: tuple[str, ...] = ("recall",),
+    minimize: tuple[str, ...] = ("query_p50_ms", "context_chars"),
+) -> list[dict[str, Any]]:
+    """Keep the rows no other row beats on every objective"""
+
+    def dominates(a: dict[str, Any], b: dict[str, Any]) -> bool:
+        at_least_as_good = all(a[m] >= b[m] for m in maximize) and all(
+            a[m] <= b[m] for m in minimize
+        )
+        better = any(a[m] > b[m] for m in maximize) or any(
+            a[m] < b[m] for m in minimize
+        )
+        return at_least_as_good and better
+
+    return [r for r in rows if not any(dominates(o, r) for o in rows)]
+
+
+def _embed(texts: list[str], model: str, dims: int) -> np.ndarray:
+    embeddings = get_embeddings(model, dimensions=dims)
+    vectors = np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def run_sweep(
+    parse_results: list[ParsedDocument],
+    questions: list[EvalQuestion],
+    config: SweepConfig,
+) -> dict[str, Any]:
+    """Evaluate every grid combination
+
+    Args:
+        parse_results: The cached parse results to re-chunk
+        questions: The labelled questions
+        config: The parameter grid
+
+    Returns:
+        dict: All result rows and the Pareto frontier
+    """
+    rows = []
+    query_texts = [q.question for q in questions]
+
+    for dims in config.embedding_dims:
+        query_vectors = _embed(query_texts, config.embedding_model, dims)
+
+        for pdf_chunking in config.pdf_chunking:
+            for chunk_size in config.chunk_sizes:
+                for chunk_overlap in config.chunk_overlaps:
+                    if chunk_overlap >= chunk_size:
+                        continue
+
+                    docs = chunk_corpus(
+                        parse_results, chunk_size, chunk_overlap, pdf_chunking
+                    )
+                    start = time.perf_counter()
+                    vectors = _embed(
+                        [d.page_content for d in docs], config.embedding_model, dims
+                    )
+                    embed_seconds = time.perf_counter() - start
+
+                    for index_type in config.index_types:
+                        start = time.perf_counter()
+                        index = build_index(index_type, vectors)
+                        build_seconds = time.perf_counter() - start
+                        index_bytes = faiss.serialize_index(index).nbytes
+
+                        for k in config.ks:
+                            # Searched (and timed) at each k: what k costs is
+                            # part of the frontier
+                            latencies, rankings = [], []
+                            for vector in query_vectors:
+                                for _ in range(config.query_repeats):
+                                    start = time.perf_counter()
+                                    _, ids = index.search(vector[None, :], k)
+                                    latencies.append(time.perf_counter() - start)
+                                rankings.append([docs[i] for i in ids[0] if i >= 0])
+
+                            scores = [
+                                score_ranking(ranked, q.relevant, k)
+                                for ranked, q in zip(rankings, questions, strict=True)
+                            ]
+                            context_chars = [
+                                sum(len(d.page_content) for d in ranked[:k])
+                                for ranked in rankings
+                            ]
+                            rows.append(
+                                {
+                                    "pdf_chunking": pdf_chunking,
+                                    "chunk_size": chunk_size,
+                                    "chunk_overlap": chunk_overlap,
+                                    "embedding_dims": dims,
+                                    "index_type": index_type,
+                                    "k": k,
+                                    "n_chunks": len(docs),
+                                    "recall": float(np.mean([s[0] for s in scores])),
+                                    "mrr": float(np.mean([s[1] for s in scores])),
+                                    "context_chars": float(np.mean(context_chars)),
+                                    "query_p50_ms": percentile(latencies, 50) * 1000,
+                                    "query_p95_ms": percentile(latencies, 95) * 1000,
+                                    "build_seconds": build_seconds,
+                                    "embed_seconds": embed_seconds,
+                                    "index_bytes": index_bytes,
+                                }
+                            )
+                    logger.info(
+                        f"dims={dims} {pdf_chunking} size={chunk_size} "
+                        f"overlap={chunk_overlap}: {len(docs)} chunks evaluated"
+                    )
+
+    return {
+        "config": config.model_dump(),
+        "questions": len(questions),
+        "rows": rows,
+        "frontier": pareto_frontier(rows),
+    }
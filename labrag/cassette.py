@@ -0,0 +1,463 @@
+"""Record/replay cassettes for LLM, embedding and parser calls.
+
+In record mode every call goes to the live service and the request→response
+pair is persisted (zlib-compressed JSON in SQLite). In replay mode calls are
+served from the store, optionally sleeping for the recorded latency, so the
+system can be rebuilt, profiled and benchmarked without network or spend.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import zlib
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Literal
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.exceptions import OutputParserException
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import (
+    AIMessage,
+    BaseMessage,
+    message_to_dict,
+    messages_from_dict,
+)
+from langchain_core.output_parsers import JsonOutputParser
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import Runnable, RunnableLambda
+from loguru import logger
+from pydantic import ConfigDict, Field
+
+from labrag.ingestion.parsers.models import PDFParseResult, URLParseResult
+from labrag.ingestion.sync import file_sha256
+from labrag.providers import (
+    ChatModelFactory,
+    EmbeddingsFactory,
+    set_chat_model_factory,
+    set_embeddings_factory,
+)
+
+CassetteMode = Literal["record", "replay"]
+
+
+class CassetteMissError(KeyError):
+    """Raised in replay mode when a request was never recorded."""
+
+
+class Cassette:
+    """SQLite-backed store of request→response pairs"""
+
+    def __init__(
+        self,
+        path: str | Path = ".labrag_cache/cassette.db",
+        mode: CassetteMode = "replay",
+        simulate_latency: bool = False,
+        latency_scale: float = 1.0,
+    ) -> None:
+        """Initialize the cassette
+
+        Args:
+            path: The path to the cassette database
+            mode: "record" to call live services and store, "replay" to serve
+            simulate_latency: In replay mode, sleep for the recorded latency
+            latency_scale: Multiplier applied to simulated latencies
+        """
+        if mode not in ("record", "replay"):
+            raise ValueError("Invalid cassette mode. Use 'record' or 'replay'.")
+
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.mode = mode
+        self.simulate_latency = simulate_latency
+        self.latency_scale = latency_scale
+        self._create_table()
+
+    def _create_table(self) -> None:
+        """Create the interactions table if it doesn't exist"""
+        with sqlite3.connect(self.path) as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS interactions (
+                    key TEXT PRIMARY KEY,
+                    kind TEXT,
+                    response BLOB,
+                    latency REAL,
+                    recorded_at TEXT
+                )
+                """
+            )
+
+    @staticmethod
+    def make_key(kind: str, request: Any) -> str:  # noqa: ANN401
+        """Hash a request into a stable cassette key
+
+        Args:
+            kind: The interaction kind (e.g. "chat", "embedding", "pdf_parse")
+            request: A JSON-serializable description of the request
+
+        Returns:
+            str: The hex digest identifying the request
+        """
+        payload = json.dumps([kind, request], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, kind: str, request: Any) -> tuple[Any, float] | None:  # noqa: ANN401
+        """Look up a recorded response
+
+        Returns:
+            The (response, recorded latency) pair, or None if not recorded
+        """
+        with sqlite3.connect(self.path) as conn:
+            row = conn.execute(
+                "SELECT response, latency FROM interactions WHERE key = ?",
+                (self.make_key(kind, request),),
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(zlib.decompress(row[0])), row[1]
+
+    def put(self, kind: str, request: Any, response: Any, latency: float) -> None:  # noqa: ANN401
+        """Record a response
+
+        Args:
+            kind: The interaction kind
+            request: A JSON-serializable description of the request
+            response: The JSON-serializable response
+            latency: How long the live call took, in seconds
+        """
+        blob = zlib.compress(json.dumps(response, default=str).encode())
+        with sqlite3.connect(self.path) as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO interactions
+                (key, kind, response, latency, recorded_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (
+                    self.make_key(kind, request),
+                    kind,
+                    blob,
+                    latency,
+                    datetime.now().isoformat(),
+                ),
+            )
+
+    def iter_responses(self, kind: str) -> Iterator[Any]:
+        """Iterate over all recorded responses of a kind
+
+        Args:
+            kind: The interaction kind
+
+        Yields:
+            The recorded responses
+        """
+        with sqlite3.connect(self.path) as conn:
+            rows = conn.execute(
+                "SELECT response FROM interactions WHERE kind = ?", (kind,)
+            ).fetchall()
+        for (blob,) in rows:
+            yield json.loads(zlib.decompress(blob))
+
+    def replay(self, kind: str, request: Any) -> Any:  # noqa: ANN401
+        """Serve a recorded response, sleeping for its latency if configured
+
+        Raises:
+            CassetteMissError: If the request was never recorded
+        """
+        hit = self.get(kind, request)
+        if hit is None:
+            raise CassetteMissError(f"No recorded {kind} response for this request")
+        response, latency = hit
+        if self.simulate_latency:
+            time.sleep(latency * self.latency_scale)
+        return response
+
+    async def areplay(self, kind: str, request: Any) -> Any:  # noqa: ANN401
+        """Async variant of `replay` that does not block the event loop"""
+        hit = self.get(kind, request)
+        if hit is None:
+            raise CassetteMissError(f"No recorded {kind} response for this request")
+        response, latency = hit
+        if self.simulate_latency:
+            await asyncio.sleep(latency * self.latency_scale)
+        return response
+
+
+def _parse_with_raw(message: AIMessage) -> dict[str, Any]:
+    """The `include_raw` output of structured output: the message and its JSON"""
+    try:
+        parsed = JsonOutputParser().invoke(message)
+    except OutputParserException as e:
+        return {"raw": message, "parsed": None, "parsing_error": e}
+    return {"raw": message, "parsed": parsed, "parsing_error": None}
+
+
+class CassetteChatModel(BaseChatModel):
+    """Chat model that records or replays the calls of a wrapped model"""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    cassette: Cassette
+    model_name: str
+    model_kwargs: dict[str, Any] = Field(default_factory=dict)
+    inner: BaseChatModel | None = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "labrag-cassette-chat"
+
+    def _request(
+        self, messages: list[BaseMessage], stop: list[str] | None, kwargs: dict
+    ) -> dict[str, Any]:
+        return {
+            "model": self.model_name,
+            "model_kwargs": self.model_kwargs,
+            "call_kwargs": kwargs,
+            "stop": stop,
+            "messages": [[m.type, m.content] for m in messages],
+        }
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: Any = None,  # noqa: ANN401
+        **kwargs: Any,  # noqa: ANN401
+    ) -> ChatResult:
+        request = self._request(messages, stop, kwargs)
+        if self.cassette.mode == "replay":
+            return self._to_result(self.cassette.replay("chat", request))
+
+        start = time.perf_counter()
+        result = self.inner._generate(messages, stop=stop, **kwargs)
+        self._record(request, result, time.perf_counter() - start)
+        return result
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: Any = None,  # noqa: ANN401
+        **kwargs: Any,  # noqa: ANN401
+    ) -> ChatResult:
+        request = self._request(messages, stop, kwargs)
+        if self.cassette.mode == "replay":
+            return self._to_result(await self.cassette.areplay("chat", request))
+
+        start = time.perf_counter()
+        result = await self.inner._agenerate(messages, stop=stop, **kwargs)
+        self._record(request, result, time.perf_counter() - start)
+        return result
+
+    def _record(self, request: dict, result: ChatResult, latency: float) -> None:
+        message = result.generations[0].message
+        self.cassette.put("chat", request, message_to_dict(message), latency)
+
+    @staticmethod
+    def _to_result(response: dict) -> ChatResult:
+        message = messages_from_dict([response])[0]
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def with_structured_output(
+        self,
+        schema: Any = None,  # noqa: ANN401
+        **kwargs: Any,  # noqa: ANN401
+    ) -> Runnable:
+        """Only JSON mode is supported, as used by the synthesizer
+
+        With `include_raw=True` the output is a {"raw", "parsed",
+        "parsing_error"} dict, as from the live models.
+        """
+        llm = self.bind(response_format={"type": "json_object"})
+        if kwargs.get("include_raw"):
+            return llm | RunnableLambda(_parse_with_raw)
+        return llm | JsonOutputParser()
+
+
+class CassetteEmbeddings(Embeddings):
+    """Embeddings recorded or replayed per text, independent of batching"""
+
+    # Queries are recorded and replayed as single-text document batches
+    symmetric_queries = True
+
+    def __init__(
+        self,
+        cassette: Cassette,
+        model: str,
+        model_kwargs: dict[str, Any] | None = None,
+        inner: Embeddings | None = None,
+    ) -> None:
+        self.cassette = cassette
+        self.model = model
+        self.model_kwargs = model_kwargs or {}
+        self.inner = inner
+
+    def _request(self, text: str) -> dict[str, Any]:
+        return {"model": self.model, "model_kwargs": self.model_kwargs, "text": text}
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        if self.cassette.mode == "replay":
+            return [self.cassette.replay("embedding", self._request(t)) for t in texts]
+
+        start = time.perf_counter()
+        vectors = self.inner.embed_documents(texts)
+        self._record(texts, vectors, time.perf_counter() - start)
+        return vectors
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        if self.cassette.mode == "replay":
+            return [
+                await self.cassette.areplay("embedding", self._request(t))
+                for t in texts
+            ]
+
+        start = time.perf_counter()
+        vectors = await self.inner.aembed_documents(texts)
+        self._record(texts, vectors, time.perf_counter() - start)
+        return vectors
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return (await self.aembed_documents([text]))[0]
+
+    def _record(
+        self, texts: list[str], vectors: list[list[float]], latency: float
+    ) -> None:
+        # Spread the batch latency so replayed batches take about as long
+        for text, vector in zip(texts, vectors, strict=True):
+            self.cassette.put(
+                "embedding", self._request(text), vector, latency / len(texts)
+            )
+
+
+class CassettePDFParser:
+    """PDFParser wrapper keyed by the PDF's content hash"""
+
+    def __init__(self, cassette: Cassette, inner: Any = None) -> None:  # noqa: ANN401
+        """Initialize the wrapper
+
+        Args:
+            cassette: The cassette to record to or replay from
+            inner: The live PDFParser (required in record mode)
+        """
+        self.cassette = cassette
+        self.inner = inner
+
+    def parse(self, pdf_path: str | Path) -> PDFParseResult:
+        request = {"sha256": file_sha256(pdf_path)}
+        if self.cassette.mode == "replay":
+            result = PDFParseResult(**self.cassette.replay("pdf_parse", request))
+            # The same content may have been recorded under another file name
+            result.metadata["source"] = Path(pdf_path).name
+            return result
+
+        start = time.perf_counter()
+        result = self.inner.parse(pdf_path)
+        if result:
+            self.cassette.put(
+                "pdf_parse", request, result.model_dump(), time.perf_counter() - start
+            )
+        return result
+
+
+class CassetteURLParser:
+    """URLParser wrapper keyed by URL and cleaning mode"""
+
+    def __init__(self, cassette: Cassette, inner: Any = None) -> None:  # noqa: ANN401
+        """Initialize the wrapper
+
+        Args:
+            cassette: The cassette to record to or replay from
+            inner: The live URLParser (required in record mode)
+        """
+        self.cassette = cassette
+        self.inner = inner
+
+    async def parse(
+        self,
+        url: str,
+        clean_article: bool = True,
+    ) -> URLParseResult:
+        request = {"url": url, "clean_article": clean_article}
+        if self.cassette.mode == "replay":
+            return URLParseResult(**await self.cassette.areplay("url_parse", request))
+
+        start = time.perf_counter()
+        result = await self.inner.parse(url, clean_article=clean_article)
+        if result:
+            self.cassette.put(
+                "url_parse", request, result.model_dump(), time.perf_counter() - start
+            )
+        return result
+
+
+def install_cassette(
+    cassette: Cassette,
+) -> tuple[ChatModelFactory, EmbeddingsFactory]:
+    """Route all chat model and embedding requests through a cassette
+
+    Args:
+        cassette: The cassette to record to or replay from
+
+    Returns:
+        The previous (chat model, embeddings) factories, used for live calls
+    """
+    live_chat = set_chat_model_factory(None)
+    live_embeddings = set_embeddings_factory(None)
+
+    def chat_factory(model: str, **kwargs: Any) -> BaseChatModel:  # noqa: ANN401
+        inner = live_chat(model, **kwargs) if cassette.mode == "record" else None
+        return CassetteChatModel(
+            cassette=cassette, model_name=model, model_kwargs=kwargs, inner=inner
+        )
+
+    def embeddings_factory(model: str, **kwargs: Any) -> Embeddings:  # noqa: ANN401
+        inner = live_embeddings(model, **kwargs) if cassette.mode == "record" else None
+        return CassetteEmbeddings(cassette, model, kwargs, inner)
+
+    set_chat_model_factory(chat_factory)
+    set_embeddings_factory(embeddings_factory)
+    logger.info(f"Using cassette {cassette.path} in {cassette.mode} mode")
+    return live_chat, live_embeddings
+
+
+@contextmanager
+def use_cassette(cassette: Cassette) -> Iterator[Cassette]:
+    """Temporarily route chat model and embedding requests through a cassette"""
+    previous_chat, previous_embeddings = install_cassette(cassette)
+    try:
+        yield cassette
+    finally:
+        set_chat_model_factory(previous_chat)
+        set_embeddings_factory(previous_embeddings)
+
+
+def cassette_from_env() -> Cassette | None:
+    """Build a cassette from LABRAG_CASSETTE_* environment variables
+
+    LABRAG_CASSETTE_MODE ("record" or "replay") enables the cassette;
+    LABRAG_CASSETTE_PATH and LABRAG_CASSETTE_LATENCY_SCALE (simulated latency
+    multiplier, replay only) are optional.
+
+    Returns:
+        Cassette | None: The configured cassette, or None if disabled
+    """
+    mode = os.getenv("LABRAG_CASSETTE_MODE")
+    if not mode:
+        return None
+
+    latency_scale = os.getenv("LABRAG_CASSETTE_LATENCY_SCALE")
+    return Cassette(
+        path=os.getenv("LABRAG_CASSETTE_PATH", ".labrag_cache/cassette.db"),
+        mode=mode,
+        simulate_latency=latency_scale is not None,
+        latency_scale=float(latency_scale or 1.0),
+    )
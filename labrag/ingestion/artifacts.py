@@ -0,0 +1,117 @@
+"""Content-addressed store of raw parse results.
+
+LandingAI and Firecrawl output is saved as gzip-compressed JSON keyed by the
+source's content hash (PDFs) or URL hash (URLs) and the parser version, so
+re-chunking or re-embedding never pays for parsing again. Changing a parser's
+`version` invalidates its artifacts without deleting them.
+"""
+
+import gzip
+import json
+import os
+import threading
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any, Literal
+
+from loguru import logger
+
+from labrag.ingestion.parsers.models import (
+    ParsedDocument,
+    PDFParseResult,
+    URLParseResult,
+)
+
+ArtifactKind = Literal["pdf", "url"]
+
+RESULT_TYPES: dict[str, type[ParsedDocument]] = {
+    "pdf": PDFParseResult,
+    "url": URLParseResult,
+}
+
+
+def parser_version(parser: Any) -> str:  # noqa: ANN401
+    """Version tag of a parser, used in artifact keys"""
+    return getattr(parser, "version", type(parser).__name__)
+
+
+class ArtifactStore:
+    """Compressed parse results on disk, one file per (content, parser version)"""
+
+    def __init__(self, root: str | Path = ".labrag_cache/artifacts") -> None:
+        """Initialize the store
+
+        Args:
+            root: The directory holding the artifacts
+        """
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def path_for(self, kind: ArtifactKind, content_hash: str, version: str) -> Path:
+        """File path of an artifact (fanned out by hash prefix)"""
+        return self.root / kind / content_hash[:2] / f"{content_hash}.{version}.json.gz"
+
+    def get(
+        self, kind: ArtifactKind, content_hash: str, version: str
+    ) -> ParsedDocument | None:
+        """Load an artifact, or None if it was never stored
+
+        Args:
+            kind: The source type (pdf or url)
+            content_hash: The source content hash (URL hash for URLs)
+            version: The parser version
+
+        Returns:
+            The stored parse result, or None
+        """
+        path = self.path_for(kind, content_hash, version)
+        if not path.exists():
+            return None
+
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                return RESULT_TYPES[kind](**json.load(f))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable artifact {path}: {e}")
+            return None
+
+    def put(
+        self,
+        kind: ArtifactKind,
+        content_hash: str,
+        version: str,
+        result: ParsedDocument,
+    ) -> Path:
+        """Store a parse result atomically
+
+        Args:
+            kind: The source type (pdf or url)
+            content_hash: The source content hash (URL hash for URLs)
+            version: The parser version
+            result: The parse result
+
+        Returns:
+            Path: The artifact file
+        """
+        path = self.path_for(kind, content_hash, version)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write then rename, so readers never see a half-written artifact
+        tmp_path = path.with_name(
+            f"{path.name}.{os.getpid()}-{threading.get_ident()}.tmp"
+        )
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(result.model_dump(), f)
+        os.replace(tmp_path, path)
+        return path
+
+    def iter_results(
+        self, kind: ArtifactKind | None = None, version: str | None = None
+    ) -> Iterator[ParsedDocument]:
+        """Yield every stored parse result, optionally of one kind and version"""
+        kinds = [kind] if kind else list(RESULT_TYPES)
+        pattern = f"*/*.{version}.json.gz" if version else "*/*.json.gz"
+        for k in kinds:
+            for path in sorted((self.root / k).glob(pattern)):
+                with gzip.open(path, "rt", encoding="utf-8") as f:
+                    yield RESULT_TYPES[k](**json.load(f))
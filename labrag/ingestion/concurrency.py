@@ -0,0 +1,74 @@
+"""Retries and progress reporting for concurrent ingestion work."""
+
+import asyncio
+import random
+import time
+from collections.abc import Awaitable, Callable
+
+from loguru import logger
+
+
+async def retry_async[T](
+    operation: Callable[[], Awaitable[T]],
+    label: str,
+    attempts: int = 3,
+    timeout: float | None = None,
+    base_delay: float = 1.0,
+    max_delay: float = 30.0,
+) -> T:
+    """Run an async operation with a per-attempt timeout and exponential backoff
+
+    Args:
+        operation: Zero-argument callable returning a fresh awaitable per attempt
+        label: What is being attempted, for log messages
+        attempts: Total number of attempts (1 disables retries)
+        timeout: Seconds allowed per attempt (None for no limit)
+        base_delay: Delay before the first retry, doubled after every failure
+        max_delay: Upper bound on the delay between attempts
+
+    Returns:
+        The result of the first successful attempt
+
+    Raises:
+        Exception: The error of the last attempt when all attempts fail
+    """
+    for attempt in range(1, attempts + 1):
+        try:
+            return await asyncio.wait_for(operation(), timeout)
+        except Exception as e:
+            if attempt == attempts:
+                raise
+            # Full jitter keeps many failing workers from retrying in lockstep
+            delay = random.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+            reason = "timed out" if isinstance(e, TimeoutError) else f"failed: {e}"
+            logger.warning(
+                f"{label} {reason} (attempt {attempt}/{attempts}), "
+                f"retrying in {delay:.1f}s"
+            )
+            await asyncio.sleep(delay)
+
+    raise ValueError("attempts must be at least 1")
+
+
+class Progress:
+    """Log completed/failed counts, throughput and ETA for a batch of work"""
+
+    def __init__(self, total: int, label: str) -> None:
+        self.total = total
+        self.label = label
+        self.done = 0
+        self.failed = 0
+        self.started = time.perf_counter()
+
+    def update(self, item: str, ok: bool = True) -> None:
+        """Record one finished item and log the running totals"""
+        self.done += 1
+        self.failed += not ok
+        elapsed = time.perf_counter() - self.started
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        eta = (self.total - self.done) / rate if rate > 0 else 0.0
+        status = "done" if ok else "FAILED"
+        logger.info(
+            f"[{self.label} {self.done}/{self.total}] {item} {status} "
+            f"({rate:.2f}/s, ETA {eta:.0f}s, {self.failed} failed)"
+        )
@@ -0,0 +1,325 @@
+"""Entity extraction for the entity graph.
+
+Each chunk is tagged with the genes, populations, diseases and methods it
+mentions, stored in its metadata as "type:name" keys (e.g. "gene:PPP3CA").
+The co-occurrence graph searched at query time is built from these tags (see
+`labrag.ingestion.loaders.entity_graph`).
+
+The local extractor is deterministic: lexicons for the domain terms plus a few
+patterns (gene symbols, "<X> populations", "<X> disease"). The LLM extractor
+adds what the rules miss and always keeps the local entities, so a failed call
+only loses the extras.
+"""
+
+import asyncio
+import re
+from typing import Any, Literal
+
+from langchain_core.documents import Document
+from loguru import logger
+
+from labrag.config import load_prompt_templates
+from labrag.ingestion.concurrency import retry_async
+from labrag.metrics import metrics
+from labrag.providers import get_chat_model
+
+EntityType = Literal["gene", "population", "disease", "method"]
+ENTITY_TYPES: tuple[EntityType, ...] = ("gene", "population", "disease", "method")
+
+# Chunks sent to the LLM in one extraction call
+LLM_BATCH_SIZE = 8
+
+# Canonical names, matched case-insensitively (acronyms are matched as written)
+POPULATIONS = [
+    "Native American",
+    "Indigenous American",
+    "Amazonian",
+    "Andean",
+    "Mesoamerican",
+    "South American",
+    "European",
+    "African",
+    "East Asian",
+    "South Asian",
+    "Oceanian",
+    "Australasian",
+    "Siberian",
+]
+DISEASES = {
+    "Chagas disease": ["Chagas", "American trypanosomiasis"],
+    "malaria": [],
+    "tuberculosis": [],
+    "leishmaniasis": [],
+    "dengue": [],
+    "COVID-19": ["SARS-CoV-2"],
+    "cardiomyopathy": [],
+    "diabetes": [],
+    "obesity": [],
+    "hypertension": [],
+    "cancer": [],
+}
+METHODS = {
+    "GWAS": ["genome-wide association"],
+    "PBS": ["population branch statistic"],
+    "iHS": ["integrated haplotype score"],
+    "XP-EHH": [],
+    "EHH": ["extended haplotype homozygosity"],
+    "PCA": ["principal component analysis", "principal components analysis"],
+    "ADMIXTURE": [],
+    "ROH": ["runs of homozygosity"],
+    "LD": ["linkage disequilibrium"],
+    "FST": ["Fst"],
+    "PLINK": [],
+    "SHAPEIT": ["SHAPEIT2", "SHAPEIT4"],
+    "IMPUTE": ["IMPUTE2", "IMPUTE4"],
+    "FUMA": [],
+    "GSEA": ["gene set enrichment analysis"],
+    "whole-genome sequencing": ["whole genome sequencing", "WGS"],
+    "exome sequencing": ["whole-exome sequencing", "WES"],
+    "RNA-seq": ["RNA sequencing"],
+    "qPCR": ["RT-qPCR", "quantitative PCR"],
+    "CRISPR": [],
+    "shRNA": [],
+}
+
+# Gene symbols: upper-case letters and digits with at least two letters and a
+# digit (PPP3CA, TP53, DUOX2)
+GENE = re.compile(r"\b(?=[A-Z0-9]*\d)(?=(?:[0-9]*[A-Z]){2})[A-Z][A-Z0-9]{2,9}\b")
+# Principal components, supplementary figures, accessions, genome builds
+NOT_GENES = re.compile(r"^(PC\d+|S\d+[A-Z]?|[A-Z]+\d{5,}|GRCH\d+|H2O2?|CO2|COVID\d*)$")
+POPULATION_PATTERN = re.compile(
+    r"\b((?:[A-Z][a-z]+ )?[A-Z][a-z]+) (?:populations?|peoples?|groups?|"
+    r"communities|individuals|ancestry|tribes?)\b"
+)
+DISEASE_PATTERN = re.compile(r"\b([A-Z][a-z]+(?:'s)?) (?i:disease|syndrome|fever)\b")
+# Capitalized words that start sentences rather than name something
+SENTENCE_STARTERS = {
+    "A", "All", "An", "Ancient", "Both", "Different", "Each", "Few", "Human",
+    "In", "Key", "Labeled", "Lists", "Local", "Major", "Many", "Modern", "Most",
+    "Other", "Our", "Population", "Reference", "Sample", "Several", "Some",
+    "Study", "Such", "Target", "That", "The", "Their", "These", "This", "Those",
+    "Two",
+}  # fmt: skip
+
+
+def entity_key(entity_type: str, name: str) -> str:
+    """The "type:name" key an entity is stored under"""
+    return f"{entity_type}:{name}"
+
+
+def split_key(key: str) -> tuple[str, str]:
+    """The type and name of an entity key"""
+    entity_type, _, name = key.partition(":")
+    return entity_type, name
+
+
+def _phrases(
+    canonical: dict[str, list[str]], entity_type: str
+) -> tuple[re.Pattern, dict[str, str]]:
+    """One alternation over every surface form, longest first, and their keys"""
+    forms: dict[str, str] = {}
+    for name, aliases in canonical.items():
+        for form in (name, *aliases):
+            forms[form.lower()] = entity_key(entity_type, name)
+    alternation = "|".join(
+        re.escape(form) for form in sorted(forms, key=len, reverse=True)
+    )
+    pattern = re.compile(rf"(?<![\w-])({alternation})s?(?![\w-])", re.IGNORECASE)
+    return pattern, forms
+
+
+class LocalEntityExtractor:
+    """Deterministic lexicon and pattern based extractor"""
+
+    def __init__(self, terms: dict[str, list[str]] | None = None) -> None:
+        """Compile the lexicons
+
+        Args:
+            terms: Extra names per entity type (e.g. {"gene": ["ACE"]}), for
+                terms the patterns don't catch
+        """
+        lexicons: dict[str, dict[str, list[str]]] = {
+            "population": {name: [] for name in POPULATIONS},
+            "disease": dict(DISEASES),
+            "method": dict(METHODS),
+            "gene": {},
+        }
+        for entity_type, names in (terms or {}).items():
+            if entity_type not in lexicons:
+                raise ValueError(f"Unknown entity type: {entity_type}")
+            lexicons[entity_type].update({name: [] for name in names})
+
+        self.patterns = [
+            _phrases(canonical, entity_type)
+            for entity_type, canonical in lexicons.items()
+            if canonical
+        ]
+        forms = [
+            form
+            for canonical in lexicons.values()
+            for name, aliases in canonical.items()
+            for form in (name, *aliases)
+        ]
+        # Acronyms (PBS, LD, WGS) only count when written in capitals
+        self.case_sensitive = {form.lower() for form in forms if form.isupper()} - {
+            form.lower() for form in forms if not form.isupper()
+        }
+        # Lexicon terms that look like gene symbols (SHAPEIT2, IMPUTE4)
+        self.known = {form.upper() for form in forms}
+
+    def extract(self, text: str) -> list[str]:
+        """Entity keys mentioned in a text, in order of first mention
+
+        Args:
+            text: The chunk text
+
+        Returns:
+            list[str]: Unique "type:name" keys
+        """
+        found: dict[str, None] = {}
+        for pattern, forms in self.patterns:
+            for match in pattern.finditer(text):
+                surface = match.group(1)
+                if surface.lower() in self.case_sensitive and not surface.isupper():
+                    continue
+                found[forms[surface.lower()]] = None
+
+        for match in GENE.finditer(text):
+            symbol = match.group(0)
+            if symbol not in self.known and not NOT_GENES.match(symbol):
+                found[entity_key("gene", symbol)] = None
+
+        for match in POPULATION_PATTERN.finditer(text):
+            name = match.group(1)
+            if name.split()[0] not in SENTENCE_STARTERS:
+                found[entity_key("population", name)] = None
+        for match in DISEASE_PATTERN.finditer(text):
+            if match.group(1) not in SENTENCE_STARTERS:
+                name = f"{match.group(1)} {match.group(0).split()[-1].lower()}"
+                found[entity_key("disease", name)] = None
+        return list(found)
+
+    def tag(self, documents: list[Document]) -> int:
+        """Store the entities of each document in its `entities` metadata
+
+        Returns:
+            int: The number of entity mentions tagged
+        """
+        mentions = 0
+        for doc in documents:
+            doc.metadata["entities"] = self.extract(doc.page_content)
+            mentions += len(doc.metadata["entities"])
+        return mentions
+
+    async def atag(self, documents: list[Document]) -> int:
+        """Tag documents off the event loop (see `tag`)"""
+        return await asyncio.to_thread(self.tag, documents)
+
+
+class LLMEntityExtractor(LocalEntityExtractor):
+    """The local extractor plus entities an LLM finds in each chunk"""
+
+    def __init__(
+        self,
+        terms: dict[str, list[str]] | None = None,
+        model: str = "gpt-4.1-mini",
+        concurrency: int = 4,
+        attempts: int = 2,
+        timeout_seconds: float = 60,
+    ) -> None:
+        """Compile the lexicons and bound the LLM calls
+
+        Args:
+            terms: Extra names per entity type, see `LocalEntityExtractor`
+            model: The chat model used for extraction
+            concurrency: Maximum extraction calls in flight
+            attempts: Attempts per call before keeping the local entities only
+            timeout_seconds: Seconds allowed per call
+        """
+        super().__init__(terms)
+        self.model = model
+        self.attempts = attempts
+        self.timeout_seconds = timeout_seconds
+        self._slots = asyncio.Semaphore(concurrency)
+
+    async def atag(self, documents: list[Document]) -> int:
+        """Tag documents with local and LLM entities
+
+        Returns:
+            int: The number of entity mentions tagged
+        """
+        await super().atag(documents)
+        batches = [
+            documents[i : i + LLM_BATCH_SIZE]
+            for i in range(0, len(documents), LLM_BATCH_SIZE)
+        ]
+        await asyncio.gather(*(self._tag_batch(batch) for batch in batches))
+        return sum(len(doc.metadata["entities"]) for doc in documents)
+
+    async def _tag_batch(self, documents: list[Document]) -> None:
+        """Add the LLM's entities for a batch of chunks to their metadata"""
+        async with self._slots:
+            try:
+                extracted = await retry_async(
+                    lambda: self._extract_batch(
+                        [doc.page_content for doc in documents]
+                    ),
+                    label="Entity extraction",
+                    attempts=self.attempts,
+                    timeout=self.timeout_seconds,
+                )
+            except Exception as e:
+                logger.warning(f"Keeping local entities only: {e}")
+                metrics.increment("entities.llm_failures")
+                return
+
+        for i, doc in enumerate(documents):
+            keys = dict.fromkeys(doc.metadata["entities"])
+            for item in extracted.get(str(i), []):
+                entity_type, name = item.get("type"), str(item.get("name", ""))
+                if entity_type in ENTITY_TYPES and name.strip():
+                    keys[entity_key(entity_type, name.strip())] = None
+            doc.metadata["entities"] = list(keys)
+
+    async def _extract_batch(self, texts: list[str]) -> dict[str, list[dict]]:
+        """Ask the LLM for the entities of numbered chunks
+
+        Returns:
+            dict: Chunk number (as a string) -> [{"type": ..., "name": ...}]
+        """
+        llm = get_chat_model(self.model, temperature=0).with_structured_output(
+            method="json_mode"
+        )
+        chunks = "\n\n".join(f"[{i}]\n{text}" for i, text in enumerate(texts))
+        prompt = load_prompt_templates()["entity_extraction_prompt"].format(
+            types=", ".join(ENTITY_TYPES), chunks=chunks
+        )
+        metrics.increment("entities.llm_calls")
+        response = await llm.ainvoke(prompt)
+        return response.get("chunks", {})
+
+
+def make_entity_extractor(
+    config: dict[str, Any],
+) -> LocalEntityExtractor | None:
+    """The extractor configured in the `entity_graph` section, if enabled
+
+    Args:
+        config: The `entity_graph` configuration section
+
+    Returns:
+        The extractor, or None when the entity graph is disabled
+    """
+    if not config.get("enabled", False):
+        return None
+    terms = config.get("terms") or {}
+    extractor = config.get("extractor", "local")
+    if extractor == "local":
+        return LocalEntityExtractor(terms)
+    if extractor == "llm":
+        return LLMEntityExtractor(
+            terms,
+            model=config.get("llm_model", "gpt-4.1-mini"),
+            concurrency=config.get("llm_concurrency", 4),
+        )
+    raise ValueError(f"Unknown entity extractor: {extractor}")
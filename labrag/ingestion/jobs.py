@@ -0,0 +1,325 @@
+"""Background ingestion jobs.
+
+Uploads are queued in SQLite and processed by an `IngestionWorker`, which runs
+its own `KnowledgeBaseBuilder` on a separate thread and event loop: parsing,
+chunking and embedding never run on the server's event loop, so chat requests
+are not slowed down by an ingestion in progress. Each finished batch is
+committed as an index snapshot, which the API's vector store loads on its next
+refresh (see `VectorStore.follow`).
+
+The queue can also be drained by a separate process (scripts/ingest_worker.py)
+for complete isolation. Run a single worker per queue and vector store.
+"""
+
+import asyncio
+import json
+import sqlite3
+import threading
+import uuid
+from collections import defaultdict
+from collections.abc import Callable
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Literal
+
+from loguru import logger
+from pydantic import BaseModel
+
+from labrag.ingestion.sync import source_id
+
+if TYPE_CHECKING:
+    # Imported when the worker starts: the API loads this module on startup
+    from labrag.ingestion.knowledge_base import IngestJob, KnowledgeBaseBuilder
+
+JobStatus = Literal["queued", "running", "done", "failed"]
+
+# The ingestion pipeline's stages, in order
+INGEST_STAGES = ("parse", "chunk", "entities", "embed", "index")
+
+
+class Job(BaseModel):
+    """An ingestion job and its progress"""
+
+    job_id: str
+    kind: Literal["pdf", "url"]
+    source: str
+    status: JobStatus
+    # The stage the job is in while running ("commit" once it is indexed)
+    stage: str | None = None
+    # Seconds spent in each stage the job has finished
+    stages: dict[str, float] = {}
+    created_at: str
+    started_at: str | None = None
+    finished_at: str | None = None
+    chunk_count: int | None = None
+    error: str | None = None
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> "Job":
+        stages = json.loads(row["stages"])
+        stage = None
+        if row["status"] == "running":
+            stage = next((s for s in INGEST_STAGES if s not in stages), "commit")
+        return cls(**{**dict(row), "stages": stages, "stage": stage})
+
+
+class JobQueue:
+    """Ingestion jobs stored in SQLite, shared by the API and the worker"""
+
+    def __init__(self, db_path: str | Path = ".labrag_cache/jobs.db") -> None:
+        """Initialize the job queue
+
+        Args:
+            db_path: The path to the database file
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    kind TEXT CHECK(kind IN ('url', 'pdf')),
+                    source TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'queued',
+                    stages TEXT NOT NULL DEFAULT '{}',
+                    created_at TEXT NOT NULL,
+                    started_at TEXT,
+                    finished_at TEXT,
+                    chunk_count INTEGER,
+                    error TEXT
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_jobs_status "
+                "ON jobs (status, created_at)"
+            )
+
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+    def _query(self, sql: str, params: tuple[Any, ...] = ()) -> list[sqlite3.Row]:
+        with self._lock, self._conn:
+            return self._conn.execute(sql, params).fetchall()
+
+    def enqueue(self, kind: Literal["pdf", "url"], source: str) -> Job:
+        """Queue a source for ingestion
+
+        A source that is already waiting is not queued twice: its pending job
+        is returned instead (and will see the latest file content).
+
+        Returns:
+            Job: The queued job
+        """
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT * FROM jobs WHERE source = ? AND status = 'queued'", (source,)
+            ).fetchall()
+            if rows:
+                return Job.from_row(rows[0])
+            job_id = uuid.uuid4().hex
+            self._conn.execute(
+                "INSERT INTO jobs (job_id, kind, source, created_at) "
+                "VALUES (?, ?, ?, ?)",
+                (job_id, kind, source, datetime.now().isoformat()),
+            )
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Job | None:
+        """A job by ID, or None if not found"""
+        rows = self._query("SELECT * FROM jobs WHERE job_id = ?", (job_id,))
+        return Job.from_row(rows[0]) if rows else None
+
+    def recent(self, limit: int = 20) -> list[Job]:
+        """The most recently created jobs, newest first"""
+        rows = self._query(
+            "SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+        )
+        return [Job.from_row(row) for row in rows]
+
+    def claim(self, limit: int = 1) -> list[Job]:
+        """Mark the oldest queued jobs as running and return them"""
+        rows = self._query(
+            """
+            UPDATE jobs SET status = 'running', started_at = ?
+            WHERE job_id IN (
+                SELECT job_id FROM jobs WHERE status = 'queued'
+                ORDER BY created_at LIMIT ?
+            )
+            RETURNING *
+            """,
+            (datetime.now().isoformat(), limit),
+        )
+        return sorted((Job.from_row(row) for row in rows), key=lambda j: j.created_at)
+
+    def record_stage(self, job_id: str, stage: str, seconds: float) -> None:
+        """Record that a running job finished a pipeline stage"""
+        self._query(
+            "UPDATE jobs SET stages = json_set(stages, ?, ?) WHERE job_id = ?",
+            (f'$."{stage}"', round(seconds, 3), job_id),
+        )
+
+    def finish(
+        self,
+        job_id: str,
+        status: Literal["done", "failed"],
+        chunk_count: int | None = None,
+        error: str | None = None,
+    ) -> None:
+        """Mark a job as done or failed"""
+        self._query(
+            "UPDATE jobs SET status = ?, finished_at = ?, chunk_count = ?, error = ? "
+            "WHERE job_id = ?",
+            (status, datetime.now().isoformat(), chunk_count, error, job_id),
+        )
+
+    def requeue_running(self) -> int:
+        """Queue again the jobs a stopped worker left running
+
+        Returns:
+            int: The number of jobs requeued
+        """
+        rows = self._query(
+            "UPDATE jobs SET status = 'queued', started_at = NULL, stages = '{}' "
+            "WHERE status = 'running' RETURNING job_id"
+        )
+        return len(rows)
+
+
+class IngestionWorker:
+    """Runs queued jobs through a KnowledgeBaseBuilder on its own event loop"""
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        make_builder: Callable[[], "KnowledgeBaseBuilder"],
+        batch_size: int = 8,
+        poll_seconds: float = 1.0,
+    ) -> None:
+        """Initialize the worker
+
+        Args:
+            queue: The job queue to drain
+            make_builder: Creates the builder (called on the worker's thread, so
+                loading the index doesn't block the caller)
+            batch_size: Jobs run through the pipeline together
+            poll_seconds: Interval between checks for jobs queued by other
+                processes
+        """
+        self.queue = queue
+        self.make_builder = make_builder
+        self.batch_size = max(1, batch_size)
+        self.poll_seconds = poll_seconds
+        self.jobs_run = 0
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @classmethod
+    def from_config(cls, queue: JobQueue, config: dict[str, Any]) -> "IngestionWorker":
+        """Worker configured from the `ingestion` section (job_* keys)"""
+        from labrag.ingestion.knowledge_base import KnowledgeBaseBuilder
+
+        ingestion_config = config.get("ingestion", {})
+        return cls(
+            queue,
+            lambda: KnowledgeBaseBuilder(config),
+            batch_size=ingestion_config.get("job_batch_size", 8),
+            poll_seconds=ingestion_config.get("job_poll_seconds", 1.0),
+        )
+
+    def notify(self) -> None:
+        """Wake the worker up after queuing a job"""
+        self._wake.set()
+
+    def start(self) -> None:
+        """Run the worker on a background thread"""
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=lambda: asyncio.run(self.run()),
+            name="ingestion-worker",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Stop after the batch in progress (jobs cut short are requeued on
+        the next start)
+
+        Args:
+            timeout: Seconds to wait for the background thread
+        """
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    async def run(self) -> None:
+        """Process jobs until `stop` is called"""
+        try:
+            builder = self.make_builder()
+        except Exception as e:
+            logger.error(f"Ingestion worker could not start: {e}")
+            return
+        if requeued := self.queue.requeue_running():
+            logger.warning(f"Requeued {requeued} interrupted ingestion jobs")
+
+        logger.info("Ingestion worker started")
+        while not self._stop.is_set():
+            jobs = self.queue.claim(self.batch_size)
+            if not jobs:
+                await asyncio.to_thread(self._wake.wait, self.poll_seconds)
+                self._wake.clear()
+                continue
+            await self._run_batch(builder, jobs)
+        logger.info(f"Ingestion worker stopped after {self.jobs_run} jobs")
+
+    async def _run_batch(
+        self, builder: "KnowledgeBaseBuilder", jobs: list[Job]
+    ) -> None:
+        """Ingest a batch of jobs in one pipeline run and record the outcomes"""
+        job_ids: dict[str, list[str]] = defaultdict(list)
+        for job in jobs:
+            job_ids[job.source].append(job.job_id)
+        indexed: dict[str, int | None] = {}
+
+        def on_stage(item: "IngestJob", stage: str, seconds: float) -> None:
+            for job_id in job_ids[item.source]:
+                self.queue.record_stage(job_id, stage, seconds)
+            if stage == INGEST_STAGES[-1]:
+                indexed[item.source] = item.chunk_count
+
+        sources = list(job_ids)
+        kinds = {job.source: job.kind for job in jobs}
+        logger.info(f"Running {len(jobs)} ingestion jobs")
+        try:
+            # Another process (a build, the watcher) may have saved meanwhile
+            await asyncio.to_thread(builder.refresh)
+            await builder.ingest(
+                [s for s in sources if kinds[s] == "pdf"],
+                [s for s in sources if kinds[s] == "url"],
+                on_stage=on_stage,
+            )
+        except Exception as e:
+            logger.error(f"Ingestion batch failed: {e}")
+            for job in jobs:
+                self.queue.finish(job.job_id, "failed", error=repr(e))
+            return
+
+        for job in jobs:
+            self.jobs_run += 1
+            if job.source in indexed:
+                self.queue.finish(job.job_id, "done", chunk_count=indexed[job.source])
+                continue
+            record = builder.cache.get_document(source_id(job.source)) or {}
+            error = record.get("error") if record.get("status") == "failed" else None
+            self.queue.finish(job.job_id, "failed", error=error or "Not ingested")
@@ -2,44 +2,180 @@
 
 import asyncio
 import glob
-import hashlib
 import os
-from typing import Any
+import tempfile
+import time
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from itertools import zip_longest
+from pathlib import Path
+from typing import Any, Literal
 
+from langchain_core.documents import Document
 from loguru import logger
+from pydantic import BaseModel
 
 from labrag.config import load_config
+from labrag.ingestion.artifacts import ArtifactStore, parser_version
+from labrag.ingestion.concurrency import Progress, retry_async
+from labrag.ingestion.entities import make_entity_extractor
+from labrag.ingestion.loaders.bundle import BundleHeader, KnowledgeBundle
+from labrag.ingestion.loaders.chunker import (
+    MarkdownChunker,
+    chunk_size_summary,
+    describe_chunk_sizes,
+)
 from labrag.ingestion.loaders.document_loader import DocumentLoader
 from labrag.ingestion.loaders.vector_store import VectorStore
 from labrag.ingestion.parsers.cache import DocumentCache
+from labrag.ingestion.parsers.models import ParsedDocument, PDFParseResult
 from labrag.ingestion.parsers.pdf_parser import PDFParser
 from labrag.ingestion.parsers.url_parser import URLParser
+from labrag.ingestion.pipeline import Pipeline, Stage
+from labrag.ingestion.sync import (
+    SyncAction,
+    SyncPlan,
+    file_sha256,
+    plan_sync,
+    read_url_list,
+    source_id,
+)
+from labrag.ingestion.tokens import count_tokens_batch
+from labrag.metrics import metrics
+
+
+class IngestJob(BaseModel):
+    """One source moving through the ingestion pipeline"""
+
+    kind: Literal["pdf", "url"]
+    source: str
+    key: str | None = None
+    result: ParsedDocument | None = None
+    documents: list[Document] = []
+    vectors: list[list[float]] = []
+    # Parent pages/sections of the documents (parent/child chunking only)
+    parents: list[Document] = []
+    chunk_count: int | None = None
+    started: float = 0.0
+    parse_seconds: float | None = None
+    load_seconds: float = 0.0
+
+    @property
+    def name(self) -> str:
+        """The source as labelled in chunk metadata (file name for PDFs)"""
+        return Path(self.source).name if self.kind == "pdf" else self.source
 
 
 class KnowledgeBaseBuilder:
     """Build knowledge base with cosine similarity using text-embedding-3-small"""
 
-    def __init__(self, config: dict[str, Any] | None = None) -> None:
+    def __init__(
+        self,
+        config: dict[str, Any] | None = None,
+        pdf_parser: PDFParser | None = None,
+        url_parser: URLParser | None = None,
+        cache: DocumentCache | None = None,
+        artifacts: ArtifactStore | None = None,
+    ) -> None:
         self.config = config or {}
 
         # Initialize components
         vector_store_config = self.config.get("vector_store", {})
         store_path = vector_store_config.get("store_path", "data/vector_store")
 
-        # Vector store with cosine similarity
-        self.vector_store = VectorStore(store_path)
+        # Vector store with cosine similarity, saved as versioned snapshots
+        self.vector_store = VectorStore(
+            store_path, keep_snapshots=vector_store_config.get("keep_snapshots", 5)
+        )
 
         # Document loader
-        self.document_loader = DocumentLoader(
-            self.vector_store,
-            chunk_size=vector_store_config.get("chunk_size", 5000),
-            chunk_overlap=vector_store_config.get("chunk_overlap", 200),
+        self.chunk_size = vector_store_config.get("chunk_size", 5000)
+        self.chunk_overlap = vector_store_config.get("chunk_overlap", 200)
+        self.chunker = None
+        if vector_store_config.get("chunker", "markdown") == "markdown":
+            # Token-aware chunks; chunk_size/chunk_overlap only apply to "recursive"
+            self.chunker = MarkdownChunker(
+                max_tokens=vector_store_config.get("chunk_tokens", 800),
+                min_tokens=vector_store_config.get("min_chunk_tokens", 100),
+            )
+        # Parent/child chunking: small chunks are embedded, and searches return
+        # the pages (PDFs) or chunks (URLs) they were cut from
+        self.child_chunker = None
+        if vector_store_config.get("parent_child", False):
+            child_tokens = vector_store_config.get("child_tokens", 200)
+            self.child_chunker = MarkdownChunker(
+                max_tokens=child_tokens,
+                min_tokens=vector_store_config.get(
+                    "min_child_tokens", child_tokens // 4
+                ),
+            )
+        self.document_loader = self._make_loader(self.vector_store)
+        self._chunk_tokens: list[int] = []
+        # Entity tags for the entity graph (None when it is disabled)
+        self.entity_extractor = make_entity_extractor(
+            self.config.get("entity_graph", {})
         )
 
         # Parsers and cache
-        self.pdf_parser = PDFParser()
-        self.url_parser = URLParser()
-        self.cache = DocumentCache()
+        ingestion_config = self.config.get("ingestion", {})
+        self.pdf_parser = pdf_parser or PDFParser()
+        self.url_parser = url_parser or URLParser(
+            max_concurrency=ingestion_config.get("url_concurrency", 4),
+            per_domain_concurrency=ingestion_config.get("url_per_domain", 1),
+            domain_delay_seconds=ingestion_config.get("url_domain_delay_seconds", 1.0),
+            attempts=ingestion_config.get("url_attempts", 3),
+            timeout_seconds=ingestion_config.get("url_timeout_seconds", 90),
+            retry_base_delay_seconds=ingestion_config.get(
+                "retry_base_delay_seconds", 2.0
+            ),
+            clean_mode=ingestion_config.get("url_clean_mode", "hybrid"),
+        )
+        self.cache = cache or DocumentCache()
+
+        # Raw parse results, reused whenever the same content is processed again
+        self.artifacts = artifacts or ArtifactStore(
+            ingestion_config.get("artifacts_dir", ".labrag_cache/artifacts")
+        )
+        self.use_artifacts = True
+
+        # PDF parsing pool: LandingAI calls block, so they run off the event loop
+        self.pdf_workers = ingestion_config.get("pdf_workers", 4)
+        self.pdf_executor = ingestion_config.get("pdf_executor", "thread")
+        self.pdf_timeout = ingestion_config.get("pdf_timeout_seconds", 600)
+        self.pdf_attempts = ingestion_config.get("pdf_attempts", 3)
+        self.retry_base_delay = ingestion_config.get("retry_base_delay_seconds", 2.0)
+
+        # Pipeline stages (parse → chunk → entities → embed → index) and queues
+        self.parse_workers = ingestion_config.get(
+            "parse_workers",
+            self.pdf_workers + ingestion_config.get("url_concurrency", 4),
+        )
+        self.chunk_workers = ingestion_config.get("chunk_workers", 2)
+        self.entity_workers = ingestion_config.get("entity_workers", 4)
+        self.embed_workers = ingestion_config.get("embed_workers", 4)
+        self.queue_size = ingestion_config.get("stage_queue_size")
+        self.save_every = ingestion_config.get("save_every", 25)
+        self.progress_interval = ingestion_config.get("progress_interval_seconds", 10)
+
+        # Finish the last commit if the previous run stopped halfway through it
+        self._recover()
+
+    @staticmethod
+    def _list_sources(config: dict[str, Any]) -> tuple[list[str], list[str]]:
+        """PDF files in the papers directory, URLs from the config and urls_file"""
+        data_sources = config.get("data_sources", {})
+        papers_dir = data_sources.get("papers_dir", "data/raw/papers")
+
+        pdf_files = []
+        if os.path.exists(papers_dir):
+            pdf_files = sorted(glob.glob(os.path.join(papers_dir, "*.pdf")))
+
+        urls = list(data_sources.get("media_urls", []))
+        urls_file = data_sources.get("urls_file")
+        if urls_file and os.path.exists(urls_file):
+            urls += read_url_list(urls_file)
+        return pdf_files, list(dict.fromkeys(urls))
 
     async def build_from_config(self, config_path: str, force: bool = False) -> int:
         """Build knowledge base from configuration file"""
@@ -49,84 +185,722 @@ class KnowledgeBaseBuilder:
         logger.info("Starting knowledge base build...")
 
         # Process PDFs from papers directory
-        data_sources = config.get("data_sources", {})
-        papers_dir = data_sources.get("papers_dir", "data/raw/papers")
+        pdf_files, urls = self._list_sources(config)
 
-        # Get PDF files from the papers directory
-        pdf_files = []
-        if os.path.exists(papers_dir):
-            pdf_files = glob.glob(os.path.join(papers_dir, "*.pdf"))
-
-        logger.info(f"Processing {len(pdf_files)} PDF files from {papers_dir}")
-        for pdf_path in pdf_files:
-            if self._process_pdf(pdf_path, force):
-                processed_count += 1
-
-        # Process URLs from media_urls - use async for better performance
-        urls = data_sources.get("media_urls", [])
-        logger.info(f"Processing {len(urls)} URLs")
-
-        # Process URLs concurrently for better performance
-        url_tasks = [self._process_url_async(url, force) for url in urls]
-        if url_tasks:
-            url_results = await asyncio.gather(*url_tasks, return_exceptions=True)
-            for result in url_results:
-                if isinstance(result, bool) and result:
-                    processed_count += 1
-                elif isinstance(result, Exception):
-                    logger.error(f"Error processing URL: {result}")
+        logger.info(f"Processing {len(pdf_files)} PDF files and {len(urls)} URLs")
+
+        # PDFs (on the worker pool) and URLs share one staged pipeline
+        try:
+            processed_count = await self._ingest(pdf_files, urls, force)
+        except Exception as e:
+            logger.error(f"Error processing sources: {e}")
 
         logger.success(
             f"Knowledge base build complete: {processed_count} documents processed"
         )
         return processed_count
 
-    def _process_pdf(self, pdf_path: str, force: bool = False) -> bool:
-        """Process single PDF file"""
-        doc_id = hashlib.sha256(pdf_path.encode()).hexdigest()
+    async def sync_from_config(
+        self, config_path: str, dry_run: bool = False
+    ) -> SyncPlan:
+        """Bring the knowledge base in line with the configured sources
 
-        if not force and self.cache.is_processed(doc_id):
-            logger.debug(f"PDF {pdf_path} already processed")
-            return False
+        Only new, changed, renamed and deleted sources are touched: unchanged
+        files are skipped on size and mtime without being read, renamed files
+        keep their embeddings, changed files keep their chunks until the new
+        ones replace them, and deleted sources are dropped from the index.
 
-        logger.info(f"Processing PDF: {pdf_path}")
-        pdf_result = self.pdf_parser.parse(pdf_path)
-        if not pdf_result:
-            logger.error(f"Failed to parse PDF: {pdf_path}")
-            return False
+        Args:
+            config_path: The configuration file listing the sources
+            dry_run: Only compute and log the plan, without applying it
 
-        success = self.document_loader.load_pdf_result(pdf_result)
-        if success:
-            self.cache.add_document(doc_id, pdf_path, "pdf")
-            logger.info(f"Successfully processed PDF: {pdf_path}")
+        Returns:
+            SyncPlan: The plan that was (or would have been) applied
+        """
+        pdf_files, urls = self._list_sources(load_config(config_path))
+        plan = plan_sync(self.cache, pdf_files, urls)
+        logger.info(plan.describe())
 
-        return success
+        if dry_run or not plan.actions:
+            return plan
 
-    async def _process_url_async(self, url: str, force: bool = False) -> bool:
-        """Process single URL asynchronously"""
-        doc_id = hashlib.sha256(url.encode()).hexdigest()
+        urls, pdf_paths = [], []
+        records: list[dict[str, Any]] = []
+        removed: list[str] = []
+        for action in plan.actions:
+            if action.document_type == "url":
+                if action.action == "remove":
+                    removed.append(self._remove_source(action))
+                else:
+                    urls.append(action.source)
+            else:
+                self._apply_pdf_action(action, records, removed)
+                if action.action in ("add", "update"):
+                    pdf_paths.append(action.source)
+        if records or removed:
+            await asyncio.to_thread(self._commit, records, removed)
 
-        if not force and self.cache.is_processed(doc_id):
-            logger.debug(f"URL {url} already processed")
+        try:
+            await self._ingest(pdf_paths, urls, force=True)
+        except Exception as e:
+            logger.error(f"Error processing sources: {e}")
+
+        logger.success(f"Knowledge base sync complete: {plan.counts()}")
+        return plan
+
+    async def rebuild_from_artifacts(self, config_path: str) -> int:
+        """Rebuild the vector index from stored parse results only
+
+        Every configured source is re-chunked with the current settings and
+        re-embedded in parallel, without calling any parser. The new index is
+        built separately and committed as a new snapshot once complete, so
+        `rollback` restores the previous one. Sources without a stored parse
+        are left out of the index and the cache.
+
+        Args:
+            config_path: The configuration file listing the sources
+
+        Returns:
+            int: The number of sources in the rebuilt index
+        """
+        pdf_files, urls = self._list_sources(load_config(config_path))
+        sources = [("pdf", path) for path in pdf_files] + [("url", u) for u in urls]
+        logger.info(f"Rebuilding index from stored parses of {len(sources)} sources")
+
+        build_dir = tempfile.TemporaryDirectory(prefix="labrag-rebuild-")
+        # Never saved: only the in-memory index is taken over at the end
+        new_store = VectorStore(build_dir.name, embeddings=self.vector_store.embeddings)
+        loader = self._make_loader(new_store)
+
+        semaphore = asyncio.Semaphore(self.pdf_workers)
+        progress = Progress(len(sources), "rebuild")
+        chunk_counts: dict[str, int] = {}
+
+        async def load(kind: str, source: str) -> str | None:
+            """Load one source; returns its artifact key, or None if missing"""
+            if kind == "pdf":
+                key = await asyncio.to_thread(file_sha256, source)
+                name = Path(source).name
+            else:
+                key, name = source_id(source), source
+
+            result = self._load_artifact(kind, key, name)
+            if result is None:
+                logger.warning(f"No stored parse for {source}, leaving it out")
+                progress.update(name, ok=False)
+                return None
+
+            documents, parents = loader.build_documents(result)
+            if self.entity_extractor is not None:
+                await self.entity_extractor.atag(documents)
+            async with semaphore:
+                await new_store.aadd_documents(
+                    documents, persist=False, parents=parents
+                )
+            chunk_counts[source] = len(documents)
+            self._chunk_tokens += self._token_counts(documents)
+            progress.update(name)
+            return key
+
+        self._chunk_tokens = []
+        with build_dir:
+            keys = await asyncio.gather(
+                *(load(kind, source) for kind, source in sources)
+            )
+        if not any(keys):
+            logger.error("No stored parses found, keeping the current index")
+            return 0
+
+        self.vector_store.replace_index(new_store)
+        await asyncio.to_thread(self._commit_rebuild, sources, keys, chunk_counts)
+
+        logger.info(f"Chunk sizes: {describe_chunk_sizes(self._chunk_tokens)}")
+        rebuilt = sum(key is not None for key in keys)
+        logger.success(f"Rebuilt index from {rebuilt}/{len(sources)} stored parses")
+        return rebuilt
+
+    def rechunk_artifacts(self) -> dict[str, float]:
+        """Chunk every stored parse with the current settings, without embedding
+
+        Used to check chunking settings against the whole corpus in seconds
+        before paying for a rebuild.
+
+        Returns:
+            The chunk size distribution (see `chunk_size_summary`)
+        """
+        loader = self._make_loader(None)
+        start = time.perf_counter()
+        token_counts, sources = [], 0
+        for kind, parser in (("pdf", self.pdf_parser), ("url", self.url_parser)):
+            for result in self.artifacts.iter_results(kind, parser_version(parser)):
+                documents, _ = loader.build_documents(result)
+                token_counts += self._token_counts(documents)
+                sources += 1
+
+        logger.info(
+            f"Re-chunked {sources} stored parses in "
+            f"{time.perf_counter() - start:.2f}s: {describe_chunk_sizes(token_counts)}"
+        )
+        return chunk_size_summary(token_counts)
+
+    def _make_loader(self, vector_store: VectorStore | None) -> DocumentLoader:
+        """Document loader with the configured chunking"""
+        return DocumentLoader(
+            vector_store,
+            chunk_size=self.chunk_size,
+            chunk_overlap=self.chunk_overlap,
+            chunker=self.chunker,
+            child_chunker=self.child_chunker,
+        )
+
+    @staticmethod
+    def _token_counts(documents: list[Document]) -> list[int]:
+        """Chunk sizes in tokens (counted if the chunker didn't record them)"""
+        if all("tokens" in doc.metadata for doc in documents):
+            return [doc.metadata["tokens"] for doc in documents]
+        return count_tokens_batch([doc.page_content for doc in documents])
+
+    def rollback(self, snapshot: str | None = None) -> str:
+        """Restore an earlier index snapshot together with its cache records
+
+        Args:
+            snapshot: The snapshot to restore (default: the previous one)
+
+        Returns:
+            str: The name of the restored snapshot
+        """
+        name = self.vector_store.rollback(snapshot)
+        self._recover()
+        return name
+
+    def refresh(self) -> bool:
+        """Load the index and cache state another process committed since
+
+        Returns:
+            bool: True if a newer snapshot was loaded
+        """
+        if not self.vector_store.refresh():
             return False
+        self._recover()
+        return True
+
+    def export_bundle(self, output: str) -> BundleHeader:
+        """Write the index and the cache records to a single bundle file
+
+        Args:
+            output: The bundle path
+
+        Returns:
+            BundleHeader: What was written
+        """
+        return self.vector_store.export_bundle(output, self.cache.list_documents())
+
+    def import_bundle(self, path: str) -> str:
+        """Make a bundle's index and cache records current
 
-        logger.info(f"Processing URL: {url}")
+        The bundle is verified, then committed as a new snapshot carrying its
+        cache records, like a build: `rollback` restores the previous index.
+
+        Args:
+            path: The bundle file
+
+        Returns:
+            str: The name of the new snapshot
+
+        Raises:
+            ValueError: Invalid or corrupted bundle, or embedded with another
+                model than the configured one
+        """
+        bundle = KnowledgeBundle(path, verify=True)
+        header = bundle.header
+        if header.embedding_model != self.vector_store.embedding_model:
+            raise ValueError(
+                f"{path} was embedded with {header.embedding_model}, the "
+                f"store uses {self.vector_store.embedding_model}"
+            )
+
+        records = bundle.cache_records()
+        # An ordinary in-memory copy: the imported index stays writable
+        self.vector_store.replace_store(
+            bundle.to_faiss(self.vector_store.embeddings, copy=True)
+        )
+        snapshot = self.vector_store.save(
+            manifest={
+                **header.manifest,
+                "documents": records,
+                "bundle": {"path": str(path), "snapshot": header.snapshot},
+            }
+        )
+        self.cache.restore(records, snapshot)
+        logger.success(
+            f"Imported {header.chunks} chunks and {len(records)} cache records "
+            f"from {path} as snapshot {snapshot}"
+        )
+        return snapshot
+
+    def _recover(self) -> None:
+        """Bring the cache in line with the loaded index snapshot
+
+        Needed after a crash between a snapshot commit and the cache update,
+        after a rollback, or when a damaged snapshot was skipped on load.
+        """
+        snapshot = self.vector_store.snapshot
+        if snapshot is None or snapshot == self.cache.snapshot:
+            return
+
+        documents = self.vector_store.snapshots.manifest(snapshot).get("documents")
+        if documents is None:
+            # Saved outside a build (e.g. DocumentLoader); nothing to restore
+            return
+        self.cache.restore(documents, snapshot)
+        logger.warning(
+            f"Restored {len(documents)} cache records from index snapshot {snapshot}"
+        )
+
+    def _commit(
+        self, records: list[dict[str, Any]], removed: list[str] | None = None
+    ) -> None:
+        """Save the index and the matching cache changes as one snapshot
+
+        The snapshot manifest carries the cache rows it corresponds to, and
+        the cache is updated once the snapshot is current. If the process dies
+        in between, `_recover` replays the rows on the next start.
+
+        Args:
+            records: Cache records of sources now in the index
+            removed: Cache IDs of sources dropped from the index
+        """
+        removed = removed or []
+        documents = self.cache.state_after(records, removed)
+        snapshot = self.vector_store.save(manifest={"documents": documents})
+        self.cache.commit(records, removed, snapshot)
+
+    def _commit_rebuild(
+        self,
+        sources: list[tuple[str, str]],
+        keys: list[str | None],
+        chunk_counts: dict[str, int],
+    ) -> None:
+        """Commit a rebuilt index with a cache mirroring exactly its sources"""
+        records = []
+        for (kind, source), key in zip(sources, keys, strict=True):
+            if key is None:
+                continue
+            record = {
+                "document_id": source_id(source),
+                "document_source": source,
+                "document_type": kind,
+                **self._ingestion_details(kind, chunk_counts.get(source)),
+            }
+            if kind == "pdf":
+                stat = os.stat(source)
+                record.update(
+                    content_hash=key, size_bytes=stat.st_size, mtime=stat.st_mtime
+                )
+            records.append(record)
+
+        removed = [row["document_id"] for row in self.cache.list_documents()]
+        self._commit(records, removed)
+
+    def _remove_source(self, action: SyncAction) -> str:
+        """Drop a source from the index (unsaved); returns its cache ID"""
+        source = action.source
+        if action.document_type == "pdf":
+            # PDF chunks are labelled with the file name, not the full path
+            source = Path(action.source).name
+        self.vector_store.delete_source(source, persist=False)
+        return source_id(action.source)
+
+    def _apply_pdf_action(
+        self,
+        action: SyncAction,
+        records: list[dict[str, Any]],
+        removed: list[str],
+    ) -> None:
+        """Apply the index side of a planned PDF change
+
+        Cache changes that must land with the index are added to `records` and
+        `removed` for the next commit. Added and updated files still need
+        parsing afterwards; an updated file keeps its old chunks until the new
+        ones replace them in the index stage, so a failed re-parse loses
+        nothing and the served index never lacks the file.
+        """
+        if action.action == "rename":
+            self.vector_store.rename_source(
+                Path(action.previous_source).name,
+                Path(action.source).name,
+                persist=False,
+            )
+            previous_id = source_id(action.previous_source)
+            record = self.cache.get_document(previous_id)
+            removed.append(previous_id)
+            if record is not None:
+                records.append(
+                    {
+                        **record,
+                        "document_id": source_id(action.source),
+                        "document_source": action.source,
+                        "content_hash": action.content_hash,
+                        "size_bytes": action.size_bytes,
+                        "mtime": action.mtime,
+                    }
+                )
+        elif action.action == "remove":
+            removed.append(self._remove_source(action))
+
+        if action.action == "touch":
+            # Fingerprints alone don't affect the index
+            self.cache.update_fingerprint(
+                source_id(action.source),
+                action.content_hash,
+                action.size_bytes,
+                action.mtime,
+            )
+
+    def _make_executor(self) -> Executor:
+        """Worker pool for PDF parsing (a process pool needs a picklable parser)
+
+        A parse that times out keeps its worker busy until it returns, so the
+        pool has spare workers for the retries; the number of parses in flight
+        is bounded separately.
+        """
+        max_workers = self.pdf_workers * self.pdf_attempts
+        if self.pdf_executor == "process":
+            return ProcessPoolExecutor(max_workers=max_workers)
+        return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pdf")
+
+    def _make_pipeline(
+        self,
+        executor: Executor,
+        on_stage: Callable[[IngestJob, str, float], None] | None = None,
+    ) -> Pipeline:
+        """Parse → chunk → entities → embed → index stages with their own
+        worker counts
+
+        Parsing and embedding (and LLM entity extraction) wait on the network,
+        chunking and indexing use the CPU; with a queue between each pair they
+        all overlap. Index writes stay on a single worker.
+        """
+        pdf_slots = asyncio.Semaphore(self.pdf_workers)
+        return Pipeline(
+            [
+                Stage(
+                    "parse",
+                    partial(self._parse, executor=executor, pdf_slots=pdf_slots),
+                    workers=self.parse_workers,
+                    queue_size=self.queue_size,
+                ),
+                Stage(
+                    "chunk",
+                    self._chunk,
+                    workers=self.chunk_workers,
+                    queue_size=self.queue_size,
+                ),
+                Stage(
+                    "entities",
+                    self._extract_entities,
+                    workers=self.entity_workers,
+                    queue_size=self.queue_size,
+                ),
+                Stage(
+                    "embed",
+                    self._embed,
+                    workers=self.embed_workers,
+                    queue_size=self.queue_size,
+                ),
+                Stage("index", self._index, workers=1, queue_size=self.queue_size),
+            ],
+            label="ingest",
+            report_interval=self.progress_interval,
+            describe=lambda job: job.name,
+            on_error=self._job_failed,
+            on_stage=on_stage,
+        )
+
+    async def ingest(
+        self,
+        pdf_paths: list[str],
+        urls: list[str],
+        on_stage: Callable[[IngestJob, str, float], None] | None = None,
+    ) -> int:
+        """Ingest the given sources, replacing them if they are already indexed
+
+        Args:
+            pdf_paths: The PDF files to process
+            urls: The URLs to process
+            on_stage: Called with the job, stage name and seconds spent each
+                time a stage finishes a source
+
+        Returns:
+            int: The number of sources processed successfully
+        """
+        return await self._ingest(pdf_paths, urls, force=True, on_stage=on_stage)
+
+    async def _ingest(
+        self,
+        pdf_paths: list[str],
+        urls: list[str],
+        force: bool = False,
+        on_stage: Callable[[IngestJob, str, float], None] | None = None,
+    ) -> int:
+        """Run PDFs and URLs through the ingestion pipeline
+
+        Args:
+            pdf_paths: The PDF files to process
+            urls: The URLs to process
+            force: Reprocess sources that are already in the cache
+            on_stage: Per-stage progress callback, see `ingest`
+
+        Returns:
+            int: The number of sources processed successfully
+        """
+        pdf_jobs = [IngestJob(kind="pdf", source=path) for path in pdf_paths]
+        url_jobs = [IngestJob(kind="url", source=url) for url in urls]
+        # Alternate kinds, so PDF parses don't hold every parse worker
+        jobs = [
+            job
+            for pair in zip_longest(pdf_jobs, url_jobs)
+            for job in pair
+            if job is not None
+        ]
+
+        if not force:
+            # One query for the whole batch instead of one per source
+            todo = self.cache.pending([source_id(job.source) for job in jobs])
+            if len(todo) < len(jobs):
+                logger.info(f"Skipping {len(jobs) - len(todo)} processed sources")
+            jobs = [job for job in jobs if source_id(job.source) in todo]
+        if not jobs:
+            return 0
+
+        executor = self._make_executor()
+        counters_before = metrics.counters()
+        self._unsaved: list[IngestJob] = []
+        self._chunk_tokens = []
         try:
-            url_result = await self.url_parser.parse(url)
-            if not url_result:
-                logger.error(f"Failed to parse URL: {url}")
-                return False
+            done = await self._make_pipeline(executor, on_stage).run(jobs)
+        finally:
+            # Don't wait for parses that timed out: their threads can't be killed
+            executor.shutdown(wait=False, cancel_futures=True)
+            await asyncio.to_thread(self._checkpoint)
 
-            success = self.document_loader.load_url_result(url_result)
-            if success:
-                self.cache.add_document(doc_id, url, "url")
-                logger.info(f"Successfully processed URL: {url}")
+        self._log_cleaning_tokens(counters_before, metrics.counters())
+        logger.info(f"Chunk sizes: {describe_chunk_sizes(self._chunk_tokens)}")
+        return len(done)
 
-            return success
-        except Exception as e:
-            logger.error(f"Error processing URL {url}: {e}")
-            return False
+    async def _parse(
+        self,
+        job: IngestJob,
+        executor: Executor,
+        pdf_slots: asyncio.Semaphore,
+    ) -> IngestJob:
+        """Parse stage: reuse a stored parse, or call the parser"""
+        job.started = time.perf_counter()
+        if job.kind == "pdf":
+            job.key = await asyncio.to_thread(file_sha256, job.source)
+        else:
+            job.key = source_id(job.source)
+
+        result = None
+        if self.use_artifacts:
+            result = self._load_artifact(job.kind, job.key, job.name)
+        if result is None:
+            logger.info(f"Parsing {job.source}")
+            if job.kind == "pdf":
+                result = await self._parse_pdf(job.source, executor, pdf_slots)
+            else:
+                with metrics.timer("ingest.url.parse"):
+                    result = await self.url_parser.parse(job.source)
+            if not result:
+                raise ValueError("empty parse result")
+            await asyncio.to_thread(self._store_artifact, job.kind, job.key, result)
+
+        job.result = result
+        job.parse_seconds = time.perf_counter() - job.started
+        return job
+
+    async def _parse_pdf(
+        self, pdf_path: str, executor: Executor, pdf_slots: asyncio.Semaphore
+    ) -> PDFParseResult:
+        """Parse one PDF on the pool, with a timeout and retries"""
+        loop = asyncio.get_running_loop()
+        async with pdf_slots:
+            with metrics.timer("ingest.pdf.parse"):
+                return await retry_async(
+                    lambda: loop.run_in_executor(
+                        executor, self.pdf_parser.parse, pdf_path
+                    ),
+                    label=f"Parsing {Path(pdf_path).name}",
+                    attempts=self.pdf_attempts,
+                    timeout=self.pdf_timeout,
+                    base_delay=self.retry_base_delay,
+                )
+
+    async def _chunk(self, job: IngestJob) -> IngestJob:
+        """Chunk stage: split the parse result into documents"""
+        start = time.perf_counter()
+        with metrics.timer("ingest.chunk"):
+            job.documents, job.parents = await asyncio.to_thread(
+                self.document_loader.build_documents, job.result
+            )
+        self._chunk_tokens += self._token_counts(job.documents)
+        job.load_seconds += time.perf_counter() - start
+        return job
+
+    async def _extract_entities(self, job: IngestJob) -> IngestJob:
+        """Entities stage: tag the chunks for the entity graph (if enabled)"""
+        if self.entity_extractor is None or not job.documents:
+            return job
+        start = time.perf_counter()
+        with metrics.timer("ingest.entities"):
+            mentions = await self.entity_extractor.atag(job.documents)
+        metrics.increment("ingest.entity_mentions", mentions)
+        job.load_seconds += time.perf_counter() - start
+        return job
+
+    async def _embed(self, job: IngestJob) -> IngestJob:
+        """Embed stage: embed the chunks, without touching the index"""
+        start = time.perf_counter()
+        if job.documents:
+            with metrics.timer("ingest.embed"):
+                job.vectors = await self.vector_store.aembed_documents(job.documents)
+        job.load_seconds += time.perf_counter() - start
+        return job
+
+    async def _index(self, job: IngestJob) -> IngestJob:
+        """Index stage: replace the source's chunks in the index"""
+        start = time.perf_counter()
+        with metrics.timer("ingest.index"):
+            await asyncio.to_thread(self._index_job, job)
+        job.load_seconds += time.perf_counter() - start
+        logger.success(f"Loaded {job.chunk_count} chunks from {job.name}")
+
+        # Only the cache record is needed from here on
+        job.result, job.documents, job.vectors, job.parents = None, [], [], []
+        self._unsaved.append(job)
+        if len(self._unsaved) >= self.save_every:
+            await asyncio.to_thread(self._checkpoint)
+        return job
+
+    def _index_job(self, job: IngestJob) -> None:
+        self.vector_store.replace_source(
+            job.result.metadata["source"], job.documents, job.vectors, job.parents
+        )
+        job.chunk_count = len(job.documents)
+
+    def _checkpoint(self) -> None:
+        """Commit the index with the sources it now contains
+
+        Sources are only marked as done by the same commit that saves their
+        chunks, so an interrupted build resumes from the last committed source.
+        """
+        jobs, self._unsaved = self._unsaved, []
+        if not jobs:
+            return
+
+        records = []
+        for job in jobs:
+            record = {
+                "document_id": source_id(job.source),
+                "document_source": job.source,
+                "document_type": job.kind,
+                **self._ingestion_details(
+                    job.kind, job.chunk_count, job.parse_seconds, job.load_seconds
+                ),
+            }
+            if job.kind == "pdf":
+                stat = os.stat(job.source)
+                record.update(
+                    content_hash=job.key, size_bytes=stat.st_size, mtime=stat.st_mtime
+                )
+            records.append(record)
+        self._commit(records)
+
+    def _job_failed(self, job: IngestJob, stage: str, error: Exception) -> None:
+        """Record a source that failed in any stage, so it is retried later"""
+        self._record_failure(
+            job.kind,
+            job.source,
+            f"{stage}: {error!r}",
+            job.started if job.result is None else None,
+            job.parse_seconds,
+        )
+
+    def _load_artifact(self, kind: str, key: str, source: str) -> ParsedDocument | None:
+        """Stored parse result for this content and parser version, if any"""
+        parser = self.pdf_parser if kind == "pdf" else self.url_parser
+        result = self.artifacts.get(kind, key, parser_version(parser))
+        if result is not None:
+            # The same content may have been stored under another file name
+            result.metadata["source"] = source
+            metrics.increment(f"ingest.{kind}.artifact_hits")
+            logger.info(f"Reusing stored parse of {source}")
+        return result
+
+    def _store_artifact(self, kind: str, key: str, result: ParsedDocument) -> None:
+        """Persist a fresh parse result"""
+        parser = self.pdf_parser if kind == "pdf" else self.url_parser
+        self.artifacts.put(kind, key, parser_version(parser), result)
+
+    def _ingestion_details(
+        self,
+        kind: str,
+        chunk_count: int | None = None,
+        parse_seconds: float | None = None,
+        load_seconds: float | None = None,
+    ) -> dict[str, Any]:
+        """Cache columns describing how a source was ingested"""
+        parser = self.pdf_parser if kind == "pdf" else self.url_parser
+        return {
+            "chunk_count": chunk_count,
+            "embedding_model": self.vector_store.embedding_model,
+            "embedding_dims": self.vector_store.dimensions,
+            "parser_version": parser_version(parser),
+            "parse_seconds": parse_seconds,
+            "load_seconds": load_seconds,
+        }
+
+    def _record_failure(
+        self,
+        kind: str,
+        source: str,
+        error: str,
+        start: float | None,
+        parse_seconds: float | None = None,
+    ) -> None:
+        """Mark a source as failed, so the next build or sync retries it"""
+        if start is not None:
+            parse_seconds = time.perf_counter() - start
+        self.cache.mark_failed(
+            source_id(source),
+            source,
+            kind,
+            error,
+            parser_version=parser_version(
+                self.pdf_parser if kind == "pdf" else self.url_parser
+            ),
+            parse_seconds=parse_seconds,
+        )
+
+    def _process_pdf(self, pdf_path: str, force: bool = False) -> bool:
+        """Process single PDF file (sync version for backward compatibility)"""
+        return asyncio.run(self._ingest([pdf_path], [], force)) > 0
+
+    @staticmethod
+    def _log_cleaning_tokens(before: dict[str, float], after: dict[str, float]) -> None:
+        """Log how many article tokens the local cleaning kept away from the LLM"""
+
+        def delta(name: str) -> float:
+            return after.get(name, 0) - before.get(name, 0)
+
+        raw = delta("url.clean.raw_tokens")
+        if raw:
+            llm = delta("url.clean.llm_input_tokens")
+            logger.info(
+                f"Article cleaning sent {llm:.0f} of {raw:.0f} scraped tokens to "
+                f"the LLM ({1 - llm / raw:.0%} saved vs. cleaning with the LLM only)"
+            )
 
     def _process_url(self, url: str, force: bool = False) -> bool:
         """Process single URL (sync version for backward compatibility)"""
-        return asyncio.run(self._process_url_async(url, force))
+        return asyncio.run(self._ingest([], [url], force)) > 0
@@ -0,0 +1,375 @@
+"""Single-file, checksummed knowledge-base bundles.
+
+A bundle holds everything a server needs to answer questions: the FAISS index,
+the documents (chunks and parents), the row -> document ID mapping, the
+embedding model and dimensions, the snapshot manifest and the ingestion cache
+records. The file can be memory-mapped and served as is:
+
+    offset 0      b"LABRAGKB" and the header length (8 bytes, little endian)
+    offset 16     header JSON: format version, embedding model, dimensions,
+                  manifest, and offset/length/sha256 of every section
+    HEADER_SPACE  sections, 64-byte aligned:
+                  index             faiss.serialize_index output; placed so the
+                                    vectors start on a 64-byte boundary
+                  documents         one JSON object per document, back to back
+                  document_offsets  int64 start of each document (+ the end)
+                  ids               JSON: IDs of the index rows, then of the
+                                    documents without a vector (parents)
+                  cache             JSON: the ingestion cache records
+                  tags              JSON: source names and entity keys
+                  row_sources       int32 source of each index row
+                  row_entity_offsets
+                                    int64 start of each row's entities (+ the
+                                    end)
+                  row_entities      int32 entities of the rows, back to back
+
+Serving from a bundle reads the index vectors in place (zero copy) and decodes
+documents only when a search returns them, so startup doesn't depend on the
+index size. The document router and the entity graph are built from the row
+tags, without decoding documents either. Such a store is read-only; importing
+a bundle instead copies it into a regular snapshot, for nodes that keep
+ingesting (see `KnowledgeBaseBuilder.import_bundle`).
+"""
+
+import hashlib
+import json
+import mmap
+import os
+from collections.abc import Iterator, Mapping
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+import faiss
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from loguru import logger
+from pydantic import BaseModel
+
+from labrag.ingestion.loaders.row_tags import RowTags
+
+MAGIC = b"LABRAGKB"
+# Version 2 added the row tag sections
+FORMAT_VERSION = 2
+SECTION_ALIGNMENT = 64
+# Room for the header: sections start at a page boundary after it
+PAGE_SIZE = 4096
+
+
+class BundleSection(BaseModel):
+    """Where a section lives in the file, and its checksum"""
+
+    offset: int
+    length: int
+    sha256: str
+
+
+class BundleHeader(BaseModel):
+    """What a bundle contains"""
+
+    format_version: int
+    created_at: str
+    snapshot: str | None
+    embedding_model: str
+    dimensions: int | None
+    index_type: str
+    chunks: int
+    documents: int
+    cache_records: int
+    # The snapshot manifest (without the cache records, stored in "cache")
+    manifest: dict[str, Any] = {}
+    sections: dict[str, BundleSection] = {}
+
+
+def _align(offset: int, alignment: int) -> int:
+    return -(-offset // alignment) * alignment
+
+
+def _vectors_offset(serialized: np.ndarray) -> int:
+    """Where the vectors of a serialized flat index start (0 if not flat)"""
+    index = faiss.read_index(
+        faiss.ZeroCopyIOReader(faiss.swig_ptr(serialized), serialized.size),
+        faiss.IO_FLAG_MMAP_IFC,
+    )
+    if not isinstance(index, faiss.IndexFlat) or index.ntotal == 0:
+        return 0
+    start = faiss.rev_swig_ptr(index.get_xb(), 1).ctypes.data
+    return start - serialized.ctypes.data
+
+
+def _encode_documents(documents: list[Document]) -> tuple[bytes, np.ndarray]:
+    """Documents as back-to-back JSON objects, and where each one starts"""
+    blobs = [
+        json.dumps(
+            {"page_content": doc.page_content, "metadata": doc.metadata},
+            ensure_ascii=False,
+            default=str,
+        ).encode()
+        for doc in documents
+    ]
+    offsets = np.zeros(len(blobs) + 1, dtype="<i8")
+    offsets[1:] = np.cumsum([len(blob) for blob in blobs])
+    return b"".join(blobs), offsets
+
+
+def write_bundle(
+    output: str | Path,
+    store: FAISS,
+    snapshot: str | None,
+    embedding_model: str,
+    manifest: dict[str, Any] | None = None,
+    cache_records: list[dict[str, Any]] | None = None,
+) -> BundleHeader:
+    """Write a FAISS store (and cache records) to a bundle file
+
+    The file is written next to `output` and renamed into place, so readers
+    never see half a bundle. Callers hold the store's write lock.
+
+    Args:
+        output: The bundle path
+        store: The store to export
+        snapshot: The snapshot the store was loaded from or saved as
+        embedding_model: The model the vectors were embedded with
+        manifest: The snapshot manifest
+        cache_records: The ingestion cache records matching the store
+
+    Returns:
+        BundleHeader: The header written
+    """
+    output = Path(output)
+    row_ids = [store.index_to_docstore_id[row] for row in range(store.index.ntotal)]
+    indexed = set(row_ids)
+    parent_ids = [doc_id for doc_id in store.docstore._dict if doc_id not in indexed]
+    documents = [store.docstore._dict[doc_id] for doc_id in row_ids + parent_ids]
+    serialized = faiss.serialize_index(store.index)
+    records = cache_records or []
+    tags = RowTags.from_store(store)
+
+    data, offsets = _encode_documents(documents)
+    sections = {
+        "index": serialized.tobytes(),
+        "documents": data,
+        "document_offsets": offsets.tobytes(),
+        "ids": json.dumps({"rows": row_ids, "parents": parent_ids}).encode(),
+        "cache": json.dumps(records, default=str).encode(),
+        "tags": json.dumps(
+            {"sources": tags.sources, "entities": tags.entities}, ensure_ascii=False
+        ).encode(),
+        "row_sources": tags.row_sources.astype("<i4").tobytes(),
+        "row_entity_offsets": tags.entity_offsets.astype("<i8").tobytes(),
+        "row_entities": tags.row_entities.astype("<i4").tobytes(),
+    }
+    # Shift the index section so the vectors are aligned for SIMD reads
+    shifts = {"index": _vectors_offset(serialized)}
+
+    header = BundleHeader(
+        format_version=FORMAT_VERSION,
+        created_at=datetime.now().isoformat(timespec="seconds"),
+        snapshot=snapshot,
+        embedding_model=embedding_model,
+        dimensions=store.index.d,
+        index_type=type(store.index).__name__,
+        chunks=len(row_ids),
+        documents=len(documents),
+        cache_records=len(records),
+        # The cache records are stored once, in their own section
+        manifest={k: v for k, v in (manifest or {}).items() if k != "documents"},
+    )
+    # Offsets are only known once the header size is; reserve room for them
+    draft = header.model_copy(
+        update={
+            "sections": {
+                name: BundleSection(offset=2**62, length=2**62, sha256="0" * 64)
+                for name in sections
+            }
+        }
+    )
+    header_space = _align(len(MAGIC) + 8 + len(draft.model_dump_json()), PAGE_SIZE)
+
+    cursor = header_space
+    for name, payload in sections.items():
+        offset = _align(cursor, SECTION_ALIGNMENT)
+        offset += -(offset + shifts.get(name, 0)) % SECTION_ALIGNMENT
+        header.sections[name] = BundleSection(
+            offset=offset,
+            length=len(payload),
+            sha256=hashlib.sha256(payload).hexdigest(),
+        )
+        cursor = offset + len(payload)
+
+    encoded = header.model_dump_json().encode()
+    output.parent.mkdir(parents=True, exist_ok=True)
+    tmp = output.with_name(f".{output.name}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(MAGIC + len(encoded).to_bytes(8, "little") + encoded)
+        for name, payload in sections.items():
+            f.write(b"\0" * (header.sections[name].offset - f.tell()))
+            f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, output)
+
+    logger.success(
+        f"Wrote {header.chunks} chunks ({header.documents} documents, "
+        f"{header.cache_records} cache records) to {output} "
+        f"({cursor / 2**20:.1f} MB)"
+    )
+    return header
+
+
+def read_header(path: str | Path) -> BundleHeader:
+    """The header of a bundle, without mapping the rest
+
+    Raises:
+        ValueError: Not a bundle, or a newer format than this version reads
+    """
+    with open(path, "rb") as f:
+        prefix = f.read(len(MAGIC) + 8)
+        if len(prefix) < len(MAGIC) + 8 or not prefix.startswith(MAGIC):
+            raise ValueError(f"{path} is not a LabRAG bundle")
+        length = int.from_bytes(prefix[len(MAGIC) :], "little")
+        header = BundleHeader.model_validate_json(f.read(length))
+    if header.format_version > FORMAT_VERSION:
+        raise ValueError(
+            f"{path} uses bundle format {header.format_version}; this version "
+            f"reads up to {FORMAT_VERSION}"
+        )
+    return header
+
+
+class BundleDocuments(Mapping[str, Document]):
+    """Read-only docstore mapping that decodes documents on access"""
+
+    def __init__(self, data: np.ndarray, offsets: np.ndarray, ids: list[str]) -> None:
+        self._data = data
+        self._offsets = offsets
+        self._positions = {doc_id: i for i, doc_id in enumerate(ids)}
+
+    def __getitem__(self, doc_id: str) -> Document:
+        i = self._positions[doc_id]
+        raw = self._data[self._offsets[i] : self._offsets[i + 1]].tobytes()
+        item = json.loads(raw)
+        return Document(
+            id=doc_id, page_content=item["page_content"], metadata=item["metadata"]
+        )
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._positions)
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __contains__(self, doc_id: object) -> bool:
+        return doc_id in self._positions
+
+
+class KnowledgeBundle:
+    """A memory-mapped bundle file"""
+
+    def __init__(self, path: str | Path, verify: bool = False) -> None:
+        """Map a bundle
+
+        Args:
+            path: The bundle file
+            verify: Check every section's checksum (reads the whole file)
+
+        Raises:
+            ValueError: Not a bundle, truncated, or a checksum mismatch
+        """
+        self.path = Path(path)
+        self.header = read_header(self.path)
+        with open(self.path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buffer = np.frombuffer(self._mmap, dtype=np.uint8)
+
+        end = max(
+            (s.offset + s.length for s in self.header.sections.values()), default=0
+        )
+        if end > len(self._buffer):
+            raise ValueError(f"{self.path} is truncated")
+        if verify:
+            self.verify()
+
+    def section(self, name: str) -> np.ndarray:
+        """A section's bytes, viewed in place"""
+        section = self.header.sections[name]
+        return self._buffer[section.offset : section.offset + section.length]
+
+    def verify(self) -> None:
+        """Check every section against its checksum
+
+        Raises:
+            ValueError: A section doesn't match
+        """
+        for name, section in self.header.sections.items():
+            if hashlib.sha256(self.section(name)).hexdigest() != section.sha256:
+                raise ValueError(f"{self.path}: section {name} is corrupted")
+
+    def index(self, copy: bool = False) -> faiss.Index:
+        """The FAISS index, reading the vectors in place unless `copy`"""
+        serialized = self.section("index")
+        if copy:
+            return faiss.deserialize_index(serialized.copy())
+        # Flat indexes keep pointing into the mapping (which must stay open)
+        return faiss.read_index(
+            faiss.ZeroCopyIOReader(faiss.swig_ptr(serialized), serialized.size),
+            faiss.IO_FLAG_MMAP_IFC,
+        )
+
+    def ids(self) -> tuple[list[str], list[str]]:
+        """IDs of the index rows, and of the documents without a vector"""
+        ids = json.loads(self.section("ids").tobytes())
+        return ids["rows"], ids["parents"]
+
+    def documents(self) -> BundleDocuments:
+        """Every document, decoded on access"""
+        rows, parents = self.ids()
+        offsets = self.section("document_offsets").view("<i8")
+        return BundleDocuments(self.section("documents"), offsets, rows + parents)
+
+    def row_tags(self) -> RowTags | None:
+        """Source and entity tags of the index rows, viewed in place
+
+        Returns:
+            RowTags: The tags, or None for a bundle written before they were
+                stored (format 1)
+        """
+        if "tags" not in self.header.sections:
+            return None
+        names = json.loads(self.section("tags").tobytes())
+        return RowTags(
+            names["sources"],
+            self.section("row_sources").view("<i4"),
+            names["entities"],
+            self.section("row_entity_offsets").view("<i8"),
+            self.section("row_entities").view("<i4"),
+        )
+
+    def cache_records(self) -> list[dict[str, Any]]:
+        """The ingestion cache records exported with the index"""
+        return json.loads(self.section("cache").tobytes())
+
+    def to_faiss(self, embeddings: Embeddings, copy: bool = False) -> FAISS:
+        """A LangChain FAISS store over the bundle
+
+        Args:
+            embeddings: The embedding model for queries
+            copy: Load an ordinary, writable store instead of reading the
+                bundle in place
+
+        Returns:
+            FAISS: The store
+        """
+        rows, _ = self.ids()
+        documents = self.documents()
+        docstore = InMemoryDocstore(dict(documents.items()) if copy else documents)
+        return FAISS(
+            embeddings,
+            self.index(copy=copy),
+            docstore,
+            dict(enumerate(rows)),
+            distance_strategy="MAX_INNER_PRODUCT",
+        )
@@ -0,0 +1,350 @@
+"""Markdown- and token-aware chunking.
+
+Text is cut into structural units first: headings, paragraphs, lists, tables,
+fenced code, and figures with their captions. Units are packed into chunks of
+at most `max_tokens` tokens. A heading starts a new chunk once the current one
+has reached `min_tokens`. Only a unit that is too large on its own is split,
+at sentence boundaries and then at token boundaries as a last resort.
+
+Token counts are computed once per unit in a single batched tokenizer call.
+Packing is a linear pass, so re-chunking a whole corpus takes seconds.
+"""
+
+import re
+from collections.abc import Iterable
+from typing import Any
+
+import numpy as np
+from pydantic import BaseModel
+
+from labrag.ingestion.tokens import count_tokens_batch, split_by_tokens
+
+HEADING = re.compile(r"^(#{1,6})\s+(.*)")
+IMAGE = re.compile(r"^!\[[^\]]*\]\([^)]*\)\s*$")
+CAPTION = re.compile(
+    r"^[*_]*(fig(ure)?|table|chart|photo|image|source|credit)\b", re.IGNORECASE
+)
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(\[])")
+
+# Tokens added by the separator when joining two pieces of text
+SEPARATOR_TOKENS = 1
+
+
+class Chunk(BaseModel):
+    """A piece of text ready to be embedded"""
+
+    text: str
+    tokens: int
+    section: str = ""
+
+
+class _Unit(BaseModel):
+    text: str
+    tokens: int = 0
+    heading_level: int = 0
+
+
+def _blocks(markdown: str) -> list[str]:
+    """Blank-line separated blocks, keeping fenced code blocks whole"""
+    blocks, current, in_fence = [], [], False
+    for line in markdown.splitlines():
+        if line.lstrip().startswith("```"):
+            in_fence = not in_fence
+        if not line.strip() and not in_fence:
+            if current:
+                blocks.append("\n".join(current))
+                current = []
+        else:
+            current.append(line)
+    if current:
+        blocks.append("\n".join(current))
+    return blocks
+
+
+def _is_figure(text: str) -> bool:
+    return bool(IMAGE.match(text.strip()))
+
+
+def _units(markdown: str) -> list[_Unit]:
+    """Structural units, with figures and their captions glued together"""
+    units: list[_Unit] = []
+    for block in _blocks(markdown):
+        heading = HEADING.match(block)
+        previous = units[-1] if units else None
+        if (
+            previous is not None
+            and not heading
+            and not previous.heading_level
+            and (
+                (_is_figure(previous.text) and CAPTION.match(block))
+                or (CAPTION.match(previous.text) and _is_figure(block))
+            )
+        ):
+            previous.text += "\n\n" + block
+            continue
+        units.append(
+            _Unit(text=block, heading_level=len(heading.group(1)) if heading else 0)
+        )
+    return units
+
+
+def _split_sentences(text: str, max_tokens: int) -> list[str]:
+    """Pack sentences into pieces of at most max_tokens tokens"""
+    sentences = [s for s in SENTENCE_END.split(text) if s.strip()]
+    counts = count_tokens_batch(sentences)
+
+    pieces, current, current_tokens = [], [], 0
+    for sentence, tokens in zip(sentences, counts, strict=True):
+        if tokens > max_tokens:
+            if current:
+                pieces.append(" ".join(current))
+                current, current_tokens = [], 0
+            pieces += split_by_tokens(sentence, max_tokens)
+            continue
+        if current and current_tokens + tokens + SEPARATOR_TOKENS > max_tokens:
+            pieces.append(" ".join(current))
+            current, current_tokens = [], 0
+        current.append(sentence)
+        current_tokens += tokens + SEPARATOR_TOKENS
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+
+class _Packer:
+    """Greedy packing of units into chunks, tracking the heading path"""
+
+    def __init__(self, max_tokens: int, min_tokens: int) -> None:
+        self.max_tokens = max_tokens
+        self.min_tokens = min_tokens
+        self.chunks: list[Chunk] = []
+        self.current: list[_Unit] = []
+        self.tokens = 0
+        self.headings: list[str] = []
+        self.section = ""
+
+    def path(self) -> str:
+        return " > ".join(self.headings)
+
+    def flush(self) -> None:
+        if self.current:
+            self.chunks.append(
+                Chunk(
+                    text="\n\n".join(u.text for u in self.current),
+                    tokens=self.tokens,
+                    section=self.section,
+                )
+            )
+        self.current, self.tokens = [], 0
+
+    def pop_headings(self) -> list[_Unit]:
+        """Remove the headings at the end of the current chunk"""
+        headings = []
+        while self.current and self.current[-1].heading_level:
+            headings.insert(0, self.current.pop())
+        self.tokens -= sum(u.tokens + SEPARATOR_TOKENS for u in headings)
+        return headings
+
+    def start_section(self, heading: _Unit) -> None:
+        """A heading closes the current chunk, unless it is still too small or
+        holds only headings"""
+        if self.tokens >= self.min_tokens and not all(
+            u.heading_level for u in self.current
+        ):
+            self.flush()
+        self.headings = self.headings[: heading.heading_level - 1]
+        self.headings.append(HEADING.match(heading.text).group(2).strip())
+
+    def add(self, unit: _Unit) -> bool:
+        """Append a unit, starting a new chunk when it doesn't fit
+
+        Returns:
+            bool: False, with nothing added, when the unit doesn't fit even in
+            a new chunk under the headings it follows (the caller splits it)
+        """
+        if self.tokens + unit.tokens + SEPARATOR_TOKENS > self.max_tokens:
+            # Never end a chunk with a heading, apart from its text
+            headings = self.pop_headings()
+            reserved = sum(h.tokens + SEPARATOR_TOKENS for h in headings)
+            if reserved + unit.tokens + SEPARATOR_TOKENS > self.max_tokens:
+                self.current += headings
+                self.tokens += reserved
+                return False
+            self.flush()
+            for heading in headings:
+                self.add(heading)
+        if all(u.heading_level for u in self.current):
+            self.section = self.path()
+        self.current.append(unit)
+        self.tokens += unit.tokens + SEPARATOR_TOKENS
+        return True
+
+
+class MarkdownChunker:
+    """Split markdown along its structure into token-bounded chunks"""
+
+    def __init__(self, max_tokens: int = 800, min_tokens: int = 100) -> None:
+        """Initialize the chunker
+
+        Args:
+            max_tokens: Upper bound on chunk size
+            min_tokens: Chunks smaller than this are merged with their
+                neighbours where possible (headings don't split them off)
+        """
+        if not 0 <= min_tokens < max_tokens:
+            raise ValueError("min_tokens must be at least 0 and below max_tokens")
+        self.max_tokens = max_tokens
+        self.min_tokens = min_tokens
+
+    def split(self, markdown: str) -> list[Chunk]:
+        """Chunk a markdown document
+
+        Args:
+            markdown: The document
+
+        Returns:
+            list[Chunk]: The chunks in document order, with their token count
+            and the heading path they start under
+        """
+        units = _units(markdown)
+        for unit, tokens in zip(
+            units, count_tokens_batch([u.text for u in units]), strict=True
+        ):
+            unit.tokens = tokens
+
+        packer = _Packer(self.max_tokens, self.min_tokens)
+        for unit in units:
+            if unit.heading_level:
+                packer.start_section(unit)
+            # Too large alone, or alongside the headings it must start under
+            if unit.tokens + SEPARATOR_TOKENS > self.max_tokens or not packer.add(unit):
+                headings = packer.pop_headings()
+                packer.flush()
+                packer.chunks += self._split_unit(unit, headings, packer.path())
+        packer.flush()
+        return packer.chunks
+
+    def _split_unit(
+        self, unit: _Unit, headings: list[_Unit], section: str
+    ) -> list[Chunk]:
+        """Split an oversized unit by lines (lists, tables) or sentences
+
+        The headings it sits under are kept at the top of the first piece.
+        """
+        reserved = sum(h.tokens + SEPARATOR_TOKENS for h in headings)
+        budget = max(1, self.max_tokens - reserved)
+
+        lines = unit.text.splitlines()
+        counts = count_tokens_batch(lines)
+        if len(lines) > 1 and max(counts) + SEPARATOR_TOKENS <= budget:
+            pieces = self._pack(lines, counts, "\n", budget)
+        else:
+            sentences = _split_sentences(unit.text, budget - SEPARATOR_TOKENS)
+            pieces = self._pack(sentences, count_tokens_batch(sentences), " ", budget)
+
+        if headings:
+            first = pieces[0]
+            pieces[0] = Chunk(
+                text="\n\n".join([*(h.text for h in headings), first.text]),
+                tokens=first.tokens + reserved,
+            )
+        return [piece.model_copy(update={"section": section}) for piece in pieces]
+
+    @staticmethod
+    def _pack(
+        parts: list[str], counts: list[int], separator: str, max_tokens: int
+    ) -> list[Chunk]:
+        chunks, current, current_tokens = [], [], 0
+        for part, tokens in zip(parts, counts, strict=True):
+            if current and current_tokens + tokens + SEPARATOR_TOKENS > max_tokens:
+                chunks.append(
+                    Chunk(text=separator.join(current), tokens=current_tokens)
+                )
+                current, current_tokens = [], 0
+            current.append(part)
+            current_tokens += tokens + SEPARATOR_TOKENS
+        if current:
+            chunks.append(Chunk(text=separator.join(current), tokens=current_tokens))
+        return chunks
+
+    def merge_pdf_chunks(self, chunks: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Resize parser chunks: split big ones, merge small ones within a page
+
+        Well-sized chunks are kept as the parser cut them. Oversized ones are
+        re-split with `split`, and undersized chunks (captions, headers, short
+        paragraphs) are merged with their neighbours on the same page.
+
+        Args:
+            chunks: Parser chunks with "content" and "page"
+
+        Returns:
+            Chunks with "content", "page" and "tokens"
+        """
+        pieces: list[dict[str, Any]] = []
+        counts = count_tokens_batch([chunk["content"] for chunk in chunks])
+        for chunk, tokens in zip(chunks, counts, strict=True):
+            if tokens > self.max_tokens:
+                pieces += [
+                    {"content": c.text, "page": chunk["page"], "tokens": c.tokens}
+                    for c in self.split(chunk["content"])
+                ]
+            else:
+                pieces.append({**chunk, "tokens": tokens})
+
+        merged: list[dict[str, Any]] = []
+        for piece in pieces:
+            previous = merged[-1] if merged else None
+            if (
+                previous is not None
+                and previous["page"] == piece["page"]
+                and previous["tokens"] + piece["tokens"] + SEPARATOR_TOKENS
+                <= self.max_tokens
+                and min(previous["tokens"], piece["tokens"]) < self.min_tokens
+            ):
+                previous["content"] += "\n\n" + piece["content"]
+                previous["tokens"] += piece["tokens"] + SEPARATOR_TOKENS
+            else:
+                merged.append(
+                    {
+                        "content": piece["content"],
+                        "page": piece["page"],
+                        "tokens": piece["tokens"],
+                    }
+                )
+        return merged
+
+
+def chunk_size_summary(token_counts: Iterable[int]) -> dict[str, float]:
+    """Distribution of chunk sizes in tokens
+
+    Returns:
+        Count, total, mean, min, p10, p50, p90, p99 and max
+    """
+    counts = np.fromiter(token_counts, dtype=np.int64)
+    if not counts.size:
+        return {"count": 0}
+
+    p10, p50, p90, p99 = np.percentile(counts, [10, 50, 90, 99])
+    return {
+        "count": int(counts.size),
+        "total": int(counts.sum()),
+        "mean": float(counts.mean()),
+        "min": int(counts.min()),
+        "p10": float(p10),
+        "p50": float(p50),
+        "p90": float(p90),
+        "p99": float(p99),
+        "max": int(counts.max()),
+    }
+
+
+def describe_chunk_sizes(token_counts: Iterable[int]) -> str:
+    """One-line summary of a chunk size distribution, for logs"""
+    s = chunk_size_summary(token_counts)
+    if not s["count"]:
+        return "no chunks"
+    return (
+        f"{s['count']} chunks, {s['total']} tokens; tokens per chunk: "
+        f"min {s['min']}, p10 {s['p10']:.0f}, median {s['p50']:.0f}, "
+        f"p90 {s['p90']:.0f}, p99 {s['p99']:.0f}, max {s['max']}"
+    )
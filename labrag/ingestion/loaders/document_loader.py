@@ -1,9 +1,18 @@
+import asyncio
+from itertools import groupby
+
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 from loguru import logger
 
+from labrag.ingestion.loaders.chunker import MarkdownChunker
 from labrag.ingestion.loaders.vector_store import VectorStore
-from labrag.ingestion.parsers.models import PDFParseResult, URLParseResult
+from labrag.ingestion.parsers.models import (
+    ParsedDocument,
+    PDFParseResult,
+    URLParseResult,
+)
+from labrag.ingestion.tokens import count_tokens_batch
 
 
 class DocumentLoader:
@@ -11,11 +20,26 @@ class DocumentLoader:
 
     def __init__(
         self,
-        vector_store: VectorStore,
+        vector_store: VectorStore | None,
         chunk_size: int = 5000,
         chunk_overlap: int = 200,
+        chunker: MarkdownChunker | None = None,
+        child_chunker: MarkdownChunker | None = None,
     ) -> None:
+        """Initialize the loader
+
+        Args:
+            vector_store: The vector store to load into (None to only chunk)
+            chunk_size: Characters per URL chunk for the recursive splitter
+            chunk_overlap: Characters shared by consecutive recursive chunks
+            chunker: Token-aware chunker; when given it splits URL content and
+                resizes PDF chunks instead of the recursive splitter
+            child_chunker: Enables parent/child chunking (see
+                `build_documents`): cuts the small chunks that are embedded
+        """
         self.vector_store = vector_store
+        self.chunker = chunker
+        self.child_chunker = child_chunker
 
         # Text splitter for URLs (PDFs come pre-chunked from LandingAI)
         self.text_splitter = RecursiveCharacterTextSplitter(
@@ -23,79 +47,252 @@ class DocumentLoader:
             chunk_overlap=chunk_overlap,
         )
 
-    def load_pdf_result(self, pdf_result: PDFParseResult) -> bool:
-        """Load PDF chunks (already chunked by LandingAI)"""
-        try:
-            documents = []
-
-            for i, chunk in enumerate(pdf_result.chunks):
-                # Prepare metadata
-                metadata = pdf_result.metadata.copy()
-                target_keys = ["source", "source_type", "source_url", "parsing_method"]
-                filtered_metadata = {
-                    k: v for k, v in metadata.items() if k in target_keys
+    def build_pdf_documents(self, pdf_result: PDFParseResult) -> list[Document]:
+        """Turn PDF chunks (already chunked by LandingAI) into documents"""
+        chunks = pdf_result.chunks
+        if self.chunker is not None:
+            chunks = self.chunker.merge_pdf_chunks(chunks)
+
+        documents = []
+        for i, chunk in enumerate(chunks):
+            # Prepare metadata
+            metadata = pdf_result.metadata.copy()
+            target_keys = ["source", "source_type", "source_url", "parsing_method"]
+            filtered_metadata = {k: v for k, v in metadata.items() if k in target_keys}
+            filtered_metadata.update(
+                {
+                    "page": chunk["page"],
+                    "chunk_index": i,
+                    "total_chunks": len(chunks),
                 }
-                filtered_metadata.update(
-                    {
-                        "page": chunk["page"],
-                        "chunk_index": i,
-                        "total_chunks": len(pdf_result.chunks),
-                    }
-                )
+            )
+            if "tokens" in chunk:
+                filtered_metadata["tokens"] = chunk["tokens"]
+
+            # Create LangChain Document with metadata
+            doc = Document(
+                id=f"{i}-{pdf_result.metadata['source']}",
+                page_content=chunk["content"],
+                metadata=filtered_metadata,
+            )
+            documents.append(doc)
 
-                # Create LangChain Document with metadata
-                doc = Document(
-                    id=f"{i}-{pdf_result.metadata['source']}",
-                    page_content=chunk["content"],
-                    metadata=filtered_metadata,
+        return documents
+
+    def build_url_documents(self, url_result: URLParseResult) -> list[Document]:
+        """Split URL content into chunked documents"""
+        # Split content into chunks
+        if self.chunker is not None:
+            chunks = self.chunker.split(url_result.content)
+            text_chunks = [chunk.text for chunk in chunks]
+        else:
+            chunks, text_chunks = (
+                None,
+                self.text_splitter.split_text(url_result.content),
+            )
+
+        documents = []
+        for i, chunk_text in enumerate(text_chunks):
+            # Prepare    metadata
+            metadata = url_result.metadata.copy()
+            metadata.update(
+                {
+                    "chunk_index": i,
+                    "total_chunks": len(text_chunks),
+                }
+            )
+            if chunks is not None:
+                metadata.update(tokens=chunks[i].tokens, section=chunks[i].section)
+
+            # Create LangChain Document with metadata
+            doc = Document(
+                id=f"{i}-{url_result.metadata['source']}",
+                page_content=chunk_text,
+                metadata=metadata,
+            )
+            documents.append(doc)
+
+        return documents
+
+    def build_documents(
+        self, result: ParsedDocument
+    ) -> tuple[list[Document], list[Document]]:
+        """Chunks to embed and, with parent/child chunking, their parents
+
+        Without a child chunker the chunks are those of `build_pdf_documents`
+        or `build_url_documents`, and there are no parents. With one, the
+        parents are whole pages for PDFs and the usual chunks (sections) for
+        URLs; the embedded chunks are small pieces of them pointing back to
+        their parent through `parent_id`.
+
+        Returns:
+            tuple: The chunks to embed and the parent documents to store
+        """
+        if self.child_chunker is None:
+            if isinstance(result, PDFParseResult):
+                return self.build_pdf_documents(result), []
+            return self.build_url_documents(result), []
+
+        if isinstance(result, PDFParseResult):
+            parents, children = self._pdf_pages(result)
+        else:
+            parents, children = self._url_sections(result)
+
+        documents = []
+        for i, (parent, text, tokens) in enumerate(children):
+            metadata = {
+                **parent.metadata,
+                "chunk_index": i,
+                "total_chunks": len(children),
+                "tokens": tokens,
+                "parent_id": parent.id,
+            }
+            documents.append(
+                Document(
+                    id=f"{i}-{result.metadata['source']}",
+                    page_content=text,
+                    metadata=metadata,
                 )
-                documents.append(doc)
+            )
+        return documents, parents
+
+    def _pdf_pages(
+        self, pdf_result: PDFParseResult
+    ) -> tuple[list[Document], list[tuple[Document, str, int]]]:
+        """PDF pages as parents, and the parser's chunks resized as children"""
+        source = pdf_result.metadata["source"]
+        target_keys = ["source", "source_type", "source_url", "parsing_method"]
+        base = {k: v for k, v in pdf_result.metadata.items() if k in target_keys}
+
+        parents, children = [], []
+        pages = groupby(pdf_result.chunks, key=lambda chunk: chunk["page"])
+        for page, chunks in pages:
+            chunks = list(chunks)
+            text = "\n\n".join(chunk["content"] for chunk in chunks)
+            parent = Document(
+                id=f"parent-{len(parents)}-{source}",
+                page_content=text,
+                metadata={**base, "page": page},
+            )
+            parents.append(parent)
+            children += [
+                (parent, piece["content"], piece["tokens"])
+                for piece in self.child_chunker.merge_pdf_chunks(chunks)
+            ]
+
+        counts = count_tokens_batch([parent.page_content for parent in parents])
+        for parent, tokens in zip(parents, counts, strict=True):
+            parent.metadata["tokens"] = tokens
+        return parents, children
+
+    def _url_sections(
+        self, url_result: URLParseResult
+    ) -> tuple[list[Document], list[tuple[Document, str, int]]]:
+        """URL chunks as parents, each split again into children"""
+        source = url_result.metadata["source"]
+        parents, children = [], []
+        for i, section in enumerate(self.build_url_documents(url_result)):
+            metadata = {
+                k: v
+                for k, v in section.metadata.items()
+                if k not in ("chunk_index", "total_chunks")
+            }
+            parent = Document(
+                id=f"parent-{i}-{source}",
+                page_content=section.page_content,
+                metadata=metadata,
+            )
+            parents.append(parent)
+            children += [
+                (parent, piece.text, piece.tokens)
+                for piece in self.child_chunker.split(section.page_content)
+            ]
+        return parents, children
 
-            # Add documents to vector store
+    def load_pdf_result(self, pdf_result: PDFParseResult) -> int | None:
+        """Load PDF chunks (already chunked by LandingAI)
+
+        Returns:
+            The number of chunks loaded, or None if loading failed
+        """
+        try:
+            documents = self.build_pdf_documents(pdf_result)
+
+            # Add documents to vector store, replacing any earlier version
+            self.vector_store.delete_source(pdf_result.metadata["source"])
             self.vector_store.add_documents(documents)
             logger.success(
                 f"Loaded {len(documents)} PDF chunks from "
                 f"{pdf_result.metadata['source']}"
             )
-            return True
+            return len(documents)
 
         except Exception as e:
             logger.error(f"Failed to load PDF: {e}")
-            return False
+            return None
+
+    async def aload_pdf_result(self, pdf_result: PDFParseResult) -> int | None:
+        """Load PDF chunks, embedding concurrently with other files
 
-    def load_url_result(self, url_result: URLParseResult) -> bool:
-        """Load URL content (needs chunking with text splitter)"""
+        Returns:
+            The number of chunks loaded, or None if loading failed
+        """
         try:
-            # Split content into chunks
-            text_chunks = self.text_splitter.split_text(url_result.content)
-
-            documents = []
-            for i, chunk_text in enumerate(text_chunks):
-                # Prepare    metadata
-                metadata = url_result.metadata.copy()
-                metadata.update(
-                    {
-                        "chunk_index": i,
-                        "total_chunks": len(text_chunks),
-                    }
-                )
+            documents = self.build_pdf_documents(pdf_result)
+            await asyncio.to_thread(
+                self.vector_store.delete_source, pdf_result.metadata["source"]
+            )
+            await self.vector_store.aadd_documents(documents)
+            logger.success(
+                f"Loaded {len(documents)} PDF chunks from "
+                f"{pdf_result.metadata['source']}"
+            )
+            return len(documents)
 
-                # Create LangChain Document with metadata
-                doc = Document(
-                    id=f"{i}-{url_result.metadata['source']}",
-                    page_content=chunk_text,
-                    metadata=metadata,
-                )
-                documents.append(doc)
+        except Exception as e:
+            logger.error(f"Failed to load PDF: {e}")
+            return None
 
-            # Add documents to vector store
+    def load_url_result(self, url_result: URLParseResult) -> int | None:
+        """Load URL content (needs chunking with text splitter)
+
+        Returns:
+            The number of chunks loaded, or None if loading failed
+        """
+        try:
+            documents = self.build_url_documents(url_result)
+
+            # Add documents to vector store, replacing any earlier version
+            self.vector_store.delete_source(url_result.metadata["source"])
             self.vector_store.add_documents(documents)
             logger.success(
                 f"Loaded {len(documents)} URL chunks from "
                 f"{url_result.metadata['source']}"
             )
-            return True
+            return len(documents)
+
+        except Exception as e:
+            logger.error(f"Failed to load URL: {e}")
+            return None
+
+    async def aload_url_result(self, url_result: URLParseResult) -> int | None:
+        """Load URL content, embedding concurrently with other sources
+
+        Returns:
+            The number of chunks loaded, or None if loading failed
+        """
+        try:
+            documents = self.build_url_documents(url_result)
+            await asyncio.to_thread(
+                self.vector_store.delete_source, url_result.metadata["source"]
+            )
+            await self.vector_store.aadd_documents(documents)
+            logger.success(
+                f"Loaded {len(documents)} URL chunks from "
+                f"{url_result.metadata['source']}"
+            )
+            return len(documents)
 
         except Exception as e:
             logger.error(f"Failed to load URL: {e}")
-            return False
+            return None
@@ -0,0 +1,119 @@
+"""Micro-batching of concurrent query embeddings."""
+
+import asyncio
+
+from langchain_core.embeddings import Embeddings
+from langchain_openai import OpenAIEmbeddings
+from loguru import logger
+
+# Providers whose query embedding is the document embedding of the query text,
+# so a batch of queries can go through `aembed_documents`. Other embeddings opt
+# in with a truthy `symmetric_queries` attribute.
+SYMMETRIC_EMBEDDINGS: tuple[type[Embeddings], ...] = (OpenAIEmbeddings,)
+
+
+def embeds_queries_as_documents(embeddings: Embeddings) -> bool:
+    """Whether a provider embeds a query exactly like a document
+
+    Some providers (instruction-tuned models, APIs with an input type) embed
+    queries differently; their queries can't share a document call.
+    """
+    return isinstance(embeddings, SYMMETRIC_EMBEDDINGS) or bool(
+        getattr(embeddings, "symmetric_queries", False)
+    )
+
+
+class QueryEmbeddingBatcher:
+    """Coalesce concurrent query embeddings into a single provider call.
+
+    Queries arriving within `max_wait_ms` of each other (or until
+    `max_batch_size` is reached) are sent together through
+    `aembed_documents`, so N concurrent searches cost one round trip. For
+    providers that embed queries differently (see
+    `embeds_queries_as_documents`), each unique query of a batch goes through
+    `aembed_query` instead, concurrently.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        max_batch_size: int = 64,
+        max_wait_ms: float = 10.0,
+    ) -> None:
+        """Initialize the batcher
+
+        Args:
+            embeddings: The embedding model used for queries
+            max_batch_size: Flush as soon as this many queries are pending
+            max_wait_ms: Maximum time the first query waits for companions
+        """
+        self.embeddings = embeddings
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.symmetric = embeds_queries_as_documents(embeddings)
+        self._pending: list[tuple[str, asyncio.Future]] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+        # The loop only keeps weak references to tasks: hold the batches in
+        # flight so they aren't collected before resolving their futures
+        self._tasks: set[asyncio.Task] = set()
+
+    async def aembed_query(self, text: str) -> list[float]:
+        """Embed a query, sharing the provider call with concurrent callers
+
+        Args:
+            text: The query to embed
+
+        Returns:
+            list[float]: The query embedding
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_wait_ms / 1000, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        """Send all pending queries as one batch"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._embed_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _embed_texts(self, texts: list[str]) -> list[list[float]]:
+        """Embed unique query texts with as few provider calls as allowed"""
+        if self.symmetric:
+            return await self.embeddings.aembed_documents(texts)
+        return list(
+            await asyncio.gather(*(self.embeddings.aembed_query(t) for t in texts))
+        )
+
+    async def _embed_batch(self, batch: list[tuple[str, asyncio.Future]]) -> None:
+        """Embed a batch of queries and resolve their futures"""
+        # Identical questions (common in regression sets) are embedded once
+        unique_texts = list(dict.fromkeys(text for text, _ in batch))
+        try:
+            vectors = await self._embed_texts(unique_texts)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        by_text = dict(zip(unique_texts, vectors, strict=True))
+        for text, future in batch:
+            if not future.done():
+                future.set_result(by_text[text])
+
+        logger.debug(
+            f"Embedded {len(batch)} queries ({len(unique_texts)} unique) in one call"
+        )
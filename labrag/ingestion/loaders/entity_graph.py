@@ -0,0 +1,263 @@
+"""Entity co-occurrence graph over the indexed chunks.
+
+Chunks are tagged at ingestion with the entities they mention (see
+`labrag.ingestion.entities`). The graph is derived from those tags whenever
+the index is loaded or changed, and keeps three adjacency indexes:
+
+- entity -> chunk rows mentioning it (postings)
+- entity -> entities mentioned in the same chunks, strongest first
+- chunk row -> source
+
+Only relational or cross-document questions use the graph: those naming two
+entities, an entity and another entity type ("Which populations carry PPP3CA
+variants?"), or asking across sources ("Which genes appear in both the paper
+and the media coverage?"). A question that merely mentions a type ("Which
+genes were studied?") is left to the vector search.
+
+The chunks mentioning the named entities are used, together with their
+strongest neighbors of any entity type the question asks about. A question
+naming only a type starts from the entities of that type found in the most
+sources. Chunks are then picked greedily so every (entity, source) pair is
+covered by as few chunks as possible.
+"""
+
+import math
+import re
+import time
+from collections import Counter, defaultdict
+
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from loguru import logger
+from pydantic import BaseModel
+
+from labrag.ingestion.entities import ENTITY_TYPES, split_key
+from labrag.ingestion.loaders.row_tags import RowTags
+from labrag.metrics import metrics
+
+# Words that ask about an entity type
+TYPE_WORDS = {
+    "gene": {"gene", "genes", "locus", "loci"},
+    "population": {"population", "populations", "people", "peoples", "ancestry"},
+    "disease": {"disease", "diseases", "infection", "infections", "condition"},
+    "method": {"method", "methods", "statistic", "statistics", "tool", "tools"},
+}
+# Words that ask about several sources at once
+CROSS_DOCUMENT_WORDS = {
+    "both",
+    "across",
+    "between",
+    "compare",
+    "compared",
+    "comparing",
+    "versus",
+    "vs",
+    "common",
+    "shared",
+    "overlap",
+}
+# Neighbors of each named entity considered, and their weight against the
+# named entities themselves
+NEIGHBORS = 5
+NEIGHBOR_WEIGHT = 0.5
+# Entities of an asked-for type considered when the question names none
+TYPE_ENTITIES = 10
+
+TOKEN = re.compile(r"[\w'-]+")
+
+
+def _tokens(text: str) -> list[str]:
+    return TOKEN.findall(text.lower())
+
+
+class GraphHits(BaseModel):
+    """Chunks picked through the graph and the entities that led to them"""
+
+    docs: list[Document]
+    entities: list[str]
+
+
+class EntityGraph:
+    """Adjacency indexes over the entity tags of a FAISS store's chunks"""
+
+    def __init__(self, store: FAISS, tags: RowTags | None = None) -> None:
+        """Build the graph from the `entities` metadata of the indexed chunks
+
+        Args:
+            store: A LangChain FAISS store (parent documents are ignored)
+            tags: The sources and entities of the index rows (default: read
+                from the chunks' metadata)
+        """
+        start = time.perf_counter()
+        self.store = store
+        tags = tags or RowTags.from_store(store)
+        rows = tags.rows
+
+        self.keys = list(tags.entities)
+        self.ids = {key: entity for entity, key in enumerate(self.keys)}
+        postings: list[list[int]] = [[] for _ in self.keys]
+        cooccurrence: dict[int, Counter] = defaultdict(Counter)
+        self.row_source = tags.row_sources
+
+        for row in range(rows):
+            entities = tags.entities_of(row).tolist()
+            for entity in entities:
+                postings[entity].append(row)
+            for entity in entities:
+                for other in entities:
+                    if other != entity:
+                        cooccurrence[entity][other] += 1
+
+        self.postings = [np.array(found, dtype=np.int64) for found in postings]
+        self.neighbors = [cooccurrence[e].most_common() for e in range(len(self.keys))]
+        self.source_counts = np.array(
+            [len(np.unique(self.row_source[found])) for found in self.postings],
+            dtype=np.int32,
+        )
+        self.types = [split_key(key)[0] for key in self.keys]
+
+        # Lower-cased entity names as token tuples, for matching questions
+        self.names: dict[tuple[str, ...], list[int]] = defaultdict(list)
+        for entity, key in enumerate(self.keys):
+            self.names[tuple(_tokens(split_key(key)[1]))].append(entity)
+        self.max_name_tokens = max((len(name) for name in self.names), default=0)
+        self.chunk_count = rows
+
+        self.build_seconds = time.perf_counter() - start
+        logger.debug(
+            f"Built entity graph: {len(self.keys)} entities, "
+            f"{self.edge_count} edges over {rows} chunks in "
+            f"{self.build_seconds:.3f}s"
+        )
+
+    @property
+    def entity_count(self) -> int:
+        """Number of distinct entities"""
+        return len(self.keys)
+
+    @property
+    def edge_count(self) -> int:
+        """Number of co-occurring entity pairs"""
+        return sum(len(neighbors) for neighbors in self.neighbors) // 2
+
+    def _idf(self, entity: int) -> float:
+        return math.log(1 + self.chunk_count / len(self.postings[entity]))
+
+    def match(self, query: str) -> tuple[list[int], list[str]]:
+        """Entities named in a question, and the entity types it asks about
+
+        Names are matched on whole words, longest first; a trailing "s"
+        ("Amazonians") is allowed.
+
+        Returns:
+            tuple: Entity ids and entity types
+        """
+        tokens = _tokens(query)
+        seeds: dict[int, None] = {}
+        i = 0
+        while i < len(tokens):
+            for size in range(min(self.max_name_tokens, len(tokens) - i), 0, -1):
+                name = tokens[i : i + size]
+                found = self.names.get(tuple(name)) or self.names.get(
+                    (*name[:-1], name[-1].removesuffix("s"))
+                )
+                if found:
+                    seeds.update(dict.fromkeys(found))
+                    i += size
+                    break
+            else:
+                i += 1
+
+        words = set(tokens)
+        types = [t for t in ENTITY_TYPES if TYPE_WORDS[t] & words]
+        return list(seeds), types
+
+    def is_relational(self, query: str, seeds: list[int], types: list[str]) -> bool:
+        """Whether a question relates entities or sources, given what it matched
+
+        That is two named entities, a named entity and an entity type other
+        than its own, or a cross-document word with any entity or type.
+        """
+        if len(seeds) > 1:
+            return True
+        if seeds and set(types) - {self.types[e] for e in seeds}:
+            return True
+        return bool((seeds or types) and CROSS_DOCUMENT_WORDS & set(_tokens(query)))
+
+    def _weights(self, seeds: list[int], types: list[str]) -> dict[int, float]:
+        """Weights of the entities a question's chunks should cover"""
+        if not seeds:
+            of_type = [e for e, t in enumerate(self.types) if t in types]
+            # Entities found across many sources (and chunks) first
+            of_type.sort(key=lambda e: (-self.source_counts[e], -len(self.postings[e])))
+            return {entity: 1.0 for entity in of_type[:TYPE_ENTITIES]}
+
+        weights = {entity: self._idf(entity) for entity in seeds}
+        for entity in seeds:
+            neighbors = [
+                other
+                for other, _ in self.neighbors[entity]
+                if not types or self.types[other] in types
+            ]
+            for other in neighbors[:NEIGHBORS]:
+                weights.setdefault(other, NEIGHBOR_WEIGHT * self._idf(other))
+        return weights
+
+    def search(self, query: str, limit: int) -> GraphHits | None:
+        """Chunks covering the entities of a question
+
+        Args:
+            query: The question
+            limit: Maximum number of chunks
+
+        Returns:
+            GraphHits: The chunks, best first, or None when the question is
+                not relational (see `is_relational`)
+        """
+        with metrics.timer("vector_store.graph_search"):
+            seeds, types = self.match(query)
+            if not self.is_relational(query, seeds, types):
+                return None
+            weights = self._weights(seeds, types)
+            if not weights:
+                return None
+
+            # Candidate rows and the weighted entities they mention; with
+            # named entities, only rows mentioning one of them
+            row_entities: dict[int, list[int]] = defaultdict(list)
+            for entity in weights:
+                for row in self.postings[entity].tolist():
+                    row_entities[row].append(entity)
+            if seeds:
+                named = set(seeds)
+                row_entities = {
+                    row: entities
+                    for row, entities in row_entities.items()
+                    if named.intersection(entities)
+                }
+
+            chosen, covered = [], set()
+            while len(chosen) < limit and row_entities:
+                best, best_gain = None, 0.0
+                for row, entities in row_entities.items():
+                    source = self.row_source[row]
+                    gain = sum(
+                        weights[e] for e in entities if (e, source) not in covered
+                    )
+                    if gain > best_gain:
+                        best, best_gain = row, gain
+                if best is None:
+                    break
+                source = self.row_source[best]
+                covered.update((e, source) for e in row_entities.pop(best))
+                chosen.append(best)
+
+            docs = [
+                self.store.docstore.search(self.store.index_to_docstore_id[row])
+                for row in chosen
+            ]
+            entities = seeds or list(weights)
+            return GraphHits(
+                docs=docs, entities=[split_key(self.keys[e])[1] for e in entities]
+            )
@@ -0,0 +1,116 @@
+"""Document-level routing over the chunk index.
+
+A flat search compares the query with every chunk of every source. The router
+adds a second, much smaller level: one vector per source (the normalized mean
+of its chunk vectors). A query is first scored against the source vectors, and
+only the chunks of the best `top_documents` sources are then scored, which
+keeps query cost proportional to the chunks of a few sources instead of the
+whole corpus.
+
+The router reads the chunk vectors in place from a flat FAISS index (no copy)
+and is derived from it whenever the index changes, so it is always consistent
+with the snapshot being searched.
+"""
+
+import time
+
+import faiss
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from loguru import logger
+
+from labrag.ingestion.loaders.row_tags import RowTags
+from labrag.metrics import metrics
+
+
+class DocumentRouter:
+    """Source vectors and per-source chunk rows of a flat FAISS index"""
+
+    def __init__(self, store: FAISS, tags: RowTags | None = None) -> None:
+        """Build the routing level from a LangChain FAISS store
+
+        Args:
+            store: A store over a flat inner-product index
+            tags: The sources of the index rows (default: read from the
+                chunks' metadata)
+
+        Raises:
+            ValueError: The index is not flat or not inner-product
+        """
+        index = store.index
+        if not isinstance(index, faiss.IndexFlat) or (
+            index.metric_type != faiss.METRIC_INNER_PRODUCT
+        ):
+            raise ValueError("Document routing needs a flat inner-product index")
+
+        start = time.perf_counter()
+        self.store = store
+        # Keeps the index (and the memory viewed below) alive
+        self.index = index
+        self.vectors = faiss.rev_swig_ptr(
+            index.get_xb(), index.ntotal * index.d
+        ).reshape(index.ntotal, index.d)
+
+        tags = tags or RowTags.from_store(store)
+        self.sources = np.array(tags.sources, dtype=object)
+        groups = tags.row_sources
+        order = np.argsort(groups, kind="stable")
+        bounds = np.cumsum(np.bincount(groups, minlength=len(self.sources)))[:-1]
+        self.rows: list[np.ndarray] = np.split(order, bounds)
+
+        centroids = np.stack([self.vectors[rows].mean(axis=0) for rows in self.rows])
+        norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+        self.centroids = centroids / np.where(norms == 0, 1, norms)
+        self.build_seconds = time.perf_counter() - start
+        logger.debug(
+            f"Built document router over {len(self.sources)} sources in "
+            f"{self.build_seconds:.3f}s"
+        )
+
+    @property
+    def document_count(self) -> int:
+        """Number of sources"""
+        return len(self.sources)
+
+    def rank_documents(self, query: np.ndarray, top_documents: int) -> np.ndarray:
+        """Positions of the sources closest to the query, best first"""
+        scores = self.centroids @ query
+        if top_documents < len(scores):
+            top = np.argpartition(-scores, top_documents - 1)[:top_documents]
+        else:
+            top = np.arange(len(scores))
+        return top[np.argsort(-scores[top])]
+
+    def search(
+        self, embedding: list[float], k: int, top_documents: int
+    ) -> list[tuple[Document, float]]:
+        """Search the chunks of the sources closest to the query
+
+        Args:
+            embedding: The query vector
+            k: The number of chunks to return
+            top_documents: The number of sources whose chunks are searched
+
+        Returns:
+            list: (chunk, inner product) pairs, best first
+        """
+        with metrics.timer("vector_store.routed_search"):
+            query = np.asarray(embedding, dtype=np.float32)
+            documents = self.rank_documents(query, top_documents)
+            rows = np.concatenate([self.rows[i] for i in documents])
+
+            scores = self.vectors[rows] @ query
+            if k < len(scores):
+                best = np.argpartition(-scores, k - 1)[:k]
+            else:
+                best = np.arange(len(scores))
+            best = best[np.argsort(-scores[best])]
+
+            results = []
+            for position in best:
+                doc_id = self.store.index_to_docstore_id[int(rows[position])]
+                results.append(
+                    (self.store.docstore.search(doc_id), float(scores[position]))
+                )
+            return results
@@ -0,0 +1,80 @@
+"""Source and entity tags of each row of a FAISS index.
+
+The document router groups the rows of an index by source, and the entity
+graph by source and entity. Both read these tags rather than the chunks
+themselves, so a bundle, which stores them in sections of their own, can
+build either one without decoding a single document.
+"""
+
+import numpy as np
+from langchain_community.vectorstores import FAISS
+
+
+class RowTags:
+    """Per-row source and entity ids of an index, and the names behind them"""
+
+    def __init__(
+        self,
+        sources: list[str],
+        row_sources: np.ndarray,
+        entities: list[str],
+        entity_offsets: np.ndarray,
+        row_entities: np.ndarray,
+    ) -> None:
+        """Initialize the tags
+
+        Args:
+            sources: Source names ("None" for chunks without one)
+            row_sources: Position in `sources` of each row's source
+            entities: Entity keys ("type:name")
+            entity_offsets: Where each row's entities start in `row_entities`,
+                plus the end
+            row_entities: Positions in `entities`, row after row
+        """
+        self.sources = sources
+        self.row_sources = row_sources
+        self.entities = entities
+        self.entity_offsets = entity_offsets
+        self.row_entities = row_entities
+
+    @classmethod
+    def from_store(cls, store: FAISS) -> "RowTags":
+        """The tags in the metadata of every indexed chunk
+
+        Args:
+            store: A LangChain FAISS store (parent documents are ignored)
+        """
+        docstore = store.docstore._dict
+        rows = len(store.index_to_docstore_id)
+        sources: dict[str, int] = {}
+        entities: dict[str, int] = {}
+        row_sources = np.zeros(rows, dtype=np.int32)
+        entity_offsets = np.zeros(rows + 1, dtype=np.int64)
+        row_entities: list[int] = []
+
+        for row in range(rows):
+            metadata = docstore[store.index_to_docstore_id[row]].metadata
+            source = str(metadata.get("source"))
+            row_sources[row] = sources.setdefault(source, len(sources))
+            for key in metadata.get("entities", []):
+                row_entities.append(entities.setdefault(key, len(entities)))
+            entity_offsets[row + 1] = len(row_entities)
+
+        return cls(
+            list(sources),
+            row_sources,
+            list(entities),
+            entity_offsets,
+            np.array(row_entities, dtype=np.int32),
+        )
+
+    @property
+    def rows(self) -> int:
+        """Number of index rows"""
+        return len(self.row_sources)
+
+    def entities_of(self, row: int) -> np.ndarray:
+        """Positions in `entities` of the entities a row mentions"""
+        return self.row_entities[
+            self.entity_offsets[row] : self.entity_offsets[row + 1]
+        ]
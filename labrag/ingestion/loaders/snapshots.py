@@ -0,0 +1,213 @@
+"""Versioned, crash-safe snapshots of the vector index.
+
+Every save writes a complete snapshot (index, docstore and a manifest) into a
+temporary directory, fsyncs it and renames it into `snapshots/`. The
+`CURRENT` file names the live snapshot and is replaced atomically, so a crash
+leaves either the previous snapshot or the new one, never a mismatched
+index/docstore pair. The last few snapshots are kept for rollback.
+
+Writers in different processes (the API's upload worker, the ingest worker,
+the source watcher) take an exclusive lock on `LOCK` while they commit, so
+checking CURRENT, writing the snapshot and swapping CURRENT happen as one step.
+
+    data/vector_store/
+    ├── CURRENT                   # name of the live snapshot
+    ├── LOCK                      # held by the process committing a snapshot
+    └── snapshots/
+        ├── 000041-20261019T101500/
+        │   ├── index.faiss
+        │   ├── index.pkl
+        │   └── manifest.json
+        └── 000042-20261019T103000/
+"""
+
+import json
+import os
+import shutil
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+try:
+    import fcntl
+except ImportError:  # Windows: commits are only serialized within a process
+    fcntl = None
+
+CURRENT_FILE = "CURRENT"
+LOCK_FILE = "LOCK"
+MANIFEST_FILE = "manifest.json"
+_TMP_PREFIX = ".tmp-"
+
+
+def _fsync(path: Path) -> None:
+    """Flush a file or directory entry to disk"""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class SnapshotStore:
+    """Directory of numbered index snapshots with an atomic CURRENT pointer"""
+
+    def __init__(self, root: str | Path, keep: int = 5) -> None:
+        """Initialize the snapshot store
+
+        Args:
+            root: The vector store directory
+            keep: Number of snapshots to retain (the current one is never
+                removed)
+        """
+        self.root = Path(root)
+        self.snapshots_dir = self.root / "snapshots"
+        self.keep = max(1, keep)
+
+    @property
+    def current(self) -> str | None:
+        """Name of the live snapshot, or None before the first save"""
+        try:
+            name = (self.root / CURRENT_FILE).read_text().strip()
+        except FileNotFoundError:
+            return None
+        return name or None
+
+    @contextmanager
+    def lock(self) -> Iterator[None]:
+        """Hold the store's exclusive cross-process write lock"""
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.root / LOCK_FILE, "a") as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def path(self, name: str) -> Path:
+        """Directory of a snapshot"""
+        return self.snapshots_dir / name
+
+    def names(self) -> list[str]:
+        """Committed snapshots, oldest first"""
+        if not self.snapshots_dir.is_dir():
+            return []
+        return sorted(
+            path.name
+            for path in self.snapshots_dir.iterdir()
+            if path.is_dir() and not path.name.startswith(".")
+        )
+
+    def manifest(self, name: str) -> dict[str, Any]:
+        """Manifest of a snapshot (empty if it has none)"""
+        try:
+            return json.loads((self.path(name) / MANIFEST_FILE).read_text())
+        except FileNotFoundError:
+            return {}
+
+    def previous(self, name: str | None = None) -> str | None:
+        """The snapshot `name` replaced (default: the current one)
+
+        That is its parent if still retained (after a rollback, the parent
+        is not the snapshot numbered just before it), else the one before it.
+        """
+        names = self.names()
+        name = name or self.current
+        if name not in names:
+            return None
+        parent = self.manifest(name).get("parent")
+        if parent in names and parent < name:
+            return parent
+        position = names.index(name)
+        return names[position - 1] if position > 0 else None
+
+    def history(self) -> list[dict[str, Any]]:
+        """Summary of every snapshot, newest first"""
+        current = self.current
+        summaries = []
+        for name in reversed(self.names()):
+            manifest = self.manifest(name)
+            documents = manifest.pop("documents", None)
+            summaries.append(
+                {
+                    **manifest,
+                    "name": name,
+                    "current": name == current,
+                    "documents": None if documents is None else len(documents),
+                }
+            )
+        return summaries
+
+    def commit(self, write: Callable[[Path], None], manifest: dict[str, Any]) -> str:
+        """Write a new snapshot and make it current
+
+        Callers checking CURRENT first hold `lock()` around both.
+
+        Args:
+            write: Writes the index files into the directory it is given
+            manifest: JSON-serializable description stored with the snapshot
+                ("parent" defaults to the current snapshot)
+
+        Returns:
+            str: The name of the new snapshot
+        """
+        self.snapshots_dir.mkdir(parents=True, exist_ok=True)
+        # Left behind by a save that was interrupted before its rename
+        for stale in self.snapshots_dir.glob(f"{_TMP_PREFIX}*"):
+            shutil.rmtree(stale, ignore_errors=True)
+
+        name = self._next_name()
+        tmp = self.snapshots_dir / f"{_TMP_PREFIX}{name}"
+        tmp.mkdir()
+        try:
+            write(tmp)
+            (tmp / MANIFEST_FILE).write_text(
+                json.dumps(
+                    {
+                        "name": name,
+                        "created_at": datetime.now().isoformat(),
+                        "parent": self.current,
+                        **manifest,
+                    }
+                )
+            )
+            for file in tmp.iterdir():
+                _fsync(file)
+            _fsync(tmp)
+            tmp.rename(self.path(name))
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        _fsync(self.snapshots_dir)
+
+        self.set_current(name)
+        self._prune()
+        return name
+
+    def set_current(self, name: str) -> None:
+        """Atomically point CURRENT at a committed snapshot"""
+        if not self.path(name).is_dir():
+            raise ValueError(f"Unknown snapshot: {name}")
+
+        tmp = self.root / f"{CURRENT_FILE}.tmp"
+        with open(tmp, "w") as f:
+            f.write(f"{name}\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.root / CURRENT_FILE)
+        _fsync(self.root)
+
+    def _next_name(self) -> str:
+        names = self.names()
+        number = int(names[-1].split("-")[0]) + 1 if names else 1
+        return f"{number:06d}-{datetime.now():%Y%m%dT%H%M%S}"
+
+    def _prune(self) -> None:
+        """Remove the oldest snapshots beyond `keep`"""
+        current = self.current
+        for name in self.names()[: -self.keep]:
+            if name != current:
+                shutil.rmtree(self.path(name), ignore_errors=True)
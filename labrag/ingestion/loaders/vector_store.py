@@ -1,29 +1,203 @@
 # labrag/ingestion/loaders/vector_store.py
 
+import asyncio
+import threading
 from pathlib import Path
 from typing import Any
 
 from langchain_community.vectorstores import FAISS
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
 from langchain_core.vectorstores.base import VectorStoreRetriever
-from langchain_openai import OpenAIEmbeddings
 from loguru import logger
 
+from labrag.ingestion.loaders.bundle import BundleHeader, KnowledgeBundle, write_bundle
+from labrag.ingestion.loaders.embedding_batcher import QueryEmbeddingBatcher
+from labrag.ingestion.loaders.entity_graph import EntityGraph
+from labrag.ingestion.loaders.routing import DocumentRouter
+from labrag.ingestion.loaders.row_tags import RowTags
+from labrag.ingestion.loaders.snapshots import SnapshotStore
+from labrag.metrics import metrics
+from labrag.providers import get_embeddings
+
 
 class VectorStore:
     """LangChain FAISS wrapper for vector storage"""
 
-    def __init__(self, store_path: str = "data/vector_store") -> None:
+    def __init__(
+        self,
+        store_path: str = "data/vector_store",
+        embeddings: Embeddings | None = None,
+        keep_snapshots: int = 5,
+        bundle: str | Path | KnowledgeBundle | None = None,
+    ) -> None:
         """Initialize the vector store
 
         Args:
             store_path: The path to the vector store
+            embeddings: The embedding model (defaults to the configured provider)
+            keep_snapshots: Number of saved snapshots to retain for rollback
+            bundle: Serve this bundle file (read-only) instead of the snapshots
         """
-        self.embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
+        self.embeddings = embeddings or get_embeddings()
         self.store_path = Path(store_path)
         self.store_path.mkdir(parents=True, exist_ok=True)
+        self.snapshots = SnapshotStore(self.store_path, keep=keep_snapshots)
+        # Name of the snapshot the index was last loaded from or saved to
+        self.snapshot: str | None = None
+        # CURRENT as last seen, so refresh() only reacts to new commits
+        self._seen_current: str | None = None
         self.vector_store: FAISS | None = None
-        self.load()
+        self.query_batcher: QueryEmbeddingBatcher | None = None
+        # Document-level routing (see enable_routing); the router is derived
+        # from the index and dropped whenever the index changes
+        self.route_documents: int | None = None
+        self.route_min_documents = 0
+        self._router: DocumentRouter | None = None
+        # Entity graph over the chunks' entity tags (see enable_entity_graph),
+        # derived and dropped like the router
+        self.use_entity_graph = False
+        self._entity_graph: EntityGraph | None = None
+        # FAISS indexes are not safe for concurrent writes (or saves during
+        # writes); reentrant so compound updates can hold it across calls
+        self._write_lock = threading.RLock()
+        # The memory-mapped bundle being served, if any (see load_bundle)
+        self.bundle: KnowledgeBundle | None = None
+        if bundle is not None:
+            self.load_bundle(bundle)
+        else:
+            self.load()
+
+    @property
+    def embedding_model(self) -> str:
+        """Name of the embedding model (the class name if it has none)"""
+        return getattr(self.embeddings, "model", None) or type(self.embeddings).__name__
+
+    @property
+    def dimensions(self) -> int | None:
+        """Vector size of the index, or None while it is empty"""
+        if self.vector_store is None:
+            return None
+        return self.vector_store.index.d
+
+    @property
+    def chunk_count(self) -> int:
+        """Number of chunks in the index"""
+        if self.vector_store is None:
+            return 0
+        return len(self.vector_store.index_to_docstore_id)
+
+    @property
+    def read_only(self) -> bool:
+        """Whether the index is served from a bundle and can't be changed"""
+        return self.bundle is not None
+
+    def _check_writable(self) -> None:
+        """Refuse changes to an index read in place from a bundle
+
+        Raises:
+            RuntimeError: The store serves a bundle
+        """
+        if self.bundle is not None:
+            raise RuntimeError(
+                f"The index is served read-only from {self.bundle.path}; import "
+                "the bundle to change it"
+            )
+
+    @property
+    def has_parents(self) -> bool:
+        """Whether the index was built with parent/child chunking
+
+        Parent documents are kept in the docstore without a vector, so they
+        are the only docstore entries missing from the index.
+        """
+        if self.vector_store is None:
+            return False
+        return len(self.vector_store.docstore._dict) > self.chunk_count
+
+    def enable_query_batching(
+        self, max_batch_size: int = 64, max_wait_ms: float = 10.0
+    ) -> None:
+        """Share one embedding call between concurrent async searches
+
+        Args:
+            max_batch_size: Maximum number of queries per embedding call
+            max_wait_ms: Maximum time a query waits for others to join its batch
+        """
+        self.query_batcher = QueryEmbeddingBatcher(
+            self.embeddings, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms
+        )
+
+    def enable_routing(self, top_documents: int = 10, min_documents: int = 50) -> None:
+        """Search only the chunks of the sources closest to each query
+
+        Args:
+            top_documents: Sources whose chunks are searched per query
+            min_documents: Below this many sources, search every chunk
+        """
+        self.route_documents = top_documents
+        self.route_min_documents = max(min_documents, top_documents + 1)
+        self._router = None
+        # A served bundle builds it on first use, keeping startup instant
+        if self.vector_store is not None and self.bundle is None:
+            self._router = self._build_router(self.vector_store)
+
+    def _row_tags(self) -> RowTags | None:
+        """The row tags stored in the bundle being served, if any"""
+        return self.bundle.row_tags() if self.bundle is not None else None
+
+    def _build_router(
+        self, store: FAISS, tags: RowTags | None = None
+    ) -> DocumentRouter | None:
+        """The routing level of an index, or None if routing doesn't apply"""
+        if not self.route_documents or not store.index.ntotal:
+            return None
+        try:
+            return DocumentRouter(store, tags)
+        except ValueError as e:
+            logger.warning(f"Searching without document routing: {e}")
+            self.route_documents = None
+            return None
+
+    @property
+    def router(self) -> DocumentRouter | None:
+        """The document router, rebuilt after the index changed"""
+        with self._write_lock:
+            if self._router is None and self.vector_store is not None:
+                self._router = self._build_router(self.vector_store, self._row_tags())
+            return self._router
+
+    def enable_entity_graph(self) -> None:
+        """Answer entity questions through the graph of the chunks' entities"""
+        self.use_entity_graph = True
+        self._entity_graph = None
+        # A served bundle builds it on first use, keeping startup instant
+        if self.vector_store is not None and self.bundle is None:
+            self._entity_graph = self._build_entity_graph(self.vector_store)
+
+    def _build_entity_graph(
+        self, store: FAISS, tags: RowTags | None = None
+    ) -> EntityGraph | None:
+        """The entity graph of an index, or None if it is disabled"""
+        if not self.use_entity_graph:
+            return None
+        return EntityGraph(store, tags)
+
+    @property
+    def entity_graph(self) -> EntityGraph | None:
+        """The entity graph, or None if disabled or no chunk has entities"""
+        with self._write_lock:
+            if self._entity_graph is None and self.vector_store is not None:
+                self._entity_graph = self._build_entity_graph(
+                    self.vector_store, self._row_tags()
+                )
+            graph = self._entity_graph
+        return graph if graph is not None and graph.entity_count else None
+
+    def _drop_derived(self) -> None:
+        """Forget the router and entity graph after the index changed"""
+        self._router = None
+        self._entity_graph = None
 
     def add_documents(self, documents: list[Document]) -> None:
         """Add LangChain documents to vector store
@@ -34,6 +208,103 @@ class VectorStore:
         if not documents:
             return
 
+        with self._write_lock:
+            with metrics.timer("vector_store.add_documents"):
+                self._add_documents(documents)
+
+            self.save()
+
+    async def aadd_documents(
+        self,
+        documents: list[Document],
+        persist: bool = True,
+        parents: list[Document] | None = None,
+    ) -> None:
+        """Embed documents concurrently, then index them under the write lock
+
+        Embedding is the slow part and runs outside the lock, so several files
+        can be embedded at once while index writes stay serialized.
+
+        Args:
+            documents: List of LangChain documents to add to the vector store
+            persist: Save the index after adding (skip for bulk loads)
+            parents: Parent documents of the chunks (stored, not embedded)
+        """
+        if not documents:
+            return
+
+        vectors = await self.aembed_documents(documents)
+        await asyncio.to_thread(
+            self.add_embedded_documents, documents, vectors, persist, parents
+        )
+
+    async def aembed_documents(self, documents: list[Document]) -> list[list[float]]:
+        """Embed documents without touching the index
+
+        Args:
+            documents: The documents to embed
+
+        Returns:
+            One vector per document
+        """
+        with metrics.timer("vector_store.embed_documents"):
+            return await self.embeddings.aembed_documents(
+                [doc.page_content for doc in documents]
+            )
+
+    def add_embedded_documents(
+        self,
+        documents: list[Document],
+        vectors: list[list[float]],
+        persist: bool,
+        parents: list[Document] | None = None,
+    ) -> None:
+        """Index pre-computed embeddings under the write lock
+
+        Args:
+            documents: The documents that were embedded
+            vectors: Their embeddings, in the same order
+            persist: Save the index after adding
+            parents: Parent documents the chunks point to with `parent_id`;
+                stored in the docstore without a vector
+        """
+        if not documents:
+            return
+
+        text_embeddings = [
+            (doc.page_content, vector)
+            for doc, vector in zip(documents, vectors, strict=True)
+        ]
+        metadatas = [doc.metadata for doc in documents]
+        ids = [doc.id for doc in documents]
+
+        with self._write_lock:
+            self._check_writable()
+            self._drop_derived()
+            with metrics.timer("vector_store.add_documents"):
+                if self.vector_store is None:
+                    self.vector_store = FAISS.from_embeddings(
+                        text_embeddings,
+                        self.embeddings,
+                        metadatas=metadatas,
+                        ids=ids,
+                        distance_strategy="MAX_INNER_PRODUCT",
+                    )
+                else:
+                    self.vector_store.add_embeddings(
+                        text_embeddings, metadatas=metadatas, ids=ids
+                    )
+                if parents:
+                    self.vector_store.docstore.add({p.id: p for p in parents})
+            logger.info(f"Added {len(documents)} documents to vector store")
+
+            if persist:
+                self.save()
+
+    def _add_documents(self, documents: list[Document]) -> None:
+        """Embed and index documents without persisting"""
+        self._check_writable()
+        self._drop_derived()
         if self.vector_store is None:
             # Create new vector store
             self.vector_store = FAISS.from_documents(
@@ -45,7 +316,130 @@ class VectorStore:
             self.vector_store.add_documents(documents)
             logger.info(f"Added {len(documents)} documents to vector store")
 
-        self.save()
+    def replace_source(
+        self,
+        source: str,
+        documents: list[Document],
+        vectors: list[list[float]],
+        parents: list[Document] | None = None,
+    ) -> None:
+        """Swap a source's chunks for new ones in a single locked step
+
+        A save never sees the source half-replaced. The index is not persisted.
+
+        Args:
+            source: The source as stored in chunk metadata
+            documents: The new chunks
+            vectors: Their embeddings, in the same order
+            parents: The chunks' parent documents, if any
+        """
+        with self._write_lock:
+            self.delete_source(source, persist=False)
+            self.add_embedded_documents(documents, vectors, False, parents)
+
+    def replace_index(self, other: "VectorStore") -> None:
+        """Take over the in-memory index of another store, without saving
+
+        Args:
+            other: A store built separately (e.g. a full rebuild)
+        """
+        self.replace_store(other.vector_store)
+
+    def replace_store(self, store: FAISS | None) -> None:
+        """Swap in another FAISS store, without saving
+
+        Args:
+            store: The new index (e.g. one read from a bundle)
+        """
+        with self._write_lock:
+            self._check_writable()
+            self.vector_store = store
+            self._drop_derived()
+
+    def _ids_for_source(self, source: str) -> list[str]:
+        """Docstore IDs of all chunks that came from a source"""
+        return [
+            doc_id
+            for doc_id, doc in self.vector_store.docstore._dict.items()
+            if doc.metadata.get("source") == source
+        ]
+
+    def delete_source(self, source: str, persist: bool = True) -> int:
+        """Remove every chunk of a source from the index
+
+        Args:
+            source: The source as stored in chunk metadata (file name or URL)
+            persist: Save the index after removing
+
+        Returns:
+            int: The number of chunks removed
+        """
+        if self.vector_store is None:
+            return 0
+
+        with self._write_lock:
+            self._check_writable()
+            ids = self._ids_for_source(source)
+            indexed = set(self.vector_store.index_to_docstore_id.values())
+            parent_ids = [doc_id for doc_id in ids if doc_id not in indexed]
+            ids = [doc_id for doc_id in ids if doc_id in indexed]
+            if parent_ids:
+                self.vector_store.docstore.delete(parent_ids)
+            if ids:
+                self._drop_derived()
+                self.vector_store.delete(ids)
+                if persist:
+                    self.save()
+                logger.info(f"Removed {len(ids)} chunks of {source} from vector store")
+        return len(ids)
+
+    def rename_source(
+        self, old_source: str, new_source: str, persist: bool = True
+    ) -> int:
+        """Re-label the chunks of a renamed source without re-embedding them
+
+        Args:
+            old_source: The previous source name in chunk metadata
+            new_source: The new source name
+            persist: Save the index after renaming
+
+        Returns:
+            int: The number of chunks renamed
+        """
+        if self.vector_store is None or old_source == new_source:
+            return 0
+
+        with self._write_lock:
+            self._check_writable()
+            docstore = self.vector_store.docstore._dict
+            renamed = {}
+            for doc_id in self._ids_for_source(old_source):
+                doc = docstore.pop(doc_id)
+                doc.metadata["source"] = new_source
+                # Chunk IDs are "{chunk_index}-{source}" (and parent IDs
+                # "parent-{index}-{source}"); keep them in sync
+                new_id = doc_id.removesuffix(old_source) + new_source
+                if parent_id := doc.metadata.get("parent_id"):
+                    doc.metadata["parent_id"] = (
+                        parent_id.removesuffix(old_source) + new_source
+                    )
+                doc.id = new_id
+                docstore[new_id] = doc
+                renamed[doc_id] = new_id
+
+            self._drop_derived()
+            mapping = self.vector_store.index_to_docstore_id
+            for position, doc_id in mapping.items():
+                if doc_id in renamed:
+                    mapping[position] = renamed[doc_id]
+
+            if renamed:
+                if persist:
+                    self.save()
+                logger.info(
+                    f"Renamed {len(renamed)} chunks: {old_source} -> {new_source}"
+                )
+        return len(renamed)
 
     def search(self, query: str, k: int = 5) -> list[Document]:
         """Search and return LangChain Documents
@@ -61,7 +455,8 @@ class VectorStore:
             logger.warning("No vector store available")
             return []
 
-        return self.vector_store.similarity_search(query, k=k)
+        with metrics.timer("vector_store.search"):
+            return self.vector_store.similarity_search(query, k=k)
 
     async def asearch(self, query: str, k: int = 5) -> list[Document]:
         """Async search and return LangChain Documents
@@ -77,7 +472,93 @@ class VectorStore:
             logger.warning("No vector store available")
             return []
 
-        return await self.vector_store.asimilarity_search(query, k=k)
+        with metrics.timer("vector_store.search"):
+            if self.query_batcher is not None or self.route_documents:
+                embedding = await self.aembed_query(query)
+                return await self.asearch_by_vector(embedding, k=k)
+
+            return await self.vector_store.asimilarity_search(query, k=k)
+
+    def parents_of(self, documents: list[Document]) -> list[Document]:
+        """Replace chunks with their parent documents
+
+        Parents come in the order of their best-ranked chunk, each once.
+        Chunks without a parent (flat indexes) are returned as they are.
+
+        Args:
+            documents: Search results, best first
+
+        Returns:
+            list[Document]: The deduplicated parents
+        """
+        if self.vector_store is None:
+            return documents
+
+        results, seen = [], set()
+        for doc in documents:
+            parent_id = doc.metadata.get("parent_id")
+            key = parent_id or doc.id or id(doc)
+            if key in seen:
+                continue
+            seen.add(key)
+            parent = self.vector_store.docstore.search(parent_id) if parent_id else doc
+            # The docstore answers a missing ID with an error string
+            results.append(parent if isinstance(parent, Document) else doc)
+        return results
+
+    async def aembed_query(self, query: str) -> list[float]:
+        """Embed a search query (batched with concurrent queries if enabled)
+
+        Args:
+            query: The query to embed
+
+        Returns:
+            list[float]: The query vector
+        """
+        if self.query_batcher is not None:
+            return await self.query_batcher.aembed_query(query)
+        return await self.embeddings.aembed_query(query)
+
+    async def asearch_by_vector(
+        self, embedding: list[float], k: int = 5
+    ) -> list[Document]:
+        """Async search with an already embedded query
+
+        Args:
+            embedding: The query vector (see `aembed_query`)
+            k: The number of documents to return
+
+        Returns:
+            list[Document]: The documents closest to the vector
+        """
+        return [
+            doc for doc, _ in await self.asearch_with_scores_by_vector(embedding, k)
+        ]
+
+    async def asearch_with_scores_by_vector(
+        self, embedding: list[float], k: int = 5
+    ) -> list[tuple[Document, float]]:
+        """Async search with an already embedded query, keeping the scores
+
+        Args:
+            embedding: The query vector (see `aembed_query`)
+            k: The number of documents to return
+
+        Returns:
+            list: (document, inner product) pairs, best first
+        """
+        if self.vector_store is None:
+            logger.warning("No vector store available")
+            return []
+
+        router = self.router if self.route_documents else None
+        if router is not None and router.document_count >= self.route_min_documents:
+            return router.search(embedding, k, self.route_documents)
+
+        with metrics.timer("vector_store.search_by_vector"):
+            return await self.vector_store.asimilarity_search_with_score_by_vector(
+                embedding, k=k
+            )
 
     def search_with_scores(
         self, query: str, k: int = 5
@@ -111,17 +592,191 @@ class VectorStore:
             return None
         return self.vector_store.as_retriever(**kwargs)
 
-    def save(self) -> None:
-        """Save to disk"""
-        if self.vector_store is not None:
-            self.vector_store.save_local(str(self.store_path))
-            logger.debug(f"Saved vector store to {self.store_path}")
+    def save(self, manifest: dict[str, Any] | None = None) -> str | None:
+        """Save to disk as a new snapshot and make it current
+
+        Args:
+            manifest: Extra JSON-serializable data recorded with the snapshot
+
+        Returns:
+            The name of the snapshot, or None if there is nothing to save
+
+        Raises:
+            RuntimeError: Another process committed a snapshot since this index
+                was loaded; saving would discard its changes
+        """
+        with self._write_lock:
+            if self.vector_store is None:
+                return None
+            self._check_writable()
+            with self.snapshots.lock(), metrics.timer("vector_store.save"):
+                current = self.snapshots.current
+                if current != self._seen_current:
+                    raise RuntimeError(
+                        f"Snapshot {current} was committed by another writer "
+                        f"after {self._seen_current} was loaded; refresh before "
+                        "saving"
+                    )
+
+                self.snapshot = self.snapshots.commit(
+                    lambda path: self.vector_store.save_local(str(path)),
+                    {
+                        # What this snapshot replaces, for rollback
+                        "parent": self.snapshot,
+                        "chunks": self.chunk_count,
+                        "embedding_model": self.embedding_model,
+                        "dimensions": self.dimensions,
+                        **(manifest or {}),
+                    },
+                )
+                self._seen_current = self.snapshot
+        logger.debug(
+            f"Saved vector store snapshot {self.snapshot} to {self.store_path}"
+        )
+        return self.snapshot
 
     def load(self) -> None:
-        """Load from disk"""
+        """Load the current snapshot from disk
+
+        If it can't be read, the snapshots it replaced are tried in turn. Stores
+        written before snapshots existed (index files directly in store_path)
+        are still loaded.
+        """
+        current = self.snapshots.current
+        self._seen_current = current
+        if current is None:
+            self._load_legacy()
+            return
+
+        name = current
+        while name is not None:
+            try:
+                vector_store = FAISS.load_local(
+                    str(self.snapshots.path(name)),
+                    self.embeddings,
+                    allow_dangerous_deserialization=True,
+                )
+            except Exception as e:
+                logger.error(f"Could not load snapshot {name}: {e}")
+                name = self.snapshots.previous(name)
+                continue
+
+            if name != current:
+                logger.warning(f"Falling back to snapshot {name} (current: {current})")
+            # Built before the swap, so searches never wait for it
+            router = self._build_router(vector_store)
+            entity_graph = self._build_entity_graph(vector_store)
+            with self._write_lock:
+                self.vector_store, self.snapshot = vector_store, name
+                self._router, self._entity_graph = router, entity_graph
+            logger.info(f"Loaded vector store snapshot {name} from {self.store_path}")
+            return
+
+        raise RuntimeError(f"No readable snapshot in {self.snapshots.snapshots_dir}")
+
+    def load_bundle(self, bundle: str | Path | KnowledgeBundle) -> None:
+        """Serve a bundle file in place, read-only
+
+        The vectors are read from the memory-mapped file and documents are
+        decoded when searches return them, so nothing is deserialized upfront.
+        The router and entity graph are built from the bundle's row tags on
+        first use.
+
+        Args:
+            bundle: The bundle path (see `export_bundle`) or opened bundle
+
+        Raises:
+            ValueError: Invalid bundle, or embedded with another model
+        """
+        if not isinstance(bundle, KnowledgeBundle):
+            bundle = KnowledgeBundle(bundle)
+        if bundle.header.embedding_model != self.embedding_model:
+            raise ValueError(
+                f"{bundle.path} was embedded with {bundle.header.embedding_model}, "
+                f"queries use {self.embedding_model}"
+            )
+        vector_store = bundle.to_faiss(self.embeddings)
+        with self._write_lock:
+            self.vector_store, self.snapshot = vector_store, bundle.header.snapshot
+            self.bundle = bundle
+            self._drop_derived()
+        logger.info(
+            f"Serving {bundle.header.chunks} chunks from bundle {bundle.path} "
+            f"(snapshot {bundle.header.snapshot})"
+        )
+
+    def export_bundle(
+        self, output: str | Path, cache_records: list[dict[str, Any]] | None = None
+    ) -> BundleHeader:
+        """Write the loaded index to a single bundle file
+
+        Args:
+            output: The bundle path
+            cache_records: Ingestion cache records to ship with the index
+
+        Returns:
+            BundleHeader: What was written
+
+        Raises:
+            ValueError: The index is empty
+        """
+        with self._write_lock:
+            if self.vector_store is None:
+                raise ValueError("Nothing to export: the index is empty")
+            manifest = {}
+            if self.bundle is not None:
+                manifest = self.bundle.header.manifest
+            elif self.snapshot is not None:
+                manifest = self.snapshots.manifest(self.snapshot)
+            with metrics.timer("vector_store.export_bundle"):
+                return write_bundle(
+                    output,
+                    self.vector_store,
+                    self.snapshot,
+                    self.embedding_model,
+                    manifest,
+                    cache_records,
+                )
+
+    def refresh(self) -> bool:
+        """Load the current snapshot if another process committed a new one
+
+        Searches keep using the old index until the new one is loaded. A
+        store serving a bundle never refreshes.
+
+        Returns:
+            bool: True if a new snapshot was loaded
+        """
+        if self.bundle is not None:
+            return False
+        current = self.snapshots.current
+        if current is None or current == self._seen_current:
+            return False
+        self.load()
+        return True
+
+    async def follow(self, interval_seconds: float = 5.0) -> None:
+        """Refresh from disk every `interval_seconds` until cancelled
+
+        Lets a server pick up builds and syncs from other processes without a
+        restart.
+
+        Args:
+            interval_seconds: How often to check for a new snapshot
+        """
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                logger.error(f"Could not reload vector store: {e}")
+
+    def _load_legacy(self) -> None:
+        """Load index files saved directly in store_path, if any"""
         try:
             index_path = self.store_path / "index.faiss"
             if index_path.exists():
+                self._drop_derived()
                 self.vector_store = FAISS.load_local(
                     str(self.store_path),
                     self.embeddings,
@@ -131,3 +786,25 @@ class VectorStore:
         except Exception as e:
             logger.info(f"No existing vector store found: {e}")
             self.vector_store = None
+
+    def rollback(self, name: str | None = None) -> str:
+        """Make an earlier snapshot current again and load it
+
+        Args:
+            name: The snapshot to restore (default: the one before the
+                loaded snapshot)
+
+        Returns:
+            str: The name of the restored snapshot
+        """
+        self._check_writable()
+        target = name or self.snapshots.previous(self.snapshot)
+        if target is None:
+            raise ValueError("No earlier snapshot to roll back to")
+
+        with self._write_lock:
+            with self.snapshots.lock():
+                self.snapshots.set_current(target)
+            self.load()
+        logger.success(f"Rolled back vector store to snapshot {target}")
+        return target
@@ -0,0 +1,166 @@
+"""Rule-based boilerplate removal for scraped markdown.
+
+Firecrawl markdown is split into blank-line separated blocks and each block is
+scored on link density, navigation/advertising patterns and repetition, within
+the article and across articles of the same site. Blocks are kept, dropped or
+marked ambiguous; only ambiguous blocks need an LLM to decide.
+
+Repetition across a site only settles ambiguous blocks: headings and blocks
+the rules keep may legitimately recur (a "## Methods" heading, a disclaimer).
+Each article is observed as soon as it is scraped and split right after, so
+repetition is counted over the site's articles seen so far, within a bounded
+window of the most recent ones. The first article of a site has nothing to be
+compared with; its chrome is left to the other rules (or the LLM).
+"""
+
+import hashlib
+import re
+from collections import Counter, defaultdict
+from typing import Literal
+
+from pydantic import BaseModel
+
+BlockLabel = Literal["keep", "drop", "ambiguous"]
+
+LINK = re.compile(r"!?\[([^\]]*)\]\([^)]*\)")
+BOILERPLATE = re.compile(
+    r"\b(subscribe|newsletter|sign (up|in)|log ?in|cookies?|privacy policy|"
+    r"terms (of|and) (use|conditions|service)|all rights reserved|copyright|"
+    r"advertisement|sponsored|share (on|this)|follow us|read more|related "
+    r"(articles|stories|content)|most (read|popular)|skip to (main )?content|"
+    r"menu|donate|support our journalism|download the app)\b",
+    re.IGNORECASE,
+)
+
+# A block seen in this many articles of one site is site chrome
+SITE_CHROME_MIN_ARTICLES = 2
+# Articles per site remembered for counting chrome (the oldest are forgotten)
+SITE_CHROME_WINDOW = 50
+
+
+class Block(BaseModel):
+    """A blank-line separated piece of markdown and its verdict"""
+
+    text: str
+    label: BlockLabel
+    reason: str
+
+
+def _split_blocks(markdown: str) -> list[str]:
+    return [t for t in re.split(r"\n\s*\n", markdown) if t.strip()]
+
+
+def _fingerprint(text: str) -> str:
+    normalized = " ".join(text.lower().split())
+    return hashlib.sha1(normalized.encode()).hexdigest()
+
+
+def classify_block(text: str) -> tuple[BlockLabel, str]:
+    """Score one block on its own (without repetition)
+
+    Returns:
+        The label and a short reason
+    """
+    stripped = text.strip()
+    if not stripped:
+        return "drop", "empty"
+
+    visible = LINK.sub(r"\1", stripped)
+    words = len(visible.split())
+    link_chars = sum(len(m.group(1)) for m in LINK.finditer(stripped))
+    link_density = link_chars / max(1, len(visible))
+    lines = [line for line in stripped.splitlines() if line.strip()]
+    link_lines = sum(bool(LINK.search(line)) for line in lines)
+    boilerplate_hits = len(BOILERPLATE.findall(visible))
+
+    if stripped.startswith("![") and words <= 1:
+        return "keep", "image"
+    if len(lines) >= 3 and link_lines / len(lines) > 0.7 and link_density > 0.5:
+        return "drop", "link list"
+    if link_density > 0.6 and words < 60:
+        return "drop", "mostly links"
+    if boilerplate_hits and words < 25:
+        return "drop", "boilerplate pattern"
+    if stripped.startswith("#") and not boilerplate_hits:
+        return "keep", "heading"
+    if words >= 40 and link_density < 0.25 and boilerplate_hits <= 1:
+        return "keep", "prose"
+    return "ambiguous", f"{words} words, link density {link_density:.2f}"
+
+
+class BoilerplateRemover:
+    """Classify markdown blocks, remembering chrome repeated across a site"""
+
+    def __init__(self, window: int = SITE_CHROME_WINDOW) -> None:
+        """Initialize the remover
+
+        Args:
+            window: Most recent articles per site that chrome is counted over
+        """
+        self.window = window
+        # Site → article → fingerprints of its blocks (oldest first), and site
+        # → fingerprint → number of those articles it appears in
+        self._site_articles: defaultdict[str, dict[str, frozenset[str]]] = defaultdict(
+            dict
+        )
+        self._site_blocks: defaultdict[str, Counter[str]] = defaultdict(Counter)
+
+    def observe(self, markdown: str, site: str, article: str) -> None:
+        """Count an article's blocks towards its site's repeated chrome
+
+        Observing an article again replaces its previous blocks. Beyond
+        `window` articles of a site, the oldest one stops counting.
+
+        Args:
+            markdown: The scraped markdown
+            site: The article's domain
+            article: The article's identity (its URL)
+        """
+        fingerprints = frozenset(_fingerprint(t) for t in _split_blocks(markdown))
+        counts, articles = self._site_blocks[site], self._site_articles[site]
+        forgotten = [articles.pop(article, frozenset())]
+        articles[article] = fingerprints
+        while len(articles) > self.window:
+            forgotten.append(articles.pop(next(iter(articles))))
+
+        counts.update(fingerprints)
+        for previous in forgotten:
+            counts.subtract(previous)
+            for fingerprint in previous:
+                # Keep the counter no larger than the window's blocks
+                if counts[fingerprint] <= 0:
+                    del counts[fingerprint]
+
+    def split(self, markdown: str, site: str | None = None) -> list[Block]:
+        """Split markdown into blocks and label each one
+
+        Args:
+            markdown: The scraped markdown
+            site: The article's domain; ambiguous blocks found in at least
+                `SITE_CHROME_MIN_ARTICLES` observed articles of it are dropped
+
+        Returns:
+            list[Block]: The blocks in document order
+        """
+        seen_on_site = self._site_blocks[site] if site else Counter()
+
+        blocks, seen_here = [], set()
+        for text in _split_blocks(markdown):
+            fingerprint = _fingerprint(text)
+            label, reason = classify_block(text)
+            if fingerprint in seen_here:
+                label, reason = "drop", "repeated in article"
+            elif (
+                label == "ambiguous"
+                and seen_on_site[fingerprint] >= SITE_CHROME_MIN_ARTICLES
+            ):
+                label, reason = "drop", "repeated across site"
+            seen_here.add(fingerprint)
+            blocks.append(Block(text=text, label=label, reason=reason))
+        return blocks
+
+
+def join_blocks(blocks: list[Block], keep_ambiguous: bool = True) -> str:
+    """Reassemble the kept (and optionally ambiguous) blocks into markdown"""
+    allowed = {"keep", "ambiguous"} if keep_ambiguous else {"keep"}
+    return "\n\n".join(b.text for b in blocks if b.label in allowed)
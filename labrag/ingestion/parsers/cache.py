@@ -1,35 +1,143 @@
 import sqlite3
+import threading
+from collections.abc import Callable, Iterable
 from datetime import datetime
 from pathlib import Path
-from typing import Literal
+from typing import TYPE_CHECKING, Any, Literal
 
-import pandas as pd
+if TYPE_CHECKING:
+    # Only the reports need pandas, which is slow to import
+    import pandas as pd
+
+DocumentStatus = Literal["done", "failed"]
+
+# Every column an ingestion record can carry, besides the primary key
+RECORD_COLUMNS = (
+    "document_source",
+    "document_type",
+    "processed_at",
+    "content_hash",
+    "size_bytes",
+    "mtime",
+    "chunk_count",
+    "embedding_model",
+    "embedding_dims",
+    "parser_version",
+    "status",
+    "error",
+    "parse_seconds",
+    "load_seconds",
+)
+
+# SQLite caps the number of bound parameters per statement
+_MAX_PARAMS = 900
+
+
+def _add_columns(conn: sqlite3.Connection, columns: dict[str, str]) -> None:
+    """Add columns that are missing (databases may be partially migrated)"""
+    existing = {
+        row[1] for row in conn.execute("PRAGMA table_info(processed_documents)")
+    }
+    for column, column_type in columns.items():
+        if column not in existing:
+            conn.execute(
+                f"ALTER TABLE processed_documents ADD COLUMN {column} {column_type}"
+            )
+
+
+def _migrate_v1(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS processed_documents (
+            document_id TEXT PRIMARY KEY,
+            document_source TEXT UNIQUE,
+            document_type TEXT CHECK(document_type IN ('url', 'pdf')),
+            processed_at TEXT
+        )
+        """
+    )
+
+
+def _migrate_v2(conn: sqlite3.Connection) -> None:
+    # Source fingerprints for incremental sync
+    _add_columns(
+        conn, {"content_hash": "TEXT", "size_bytes": "INTEGER", "mtime": "REAL"}
+    )
+
+
+def _migrate_v3(conn: sqlite3.Connection) -> None:
+    # Ingestion state and per-source performance
+    _add_columns(
+        conn,
+        {
+            "chunk_count": "INTEGER",
+            "embedding_model": "TEXT",
+            "embedding_dims": "INTEGER",
+            "parser_version": "TEXT",
+            "status": "TEXT NOT NULL DEFAULT 'done'",
+            "error": "TEXT",
+            "parse_seconds": "REAL",
+            "load_seconds": "REAL",
+        },
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_processed_documents_status "
+        "ON processed_documents (status)"
+    )
+
+
+def _migrate_v4(conn: sqlite3.Connection) -> None:
+    # Which index snapshot the records correspond to
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS cache_state (key TEXT PRIMARY KEY, value TEXT)"
+    )
+
+
+# Schema versions, applied in order and tracked with PRAGMA user_version
+MIGRATIONS: list[Callable[[sqlite3.Connection], None]] = [
+    _migrate_v1,
+    _migrate_v2,
+    _migrate_v3,
+    _migrate_v4,
+]
 
 
 class DocumentCache:
     def __init__(self, db_path: str | Path = ".labrag_cache/processed_docs.db") -> None:
         """Initialize the document cache
 
+        One connection is kept open for the lifetime of the cache and shared
+        between threads under a lock; WAL journaling lets readers (e.g. a
+        report) run while a build is writing.
+
         Args:
             db_path: The path to the database file
         """
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
-        self._create_table()
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._migrate()
 
-    def _create_table(self) -> None:
-        """Create the processed_documents table if it doesn't exist"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS processed_documents (
-                    document_id TEXT PRIMARY KEY,
-                    document_source TEXT UNIQUE,
-                    document_type TEXT CHECK(document_type IN ('url', 'pdf')),
-                    processed_at TEXT
-                )
-                """
-            )
+    def _migrate(self) -> None:
+        """Bring the schema up to the latest version"""
+        with self._lock, self._conn:
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            for target, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+                migration(self._conn)
+                self._conn.execute(f"PRAGMA user_version = {target}")
+
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+    def _query(self, sql: str, params: Iterable[Any] = ()) -> list[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, tuple(params)).fetchall()
 
     def is_processed(self, document_id: str) -> bool:
         """Check if a document has been processed
@@ -40,54 +148,249 @@ class DocumentCache:
         Returns:
             bool: True if the document has been processed, False otherwise
         """
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute(
-                "SELECT 1 FROM processed_documents WHERE document_id = ?",
-                (document_id,),
+        rows = self._query(
+            "SELECT 1 FROM processed_documents "
+            "WHERE document_id = ? AND status = 'done'",
+            (document_id,),
+        )
+        return bool(rows)
+
+    def pending(self, document_ids: list[str]) -> set[str]:
+        """Find which documents still need work, in one round trip
+
+        Args:
+            document_ids: The candidate document IDs
+
+        Returns:
+            The IDs that were never processed or whose last attempt failed
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS candidates "
+                "(document_id TEXT PRIMARY KEY)"
+            )
+            self._conn.execute("DELETE FROM candidates")
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO candidates VALUES (?)",
+                [(document_id,) for document_id in document_ids],
             )
-            return cursor.fetchone() is not None
+            rows = self._conn.execute(
+                """
+                SELECT c.document_id FROM candidates c
+                LEFT JOIN processed_documents p ON p.document_id = c.document_id
+                WHERE p.document_id IS NULL OR p.status != 'done'
+                """
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def get_document(self, document_id: str) -> dict[str, Any] | None:
+        """All cached columns of a document, or None if not found"""
+        rows = self._query(
+            "SELECT * FROM processed_documents WHERE document_id = ?", (document_id,)
+        )
+        return dict(rows[0]) if rows else None
 
     def get_document_source(self, document_id: str) -> str | None:
         """Get the document source for a given document_id. Returns None if not found"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute(
-                "SELECT document_source FROM processed_documents WHERE document_id = ?",
-                (document_id,),
-            )
-            result = cursor.fetchone()
-            return result[0] if result else None
+        rows = self._query(
+            "SELECT document_source FROM processed_documents WHERE document_id = ?",
+            (document_id,),
+        )
+        return rows[0][0] if rows else None
 
     def add_document(
         self,
         document_id: str,
         document_source: str,
         document_type: Literal["url", "pdf"],
+        content_hash: str | None = None,
+        size_bytes: int | None = None,
+        mtime: float | None = None,
+        **details: Any,  # noqa: ANN401
     ) -> None:
-        """Add a processed document to the cache.
+        """Add (or update) a processed document in the cache.
 
         Args:
             document_id: The ID of the document to add.
             document_source: The source of the document to add (URL or file path).
             document_type: The type of the document to add (url or pdf).
+            content_hash: SHA-256 of the source file content (files only).
+            size_bytes: Size of the source file when it was processed.
+            mtime: Modification time of the source file when it was processed.
+            **details: Other record columns: chunk_count, embedding_model,
+                embedding_dims, parser_version, status, error, parse_seconds
+                and load_seconds.
         """
-        if document_type not in ("url", "pdf"):
+        self.add_documents(
+            [
+                {
+                    "document_id": document_id,
+                    "document_source": document_source,
+                    "document_type": document_type,
+                    "content_hash": content_hash,
+                    "size_bytes": size_bytes,
+                    "mtime": mtime,
+                    **details,
+                }
+            ]
+        )
+
+    def add_documents(self, records: list[dict[str, Any]]) -> None:
+        """Insert or update many documents in one transaction.
+
+        Args:
+            records: One dict per document with document_id, document_source,
+                document_type and any other record columns.
+        """
+        rows = [self._row(record) for record in records]
+        with self._lock, self._conn:
+            self._upsert(rows)
+
+    @staticmethod
+    def _row(record: dict[str, Any]) -> dict[str, Any]:
+        """Validate a record and fill in the defaults of a full row"""
+        if record["document_type"] not in ("url", "pdf"):
             raise ValueError("Invalid document_type. Use 'url' or 'pdf'.")
+        unknown = set(record) - {"document_id", *RECORD_COLUMNS}
+        if unknown:
+            raise ValueError(f"Unknown document cache columns: {sorted(unknown)}")
 
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute(
+        values = {
+            "processed_at": datetime.now().isoformat(),
+            "status": "done",
+            **record,
+        }
+        return {
+            "document_id": values["document_id"],
+            **{column: values.get(column) for column in RECORD_COLUMNS},
+        }
+
+    def _upsert(self, rows: list[dict[str, Any]]) -> None:
+        """Insert or replace full rows (call inside a transaction)"""
+        columns = ", ".join(RECORD_COLUMNS)
+        placeholders = ", ".join("?" * (len(RECORD_COLUMNS) + 1))
+        updates = ", ".join(f"{c} = excluded.{c}" for c in RECORD_COLUMNS)
+        self._conn.executemany(
+            f"""
+            INSERT INTO processed_documents (document_id, {columns})
+            VALUES ({placeholders})
+            ON CONFLICT(document_id) DO UPDATE SET {updates}
+            """,
+            [
+                (row["document_id"], *(row.get(c) for c in RECORD_COLUMNS))
+                for row in rows
+            ],
+        )
+
+    def mark_failed(
+        self,
+        document_id: str,
+        document_source: str,
+        document_type: Literal["url", "pdf"],
+        error: str,
+        **details: Any,  # noqa: ANN401
+    ) -> None:
+        """Record a failed attempt, so the next build retries the document.
+
+        An existing record only gets its status and error updated: the
+        fingerprint and chunk details of the last good ingestion are kept, so
+        the source isn't treated as new once it succeeds again.
+
+        Args:
+            document_id: The ID of the document.
+            document_source: The source of the document (URL or file path).
+            document_type: The type of the document (url or pdf).
+            error: What went wrong.
+            **details: Other record columns (e.g. parse_seconds), only stored
+                when the document has no record yet.
+        """
+        row = self._row(
+            {
+                "document_id": document_id,
+                "document_source": document_source,
+                "document_type": document_type,
+                **details,
+                "status": "failed",
+                "error": error,
+            }
+        )
+        columns = ", ".join(RECORD_COLUMNS)
+        placeholders = ", ".join("?" * (len(RECORD_COLUMNS) + 1))
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"""
+                INSERT INTO processed_documents (document_id, {columns})
+                VALUES ({placeholders})
+                ON CONFLICT(document_id) DO UPDATE SET
+                    status = excluded.status, error = excluded.error
+                """,
+                (document_id, *(row[c] for c in RECORD_COLUMNS)),
+            )
+
+    def update_fingerprint(
+        self,
+        document_id: str,
+        content_hash: str | None,
+        size_bytes: int | None,
+        mtime: float | None,
+    ) -> None:
+        """Record the current fingerprint of an unchanged source.
+
+        Args:
+            document_id: The ID of the document to update.
+            content_hash: SHA-256 of the source file content.
+            size_bytes: Current size of the source file.
+            mtime: Current modification time of the source file.
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                UPDATE processed_documents
+                SET content_hash = ?, size_bytes = ?, mtime = ?
+                WHERE document_id = ?
+                """,
+                (content_hash, size_bytes, mtime, document_id),
+            )
+
+    def rename_document(
+        self, document_id: str, new_document_id: str, new_source: str
+    ) -> None:
+        """Point a cached document at its new source after a rename.
+
+        Args:
+            document_id: The current ID of the document.
+            new_document_id: The ID derived from the new source.
+            new_source: The new source (file path).
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
                 """
-                INSERT OR IGNORE INTO processed_documents
-                (document_id, document_source, document_type, processed_at)
-                VALUES (?, ?, ?, ?)
+                UPDATE processed_documents
+                SET document_id = ?, document_source = ?
+                WHERE document_id = ?
                 """,
-                (
-                    document_id,
-                    document_source,
-                    document_type,
-                    datetime.now().isoformat(),
-                ),
+                (new_document_id, new_source, document_id),
             )
 
+    def list_documents(
+        self, document_type: Literal["url", "pdf"] | None = None
+    ) -> list[dict[str, Any]]:
+        """List cached documents, optionally filtered by type.
+
+        Args:
+            document_type: Only return documents of this type (url or pdf).
+
+        Returns:
+            One dict per document with all cached columns.
+        """
+        query = "SELECT * FROM processed_documents"
+        params: tuple = ()
+        if document_type is not None:
+            query += " WHERE document_type = ?"
+            params = (document_type,)
+
+        return [dict(row) for row in self._query(query, params)]
+
     def remove_document(self, document_id: str) -> bool:
         """Remove a document from the cache.
 
@@ -97,19 +400,129 @@ class DocumentCache:
         Returns:
             True if document was removed, False if not found.
         """
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute(
-                "DELETE FROM processed_documents WHERE document_id = ?", (document_id,)
+        return self.remove_documents([document_id]) > 0
+
+    def remove_documents(self, document_ids: list[str]) -> int:
+        """Remove many documents from the cache in one transaction.
+
+        Args:
+            document_ids: The IDs of the documents to remove.
+
+        Returns:
+            The number of documents removed.
+        """
+        with self._lock, self._conn:
+            return self._delete(document_ids)
+
+    def _delete(self, document_ids: list[str]) -> int:
+        """Delete rows in batches (call inside a transaction)"""
+        removed = 0
+        for start in range(0, len(document_ids), _MAX_PARAMS):
+            batch = document_ids[start : start + _MAX_PARAMS]
+            cursor = self._conn.execute(
+                "DELETE FROM processed_documents WHERE document_id IN "
+                f"({', '.join('?' * len(batch))})",
+                batch,
             )
-            return cursor.rowcount > 0
+            removed += cursor.rowcount
+        return removed
 
-    def to_dataframe(self) -> pd.DataFrame:
+    @property
+    def snapshot(self) -> str | None:
+        """The index snapshot these records were last committed with"""
+        rows = self._query("SELECT value FROM cache_state WHERE key = 'snapshot'")
+        return rows[0][0] if rows else None
+
+    def _set_snapshot(self, snapshot: str | None) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO cache_state (key, value) VALUES ('snapshot', ?)",
+            (snapshot,),
+        )
+
+    def state_after(
+        self, records: list[dict[str, Any]], removed_ids: list[str]
+    ) -> list[dict[str, Any]]:
+        """All rows as they will be after `commit(records, removed_ids, ...)`
+
+        Args:
+            records: Documents to insert or update
+            removed_ids: IDs of documents to remove (applied first)
+
+        Returns:
+            One dict per document with all record columns
+        """
+        rows = {row["document_id"]: row for row in self.list_documents()}
+        for document_id in removed_ids:
+            rows.pop(document_id, None)
+        for record in records:
+            row = self._row(record)
+            rows[row["document_id"]] = row
+        return list(rows.values())
+
+    def commit(
+        self,
+        records: list[dict[str, Any]],
+        removed_ids: list[str],
+        snapshot: str | None,
+    ) -> None:
+        """Apply the changes that went into an index snapshot, atomically
+
+        Args:
+            records: Documents to insert or update
+            removed_ids: IDs of documents to remove (applied first)
+            snapshot: The index snapshot that now contains these changes
+        """
+        rows = [self._row(record) for record in records]
+        with self._lock, self._conn:
+            self._delete(list(removed_ids))
+            self._upsert(rows)
+            self._set_snapshot(snapshot)
+
+    def restore(self, rows: list[dict[str, Any]], snapshot: str) -> None:
+        """Replace every record with the rows saved in an index snapshot
+
+        Args:
+            rows: Full rows, as returned by `state_after`
+            snapshot: The snapshot they were saved with
+        """
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM processed_documents")
+            self._upsert(rows)
+            self._set_snapshot(snapshot)
+
+    def to_dataframe(self) -> "pd.DataFrame":
         """Retrieve all processed documents as a pandas DataFrame.
 
         Returns:
             pd.DataFrame: A pandas DataFrame containing all processed documents.
         """
-        with sqlite3.connect(self.db_path) as conn:
+        import pandas as pd
+
+        with self._lock:
+            return pd.read_sql_query(
+                "SELECT * FROM processed_documents ORDER BY processed_at DESC",
+                self._conn,
+            )
+
+    def report(self) -> "pd.DataFrame":
+        """Ingestion performance per source, slowest first.
+
+        Returns:
+            pd.DataFrame: Source, type, status, chunk count, parse/load/total
+            seconds and the parser and embedding model used.
+        """
+        import pandas as pd
+
+        with self._lock:
             return pd.read_sql_query(
-                "SELECT * FROM processed_documents ORDER BY processed_at DESC", conn
+                """
+                SELECT document_source, document_type, status, chunk_count,
+                       parse_seconds, load_seconds,
+                       COALESCE(parse_seconds, 0) + COALESCE(load_seconds, 0)
+                           AS total_seconds,
+                       parser_version, embedding_model, embedding_dims, error
+                FROM processed_documents
+                ORDER BY total_seconds DESC
+                """,
+                self._conn,
             )
@@ -8,6 +8,9 @@ from labrag.ingestion.parsers.models import PDFParseResult
 class PDFParser:
     """Parse PDFs using LandingAI - returns pre-chunked content"""
 
+    # Bump when the output format changes, so stored artifacts are re-parsed
+    version = "landing_ai-1"
+
     def parse(self, pdf_path: str | Path) -> PDFParseResult:
         """Parse PDF and return structured result
 
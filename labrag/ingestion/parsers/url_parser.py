@@ -1,24 +1,90 @@
+import asyncio
+import time
+from collections import defaultdict
+from typing import Literal
+from urllib.parse import urlparse
+
 from firecrawl import FirecrawlApp
-from langchain.chat_models import init_chat_model
+from firecrawl.firecrawl import ScrapeResponse
 from langchain.prompts import ChatPromptTemplate
 from loguru import logger
 
+from labrag.ingestion.concurrency import retry_async
+from labrag.ingestion.parsers.boilerplate import Block, BoilerplateRemover, join_blocks
 from labrag.ingestion.parsers.models import URLParseResult
+from labrag.ingestion.tokens import count_tokens
+from labrag.metrics import metrics
+from labrag.providers import get_chat_model
+
+CleanMode = Literal["heuristic", "llm", "hybrid"]
+
+# Largest piece of markdown sent to the LLM in one cleaning call
+LLM_CLEAN_CHUNK_TOKENS = 3000
 
 
 class URLParser:
     """Parse URLs using Firecrawl - returns raw content for chunking"""
 
-    def __init__(self) -> None:
-        """Initialize the URL parser"""
+    # Bump when the output format changes, so stored artifacts are re-parsed
+    parser_version = "firecrawl-1"
+
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        per_domain_concurrency: int = 1,
+        domain_delay_seconds: float = 1.0,
+        attempts: int = 3,
+        timeout_seconds: float = 90.0,
+        retry_base_delay_seconds: float = 2.0,
+        clean_mode: CleanMode = "hybrid",
+        clean_model: str = "gpt-4o",
+    ) -> None:
+        """Initialize the URL parser
+
+        Args:
+            max_concurrency: Maximum in-flight scrapes, and separately cleanings
+            per_domain_concurrency: Maximum in-flight scrapes per domain
+            domain_delay_seconds: Minimum delay between scrapes of one domain
+            attempts: Attempts per scrape or cleaning call
+            timeout_seconds: Timeout per attempt
+            retry_base_delay_seconds: First retry delay, doubled on each failure
+            clean_mode: How articles are cleaned: "heuristic" (local rules only),
+                "llm" (the whole article through the LLM) or "hybrid" (rules,
+                then the LLM for the blocks the rules can't decide)
+            clean_model: The chat model used for LLM cleaning
+        """
         self.firecrawl = FirecrawlApp()
+        self.domain_delay_seconds = domain_delay_seconds
+        self.attempts = attempts
+        self.timeout_seconds = timeout_seconds
+        self.retry_base_delay_seconds = retry_base_delay_seconds
+        self.clean_mode = clean_mode
+        self.clean_model = clean_model
+        self.boilerplate = BoilerplateRemover()
 
-    async def parse(self, url: str, clean_article: bool = True) -> URLParseResult:
+        self._scrape_slots = asyncio.Semaphore(max_concurrency)
+        self._clean_slots = asyncio.Semaphore(max_concurrency)
+        self._domain_slots: defaultdict[str, asyncio.Semaphore] = defaultdict(
+            lambda: asyncio.Semaphore(per_domain_concurrency)
+        )
+        self._domain_last_start: dict[str, float] = {}
+
+    @property
+    def version(self) -> str:
+        """Artifact version: the cleaned content also depends on the mode"""
+        return f"{self.parser_version}-{self.clean_mode}"
+
+    async def parse(
+        self,
+        url: str,
+        clean_article: bool | CleanMode = True,
+    ) -> URLParseResult:
         """Parse URL and return structured result
 
         Args:
             url: The URL to parse
-            clean_article: Whether to clean the article
+            clean_article: Whether to clean the article (True uses the parser's
+                mode), or the cleaning mode to use
 
         Returns:
             URLParseResult: The parsed document with raw content and metadata
@@ -26,17 +92,18 @@ class URLParser:
 
         logger.info(f"Parsing URL: {url}")
 
-        # Note: Firecrawl doesn't have async support yet, but we prepare for it
-        result = self.firecrawl.scrape_url(url, formats=["markdown"], timeout=60_000)
+        result = await self._scrape_and_observe(url)
 
         if not result.markdown:
             logger.warning(f"No content extracted from {url}")
             return None
 
         content = result.markdown
-        if clean_article:
-            logger.info(f"Cleaning article for {url}")
-            content = await self._clean_article(content)
+        mode = self.clean_mode if clean_article is True else clean_article
+        if mode:
+            logger.info(f"Cleaning article for {url} ({mode})")
+            with metrics.timer("url.clean"):
+                content = await self._clean(url, result.markdown, mode)
 
         metadata = {
             "source": url,
@@ -51,6 +118,100 @@ class URLParser:
             metadata=metadata,
         )
 
+    async def _scrape_and_observe(self, url: str) -> ScrapeResponse:
+        """Scrape a URL and count its blocks towards its site's chrome"""
+        result = await self._scrape(url)
+        if result.markdown:
+            self.boilerplate.observe(result.markdown, urlparse(url).netloc, url)
+        return result
+
+    async def _scrape(self, url: str) -> ScrapeResponse:
+        """Scrape a URL off the event loop, politely and with retries
+
+        Firecrawl's client is synchronous, so each scrape runs in a worker
+        thread. Scrapes are bounded globally and per domain, and scrapes of the
+        same domain start at least `domain_delay_seconds` apart.
+        """
+        domain = urlparse(url).netloc
+        async with self._domain_slots[domain]:
+            with metrics.timer("url.domain_wait"):
+                # Reserve the start before sleeping, so that concurrent scrapes
+                # of the domain queue up behind each other instead of all
+                # waking at once
+                now = time.monotonic()
+                last_start = self._domain_last_start.get(domain)
+                start = now
+                if last_start is not None:
+                    start = max(now, last_start + self.domain_delay_seconds)
+                self._domain_last_start[domain] = start
+                await asyncio.sleep(start - now)
+
+            async with self._scrape_slots:
+                with metrics.timer("url.scrape"):
+                    return await retry_async(
+                        lambda: asyncio.to_thread(
+                            self.firecrawl.scrape_url,
+                            url,
+                            formats=["markdown"],
+                            timeout=60_000,
+                        ),
+                        label=f"Scraping {url}",
+                        attempts=self.attempts,
+                        timeout=self.timeout_seconds,
+                        base_delay=self.retry_base_delay_seconds,
+                    )
+
+    async def _clean(self, url: str, markdown: str, mode: CleanMode) -> str:
+        """Strip boilerplate locally, sending only undecided blocks to the LLM
+
+        Blocks the rules keep or drop are settled locally. Runs of ambiguous
+        blocks (every block in "llm" mode) are packed into pieces of at most
+        `LLM_CLEAN_CHUNK_TOKENS` and cleaned in parallel, so long articles are
+        never truncated. In "heuristic" mode ambiguous blocks are kept as is.
+        """
+        if mode == "llm":
+            blocks = [
+                Block(text=text, label="ambiguous", reason="llm mode")
+                for text in markdown.split("\n\n")
+                if text.strip()
+            ]
+        else:
+            blocks = self.boilerplate.split(markdown, site=urlparse(url).netloc)
+
+        if mode == "heuristic":
+            content, pieces = join_blocks(blocks, keep_ambiguous=True), []
+        else:
+            segments, pieces = _segment(blocks)
+            cleaned = await asyncio.gather(
+                *(self._clean_piece(url, text) for _, text in pieces)
+            )
+            for (index, _), text in zip(pieces, cleaned, strict=True):
+                segments[index] = text.strip()
+            content = "\n\n".join(segment for segment in segments if segment)
+
+        raw_tokens = count_tokens(markdown)
+        llm_tokens = sum(count_tokens(text) for _, text in pieces)
+        metrics.increment("url.clean.raw_tokens", raw_tokens)
+        metrics.increment("url.clean.llm_input_tokens", llm_tokens)
+        dropped = sum(block.label == "drop" for block in blocks)
+        logger.info(
+            f"Cleaned {url} ({mode}): dropped {dropped}/{len(blocks)} blocks, "
+            f"sent {llm_tokens}/{raw_tokens} raw tokens to the LLM "
+            f"({1 - llm_tokens / max(1, raw_tokens):.0%} saved)"
+        )
+        return content
+
+    async def _clean_piece(self, url: str, markdown: str) -> str:
+        """Clean one piece of an article with the LLM, bounded and retried"""
+        async with self._clean_slots:
+            return await retry_async(
+                lambda: self._clean_article(markdown),
+                label=f"Cleaning {url}",
+                attempts=self.attempts,
+                timeout=self.timeout_seconds,
+                base_delay=self.retry_base_delay_seconds,
+            )
+
     async def _clean_article(self, markdown: str) -> str:
         """Clean article using LLM
 
@@ -72,8 +233,45 @@ class URLParser:
             [("system", system_message), ("human", "{markdown}")]
         )
 
-        llm = init_chat_model("gpt-4o")
+        llm = get_chat_model(self.clean_model)
         chain = prompt | llm
         cleaned = await chain.ainvoke(input={"markdown": markdown})
 
         return cleaned.content
+
+
+def _segment(blocks: list[Block]) -> tuple[list[str], list[tuple[int, str]]]:
+    """Lay out kept blocks and placeholders for LLM-cleaned pieces
+
+    Returns:
+        The segments in document order (placeholders are empty) and the
+        (segment index, markdown) pieces to clean
+    """
+    segments: list[str] = []
+    pieces: list[tuple[int, str]] = []
+    run: list[str] = []
+
+    def flush() -> None:
+        piece, piece_tokens = [], 0
+        for text in run:
+            tokens = count_tokens(text)
+            if piece and piece_tokens + tokens > LLM_CLEAN_CHUNK_TOKENS:
+                pieces.append((len(segments), "\n\n".join(piece)))
+                segments.append("")
+                piece, piece_tokens = [], 0
+            piece.append(text)
+            piece_tokens += tokens
+        if piece:
+            pieces.append((len(segments), "\n\n".join(piece)))
+            segments.append("")
+        run.clear()
+
+    for block in blocks:
+        if block.label == "ambiguous":
+            run.append(block.text)
+            continue
+        flush()
+        if block.label == "keep":
+            segments.append(block.text)
+    flush()
+    return segments, pieces
@@ -0,0 +1,199 @@
+"""Staged async pipeline connected by bounded queues.
+
+Each stage has its own worker count and an input queue of limited size. A
+full queue blocks the stage before it, so a slow stage throttles everything
+upstream and only a bounded number of items is in memory at any time, however
+large the input. Stages log their throughput, queue depth and busy workers
+while the pipeline runs.
+"""
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from loguru import logger
+
+from labrag.ingestion.concurrency import Progress
+
+# Marks the end of a stage's input
+_DONE = object()
+
+
+class Stage:
+    """One step of a pipeline, run by a fixed number of workers"""
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[Any], Awaitable[Any]],
+        workers: int = 1,
+        queue_size: int | None = None,
+    ) -> None:
+        """Initialize the stage
+
+        Args:
+            name: The stage name, for progress logs
+            handler: Processes one item and returns it for the next stage, or
+                None to drop it (the handler logs and records the failure)
+            workers: Number of items processed at once
+            queue_size: Input queue capacity (defaults to twice the workers)
+        """
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.queue_size = queue_size or 2 * self.workers
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self.processed = 0
+        self.dropped = 0
+        self.active = 0
+        self.busy_seconds = 0.0
+        # Workers whose input has ended
+        self.finished = 0
+
+    def status(self, elapsed: float) -> str:
+        """One-line summary of the stage's throughput and load"""
+        rate = self.processed / elapsed if elapsed > 0 else 0.0
+        return (
+            f"{self.name:<6} {self.processed:>5} done {self.dropped:>3} dropped "
+            f"{rate:6.2f}/s  queue {self.queue.qsize():>3}/{self.queue_size:<3} "
+            f"busy {self.active}/{self.workers}"
+        )
+
+
+class Pipeline:
+    """Run items through stages concurrently, with backpressure between them"""
+
+    def __init__(
+        self,
+        stages: list[Stage],
+        label: str = "pipeline",
+        report_interval: float = 10.0,
+        describe: Callable[[Any], str] = str,
+        on_error: Callable[[Any, str, Exception], None] | None = None,
+        on_stage: Callable[[Any, str, float], None] | None = None,
+    ) -> None:
+        """Initialize the pipeline
+
+        Args:
+            stages: The stages, in order
+            label: Name of the pipeline, for progress logs
+            report_interval: Seconds between stage status logs (0 disables)
+            describe: Short name of an item, for progress logs
+            on_error: Called with the item, stage name and error when a
+                handler raises; the item is dropped either way
+            on_stage: Called with the item, stage name and seconds spent
+                whenever a stage finishes an item successfully
+        """
+        self.stages = stages
+        self.label = label
+        self.report_interval = report_interval
+        self.describe = describe
+        self.on_error = on_error
+        self.on_stage = on_stage
+
+    async def run(self, items: list[Any]) -> list[Any]:
+        """Feed items through every stage
+
+        Args:
+            items: The inputs of the first stage
+
+        Returns:
+            The items that made it through the last stage, in completion order
+        """
+        self.progress = Progress(len(items), self.label)
+        self.results: list[Any] = []
+        self.started = time.perf_counter()
+        if not items:
+            return self.results
+
+        reporter = None
+        if self.report_interval > 0:
+            reporter = asyncio.create_task(self._report())
+        try:
+            # If anything fails outside the handlers (a callback, a cancelled
+            # run), the group cancels every other worker instead of leaving
+            # them blocked on their queues
+            async with asyncio.TaskGroup() as group:
+                group.create_task(self._feed(items))
+                for index, stage in enumerate(self.stages):
+                    stage.finished = 0
+                    next_stage = self.stages[index + 1 : index + 2]
+                    for _ in range(stage.workers):
+                        group.create_task(self._work(stage, *next_stage))
+        except ExceptionGroup as errors:
+            raise errors.exceptions[0] from None
+        finally:
+            if reporter is not None:
+                reporter.cancel()
+        self._log_summary()
+        return self.results
+
+    async def _feed(self, items: list[Any]) -> None:
+        first = self.stages[0]
+        for item in items:
+            await first.queue.put(item)
+        for _ in range(first.workers):
+            await first.queue.put(_DONE)
+
+    async def _work(self, stage: Stage, next_stage: Stage | None = None) -> None:
+        while (item := await stage.queue.get()) is not _DONE:
+            stage.active += 1
+            start = time.perf_counter()
+            try:
+                output = await stage.handler(item)
+            except Exception as e:
+                logger.error(f"{stage.name} failed for {self.describe(item)}: {e!r}")
+                if self.on_error is not None:
+                    self.on_error(item, stage.name, e)
+                output = None
+            finally:
+                seconds = time.perf_counter() - start
+                stage.active -= 1
+                stage.busy_seconds += seconds
+
+            if output is None:
+                stage.dropped += 1
+                self.progress.update(self.describe(item), ok=False)
+                continue
+
+            stage.processed += 1
+            if self.on_stage is not None:
+                self.on_stage(output, stage.name, seconds)
+            if next_stage is not None:
+                # Blocks while the next stage is saturated (backpressure)
+                await next_stage.queue.put(output)
+            else:
+                self.results.append(output)
+                self.progress.update(self.describe(output))
+
+        # The stage's last worker to finish ends the next stage's input
+        stage.finished += 1
+        if next_stage is not None and stage.finished == stage.workers:
+            for _ in range(next_stage.workers):
+                await next_stage.queue.put(_DONE)
+
+    async def _report(self) -> None:
+        while True:
+            await asyncio.sleep(self.report_interval)
+            elapsed = time.perf_counter() - self.started
+            logger.info(
+                f"[{self.label}] {elapsed:.0f}s elapsed\n"
+                + "\n".join(f"  {stage.status(elapsed)}" for stage in self.stages)
+            )
+
+    def _log_summary(self) -> None:
+        """Log how busy each stage was, to show where the bottleneck is"""
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        lines = []
+        for stage in self.stages:
+            utilization = stage.busy_seconds / (elapsed * stage.workers)
+            lines.append(
+                f"  {stage.name:<8} {stage.processed:>5} done "
+                f"{stage.dropped:>3} dropped  busy {stage.busy_seconds:7.2f}s "
+                f"({utilization:.0%} of {stage.workers} workers)"
+            )
+        logger.info(
+            f"[{self.label}] {len(self.results)}/{self.progress.total} items "
+            f"in {elapsed:.2f}s\n" + "\n".join(lines)
+        )
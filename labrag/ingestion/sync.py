@@ -0,0 +1,209 @@
+"""Incremental knowledge base sync based on source fingerprints.
+
+Files are fingerprinted cheaply by size and mtime; only when those differ from
+the cache is the content hashed. Comparing the fingerprints on disk with the
+`DocumentCache` yields the minimal set of adds, updates, renames and removals.
+"""
+
+import hashlib
+import os
+from collections import Counter
+from pathlib import Path
+from typing import Any, Literal
+
+from pydantic import BaseModel
+
+from labrag.ingestion.parsers.cache import DocumentCache
+
+SyncActionType = Literal["add", "update", "rename", "remove", "touch"]
+
+
+def file_sha256(path: str | Path) -> str:
+    """SHA-256 of a file's content, read in 1 MiB blocks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def source_id(source: str) -> str:
+    """Document ID of a source (file path or URL)"""
+    return hashlib.sha256(source.encode()).hexdigest()
+
+
+def read_url_list(path: str | Path) -> list[str]:
+    """URLs listed one per line in a file (blank lines and # comments skipped)"""
+    with open(path) as f:
+        lines = (line.strip() for line in f)
+        return [line for line in lines if line and not line.startswith("#")]
+
+
+def append_url(path: str | Path, url: str) -> bool:
+    """Add a URL to a URL list file, creating it if needed
+
+    Returns:
+        bool: False if the URL was already listed
+    """
+    path = Path(path)
+    if path.exists() and url in read_url_list(path):
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a") as f:
+        f.write(f"{url}\n")
+    return True
+
+
+class SyncAction(BaseModel):
+    """One change to apply to the knowledge base"""
+
+    action: SyncActionType
+    document_type: Literal["pdf", "url"]
+    source: str
+    previous_source: str | None = None
+    content_hash: str | None = None
+    size_bytes: int | None = None
+    mtime: float | None = None
+    reason: str = ""
+
+
+class SyncPlan(BaseModel):
+    """The delta between the configured sources and the cache"""
+
+    actions: list[SyncAction] = []
+    unchanged: int = 0
+
+    def counts(self) -> dict[str, int]:
+        """Number of planned actions per action type"""
+        return dict(Counter(a.action for a in self.actions))
+
+    def describe(self) -> str:
+        """Human-readable plan, one line per action"""
+        counts = self.counts()
+        header = ", ".join(f"{n} {action}" for action, n in sorted(counts.items()))
+        lines = [f"Sync plan: {header or 'nothing to do'} ({self.unchanged} unchanged)"]
+        for a in self.actions:
+            source = a.source
+            if a.previous_source:
+                source = f"{a.previous_source} -> {a.source}"
+            lines.append(f"  {a.action:<7} {a.document_type:<4} {source} ({a.reason})")
+        return "\n".join(lines)
+
+
+def plan_sync(cache: DocumentCache, pdf_paths: list[str], urls: list[str]) -> SyncPlan:
+    """Compute the changes needed to bring the cache in line with the sources
+
+    Args:
+        cache: The document cache of the current knowledge base
+        pdf_paths: The PDF files currently in the papers directory
+        urls: The URLs currently in the configuration
+
+    Returns:
+        SyncPlan: The actions to apply
+    """
+    plan = SyncPlan()
+    cached_pdfs = {row["document_source"]: row for row in cache.list_documents("pdf")}
+
+    new_files: list[SyncAction] = []
+    for path in pdf_paths:
+        stat = os.stat(path)
+        row = cached_pdfs.get(path)
+        fingerprint = {"size_bytes": stat.st_size, "mtime": stat.st_mtime}
+
+        if row is None or row["status"] == "failed":
+            content_hash = file_sha256(path)
+            new_files.append(
+                SyncAction(
+                    action="add",
+                    document_type="pdf",
+                    source=path,
+                    content_hash=content_hash,
+                    reason="new file" if row is None else "previous attempt failed",
+                    **fingerprint,
+                )
+            )
+            continue
+
+        if row["size_bytes"] == stat.st_size and row["mtime"] == stat.st_mtime:
+            plan.unchanged += 1
+            continue
+
+        content_hash = file_sha256(path)
+        if row["content_hash"] is None or row["content_hash"] == content_hash:
+            # Touched but identical (or cached before fingerprints existed): only
+            # the fingerprint needs refreshing, no paid re-parse
+            reason = "content unchanged" if row["content_hash"] else "no fingerprint"
+            action = "touch"
+        else:
+            reason, action = "content changed", "update"
+
+        plan.actions.append(
+            SyncAction(
+                action=action,
+                document_type="pdf",
+                source=path,
+                content_hash=content_hash,
+                reason=reason,
+                **fingerprint,
+            )
+        )
+
+    _plan_missing_files(plan, cached_pdfs, set(pdf_paths), new_files)
+    _plan_urls(plan, cache, urls)
+    return plan
+
+
+def _plan_missing_files(
+    plan: SyncPlan,
+    cached_pdfs: dict[str, Any],
+    on_disk: set[str],
+    new_files: list[SyncAction],
+) -> None:
+    """Files gone from disk are either renamed (same content elsewhere) or removed"""
+    missing = [row for path, row in cached_pdfs.items() if path not in on_disk]
+    missing_by_hash = {
+        row["content_hash"]: row for row in missing if row["content_hash"]
+    }
+    renamed = set()
+    for action in new_files:
+        previous = missing_by_hash.pop(action.content_hash, None)
+        if previous is not None:
+            action.action = "rename"
+            action.previous_source = previous["document_source"]
+            action.reason = "same content, new path"
+            renamed.add(previous["document_source"])
+        plan.actions.append(action)
+
+    for row in missing:
+        if row["document_source"] not in renamed:
+            plan.actions.append(
+                SyncAction(
+                    action="remove",
+                    document_type="pdf",
+                    source=row["document_source"],
+                    reason="file deleted",
+                )
+            )
+
+
+def _plan_urls(plan: SyncPlan, cache: DocumentCache, urls: list[str]) -> None:
+    """URLs have no local content to fingerprint: only additions and removals"""
+    rows = {row["document_source"]: row for row in cache.list_documents("url")}
+    for url in urls:
+        row = rows.get(url)
+        if row is not None and row["status"] != "failed":
+            plan.unchanged += 1
+        else:
+            reason = "new URL" if row is None else "previous attempt failed"
+            plan.actions.append(
+                SyncAction(action="add", document_type="url", source=url, reason=reason)
+            )
+    for url in rows.keys() - set(urls):
+        plan.actions.append(
+            SyncAction(
+                action="remove",
+                document_type="url",
+                source=url,
+                reason="URL removed from config",
+            )
+        )
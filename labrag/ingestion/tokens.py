@@ -0,0 +1,52 @@
+"""Token counting shared by article cleaning and chunking.
+
+Counts use the gpt-4o tokenizer. When its encoding can't be loaded (offline,
+no cache) they fall back to an estimate of 4 characters per token.
+"""
+
+from functools import lru_cache
+
+import tiktoken
+from loguru import logger
+
+# Characters per token when no tokenizer is available
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=1)
+def _encoding() -> tiktoken.Encoding | None:
+    try:
+        return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        logger.warning(f"Tokenizer unavailable, estimating tokens from length: {e}")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Number of gpt-4o tokens in a text (about 4 characters each if offline)"""
+    encoding = _encoding()
+    if encoding is None:
+        return len(text) // CHARS_PER_TOKEN
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def count_tokens_batch(texts: list[str]) -> list[int]:
+    """Token counts of many texts, encoded in parallel by tiktoken"""
+    encoding = _encoding()
+    if encoding is None:
+        return [len(text) // CHARS_PER_TOKEN for text in texts]
+    return [len(tokens) for tokens in encoding.encode_ordinary_batch(texts)]
+
+
+def split_by_tokens(text: str, max_tokens: int) -> list[str]:
+    """Cut a text into consecutive pieces of at most `max_tokens` tokens"""
+    encoding = _encoding()
+    if encoding is None:
+        size = max_tokens * CHARS_PER_TOKEN
+        return [text[i : i + size] for i in range(0, len(text), size)]
+
+    tokens = encoding.encode_ordinary(text)
+    return [
+        encoding.decode(tokens[i : i + max_tokens])
+        for i in range(0, len(tokens), max_tokens)
+    ]
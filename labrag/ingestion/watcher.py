@@ -0,0 +1,293 @@
+"""Watch the configured sources and ingest changes as they happen.
+
+The watcher syncs the knowledge base whenever a PDF in `papers_dir`, the
+config file (and with it `media_urls`) or the `urls_file` changes. File system
+events come from watchdog (inotify on Linux) when it is installed (the `watch`
+extra); otherwise the files are polled. Events only wake the watcher up: changes are
+confirmed by comparing file sizes and modification times, and a burst of
+changes (a folder being copied in) is debounced into a single incremental sync
+once the files have been quiet for a while. A sync that fails is retried with
+exponential backoff, whether or not the files change again.
+"""
+
+import asyncio
+import os
+import time
+from pathlib import Path
+from typing import Any
+
+import yaml
+from loguru import logger
+
+from labrag.config import load_config
+from labrag.ingestion.knowledge_base import KnowledgeBaseBuilder
+
+# (size, mtime_ns) of every watched file
+Fingerprint = dict[str, tuple[int, int]]
+
+
+def _stat(path: str) -> tuple[int, int] | None:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+class _WakeHandler:
+    """watchdog event handler that wakes the watcher on relevant events"""
+
+    def __init__(
+        self, loop: asyncio.AbstractEventLoop, wake: asyncio.Event, files: set[str]
+    ) -> None:
+        self.loop = loop
+        self.wake = wake
+        self.files = files
+
+    def dispatch(self, event: Any) -> None:  # noqa: ANN401
+        paths = [event.src_path, getattr(event, "dest_path", "")]
+        if any(
+            path.lower().endswith(".pdf") or os.path.abspath(path) in self.files
+            for path in paths
+            if path
+        ):
+            self.loop.call_soon_threadsafe(self.wake.set)
+
+
+class SourceWatcher:
+    """Long-running incremental ingestion of papers_dir, media_urls and urls_file"""
+
+    def __init__(
+        self,
+        builder: KnowledgeBaseBuilder,
+        config_path: str,
+        debounce_seconds: float = 5.0,
+        poll_seconds: float = 2.0,
+        max_delay_seconds: float = 60.0,
+        use_events: bool = True,
+        retry_seconds: float = 10.0,
+        max_retry_seconds: float = 300.0,
+    ) -> None:
+        """Initialize the watcher
+
+        Args:
+            builder: Builder whose index and cache are kept in sync
+            config_path: Config file listing the sources (watched as well)
+            debounce_seconds: Quiet time required before a sync starts
+            poll_seconds: Interval between checks when polling
+            max_delay_seconds: Sync anyway after this long, even if files keep
+                changing
+            use_events: Use file system events when watchdog is installed
+            retry_seconds: Delay before retrying a failed sync, doubled after
+                each consecutive failure
+            max_retry_seconds: Longest delay between retries
+        """
+        self.builder = builder
+        self.config_path = os.path.abspath(config_path)
+        self.debounce_seconds = debounce_seconds
+        self.poll_seconds = poll_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.use_events = use_events
+        self.retry_seconds = retry_seconds
+        self.max_retry_seconds = max_retry_seconds
+        self.papers_dir, self.urls_file = self._sources()
+        self.syncs = 0
+        # Consecutive failed syncs
+        self.failures = 0
+
+    @classmethod
+    def from_config(
+        cls,
+        builder: KnowledgeBaseBuilder,
+        config_path: str,
+        config: dict[str, Any],
+        **overrides: Any,  # noqa: ANN401
+    ) -> "SourceWatcher":
+        """Watcher configured from the `ingestion` section (watch_* keys)"""
+        ingestion_config = config.get("ingestion", {})
+        settings = {
+            "debounce_seconds": ingestion_config.get("watch_debounce_seconds", 5.0),
+            "poll_seconds": ingestion_config.get("watch_poll_seconds", 2.0),
+            "max_delay_seconds": ingestion_config.get("watch_max_delay_seconds", 60.0),
+            "retry_seconds": ingestion_config.get("watch_retry_seconds", 10.0),
+            "max_retry_seconds": ingestion_config.get("watch_max_retry_seconds", 300.0),
+            **overrides,
+        }
+        return cls(builder, config_path, **settings)
+
+    def _sources(self) -> tuple[str, str | None]:
+        """papers_dir and urls_file from the config, as absolute paths"""
+        try:
+            config = load_config(self.config_path)
+        except (OSError, yaml.YAMLError) as e:
+            # Editors may replace the file, or it may be half-written
+            logger.warning(f"Could not read {self.config_path}: {e}")
+            return getattr(self, "papers_dir", ""), getattr(self, "urls_file", None)
+        data_sources = config.get("data_sources", {})
+        papers_dir = data_sources.get("papers_dir", "data/raw/papers")
+        urls_file = data_sources.get("urls_file")
+        return os.path.abspath(papers_dir), urls_file and os.path.abspath(urls_file)
+
+    def _files(self) -> set[str]:
+        """The individual files watched besides the PDFs"""
+        return {path for path in (self.config_path, self.urls_file) if path}
+
+    def fingerprint(self) -> Fingerprint:
+        """Size and modification time of the config file, urls_file and PDFs"""
+        paths = list(self._files())
+        if os.path.isdir(self.papers_dir):
+            paths += [
+                entry.path
+                for entry in os.scandir(self.papers_dir)
+                if entry.name.lower().endswith(".pdf")
+            ]
+        return {path: stat for path in paths if (stat := _stat(path)) is not None}
+
+    async def run(self, stop: asyncio.Event | None = None) -> None:
+        """Sync once, then sync again after every settled change until stopped
+
+        Args:
+            stop: Set to shut the watcher down (runs until cancelled otherwise)
+        """
+        stop = stop or asyncio.Event()
+        wake = asyncio.Event()
+        observer = self._start_observer(wake)
+        mode = (
+            "file system events" if observer else f"polling every {self.poll_seconds}s"
+        )
+        watched = ", ".join([self.papers_dir, *sorted(self._files())])
+        logger.info(f"Watching {watched} ({mode})")
+        try:
+            synced = await self._sync("startup")
+            while not stop.is_set():
+                if synced is None:
+                    # The last sync failed: its changes are still to apply
+                    if not await self._wait_for_retry(stop):
+                        break
+                    reason = "retry"
+                elif not await self._wait_for_change(synced, wake, stop):
+                    break
+                else:
+                    reason = "change"
+                changed_at = time.perf_counter()
+                await self._settle()
+                synced = await self._sync(reason, changed_at)
+
+                if self._sources() != (self.papers_dir, self.urls_file):
+                    # The sources were moved in the config: watch the new ones
+                    self.papers_dir, self.urls_file = self._sources()
+                    self._stop_observer(observer)
+                    observer = self._start_observer(wake)
+                    if synced is not None:
+                        synced = self.fingerprint()
+        finally:
+            self._stop_observer(observer)
+
+    async def _wait_for_retry(self, stop: asyncio.Event) -> bool:
+        """Wait out the backoff after a failed sync
+
+        Returns:
+            bool: False if the watcher was stopped instead
+        """
+        delay = min(
+            self.retry_seconds * 2 ** (self.failures - 1), self.max_retry_seconds
+        )
+        logger.info(f"Retrying the sync in {delay:.0f}s")
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=delay)
+        except TimeoutError:
+            return True
+        return False
+
+    async def _wait_for_change(
+        self, synced: Fingerprint, wake: asyncio.Event, stop: asyncio.Event
+    ) -> bool:
+        """Wait until the watched files differ from the last sync
+
+        Returns:
+            bool: False if the watcher was stopped instead
+        """
+        while not stop.is_set():
+            wake.clear()
+            if self.fingerprint() != synced:
+                return True
+            waiters = [
+                asyncio.create_task(stop.wait()),
+                asyncio.create_task(wake.wait()),
+            ]
+            # With events, still re-check now and then in case one was missed
+            timeout = self.poll_seconds * 30 if self.use_events else self.poll_seconds
+            _, pending = await asyncio.wait(
+                waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in pending:
+                task.cancel()
+        return False
+
+    async def _settle(self) -> None:
+        """Wait until the files stop changing (bounded by max_delay_seconds)"""
+        start = time.perf_counter()
+        previous = self.fingerprint()
+        while time.perf_counter() - start < self.max_delay_seconds:
+            await asyncio.sleep(self.debounce_seconds)
+            current = self.fingerprint()
+            if current == previous:
+                return
+            previous = current
+        logger.warning("Sources still changing, syncing anyway")
+
+    async def _sync(
+        self, reason: str, changed_at: float | None = None
+    ) -> Fingerprint | None:
+        """Apply the changes since the last sync
+
+        Returns:
+            The fingerprint taken before syncing (anything changed during the
+            sync is picked up by the next one), or None if the sync failed
+        """
+        fingerprint = self.fingerprint()
+        try:
+            # Pick up snapshots saved by other writers (e.g. an upload worker)
+            await asyncio.to_thread(self.builder.refresh)
+            plan = await self.builder.sync_from_config(self.config_path)
+        except Exception as e:
+            self.failures += 1
+            logger.error(f"Sync after {reason} failed ({self.failures} in a row): {e}")
+            return None
+
+        self.failures = 0
+        self.syncs += 1
+        if changed_at is not None and plan.actions:
+            logger.info(
+                f"Changes committed {time.perf_counter() - changed_at:.1f}s "
+                f"after they were first seen: {plan.counts()}"
+            )
+        return fingerprint
+
+    def _start_observer(self, wake: asyncio.Event) -> Any:  # noqa: ANN401
+        """Start a watchdog observer, or return None when polling"""
+        if not self.use_events:
+            return None
+        try:
+            from watchdog.observers import Observer
+        except ImportError:
+            logger.info("watchdog is not installed, falling back to polling")
+            self.use_events = False
+            return None
+
+        handler = _WakeHandler(asyncio.get_running_loop(), wake, self._files())
+        observer = Observer()
+        directories = {str(Path(path).parent) for path in self._files()}
+        if os.path.isdir(self.papers_dir):
+            directories.add(self.papers_dir)
+        for directory in directories:
+            if os.path.isdir(directory):
+                observer.schedule(handler, directory)
+        observer.start()
+        return observer
+
+    @staticmethod
+    def _stop_observer(observer: Any) -> None:  # noqa: ANN401
+        if observer is not None:
+            observer.stop()
+            observer.join()
@@ -1,72 +1,274 @@
-"""Slack app integration for labrag."""
+"""Slack app integration for labrag.
 
-import os
-from collections.abc import Callable
+Events are acknowledged as soon as they arrive: answering runs in background
+tasks, so Slack's 3-second acknowledgement deadline is never at risk and it
+doesn't retry (and duplicate) slow events. Each answer starts with a
+placeholder reply that is updated in place once the API responds. All API
+calls share one keep-alive HTTP client.
+
+Nothing is created at import time: `labrag.integrations.slack.main` builds the
+service from the environment (bot token, signing secret, API URL).
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
 
 import httpx
-from dotenv import load_dotenv
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from loguru import logger
-from slack_bolt import App
-from slack_bolt.adapter.starlette import SlackRequestHandler
+from slack_bolt.adapter.starlette.async_handler import AsyncSlackRequestHandler
+from slack_bolt.async_app import AsyncApp
+from slack_sdk.web.async_client import AsyncWebClient
 
 from labrag.integrations.slack.utils import format_for_slack, remove_slack_mention
+from labrag.metrics import metrics
+
+REQUEST_TIMEOUT = 60.0
+# Leave headroom so the API gives up (and degrades) before this client does
+DEADLINE_SECONDS = REQUEST_TIMEOUT - 5
+
+PLACEHOLDER_TEXT = ":hourglass_flowing_sand: Looking into it..."
+# Attempts while the API answers 503 (still starting up)
+STARTING_RETRIES = 3
+
+
+class EventDeduplicator:
+    """Remembers recently seen Slack event IDs
+
+    Slack redelivers an event when it isn't acknowledged in time; the retry
+    carries the same event_id. IDs are kept in memory, so with several
+    replicas a retry can still reach another one.
+    """
+
+    def __init__(self, ttl_seconds: float = 600.0, max_size: int = 10_000) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._seen: OrderedDict[str, float] = OrderedDict()
+
+    def seen(self, event_id: str) -> bool:
+        """Whether the event was seen before (and remember it if not)"""
+        now = time.monotonic()
+        while self._seen and (
+            len(self._seen) >= self.max_size
+            or next(iter(self._seen.values())) < now - self.ttl_seconds
+        ):
+            self._seen.popitem(last=False)
+
+        if event_id in self._seen:
+            return True
+        self._seen[event_id] = now
+        return False
+
+
+class SlackResponder:
+    """Answers Slack messages through the LabRAG API in background tasks"""
+
+    def __init__(
+        self,
+        api_base_url: str = "http://localhost:8000",
+        concurrency: int = 16,
+        http_client: httpx.AsyncClient | None = None,
+    ) -> None:
+        """Initialize the responder
+
+        Args:
+            api_base_url: The LabRAG API
+            concurrency: Maximum chat requests in flight; later events wait
+                (their placeholder is already posted)
+            http_client: Client for the API (defaults to a keep-alive pool
+                created on first use)
+        """
+        self.api_base_url = api_base_url
+        self.concurrency = concurrency
+        self.deduplicator = EventDeduplicator()
+        self._http_client = http_client
+        self._slots: asyncio.Semaphore | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        """The shared API client (connections are reused across events)"""
+        if self._http_client is None:
+            self._http_client = httpx.AsyncClient(
+                base_url=self.api_base_url,
+                timeout=REQUEST_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=self.concurrency,
+                    max_keepalive_connections=self.concurrency,
+                ),
+            )
+        return self._http_client
+
+    @property
+    def in_flight(self) -> int:
+        """Events being answered"""
+        return len(self._tasks)
+
+    def dispatch(
+        self,
+        body: dict[str, Any],
+        event: dict[str, Any],
+        client: AsyncWebClient,
+    ) -> bool:
+        """Start answering an event in the background
+
+        Returns:
+            bool: False if the event is a redelivery that was already handled
+        """
+        event_id = body.get("event_id") or f"{event['channel']}-{event['ts']}"
+        if self.deduplicator.seen(event_id):
+            metrics.increment("slack.duplicate_events")
+            logger.debug(f"Ignoring redelivered event {event_id}")
+            return False
+
+        metrics.increment("slack.events")
+        task = asyncio.create_task(self.answer(event, client, time.perf_counter()))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
+
+    async def answer(
+        self,
+        event: dict[str, Any],
+        client: AsyncWebClient,
+        received_at: float | None = None,
+    ) -> None:
+        """Post a placeholder, ask the API and replace the placeholder"""
+        received_at = received_at or time.perf_counter()
+        channel = event["channel"]
+        thread_ts = event.get("thread_ts", event["ts"])
+        # Create session_id from channel + thread combination
+        session_id = f"slack_{channel}_{thread_ts}"
+
+        try:
+            placeholder = await client.chat_postMessage(
+                channel=channel, thread_ts=thread_ts, text=PLACEHOLDER_TEXT
+            )
+            metrics.record("slack.placeholder", time.perf_counter() - received_at)
+
+            reply = await self._ask(remove_slack_mention(event["text"]), session_id)
+            await client.chat_update(
+                channel=channel,
+                ts=placeholder["ts"],
+                text=reply,
+                markdown_text=format_for_slack(reply),
+            )
+            metrics.record("slack.answer", time.perf_counter() - received_at)
+        except Exception as e:
+            # Slack API errors: nothing can be posted
+            metrics.increment("slack.failed_answers")
+            logger.error(f"Could not answer in {channel}: {e!r}")
+
+    async def _ask(self, message: str, session_id: str) -> str:
+        """The API's reply to a message (or the error, for the user to see)"""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.concurrency)
+
+        chat_request = {
+            "message": message,
+            "session_id": session_id,
+            "deadline_seconds": DEADLINE_SECONDS,
+        }
+        try:
+            async with self._slots:
+                for _ in range(STARTING_RETRIES):
+                    response = await self.http_client.post(
+                        "/api/chat/", json=chat_request
+                    )
+                    if response.status_code != 503:
+                        break
+                    # The API is still loading (see /api/ready)
+                    await asyncio.sleep(float(response.headers.get("Retry-After", 5)))
+            response.raise_for_status()
+            return response.json().get("response", "Error getting chat response.")
+        except Exception as e:
+            metrics.increment("slack.failed_answers")
+            logger.error(f"Error: {e!r}")
+            return f"Error processing: {e}"
 
-load_dotenv()
+    async def aclose(self, timeout: float = REQUEST_TIMEOUT) -> None:
+        """Finish the answers in progress, then close the API client"""
+        if self._tasks:
+            logger.info(f"Waiting for {len(self._tasks)} Slack answers in progress")
+            await asyncio.wait(self._tasks, timeout=timeout)
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
 
-app = App(
-    token=os.getenv("SLACK_BOT_TOKEN"),
-    signing_secret=os.getenv("SLACK_SIGNING_SECRET"),
-)
 
+def create_app(
+    responder: SlackResponder,
+    token: str | None = None,
+    signing_secret: str | None = None,
+    client: AsyncWebClient | None = None,
+) -> AsyncApp:
+    """Bolt app handing mentions and thread replies to the responder
 
-def send_message(event: dict, say: Callable) -> None:
-    """Send message to labrag chat endpoint."""
-    message = event["text"]
-    message = remove_slack_mention(message)
+    Args:
+        responder: Answers the events
+        token: The bot token
+        signing_secret: Verifies that requests come from Slack
+        client: The Slack Web API client (defaults to one for `token`)
+    """
+    app = AsyncApp(token=token, signing_secret=signing_secret, client=client)
 
-    # Create session_id from channel + thread combination
-    session_id = f"slack_{event['channel']}_{event.get('thread_ts', event['ts'])}"
+    @app.event("app_mention")
+    async def handle_mention(body: dict, event: dict, client: AsyncWebClient) -> None:
+        """Handle when the bot is mentioned."""
+        if event.get("thread_ts"):
+            return  # Skip thread messages
 
-    try:
-        base_url = os.getenv("API_BASE_URL", "http://localhost:8000")
+        responder.dispatch(body, event, client)
 
-        # Prepare chat request for labrag API
-        chat_request = {"message": message, "session_id": session_id}
+    @app.event("message")
+    async def handle_thread_message(
+        body: dict, event: dict, client: AsyncWebClient
+    ) -> None:
+        """Handle messages in threads."""
+        if not event.get("thread_ts"):
+            return  # Not a thread message
 
-        response = httpx.post(f"{base_url}/api/chat/", json=chat_request, timeout=60.0)
-        response.raise_for_status()
-        chat_response = response.json()
-        reply = chat_response.get("response", "Error getting chat response.")
+        if event.get("bot_id"):
+            return  # Skip bot messages
 
-    except Exception as e:
-        reply = f"Error processing: {e}"
-        logger.error(f"Error: {e}")
+        responder.dispatch(body, event, client)
 
-    # Format and send the response to Slack
-    thread_ts = event.get("thread_ts", event["ts"])
-    say(markdown_text=format_for_slack(reply), thread_ts=thread_ts)
+    return app
 
 
-@app.event("app_mention")
-def handle_mention(event: dict, say: Callable) -> None:
-    """Handle when the bot is mentioned."""
-    if event.get("thread_ts"):
-        return  # Skip thread messages
+def create_service(
+    handler: AsyncSlackRequestHandler, responder: SlackResponder
+) -> FastAPI:
+    """FastAPI app receiving Slack events for a Bolt app"""
 
-    send_message(event, say)
+    @asynccontextmanager
+    async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+        yield
+        # Answers in progress are finished before the API client closes
+        await responder.aclose()
 
+    app = FastAPI(title="LabRAG Slack Integration", lifespan=lifespan)
 
-@app.event("message")
-def handle_thread_message(event: dict, say: Callable) -> None:
-    """Handle messages in threads."""
-    if not event.get("thread_ts"):
-        return  # Not a thread message
+    @app.get("/slack/health")
+    async def health_check() -> dict:
+        """Health check endpoint."""
+        return {"status": "healthy", "in_flight": responder.in_flight}
 
-    if event.get("bot_id"):
-        return  # Skip bot messages
+    @app.api_route("/slack/events", methods=["POST"])
+    async def slack_events(req: Request) -> JSONResponse:
+        """Handle Slack events (acknowledged before they are answered)."""
+        body = await req.json()
 
-    send_message(event, say)
+        # Handle Slack's URL verification challenge
+        if body.get("type") == "url_verification":
+            return JSONResponse(content={"challenge": body["challenge"]})
 
+        # Delegate all other events to the Bolt handler
+        return await handler.handle(req)
 
-# Create the request handler for FastAPI integration
-slack_handler = SlackRequestHandler(app)
+    return app
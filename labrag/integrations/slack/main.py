@@ -1,27 +1,22 @@
 """Simple FastAPI service for Slack integration."""
 
-from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+import os
 
-from labrag.integrations.slack.app import slack_handler
+from dotenv import load_dotenv
+from slack_bolt.adapter.starlette.async_handler import AsyncSlackRequestHandler
 
-app = FastAPI(title="LabRAG Slack Integration")
+from labrag.integrations.slack.app import SlackResponder, create_app, create_service
 
+load_dotenv()
 
-@app.get("/slack/health")
-async def health_check() -> dict:
-    """Health check endpoint."""
-    return {"status": "healthy"}
+responder = SlackResponder(
+    os.getenv("API_BASE_URL", "http://localhost:8000"),
+    concurrency=int(os.getenv("SLACK_CONCURRENCY", "16")),
+)
+slack_app = create_app(
+    responder,
+    token=os.getenv("SLACK_BOT_TOKEN"),
+    signing_secret=os.getenv("SLACK_SIGNING_SECRET"),
+)
 
-
-@app.api_route("/slack/events", methods=["POST"])
-async def slack_events(req: Request) -> JSONResponse:
-    """Handle Slack events."""
-    body = await req.json()
-
-    # Handle Slack's URL verification challenge
-    if body.get("type") == "url_verification":
-        return JSONResponse(content={"challenge": body["challenge"]})
-
-    # Delegate all other events to the Bolt handler
-    return await slack_handler.handle(req)
+app = create_service(AsyncSlackRequestHandler(slack_app), responder)
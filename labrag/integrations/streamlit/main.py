@@ -7,6 +7,8 @@ import streamlit as st
 # Configuration
 API_URL = os.getenv("LABRAG_API_URL", "http://localhost:8000/api/chat/")
 REQUEST_TIMEOUT = 45
+# Leave headroom so the API gives up (and degrades) before this client does
+DEADLINE_SECONDS = REQUEST_TIMEOUT - 5
 
 # Page config
 st.set_page_config(
@@ -72,7 +74,11 @@ def send_message_to_api(message: str, session_id: str) -> dict[str, str]:
 
             response = requests.post(
                 API_URL,
-                json={"message": message, "session_id": session_id},
+                json={
+                    "message": message,
+                    "session_id": session_id,
+                    "deadline_seconds": DEADLINE_SECONDS,
+                },
                 timeout=REQUEST_TIMEOUT,
             )
             response.raise_for_status()
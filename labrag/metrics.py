@@ -0,0 +1,122 @@
+"""In-process latency and counter metrics for LabRAG."""
+
+import functools
+import math
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import contextmanager
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of values.
+
+    Args:
+        values: The samples
+        pct: The percentile, between 0 and 100
+
+    Returns:
+        float: The percentile value (0.0 for an empty list)
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+class MetricsRegistry:
+    """Thread-safe store of per-stage latency samples and counters"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._latencies: dict[str, list[float]] = defaultdict(list)
+        self._counters: dict[str, float] = defaultdict(float)
+
+    def record(self, stage: str, seconds: float) -> None:
+        """Record one latency sample for a stage
+
+        Args:
+            stage: The stage name (e.g. "node.retriever")
+            seconds: The measured duration
+        """
+        with self._lock:
+            self._latencies[stage].append(seconds)
+
+    def increment(self, name: str, value: float = 1) -> None:
+        """Add to a counter
+
+        Args:
+            name: The counter name
+            value: The amount to add
+        """
+        with self._lock:
+            self._counters[name] += value
+
+    @contextmanager
+    def timer(self, stage: str) -> Iterator[None]:
+        """Time the enclosed block and record it under `stage`"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def latency_summary(self) -> dict[str, dict[str, float]]:
+        """Summarize latency samples per stage
+
+        Returns:
+            dict: Stage name to count, mean, p50, p95, p99, max and total seconds
+        """
+        with self._lock:
+            samples = {stage: list(v) for stage, v in self._latencies.items()}
+
+        return {
+            stage: {
+                "count": len(values),
+                "mean": sum(values) / len(values),
+                "p50": percentile(values, 50),
+                "p95": percentile(values, 95),
+                "p99": percentile(values, 99),
+                "max": max(values),
+                "total": sum(values),
+            }
+            for stage, values in sorted(samples.items())
+            if values
+        }
+
+    def counters(self) -> dict[str, float]:
+        """Get a snapshot of all counters"""
+        with self._lock:
+            return dict(self._counters)
+
+    def reset(self) -> None:
+        """Drop all samples and counters"""
+        with self._lock:
+            self._latencies.clear()
+            self._counters.clear()
+
+
+# Process-wide registry used by the instrumented components
+metrics = MetricsRegistry()
+
+
+def timed[**P, R](
+    stage: str,
+) -> Callable[[Callable[P, Awaitable[R]]], Callable[P, Awaitable[R]]]:
+    """Decorate an async function to record its latency under `stage`.
+
+    The wrapper keeps the original signature, so LangGraph still detects
+    parameters such as `config` on decorated nodes.
+    """
+
+    def decorator(func: Callable[P, Awaitable[R]]) -> Callable[P, Awaitable[R]]:
+        @functools.wraps(func)
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            with metrics.timer(stage):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,83 @@
+"""Chat model and embedding providers for LabRAG.
+
+Every component gets its LLMs and embeddings through these factories, so they
+can be swapped for local stand-ins (benchmarks, offline runs) in one place.
+"""
+
+from collections.abc import Callable
+from typing import Any
+
+from langchain.chat_models import init_chat_model
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_openai import OpenAIEmbeddings
+
+DEFAULT_EMBEDDING_MODEL = "text-embedding-3-small"
+
+ChatModelFactory = Callable[..., BaseChatModel]
+EmbeddingsFactory = Callable[..., Embeddings]
+
+
+def _openai_chat_model(model: str, **kwargs: Any) -> BaseChatModel:  # noqa: ANN401
+    return init_chat_model(model, model_provider="openai", **kwargs)
+
+
+def _openai_embeddings(model: str, **kwargs: Any) -> Embeddings:  # noqa: ANN401
+    return OpenAIEmbeddings(model=model, **kwargs)
+
+
+_chat_model_factory: ChatModelFactory = _openai_chat_model
+_embeddings_factory: EmbeddingsFactory = _openai_embeddings
+
+
+def get_chat_model(model: str, **kwargs: Any) -> BaseChatModel:  # noqa: ANN401
+    """Create a chat model.
+
+    Args:
+        model: The model name (e.g. "gpt-4.1")
+        **kwargs: Model parameters such as temperature
+
+    Returns:
+        BaseChatModel: The chat model
+    """
+    return _chat_model_factory(model, **kwargs)
+
+
+def get_embeddings(
+    model: str = DEFAULT_EMBEDDING_MODEL,
+    **kwargs: Any,  # noqa: ANN401
+) -> Embeddings:
+    """Create an embedding model.
+
+    Args:
+        model: The embedding model name
+        **kwargs: Model parameters such as dimensions
+
+    Returns:
+        Embeddings: The embedding model
+    """
+    return _embeddings_factory(model, **kwargs)
+
+
+def set_chat_model_factory(factory: ChatModelFactory | None) -> ChatModelFactory:
+    """Replace the chat model factory (None restores the OpenAI default).
+
+    Returns:
+        ChatModelFactory: The previous factory, so callers can restore it
+    """
+    global _chat_model_factory
+    previous = _chat_model_factory
+    _chat_model_factory = factory or _openai_chat_model
+    return previous
+
+
+def set_embeddings_factory(factory: EmbeddingsFactory | None) -> EmbeddingsFactory:
+    """Replace the embeddings factory (None restores the OpenAI default).
+
+    Returns:
+        EmbeddingsFactory: The previous factory, so callers can restore it
+    """
+    global _embeddings_factory
+    previous = _embeddings_factory
+    _embeddings_factory = factory or _openai_embeddings
+    return previous
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""Run a set of questions through LabRAG and write NDJSON results"""
+
+import argparse
+import asyncio
+import json
+import sys
+import traceback
+from collections.abc import AsyncIterator
+from typing import Any, TextIO
+
+import httpx
+from dotenv import load_dotenv
+from loguru import logger
+
+load_dotenv()
+
+
+def read_items(path: str) -> list[tuple[str, str]]:
+    """Read (session_id, message) pairs from a JSONL file.
+
+    Each line is an object with a `message` and an optional `session_id`;
+    lines without a session_id get their own session.
+    """
+    items = []
+    with open(path) as f:
+        for i, line in enumerate(f):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            items.append((record.get("session_id", f"batch-{i}"), record["message"]))
+    return items
+
+
+async def run_local(
+    items: list[tuple[str, str]],
+    concurrency: int,
+    deadline: float | None,
+    answer_tier: str | None,
+) -> AsyncIterator[dict[str, Any]]:
+    """Run the items through an in-process compiled graph"""
+    from langgraph.checkpoint.memory import InMemorySaver
+
+    from labrag.agents.batch import run_batch
+    from labrag.agents.graph import create_graph
+    from labrag.ingestion.loaders.vector_store import VectorStore
+
+    vector_store = VectorStore()
+    vector_store.enable_query_batching()
+    graph = create_graph(vector_store).compile(checkpointer=InMemorySaver())
+
+    async for result in run_batch(graph, items, concurrency, deadline, answer_tier):
+        yield result
+
+
+async def run_remote(
+    api_url: str,
+    items: list[tuple[str, str]],
+    concurrency: int,
+    deadline: float | None,
+    answer_tier: str | None,
+) -> AsyncIterator[dict[str, Any]]:
+    """Stream the items through a running API's /api/chat/batch endpoint"""
+    payload = {
+        "items": [{"session_id": s, "message": m} for s, m in items],
+        "concurrency": concurrency,
+        "deadline_seconds": deadline,
+        "answer_tier": answer_tier,
+    }
+    url = f"{api_url.rstrip('/')}/api/chat/batch"
+    async with (
+        httpx.AsyncClient(timeout=None) as client,
+        client.stream("POST", url, json=payload) as response,
+    ):
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if line.strip():
+                yield json.loads(line)
+
+
+async def write_results(results: AsyncIterator[dict[str, Any]], out: TextIO) -> int:
+    """Write results as NDJSON and return the number of failed items"""
+    failures = 0
+    async for result in results:
+        failures += "error" in result
+        out.write(json.dumps(result) + "\n")
+        out.flush()
+    return failures
+
+
+async def main() -> int | None:
+    parser = argparse.ArgumentParser(description="Run a batch of LabRAG questions")
+    parser.add_argument(
+        "input", help="JSONL file with `message` and optional `session_id`"
+    )
+    parser.add_argument("--output", help="NDJSON output file (default: stdout)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Turns in flight")
+    parser.add_argument("--deadline", type=float, help="Per-turn budget in seconds")
+    parser.add_argument(
+        "--answer-tier",
+        choices=["auto", "fast", "full"],
+        help="Answer tier (default: auto, or the API's setting)",
+    )
+    parser.add_argument(
+        "--api-url", help="Use a running API (e.g. http://localhost:8000)"
+    )
+
+    args = parser.parse_args()
+
+    try:
+        items = read_items(args.input)
+        logger.info(f"Running {len(items)} questions (concurrency {args.concurrency})")
+
+        if args.api_url:
+            results = run_remote(
+                args.api_url, items, args.concurrency, args.deadline, args.answer_tier
+            )
+        else:
+            results = run_local(
+                items, args.concurrency, args.deadline, args.answer_tier
+            )
+
+        out = open(args.output, "w") if args.output else sys.stdout  # noqa: SIM115
+        try:
+            failures = await write_results(results, out)
+        finally:
+            if out is not sys.stdout:
+                out.close()
+
+        logger.info(f"Done: {len(items) - failures} succeeded, {failures} failed")
+        return 1 if failures else None
+
+    except Exception as e:
+        logger.error(f"Error: {e}")
+        traceback.print_exc()
+        return 1
+
+
+if __name__ == "__main__":
+    exit(asyncio.run(main()))
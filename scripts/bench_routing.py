@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Benchmark document routing against flat search as the corpus grows"""
+
+import argparse
+import asyncio
+import json
+import sys
+import traceback
+
+from loguru import logger
+
+from labrag.benchmarks.routing import RoutingBenchmarkConfig, run_routing_benchmark
+
+
+async def main() -> int | None:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Compare flat and document-routed search latency and recall@k on "
+            "synthetic corpora"
+        )
+    )
+    parser.add_argument("--documents", type=int, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--top-documents", type=int, nargs="+", default=[5, 10, 20])
+    parser.add_argument("--chunks-per-document", type=int, default=40)
+    parser.add_argument("--dims", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=30)
+    parser.add_argument("--output", help="JSON results file (default: stdout)")
+
+    args = parser.parse_args()
+
+    # Keep component logs out of the way of the results
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    logger.add(sys.stderr, level="INFO", filter="__main__")
+
+    try:
+        report = await run_routing_benchmark(
+            RoutingBenchmarkConfig(
+                document_counts=args.documents,
+                top_documents=args.top_documents,
+                chunks_per_document=args.chunks_per_document,
+                dims=args.dims,
+                queries=args.queries,
+                k=args.k,
+            )
+        )
+        for result in report["results"]:
+            latency = result["latency"]
+            logger.info(
+                f"{result['documents']:>5} sources {result['chunks']:>6} chunks "
+                f"{result['mode']:<6} top={result['top_documents']!s:<4} "
+                f"recall@k={result['recall_at_k']:.3f} "
+                f"p50={latency['p50_ms']:.3f}ms p95={latency['p95_ms']:.3f}ms"
+            )
+
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(report, f, indent=2)
+        else:
+            json.dump(report, sys.stdout, indent=2)
+
+    except Exception as e:
+        logger.error(f"Error: {e}")
+        traceback.print_exc()
+        return 1
+
+
+if __name__ == "__main__":
+    exit(asyncio.run(main()))
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Benchmark the Slack integration under a burst of events"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import traceback
+
+from loguru import logger
+
+from labrag.benchmarks.slack import SlackBurstConfig, run_slack_burst
+
+
+async def main() -> int | None:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Send a burst of signed events (with redeliveries) to the Slack "
+            "service, backed by a local fake Slack and a fake API"
+        )
+    )
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument(
+        "--duplicates",
+        type=float,
+        default=0.2,
+        help="Fraction of events redelivered as Slack retries",
+    )
+    parser.add_argument(
+        "--chat-latency", type=float, default=1.0, help="Seconds per API answer"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=16, help="Chat requests in flight"
+    )
+    parser.add_argument("--output", help="JSON results file (default: stdout)")
+
+    args = parser.parse_args()
+
+    # Keep component logs out of the way of the results
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    logger.add(sys.stderr, level="INFO", filter="__main__")
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    try:
+        report = await run_slack_burst(
+            SlackBurstConfig(
+                events=args.events,
+                duplicate_fraction=args.duplicates,
+                chat_latency=args.chat_latency,
+                concurrency=args.concurrency,
+            )
+        )
+        ack = report["ack_seconds"]
+        logger.info(
+            f"events={report['events']} chat_requests={report['chat_requests']} "
+            f"answered={report['answered']} ack p95={ack['p95']:.3f}s "
+            f"max={ack['max']:.3f}s throughput={report['throughput_per_second']}/s"
+        )
+
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(report, f, indent=2)
+        else:
+            json.dump(report, sys.stdout, indent=2)
+
+    except Exception as e:
+        logger.error(f"Error: {e}")
+        traceback.print_exc()
+        return 1
+
+
+if __name__ == "__main__":
+    exit(asyncio.run(main()))
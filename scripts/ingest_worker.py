@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""Process the ingestion jobs queued through POST /api/documents"""
+
+import argparse
+import asyncio
+import contextlib
+import signal
+import traceback
+
+from dotenv import load_dotenv
+from loguru import logger
+
+from labrag.config import load_config
+from labrag.ingestion.jobs import IngestionWorker, JobQueue
+
+load_dotenv()
+
+
+async def main() -> int | None:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Run the ingestion worker in its own process "
+            "(start the API with LABRAG_INGEST_WORKER=0)"
+        )
+    )
+    parser.add_argument(
+        "--config", default="configs/default.yml", help="Config file path"
+    )
+    parser.add_argument(
+        "--jobs-db", default=".labrag_cache/jobs.db", help="Job queue database"
+    )
+
+    args = parser.parse_args()
+
+    try:
+        worker = IngestionWorker.from_config(
+            JobQueue(args.jobs_db), load_config(args.config)
+        )
+
+        # Finish the batch in progress on Ctrl-C / SIGTERM, then exit
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            with contextlib.suppress(NotImplementedError):
+                loop.add_signal_handler(sig, worker.stop)
+
+        await worker.run()
+        logger.info(f"Processed {worker.jobs_run} jobs")
+
+    except Exception as e:
+        logger.error(f"Error: {e}")
+        traceback.print_exc()
+        return 1
+
+
+if __name__ == "__main__":
+    exit(asyncio.run(main()))
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Measure how long a fresh API process takes to serve its first request"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import traceback
+
+import httpx
+from dotenv import load_dotenv
+from loguru import logger
+
+load_dotenv()
+
+
+async def wait_for(
+    client: httpx.AsyncClient, path: str, start: float, timeout: float
+) -> float:
+    """Poll an endpoint until it returns 200
+
+    Returns:
+        float: Seconds from `start` until the first 200
+    """
+    while time.perf_counter() - start < timeout:
+        try:
+            response = await client.get(path)
+            if response.status_code == 200:
+                return time.perf_counter() - start
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.05)
+    raise TimeoutError(f"{path} not available after {timeout:.0f}s")
+
+
+async def main() -> int | None:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Start the API with uvicorn and time liveness, readiness and the "
+            "first chat answer"
+        )
+    )
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on")
+    parser.add_argument(
+        "--message",
+        help="Send this chat message once ready and time the answer (calls the LLM)",
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=300, help="Seconds to wait for readiness"
+    )
+
+    args = parser.parse_args()
+
+    command = [
+        sys.executable,
+        "-m",
+        "uvicorn",
+        "labrag.api.main:app",
+        "--port",
+        str(args.port),
+        "--log-level",
+        "warning",
+    ]
+    start = time.perf_counter()
+    process = await asyncio.create_subprocess_exec(*command, env=os.environ.copy())
+    try:
+        base_url = f"http://127.0.0.1:{args.port}/api"
+        async with httpx.AsyncClient(base_url=base_url, timeout=None) as client:
+            results = {
+                "live_seconds": await wait_for(client, "/health", start, args.timeout)
+            }
+            results["ready_seconds"] = await wait_for(
+                client, "/ready", start, args.timeout
+            )
+
+            if args.message:
+                response = await client.post(
+                    "/chat/",
+                    json={"message": args.message, "session_id": "startup-probe"},
+                )
+                response.raise_for_status()
+                results["first_answer_seconds"] = time.perf_counter() - start
+
+            results["ready"] = (await client.get("/ready")).json()
+
+        logger.info(f"Startup timings:\n{json.dumps(results, indent=2)}")
+
+    except Exception as e:
+        logger.error(f"Error: {e}")
+        traceback.print_exc()
+        return 1
+    finally:
+        process.terminate()
+        await process.wait()
+
+
+if __name__ == "__main__":
+    exit(asyncio.run(main()))
@@ -8,23 +8,177 @@ import traceback
 from dotenv import load_dotenv
 from loguru import logger
 
+from labrag.cassette import (
+    Cassette,
+    CassettePDFParser,
+    CassetteURLParser,
+    cassette_from_env,
+    install_cassette,
+)
+from labrag.config import load_config
 from labrag.ingestion.knowledge_base import KnowledgeBaseBuilder
+from labrag.ingestion.parsers.cache import DocumentCache
 
 load_dotenv()
 
 
+def build_builder(
+    config: dict, cassette: Cassette | None = None
+) -> KnowledgeBaseBuilder:
+    """Create the builder, recording or replaying provider calls if requested"""
+    if cassette is None:
+        return KnowledgeBaseBuilder(config)
+
+    install_cassette(cassette)
+    if cassette.mode == "record":
+        # Live parsers configured as usual, with every result recorded
+        builder = KnowledgeBaseBuilder(config)
+        builder.pdf_parser = CassettePDFParser(cassette, builder.pdf_parser)
+        builder.url_parser = CassetteURLParser(cassette, builder.url_parser)
+        return builder
+
+    return KnowledgeBaseBuilder(
+        config,
+        pdf_parser=CassettePDFParser(cassette),
+        url_parser=CassetteURLParser(cassette),
+    )
+
+
+def print_snapshots(builder: KnowledgeBaseBuilder) -> None:
+    """Log the saved index snapshots, newest first"""
+    history = builder.vector_store.snapshots.history()
+    if not history:
+        logger.info("No index snapshots saved yet")
+        return
+
+    lines = [
+        f"{'*' if entry['current'] else ' '} {entry['name']}  "
+        f"{entry.get('chunks', '?')} chunks, "
+        f"{entry['documents'] if entry['documents'] is not None else '?'} sources"
+        for entry in history
+    ]
+    logger.info("Index snapshots (* = current):\n" + "\n".join(lines))
+
+
+def print_report(cache: DocumentCache) -> None:
+    """Print per-source ingestion state and timings, slowest first"""
+    report = cache.report()
+    if report.empty:
+        logger.info("No sources ingested yet")
+        return
+
+    counts = report["status"].value_counts().to_dict()
+    logger.info(
+        "Ingestion report (slowest first):\n"
+        + report.to_string(index=False, float_format="{:.2f}".format)
+        + f"\n{len(report)} sources ({counts}), {report['chunk_count'].sum():.0f} "
+        f"chunks, {report['total_seconds'].sum():.1f}s total ingestion time"
+    )
+
+
+async def run(builder: KnowledgeBaseBuilder, args: argparse.Namespace) -> None:
+    """Run the command selected on the command line"""
+    if args.snapshots:
+        print_snapshots(builder)
+    elif args.export_bundle:
+        builder.export_bundle(args.export_bundle)
+    elif args.import_bundle:
+        builder.import_bundle(args.import_bundle)
+    elif args.rollback is not None:
+        builder.rollback(args.rollback or None)
+    elif args.chunk_stats:
+        builder.rechunk_artifacts()
+    elif args.from_artifacts:
+        await builder.rebuild_from_artifacts(args.config)
+    elif args.sync:
+        await builder.sync_from_config(args.config, dry_run=args.dry_run)
+    else:
+        await builder.build_from_config(args.config, force=args.force)
+
+
 async def main() -> int | None:
     parser = argparse.ArgumentParser(description="Setup LabRAG knowledge base")
     parser.add_argument(
         "--config", default="configs/default.yml", help="Config file path"
     )
     parser.add_argument("--force", action="store_true", help="Force reprocessing")
+    parser.add_argument(
+        "--sync",
+        action="store_true",
+        help="Only apply added, changed, renamed and removed sources",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="With --sync, print the plan without applying it",
+    )
+    parser.add_argument(
+        "--from-artifacts",
+        action="store_true",
+        help="Rebuild the index from stored parse results, without parsing",
+    )
+    parser.add_argument(
+        "--chunk-stats",
+        action="store_true",
+        help="Re-chunk stored parse results and report chunk sizes, then exit",
+    )
+    parser.add_argument(
+        "--reparse",
+        action="store_true",
+        help="Ignore stored parse results and call the parsers again",
+    )
+    parser.add_argument(
+        "--report",
+        action="store_true",
+        help="Print per-source ingestion status and timings, then exit",
+    )
+    parser.add_argument(
+        "--snapshots",
+        action="store_true",
+        help="List saved index snapshots, then exit",
+    )
+    parser.add_argument(
+        "--rollback",
+        nargs="?",
+        const="",
+        metavar="SNAPSHOT",
+        help="Restore an index snapshot and its cache (default: the previous one)",
+    )
+    parser.add_argument(
+        "--export-bundle",
+        metavar="PATH",
+        help="Write the index and cache to a single bundle file, then exit",
+    )
+    parser.add_argument(
+        "--import-bundle",
+        metavar="PATH",
+        help="Verify a bundle and make its index and cache current, then exit",
+    )
+    parser.add_argument(
+        "--cassette",
+        choices=["record", "replay"],
+        help="Record live parser/LLM/embedding calls, or replay them offline",
+    )
+    parser.add_argument(
+        "--cassette-path",
+        default=".labrag_cache/cassette.db",
+        help="Cassette database path",
+    )
 
     args = parser.parse_args()
 
     try:
-        builder = KnowledgeBaseBuilder()
-        await builder.build_from_config(args.config, force=args.force)
+        if args.report:
+            print_report(DocumentCache())
+            return 0
+
+        cassette = cassette_from_env()
+        if args.cassette:
+            cassette = Cassette(args.cassette_path, mode=args.cassette)
+
+        builder = build_builder(load_config(args.config), cassette)
+        builder.use_artifacts = not args.reparse
+        await run(builder, args)
 
     except Exception as e:
         logger.error(f"Error: {e}")
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Sweep retrieval parameters and report the recall/latency Pareto frontier"""
+
+import argparse
+import json
+import traceback
+
+import yaml
+from dotenv import load_dotenv
+from loguru import logger
+
+from labrag.benchmarks.sweep import (
+    SweepConfig,
+    load_eval_set,
+    load_parse_results,
+    run_sweep,
+)
+from labrag.cassette import Cassette
+from labrag.ingestion.artifacts import ArtifactStore
+
+load_dotenv()
+
+
+def main() -> int | None:
+    parser = argparse.ArgumentParser(description="Sweep LabRAG retrieval parameters")
+    parser.add_argument("--eval-set", required=True, help="Labelled questions (JSONL)")
+    parser.add_argument("--grid", default="configs/sweep.yml", help="Grid file")
+    parser.add_argument(
+        "--cassette",
+        default=".labrag_cache/cassette.db",
+        help="Cassette with recorded parse results",
+    )
+    parser.add_argument(
+        "--artifacts",
+        help="Read parse results from this artifact store instead of a cassette",
+    )
+    parser.add_argument(
+        "--stub-embeddings",
+        action="store_true",
+        help="Use hash-seeded fake embeddings (latency/size only, no real recall)",
+    )
+    parser.add_argument("--output", default="sweep_results.json", help="JSON output")
+
+    args = parser.parse_args()
+
+    try:
+        with open(args.grid) as f:
+            config = SweepConfig(**(yaml.safe_load(f) or {}))
+
+        if args.artifacts:
+            parse_results = list(ArtifactStore(args.artifacts).iter_results())
+        else:
+            parse_results = load_parse_results(Cassette(args.cassette, mode="replay"))
+        questions = load_eval_set(args.eval_set)
+        logger.info(
+            f"Sweeping {len(parse_results)} documents, {len(questions)} questions"
+        )
+
+        if args.stub_embeddings:
+            from labrag.benchmarks.stubs import stubbed_providers
+
+            with stubbed_providers():
+                report = run_sweep(parse_results, questions, config)
+        else:
+            report = run_sweep(parse_results, questions, config)
+
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+        logger.info(f"Pareto frontier ({len(report['frontier'])} settings):")
+        for row in sorted(report["frontier"], key=lambda r: -r["recall"]):
+            logger.info(
+                f"recall@{row['k']}={row['recall']:.3f} mrr={row['mrr']:.3f} "
+                f"p50={row['query_p50_ms']:.2f}ms context={row['context_chars']:.0f}ch "
+                f"| {row['pdf_chunking']} size={row['chunk_size']} "
+                f"overlap={row['chunk_overlap']} dims={row['embedding_dims']} "
+                f"index={row['index_type']}"
+            )
+
+    except Exception as e:
+        logger.error(f"Error: {e}")
+        traceback.print_exc()
+        return 1
+
+
+if __name__ == "__main__":
+    exit(main())
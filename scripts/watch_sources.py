@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Keep the LabRAG knowledge base in sync with papers_dir, media_urls and urls_file"""
+
+import argparse
+import asyncio
+import contextlib
+import signal
+import traceback
+
+from dotenv import load_dotenv
+from loguru import logger
+
+from labrag.config import load_config
+from labrag.ingestion.knowledge_base import KnowledgeBaseBuilder
+from labrag.ingestion.watcher import SourceWatcher
+
+load_dotenv()
+
+
+async def main() -> int | None:
+    parser = argparse.ArgumentParser(
+        description="Watch the configured sources and ingest changes as they happen"
+    )
+    parser.add_argument(
+        "--config", default="configs/default.yml", help="Config file path"
+    )
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        help="Seconds without changes before syncing (overrides the config)",
+    )
+    parser.add_argument(
+        "--polling",
+        action="store_true",
+        help="Poll the files instead of using file system events",
+    )
+
+    args = parser.parse_args()
+
+    try:
+        config = load_config(args.config)
+        overrides = {"use_events": not args.polling}
+        if args.debounce is not None:
+            overrides["debounce_seconds"] = args.debounce
+
+        builder = KnowledgeBaseBuilder(config)
+        watcher = SourceWatcher.from_config(builder, args.config, config, **overrides)
+
+        # Finish the sync in progress on Ctrl-C / SIGTERM, then exit
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            with contextlib.suppress(NotImplementedError):
+                loop.add_signal_handler(sig, stop.set)
+
+        await watcher.run(stop)
+        logger.info(f"Stopped after {watcher.syncs} syncs")
+
+    except Exception as e:
+        logger.error(f"Error: {e}")
+        traceback.print_exc()
+        return 1
+
+
+if __name__ == "__main__":
+    exit(asyncio.run(main()))
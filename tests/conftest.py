@@ -0,0 +1,57 @@
+"""Shared fixtures: offline providers and a small vector store"""
+
+import os
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+from langchain_core.documents import Document
+
+# Provider clients check for their keys when created; the tests never call them
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("FIRECRAWL_API_KEY", "test")
+os.environ.setdefault("VISION_AGENT_API_KEY", "test")
+
+from labrag.benchmarks.stubs import stubbed_providers
+from labrag.ingestion.loaders.vector_store import VectorStore
+from labrag.metrics import metrics
+
+EMBEDDING_DIMS = 32
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics() -> Iterator[None]:
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+@pytest.fixture
+def stub_providers() -> Iterator[None]:
+    """Route chat models and embeddings to the deterministic stubs"""
+    with stubbed_providers(embedding_dims=EMBEDDING_DIMS):
+        yield
+
+
+def make_chunks(n: int, sources: int = 5) -> list[Document]:
+    """Chunks spread over `sources` PDFs, four per page"""
+    return [
+        Document(
+            page_content=f"chunk {i} about gene {i % 7} in population {i % 3}",
+            metadata={
+                "source": f"paper{i % sources}.pdf",
+                "source_type": "pdf",
+                "page": i // 4 + 1,
+                "chunk_index": i,
+            },
+        )
+        for i in range(n)
+    ]
+
+
+@pytest.fixture
+def vector_store(tmp_path: Path, stub_providers: None) -> VectorStore:
+    """A store of 60 stub-embedded chunks from five sources"""
+    store = VectorStore(str(tmp_path / "vector_store"))
+    store.add_documents(make_chunks(60))
+    return store
@@ -0,0 +1,69 @@
+import pytest
+from langchain_core.documents import Document
+from langchain_core.messages import AIMessage
+
+from labrag.agents.tiers import (
+    TIERS,
+    choose_tier,
+    estimate_complexity,
+    get_tier_mode,
+    record_usage,
+)
+from labrag.metrics import metrics
+
+
+def docs(*sources: str) -> list[Document]:
+    return [Document(page_content="x", metadata={"source": s}) for s in sources]
+
+
+def test_lookup_question_gets_the_fast_tier() -> None:
+    decision = choose_tier(
+        "auto", "What is PPP3CA?", docs("a.pdf", "a.pdf"), [0.9, 0.5], parents=False
+    )
+    assert decision.tier == "fast"
+    assert decision.complexity < 0.5
+
+
+def test_broad_question_gets_the_full_tier() -> None:
+    query = "How do the genetic findings relate to the health of Amazonian peoples?"
+    decision = choose_tier(
+        "auto", query, docs("a", "b", "c", "d"), [0.8, 0.79, 0.78, 0.78], False
+    )
+    assert decision.tier == "full"
+    assert decision.complexity >= 0.5
+
+
+def test_complexity_signals() -> None:
+    # One long query, flat scores and many sources is as complex as it gets
+    assert estimate_complexity("word " * 30, docs("a", "b", "c", "d"), [1, 1]) == 1.0
+    # A one-word lookup with one clear best match, from one source
+    assert estimate_complexity("x", docs("a"), [1.0, 0.5]) == 0.013
+
+
+def test_requested_tier() -> None:
+    config = {"configurable": {"answer_tier": "full"}}
+    assert get_tier_mode(config) == "full"
+    assert get_tier_mode(None) == "auto"
+    decision = choose_tier("fast", "long " * 40, docs("a", "b"), [], parents=True)
+    assert (decision.tier, decision.complexity) == ("fast", None)
+    with pytest.raises(ValueError, match="Unknown"):
+        choose_tier("medium", "q", [], [], parents=False)
+
+
+def test_limits() -> None:
+    assert TIERS["fast"].limit(parents=False) == 8
+    assert TIERS["fast"].limit(parents=True) == 3
+    assert TIERS["full"].limit(parents=False) is None
+
+
+def test_record_usage() -> None:
+    message = AIMessage(
+        content="{}",
+        usage_metadata={"input_tokens": 100, "output_tokens": 20, "total_tokens": 120},
+    )
+    record_usage("fast", 0.5, message)
+    record_usage("fast", 0.5, AIMessage(content="{}"))
+    counters = metrics.counters()
+    assert counters["synthesis.fast.turns"] == 2
+    assert counters["synthesis.fast.input_tokens"] == 100
+    assert counters["synthesis.fast.output_tokens"] == 20
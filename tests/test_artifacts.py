@@ -0,0 +1,89 @@
+import asyncio
+import gzip
+from pathlib import Path
+
+import yaml
+
+from labrag.benchmarks.stubs import FakePDFParser, FakeURLParser
+from labrag.ingestion.artifacts import ArtifactStore
+from labrag.ingestion.knowledge_base import KnowledgeBaseBuilder
+from labrag.ingestion.parsers.cache import DocumentCache
+from labrag.ingestion.parsers.models import PDFParseResult, URLParseResult
+
+
+def url_result(text: str = "body") -> URLParseResult:
+    return URLParseResult(
+        content=text, raw_content=text, metadata={"source": "https://a.org"}
+    )
+
+
+def test_put_and_get(tmp_path: Path) -> None:
+    store = ArtifactStore(tmp_path)
+    path = store.put("url", "ab12", "v1", url_result())
+    assert path == tmp_path / "url" / "ab" / "ab12.v1.json.gz"
+    assert store.get("url", "ab12", "v1") == url_result()
+    # Another parser version, or content, is a miss
+    assert store.get("url", "ab12", "v2") is None
+    assert store.get("url", "cd34", "v1") is None
+    assert not list(path.parent.glob("*.tmp"))
+
+
+def test_unreadable_artifacts_are_misses(tmp_path: Path) -> None:
+    store = ArtifactStore(tmp_path)
+    path = store.put("url", "ab12", "v1", url_result())
+    path.write_bytes(gzip.compress(b"{not json"))
+    assert store.get("url", "ab12", "v1") is None
+
+
+def test_iter_results(tmp_path: Path) -> None:
+    store = ArtifactStore(tmp_path)
+    store.put("url", "ab12", "v1", url_result("one"))
+    store.put("url", "cd34", "v2", url_result("two"))
+    pdf = PDFParseResult(content="", metadata={"source": "a.pdf"}, chunks=[])
+    store.put("pdf", "ef56", "v1", pdf)
+    assert [r.content for r in store.iter_results("url")] == ["one", "two"]
+    assert len(list(store.iter_results(version="v1"))) == 2
+
+
+class CountingPDFParser(FakePDFParser):
+    version = "fake-1"
+
+    def __init__(self) -> None:
+        super().__init__(chunks_per_document=6, words_per_chunk=40)
+        self.calls = 0
+
+    def parse(self, pdf_path: str | Path) -> PDFParseResult:
+        self.calls += 1
+        return super().parse(pdf_path)
+
+
+def test_rebuild_never_calls_the_parser(tmp_path: Path, stub_providers: None) -> None:
+    papers = tmp_path / "papers"
+    papers.mkdir()
+    for name in ("a.pdf", "b.pdf"):
+        (papers / name).write_bytes(name.encode())
+    config = {
+        "data_sources": {"papers_dir": str(papers), "media_urls": []},
+        "vector_store": {"store_path": str(tmp_path / "vector_store")},
+        "ingestion": {"progress_interval_seconds": 0},
+    }
+    config_path = tmp_path / "config.yml"
+    config_path.write_text(yaml.safe_dump(config))
+
+    parser = CountingPDFParser()
+    builder = KnowledgeBaseBuilder(
+        config,
+        parser,
+        FakeURLParser(100),
+        DocumentCache(tmp_path / "cache.db"),
+        ArtifactStore(tmp_path / "artifacts"),
+    )
+    asyncio.run(builder.build_from_config(str(config_path)))
+    assert parser.calls == 2
+    chunks = builder.vector_store.chunk_count
+
+    assert asyncio.run(builder.rebuild_from_artifacts(str(config_path))) == 2
+    assert parser.calls == 2
+    assert builder.vector_store.chunk_count == chunks
+    # The previous index stays available for rollback
+    assert len(builder.vector_store.snapshots.names()) == 2
@@ -0,0 +1,66 @@
+import asyncio
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from labrag.benchmarks.stubs import FakeChatModel, HashEmbeddings
+from labrag.benchmarks.suite import BenchmarkConfig, run_benchmarks
+
+
+def test_hash_embeddings_are_deterministic_and_normalized() -> None:
+    embeddings = HashEmbeddings(dims=16)
+    first, second = embeddings.embed_documents(["gene", "population"])
+    assert embeddings.embed_query("gene") == first
+    assert abs(np.linalg.norm(first) - 1) < 1e-6
+    assert first != second
+
+
+def test_fake_chat_model_is_deterministic() -> None:
+    model = FakeChatModel(model_name="fake", output_tokens=20)
+    first = model.invoke("What is a TAD?").content
+    assert model.invoke("What is a TAD?").content == first
+    assert first
+
+
+def tree_state(root: Path) -> dict[str, int]:
+    """Files under root with their modification times, skipping tool caches"""
+    skip = {".git", ".pytest_cache", ".ruff_cache", "__pycache__", ".venv"}
+    return {
+        str(path): path.stat().st_mtime_ns
+        for path in root.rglob("*")
+        if path.is_file() and not skip & set(path.relative_to(root).parts)
+    }
+
+
+def test_suite_runs_every_scenario_offline(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    before = tree_state(Path.cwd())
+    config = BenchmarkConfig(
+        corpus_sizes=[4],
+        concurrency_levels=[1, 2],
+        queries=4,
+        chunks_per_document=5,
+        chat_latency=0,
+        output_tokens=20,
+        embedding_dims=16,
+        embedding_latency=0,
+    )
+    report = asyncio.run(run_benchmarks(config))
+
+    results = report["results"]
+    assert len(results) == 2 + 2 * len(config.concurrency_levels)
+    assert {r["concurrency"] for r in results} == {None, 1, 2}
+    assert all(r["corpus_size"] == 4 for r in results)
+    assert all(r["stages"] for r in results)
+    assert report["meta"]["config"] == config.model_dump()
+    # Every parse ran: no artifact was shared between papers or runs
+    assert "ingest.pdf.artifact_hits" not in results[0]["counters"]
+    assert results[0]["stages"]["ingest.pdf.parse"]["count"] == 3
+    # Nothing was written to the working directory (e.g. its .labrag_cache),
+    # and the run's temporary directories are gone
+    assert tree_state(Path.cwd()) == before
+    assert not list(tmp_path.iterdir())
@@ -0,0 +1,138 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+from labrag.ingestion.parsers.boilerplate import (
+    BoilerplateRemover,
+    classify_block,
+    join_blocks,
+)
+from labrag.ingestion.parsers.url_parser import URLParser
+
+NAV = "[Home](/) [News](/news) [Science](/science) [Health](/health) [Subscribe](/s)"
+PROSE = (
+    "Indigenous groups in the Amazon carry genetic variants that appear to "
+    "protect against Chagas disease, a parasitic infection transmitted by "
+    "insects. Researchers analysed genomes from several populations and found "
+    "signals of natural selection near genes involved in immune response, "
+    "including variants that are rare in other populations of the continent."
+)
+CREDIT = "Photo: João Silva / Agency. Reproduction by [permission](/p) only."
+# A short article block (under 300 characters) the rules keep as prose
+DISCLAIMER = (
+    "This study was not peer reviewed before publication and its findings "
+    "should be read as preliminary evidence until the authors and other "
+    "groups in the field have had the chance to replicate the analysis in "
+    "new cohorts with larger samples and more diverse populations."
+)
+
+
+def article(i: int) -> str:
+    return "\n\n".join(
+        [NAV, f"# Title {i}", f"{PROSE} Study {i}.", "## Methods", DISCLAIMER, CREDIT]
+    )
+
+
+def labels(remover: BoilerplateRemover, markdown: str, site: str) -> dict:
+    return {b.text: (b.label, b.reason) for b in remover.split(markdown, site)}
+
+
+def test_classify_block() -> None:
+    assert classify_block(NAV)[0] == "drop"
+    assert classify_block("## Methods") == ("keep", "heading")
+    assert classify_block(PROSE) == ("keep", "prose")
+    assert classify_block(CREDIT)[0] == "ambiguous"
+    assert classify_block("   ") == ("drop", "empty")
+
+
+def test_repeated_in_article() -> None:
+    blocks = BoilerplateRemover().split(f"{CREDIT}\n\n{PROSE}\n\n{CREDIT}")
+    assert [b.label for b in blocks] == ["ambiguous", "keep", "drop"]
+    assert join_blocks(blocks, keep_ambiguous=False) == PROSE
+
+
+def test_site_rule_only_drops_ambiguous_blocks() -> None:
+    remover = BoilerplateRemover()
+    for i in range(3):
+        remover.observe(article(i), "site.org", f"https://site.org/{i}")
+
+    result = labels(remover, article(0), "site.org")
+    assert result[CREDIT] == ("drop", "repeated across site")
+    # Headings and kept blocks survive even though every article has them
+    assert result["## Methods"] == ("keep", "heading")
+    assert len(DISCLAIMER) < 300
+    assert result[DISCLAIMER] == ("keep", "prose")
+    # Other sites are unaffected
+    assert labels(remover, article(0), "other.org")[CREDIT][0] == "ambiguous"
+
+
+def test_observing_an_article_again_is_idempotent() -> None:
+    remover = BoilerplateRemover()
+    for _ in range(3):
+        remover.observe(article(0), "site.org", "https://site.org/0")
+    assert labels(remover, article(0), "site.org")[CREDIT][0] == "ambiguous"
+
+
+def test_observing_forgets_articles_beyond_the_window() -> None:
+    remover = BoilerplateRemover(window=2)
+    remover.observe(article(0), "site.org", "https://site.org/0")
+    remover.observe(article(1), "site.org", "https://site.org/1")
+    assert labels(remover, article(2), "site.org")[CREDIT][0] == "drop"
+
+    # Two newer articles without the credit push the old ones out
+    for i in (2, 3):
+        remover.observe(PROSE + f" Study {i}.", "site.org", f"https://site.org/{i}")
+    assert labels(remover, article(4), "site.org")[CREDIT][0] == "ambiguous"
+    assert len(remover._site_blocks["site.org"]) == 2
+
+
+class FakeFirecrawl:
+    """Serves pages; scrapes of URLs in `held` wait until they are released"""
+
+    def __init__(self, pages: dict[str, str]) -> None:
+        self.pages = pages
+        self.held: dict[str, threading.Event] = {}
+
+    def scrape_url(self, url: str, **kwargs: object) -> SimpleNamespace:
+        if url in self.held:
+            self.held[url].wait(5)
+        return SimpleNamespace(markdown=self.pages[url], metadata={"title": url})
+
+
+def make_parser(pages: dict[str, str]) -> URLParser:
+    parser = URLParser(
+        clean_mode="heuristic", per_domain_concurrency=4, domain_delay_seconds=0
+    )
+    parser.firecrawl = FakeFirecrawl(pages)
+    return parser
+
+
+def test_site_chrome_is_counted_as_articles_arrive() -> None:
+    pages = {f"https://site.org/{i}": article(i) for i in range(3)}
+    parser = make_parser(pages)
+
+    async def run() -> list[str]:
+        return [(await parser.parse(url)).content for url in pages]
+
+    first, second, third = asyncio.run(run())
+    # Nothing to compare the first article with: its credit line is kept
+    assert CREDIT in first
+    assert CREDIT not in second and CREDIT not in third
+    for content in (first, second, third):
+        assert "## Methods" in content and DISCLAIMER in content
+
+
+def test_articles_are_cleaned_without_waiting_for_other_scrapes() -> None:
+    pages = {f"https://site.org/{i}": article(i) for i in range(2)}
+    parser = make_parser(pages)
+    slow = parser.firecrawl.held["https://site.org/0"] = threading.Event()
+
+    async def run() -> None:
+        pending = asyncio.create_task(parser.parse("https://site.org/0"))
+        fast = await asyncio.wait_for(parser.parse("https://site.org/1"), 2)
+        assert "Study 1" in fast.content
+        assert not pending.done()
+        slow.set()
+        await pending
+
+    asyncio.run(run())
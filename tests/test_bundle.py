@@ -0,0 +1,74 @@
+from pathlib import Path
+
+import pytest
+
+from labrag.ingestion.loaders.bundle import BundleDocuments, KnowledgeBundle
+from labrag.ingestion.loaders.row_tags import RowTags
+from labrag.ingestion.loaders.vector_store import VectorStore
+
+
+@pytest.fixture
+def bundle_path(vector_store: VectorStore, tmp_path: Path) -> Path:
+    path = tmp_path / "labrag.kb"
+    vector_store.export_bundle(path, cache_records=[{"document_id": "a"}])
+    return path
+
+
+@pytest.fixture
+def decoded(monkeypatch: pytest.MonkeyPatch) -> list[str]:
+    """IDs of the bundle documents decoded, in order"""
+    ids = []
+    getitem = BundleDocuments.__getitem__
+
+    def counting(self: BundleDocuments, doc_id: str) -> object:
+        ids.append(doc_id)
+        return getitem(self, doc_id)
+
+    monkeypatch.setattr(BundleDocuments, "__getitem__", counting)
+    return ids
+
+
+def test_round_trip(vector_store: VectorStore, bundle_path: Path) -> None:
+    bundle = KnowledgeBundle(bundle_path, verify=True)
+    assert bundle.header.chunks == 60
+    assert bundle.header.snapshot == vector_store.snapshot
+    assert bundle.cache_records() == [{"document_id": "a"}]
+
+    served = VectorStore(str(bundle_path.parent / "served"), bundle=bundle_path)
+    query = "gene 3 in population 1"
+    assert served.search(query, k=5) == vector_store.search(query, k=5)
+    assert served.read_only
+    with pytest.raises(RuntimeError, match="bundle"):
+        served.add_documents(vector_store.search(query, k=1))
+
+
+def test_row_tags_match_the_chunks(
+    vector_store: VectorStore, bundle_path: Path
+) -> None:
+    tags = KnowledgeBundle(bundle_path).row_tags()
+    expected = RowTags.from_store(vector_store.vector_store)
+    assert tags.sources == expected.sources
+    assert (tags.row_sources == expected.row_sources).all()
+    assert tags.rows == 60
+
+
+def test_router_and_graph_are_built_without_decoding_documents(
+    vector_store: VectorStore, bundle_path: Path, decoded: list[str]
+) -> None:
+    served = VectorStore(str(bundle_path.parent / "served"), bundle=bundle_path)
+    served.enable_routing(top_documents=2, min_documents=3)
+    served.enable_entity_graph()
+    # Nothing is built (or decoded) until first use
+    assert served._router is None and served._entity_graph is None
+    assert not decoded
+
+    router = served.router
+    served.entity_graph  # noqa: B018
+    assert not decoded
+    assert sorted(router.sources) == [f"paper{i}.pdf" for i in range(5)]
+
+    vector_store.enable_routing(top_documents=2, min_documents=3)
+    query = "gene 3 in population 1"
+    assert served.search(query, k=4) == vector_store.search(query, k=4)
+    # A search decodes only the chunks it returns
+    assert len(decoded) == 4
@@ -0,0 +1,137 @@
+import asyncio
+import time
+from pathlib import Path
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.runnables import RunnableConfig
+
+from labrag.agents.nodes import synthesizer_node
+from labrag.agents.state import SessionState
+from labrag.benchmarks.stubs import FakePDFParser, FakeURLParser
+from labrag.cassette import (
+    Cassette,
+    CassetteMissError,
+    CassettePDFParser,
+    CassetteURLParser,
+    cassette_from_env,
+    use_cassette,
+)
+from labrag.metrics import metrics
+from labrag.providers import get_chat_model, get_embeddings
+from tests.conftest import make_chunks
+
+
+def synthesize(question: str) -> dict:
+    state = SessionState(
+        messages=[HumanMessage(content=question)], docs=make_chunks(6), tier="fast"
+    )
+    config = RunnableConfig(configurable={})
+    return asyncio.run(synthesizer_node(state, config))
+
+
+def test_synthesis_is_recorded_and_replayed(
+    tmp_path: Path, stub_providers: None
+) -> None:
+    path = tmp_path / "cassette.db"
+    with use_cassette(Cassette(path, mode="record")):
+        recorded = synthesize("Which genes protect against Chagas disease?")
+    assert "## Final Answer" in recorded["answer"]
+    recorded_tokens = metrics.counters()["synthesis.fast.output_tokens"]
+    assert recorded_tokens > 0
+
+    metrics.reset()
+    with use_cassette(Cassette(path, mode="replay")):
+        replayed = synthesize("Which genes protect against Chagas disease?")
+        assert replayed["answer"] == recorded["answer"]
+        # The raw message, with its usage, comes back from the cassette too
+        assert metrics.counters()["synthesis.fast.output_tokens"] == recorded_tokens
+
+        with pytest.raises(CassetteMissError):
+            synthesize("A question that was never recorded")
+
+
+def test_include_raw_reports_parsing_errors(tmp_path: Path) -> None:
+    cassette = Cassette(tmp_path / "cassette.db", mode="replay")
+    with use_cassette(cassette):
+        llm = get_chat_model("gpt-4.1-mini")
+    structured = llm.with_structured_output(method="json_mode", include_raw=True)
+    request = llm._request([HumanMessage(content="hi")], None, {})
+    request["call_kwargs"] = {"response_format": {"type": "json_object"}}
+    cassette.put("chat", request, {"type": "ai", "data": {"content": "{}"}}, 0.0)
+    assert structured.invoke("hi")["parsed"] == {}
+
+    cassette.put("chat", request, {"type": "ai", "data": {"content": "no"}}, 0.0)
+    output = structured.invoke("hi")
+    assert output["parsed"] is None
+    assert output["parsing_error"] is not None
+    assert isinstance(output["raw"], AIMessage)
+
+
+def test_embeddings_replay_independently_of_batching(
+    tmp_path: Path, stub_providers: None
+) -> None:
+    path = tmp_path / "cassette.db"
+    with use_cassette(Cassette(path, mode="record")):
+        recorded = get_embeddings(dimensions=8).embed_documents(["gene", "locus"])
+
+    with use_cassette(Cassette(path, mode="replay")):
+        embeddings = get_embeddings(dimensions=8)
+        assert embeddings.embed_query("locus") == recorded[1]
+        assert asyncio.run(embeddings.aembed_documents(["gene"])) == recorded[:1]
+        # The model settings are part of the request
+        with pytest.raises(CassetteMissError):
+            get_embeddings(dimensions=16).embed_query("gene")
+
+
+def test_parsers_are_recorded_and_replayed(tmp_path: Path) -> None:
+    path = tmp_path / "cassette.db"
+    pdf = tmp_path / "paper.pdf"
+    pdf.write_bytes(b"%PDF")
+    url = "https://site.org/article"
+
+    recording = Cassette(path, mode="record")
+    parsed = CassettePDFParser(recording, FakePDFParser(3, 10)).parse(pdf)
+    scraped = asyncio.run(CassetteURLParser(recording, FakeURLParser(50)).parse(url))
+
+    replaying = Cassette(path, mode="replay")
+    renamed = tmp_path / "renamed.pdf"
+    pdf.rename(renamed)
+    replayed = CassettePDFParser(replaying).parse(renamed)
+    # Keyed by content: a renamed file replays under its new name
+    assert replayed.chunks == parsed.chunks
+    assert replayed.metadata["source"] == "renamed.pdf"
+    url_parser = CassetteURLParser(replaying)
+    assert asyncio.run(url_parser.parse(url)) == scraped
+    with pytest.raises(CassetteMissError):
+        asyncio.run(url_parser.parse(url, clean_article=False))
+
+
+def test_replay_simulates_the_recorded_latency(tmp_path: Path) -> None:
+    path = tmp_path / "cassette.db"
+    Cassette(path, mode="record").put("chat", {"q": 1}, "answer", 0.2)
+    fast = Cassette(path, mode="replay")
+    slow = Cassette(path, mode="replay", simulate_latency=True, latency_scale=0.5)
+
+    start = time.perf_counter()
+    assert fast.replay("chat", {"q": 1}) == "answer"
+    assert time.perf_counter() - start < 0.05
+    start = time.perf_counter()
+    assert asyncio.run(slow.areplay("chat", {"q": 1})) == "answer"
+    assert time.perf_counter() - start >= 0.1
+
+
+def test_cassette_from_env(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("LABRAG_CASSETTE_MODE", raising=False)
+    assert cassette_from_env() is None
+
+    monkeypatch.setenv("LABRAG_CASSETTE_MODE", "replay")
+    monkeypatch.setenv("LABRAG_CASSETTE_PATH", str(tmp_path / "c.db"))
+    monkeypatch.setenv("LABRAG_CASSETTE_LATENCY_SCALE", "0.25")
+    cassette = cassette_from_env()
+    assert (cassette.mode, cassette.simulate_latency) == ("replay", True)
+    assert cassette.latency_scale == 0.25
+
+    monkeypatch.setenv("LABRAG_CASSETTE_MODE", "live")
+    with pytest.raises(ValueError, match="cassette mode"):
+        cassette_from_env()
@@ -0,0 +1,156 @@
+import asyncio
+import json
+from typing import Any
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from langchain_core.messages import AIMessage
+
+from labrag.agents.deadline import DeadlineExceededError, make_deadline
+from labrag.api.resources import ApiResources
+from labrag.api.routes import chat
+
+
+class SlowGraph:
+    """Answers after `seconds`, recording runs that were cancelled"""
+
+    def __init__(self, seconds: float = 0.0) -> None:
+        self.seconds = seconds
+        self.configs: list[dict[str, Any]] = []
+        self.cleaned_up = 0
+
+    async def ainvoke(self, state: Any, config: dict[str, Any]) -> dict[str, Any]:  # noqa: ANN401
+        self.configs.append(config)
+        try:
+            await asyncio.sleep(self.seconds)
+        except asyncio.CancelledError:
+            await asyncio.sleep(0.01)  # cleanup that takes a moment
+            self.cleaned_up += 1
+            raise
+        text = state.messages[-1].content
+        return {"messages": [AIMessage(content=f"re: {text}")], "intent": "chat"}
+
+
+def make_client(graph: Any) -> TestClient:  # noqa: ANN401
+    app = FastAPI()
+    app.include_router(chat.router, prefix="/api/chat")
+    app.state.resources = ApiResources.from_components(None, graph)
+    return TestClient(app)
+
+
+def test_chat_answers() -> None:
+    graph = SlowGraph()
+    response = make_client(graph).post(
+        "/api/chat/", json={"message": "hi", "session_id": "s1"}
+    )
+    assert response.status_code == 200
+    assert response.json() == {"response": "re: hi", "session_id": "s1", "tier": None}
+    assert graph.configs[0]["configurable"]["thread_id"] == "s1"
+
+
+def test_deadline_exceeded_returns_504_and_cancels_the_run() -> None:
+    graph = SlowGraph(seconds=5)
+    response = make_client(graph).post(
+        "/api/chat/", json={"message": "hi", "session_id": "s", "deadline_seconds": 0.1}
+    )
+    assert response.status_code == 504
+    assert graph.cleaned_up == 1
+
+
+class Request:
+    """Stands in for a Starlette request whose client may go away"""
+
+    def __init__(self, disconnected: bool) -> None:
+        self.disconnected = disconnected
+
+    async def is_disconnected(self) -> bool:
+        return self.disconnected
+
+
+def test_abandoned_run_is_cancelled_and_awaited(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(chat, "DISCONNECT_POLL_INTERVAL", 0.01)
+    graph = SlowGraph(seconds=5)
+
+    async def main() -> asyncio.Task:
+        task = asyncio.create_task(graph.ainvoke(None, {}))
+        with pytest.raises(HTTPException) as error:
+            await chat._run_until_done_or_abandoned(task, Request(True), {})
+        assert error.value.status_code == chat.CLIENT_CLOSED_REQUEST
+        return task
+
+    task = asyncio.run(main())
+    # The cancellation finished before the helper returned
+    assert task.cancelled()
+    assert graph.cleaned_up == 1
+
+
+def test_cancelled_run_errors_are_retrieved(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(chat, "DISCONNECT_POLL_INTERVAL", 0.01)
+
+    async def failing_cleanup() -> None:
+        try:
+            await asyncio.sleep(5)
+        finally:
+            raise RuntimeError("cleanup failed")
+
+    async def main() -> asyncio.Task:
+        task = asyncio.create_task(failing_cleanup())
+        config = {"configurable": {"deadline": make_deadline(0.05)}}
+        with pytest.raises(DeadlineExceededError):
+            await chat._run_until_done_or_abandoned(task, Request(False), config)
+        return task
+
+    task = asyncio.run(main())
+    assert task.done()
+
+
+class CountingGraph(SlowGraph):
+    """Tracks the runs in flight and fails on the message `fail`"""
+
+    def __init__(self, seconds: float) -> None:
+        super().__init__(seconds)
+        self.in_flight = self.peak = 0
+        self.order: list[str] = []
+
+    async def ainvoke(self, state: Any, config: dict[str, Any]) -> dict[str, Any]:  # noqa: ANN401
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            text = state.messages[-1].content
+            self.order.append(text)
+            if text == "fail":
+                raise RuntimeError("model error")
+            return await super().ainvoke(state, config)
+        finally:
+            self.in_flight -= 1
+
+
+def test_batch_streams_results_with_bounded_concurrency() -> None:
+    graph = CountingGraph(seconds=0.02)
+    items = [{"message": f"q{i}", "session_id": f"s{i % 4}"} for i in range(12)]
+    items.append({"message": "fail", "session_id": "s9"})
+    response = make_client(graph).post(
+        "/api/chat/batch", json={"items": items, "concurrency": 2}
+    )
+    assert response.status_code == 200
+    results = [json.loads(line) for line in response.text.splitlines()]
+
+    assert sorted(r["index"] for r in results) == list(range(13))
+    by_index = {r["index"]: r for r in results}
+    assert by_index[5]["response"] == "re: q5"
+    assert by_index[12]["error"] == "model error"
+    assert graph.peak == 2
+    # Turns of a session run in input order
+    session = [text for text in graph.order if text in ("q1", "q5", "q9")]
+    assert session == ["q1", "q5", "q9"]
+
+
+def test_batch_validation() -> None:
+    client = make_client(SlowGraph())
+    assert client.post("/api/chat/batch", json={"items": []}).status_code == 422
+    item = {"message": "hi", "session_id": "s"}
+    request = {"items": [item], "concurrency": 1000}
+    assert client.post("/api/chat/batch", json=request).status_code == 422
@@ -0,0 +1,93 @@
+import pytest
+
+from labrag.ingestion.loaders.chunker import MarkdownChunker
+from labrag.ingestion.tokens import count_tokens
+
+PARAGRAPH = (
+    "Researchers sequenced genomes from several Amazonian populations. "
+    "They found variants near immune genes that appear to protect carriers "
+    "against Chagas disease."
+)
+
+
+def document(sections: int = 4, paragraphs: int = 6) -> str:
+    parts = ["# Study"]
+    for s in range(sections):
+        parts.append(f"## Section {s}")
+        parts += [f"{PARAGRAPH} Finding {s}.{p}." for p in range(paragraphs)]
+    return "\n\n".join(parts)
+
+
+def test_chunks_stay_within_the_token_budget() -> None:
+    chunks = MarkdownChunker(max_tokens=120, min_tokens=20).split(document())
+    assert len(chunks) > 4
+    for chunk in chunks:
+        assert count_tokens(chunk.text) <= chunk.tokens <= 120
+    # Nothing is lost or reordered
+    text = "\n\n".join(chunk.text for chunk in chunks)
+    assert text.replace("\n\n", " ").split() == document().replace("\n\n", " ").split()
+
+
+def test_sections_start_new_chunks_with_their_heading_path() -> None:
+    chunks = MarkdownChunker(max_tokens=400, min_tokens=50).split(document())
+    assert [c.section for c in chunks] == [f"Study > Section {s}" for s in range(4)]
+    assert all(
+        c.text.startswith("## Section") or c.text.startswith("# Study") for c in chunks
+    )
+
+
+def test_no_chunk_ends_with_a_heading() -> None:
+    chunks = MarkdownChunker(max_tokens=60, min_tokens=0).split(document())
+    for chunk in chunks:
+        assert not chunk.text.splitlines()[-1].startswith("#")
+
+
+@pytest.mark.parametrize("length", [300, 340, 360, 380, 395])
+def test_headings_never_push_a_chunk_over_the_budget(length: int) -> None:
+    # The second paragraph fits alone, but not under its heading
+    markdown = "\n\n".join(
+        ["# Intro", "a" * 300, "## Methods section title here", "b" * length]
+    )
+    chunks = MarkdownChunker(max_tokens=100, min_tokens=10).split(markdown)
+    assert all(chunk.tokens <= 100 for chunk in chunks)
+    assert all(count_tokens(chunk.text) <= chunk.tokens for chunk in chunks)
+    methods = next(c for c in chunks if "## Methods" in c.text)
+    assert methods.text.startswith("## Methods section title here\n\nb")
+
+
+def test_figures_keep_their_caption_and_code_stays_whole() -> None:
+    code = "```python\nx = 1\n\ny = 2\n```"
+    markdown = "\n\n".join(
+        ["![Map](map.png)", "Figure 1: Sampling sites.", PARAGRAPH, code]
+    )
+    chunks = MarkdownChunker(max_tokens=40, min_tokens=0).split(markdown)
+    assert "![Map](map.png)\n\nFigure 1: Sampling sites." in chunks[0].text
+    assert any(code in chunk.text for chunk in chunks)
+
+
+def test_oversized_paragraph_is_split_by_sentence() -> None:
+    paragraph = " ".join(f"{PARAGRAPH} Note {i}." for i in range(20))
+    chunks = MarkdownChunker(max_tokens=100, min_tokens=10).split(paragraph)
+    assert len(chunks) > 1
+    assert all(count_tokens(chunk.text) <= chunk.tokens <= 100 for chunk in chunks)
+    assert chunks[0].text.startswith("Researchers") and chunks[0].text.endswith(".")
+
+
+def test_merge_pdf_chunks() -> None:
+    chunker = MarkdownChunker(max_tokens=100, min_tokens=20)
+    chunks = [
+        {"content": "Table 1", "page": 1},
+        {"content": PARAGRAPH, "page": 1},
+        {"content": "Page footer", "page": 2},
+        {"content": " ".join([PARAGRAPH] * 6), "page": 2},
+    ]
+    merged = chunker.merge_pdf_chunks(chunks)
+    assert merged[0]["content"] == f"Table 1\n\n{PARAGRAPH}"
+    # Small pieces are never merged across pages
+    assert [m["page"] for m in merged][:2] == [1, 2]
+    assert all(m["tokens"] <= 100 for m in merged)
+
+
+def test_invalid_sizes() -> None:
+    with pytest.raises(ValueError, match="min_tokens"):
+        MarkdownChunker(max_tokens=100, min_tokens=100)
@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+from labrag.agents.deadline import (
+    DeadlineExceededError,
+    ensure_time_left,
+    get_remaining_time,
+    make_deadline,
+    run_with_deadline,
+)
+
+
+def config(budget: float | None) -> dict:
+    return {"configurable": {"deadline": make_deadline(budget)}}
+
+
+def test_remaining_time() -> None:
+    assert get_remaining_time(None) is None
+    assert get_remaining_time(config(None)) is None
+    assert 9 < get_remaining_time(config(10)) <= 10
+    assert ensure_time_left(config(10), "node") > 9
+    with pytest.raises(DeadlineExceededError, match="before synthesis"):
+        ensure_time_left(config(-1), "synthesis")
+
+
+def test_run_with_deadline_cancels_the_call() -> None:
+    cancelled = []
+
+    async def slow() -> str:
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+        return "done"
+
+    async def main() -> None:
+        assert await run_with_deadline(asyncio.sleep(0, "ok"), config(1), "n") == "ok"
+        assert await run_with_deadline(asyncio.sleep(0, "ok"), None, "n") == "ok"
+        with pytest.raises(DeadlineExceededError, match="during retrieval"):
+            await run_with_deadline(slow(), config(0.05), "retrieval")
+
+    asyncio.run(main())
+    assert cancelled == [True]
+
+
+def test_expired_deadline_never_starts_the_call() -> None:
+    started = []
+
+    async def call() -> None:
+        started.append(True)
+
+    async def main() -> None:
+        with pytest.raises(DeadlineExceededError):
+            await run_with_deadline(call(), config(-1), "n")
+
+    asyncio.run(main())
+    assert not started
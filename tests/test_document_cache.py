@@ -0,0 +1,112 @@
+import sqlite3
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from labrag.ingestion.parsers.cache import MIGRATIONS, DocumentCache
+
+
+@pytest.fixture
+def cache(tmp_path: Path) -> Iterator[DocumentCache]:
+    cache = DocumentCache(tmp_path / "cache.db")
+    yield cache
+    cache.close()
+
+
+def add_done(cache: DocumentCache, document_id: str = "a") -> None:
+    cache.add_document(
+        document_id,
+        f"/papers/{document_id}.pdf",
+        "pdf",
+        content_hash="hash-1",
+        size_bytes=10,
+        mtime=1.0,
+        chunk_count=12,
+        embedding_model="text-embedding-3-small",
+        parser_version="landingai-1",
+    )
+
+
+def test_migrates_a_v1_database(tmp_path: Path) -> None:
+    path = tmp_path / "old.db"
+    conn = sqlite3.connect(path)
+    MIGRATIONS[0](conn)
+    conn.execute("PRAGMA user_version = 1")
+    conn.execute(
+        "INSERT INTO processed_documents VALUES ('a', 'https://x.org', 'url', 't')"
+    )
+    conn.commit()
+    conn.close()
+
+    cache = DocumentCache(path)
+    row = cache.get_document("a")
+    assert row["document_source"] == "https://x.org"
+    assert row["status"] == "done"
+    assert {"content_hash", "chunk_count", "parse_seconds"} <= set(row)
+    assert cache.snapshot is None
+    version = cache._query("PRAGMA user_version")[0][0]
+    assert version == len(MIGRATIONS)
+    cache.close()
+
+
+def test_pending(cache: DocumentCache) -> None:
+    add_done(cache, "a")
+    cache.mark_failed("b", "/papers/b.pdf", "pdf", "boom")
+    assert cache.pending(["a", "b", "c"]) == {"b", "c"}
+    assert cache.is_processed("a")
+    assert not cache.is_processed("b")
+
+
+def test_mark_failed_keeps_the_last_good_record(cache: DocumentCache) -> None:
+    add_done(cache)
+    cache.mark_failed("a", "/papers/a.pdf", "pdf", "parse: timeout", parse_seconds=9)
+
+    row = cache.get_document("a")
+    assert row["status"] == "failed"
+    assert row["error"] == "parse: timeout"
+    assert row["content_hash"] == "hash-1"
+    assert row["chunk_count"] == 12
+    assert row["embedding_model"] == "text-embedding-3-small"
+    assert row["parse_seconds"] is None
+
+    # The next success clears the error
+    add_done(cache)
+    row = cache.get_document("a")
+    assert (row["status"], row["error"]) == ("done", None)
+
+
+def test_mark_failed_inserts_new_documents(cache: DocumentCache) -> None:
+    cache.mark_failed("u", "https://x.org", "url", "scrape: 500", parse_seconds=2.5)
+    row = cache.get_document("u")
+    assert (row["status"], row["error"], row["parse_seconds"]) == (
+        "failed",
+        "scrape: 500",
+        2.5,
+    )
+    assert row["content_hash"] is None
+
+
+def test_rejects_unknown_columns(cache: DocumentCache) -> None:
+    with pytest.raises(ValueError, match="Unknown"):
+        cache.add_document("a", "/a.pdf", "pdf", pages=3)
+    with pytest.raises(ValueError, match="document_type"):
+        cache.add_document("a", "/a.doc", "doc")
+
+
+def test_commit_and_restore(cache: DocumentCache) -> None:
+    add_done(cache, "a")
+    add_done(cache, "b")
+    record = {"document_id": "c", "document_source": "/c.pdf", "document_type": "pdf"}
+
+    state = cache.state_after([record], removed_ids=["a"])
+    assert sorted(row["document_id"] for row in state) == ["b", "c"]
+    before = cache.list_documents()
+
+    cache.commit([record], removed_ids=["a"], snapshot="snap-2")
+    assert sorted(d["document_id"] for d in cache.list_documents()) == ["b", "c"]
+    assert cache.snapshot == "snap-2"
+
+    cache.restore(before, "snap-1")
+    assert sorted(d["document_id"] for d in cache.list_documents()) == ["a", "b"]
+    assert cache.snapshot == "snap-1"
@@ -0,0 +1,75 @@
+from pathlib import Path
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from labrag.api.resources import ApiResources
+from labrag.api.routes import documents
+from labrag.ingestion.jobs import JobQueue
+
+PDF = b"%PDF-1.7 test"
+
+
+def make_client(tmp_path: Path, read_only: bool = False) -> TestClient:
+    resources = ApiResources.from_components(SimpleNamespace(read_only=read_only), None)
+    resources.config = {
+        "data_sources": {
+            "papers_dir": str(tmp_path / "papers"),
+            "urls_file": str(tmp_path / "urls.txt"),
+        }
+    }
+    resources.job_queue = JobQueue(tmp_path / "jobs.db")
+    app = FastAPI()
+    app.include_router(documents.router, prefix="/api")
+    app.state.resources = resources
+    return TestClient(app)
+
+
+def test_upload_queues_a_pdf(tmp_path: Path) -> None:
+    client = make_client(tmp_path)
+    response = client.post(
+        "/api/documents", files={"file": ("my paper.pdf", PDF, "application/pdf")}
+    )
+    assert response.status_code == 202
+    job = response.json()
+    assert (job["kind"], job["status"]) == ("pdf", "queued")
+    assert (tmp_path / "papers" / "my paper.pdf").read_bytes() == PDF
+    assert client.get(f"/api/jobs/{job['job_id']}").json()["job_id"] == job["job_id"]
+
+
+def test_upload_does_not_replace_an_existing_pdf(tmp_path: Path) -> None:
+    papers = tmp_path / "papers"
+    papers.mkdir()
+    (papers / "paper.pdf").write_bytes(b"%PDF original")
+
+    response = make_client(tmp_path).post(
+        "/api/documents", files={"file": ("paper.pdf", PDF, "application/pdf")}
+    )
+    assert response.status_code == 409
+    assert (papers / "paper.pdf").read_bytes() == b"%PDF original"
+    # No temporary file is left for the watcher to pick up
+    assert [p.name for p in papers.iterdir()] == ["paper.pdf"]
+
+
+def test_upload_rejections(tmp_path: Path) -> None:
+    client = make_client(tmp_path)
+    files = {"file": ("notes.txt", PDF, "text/plain")}
+    assert client.post("/api/documents", files=files).status_code == 400
+    files = {"file": ("fake.pdf", b"hello", "application/pdf")}
+    assert client.post("/api/documents", files=files).status_code == 400
+    response = client.post("/api/documents", data={"url": "ftp://x.org/a"})
+    assert response.status_code == 400
+
+    files = {"file": ("paper.pdf", PDF, "application/pdf")}
+    response = make_client(tmp_path, read_only=True).post("/api/documents", files=files)
+    assert response.status_code == 409
+
+
+def test_url_upload_is_appended_to_the_urls_file(tmp_path: Path) -> None:
+    response = make_client(tmp_path).post(
+        "/api/documents", data={"url": " https://example.com/article "}
+    )
+    assert response.status_code == 202
+    assert response.json()["source"] == "https://example.com/article"
+    assert "https://example.com/article" in (tmp_path / "urls.txt").read_text()
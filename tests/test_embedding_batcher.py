@@ -0,0 +1,134 @@
+import asyncio
+import gc
+
+import pytest
+from langchain_core.embeddings import Embeddings
+from langchain_openai import OpenAIEmbeddings
+
+from labrag.benchmarks.stubs import HashEmbeddings
+from labrag.ingestion.loaders.embedding_batcher import (
+    QueryEmbeddingBatcher,
+    embeds_queries_as_documents,
+)
+from labrag.ingestion.loaders.vector_store import VectorStore
+
+
+class RecordingEmbeddings(Embeddings):
+    """Embeds a text as [length, kind], logging every provider call"""
+
+    def __init__(self, symmetric: bool = True, delay: float = 0.0) -> None:
+        self.symmetric_queries = symmetric
+        self.delay = delay
+        self.calls: list[tuple[str, list[str]]] = []
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        raise NotImplementedError
+
+    def embed_query(self, text: str) -> list[float]:
+        raise NotImplementedError
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.calls.append(("documents", texts))
+        await asyncio.sleep(self.delay)
+        return [[float(len(t)), 0.0] for t in texts]
+
+    async def aembed_query(self, text: str) -> list[float]:
+        self.calls.append(("query", [text]))
+        await asyncio.sleep(self.delay)
+        return [float(len(text)), 1.0]
+
+
+def test_concurrent_queries_share_one_call() -> None:
+    embeddings = RecordingEmbeddings()
+
+    async def run() -> list[list[float]]:
+        batcher = QueryEmbeddingBatcher(embeddings, max_wait_ms=20)
+        texts = ["a", "bb", "ccc", "bb"]
+        return await asyncio.gather(*(batcher.aembed_query(t) for t in texts))
+
+    assert asyncio.run(run()) == [[1.0, 0.0], [2.0, 0.0], [3.0, 0.0], [2.0, 0.0]]
+    # One call, duplicates embedded once
+    assert embeddings.calls == [("documents", ["a", "bb", "ccc"])]
+
+
+def test_full_batch_flushes_without_waiting() -> None:
+    embeddings = RecordingEmbeddings()
+
+    async def run() -> None:
+        batcher = QueryEmbeddingBatcher(
+            embeddings, max_batch_size=2, max_wait_ms=10_000
+        )
+        await asyncio.wait_for(
+            asyncio.gather(batcher.aembed_query("a"), batcher.aembed_query("b")), 1
+        )
+
+    asyncio.run(run())
+    assert len(embeddings.calls) == 1
+
+
+def test_asymmetric_provider_uses_query_path() -> None:
+    embeddings = RecordingEmbeddings(symmetric=False)
+
+    async def run() -> list[list[float]]:
+        batcher = QueryEmbeddingBatcher(embeddings, max_wait_ms=20)
+        return await asyncio.gather(
+            *(batcher.aembed_query(t) for t in ["a", "a", "bb"])
+        )
+
+    assert asyncio.run(run()) == [[1.0, 1.0], [1.0, 1.0], [2.0, 1.0]]
+    assert sorted(embeddings.calls) == [("query", ["a"]), ("query", ["bb"])]
+
+
+def test_symmetric_providers() -> None:
+    assert embeds_queries_as_documents(OpenAIEmbeddings(api_key="test"))
+    assert embeds_queries_as_documents(HashEmbeddings(dims=4))
+    assert not embeds_queries_as_documents(RecordingEmbeddings(symmetric=False))
+
+
+def test_batch_survives_garbage_collection() -> None:
+    embeddings = RecordingEmbeddings(delay=0.05)
+
+    async def run() -> list[float]:
+        batcher = QueryEmbeddingBatcher(embeddings, max_batch_size=1)
+        query = asyncio.ensure_future(batcher.aembed_query("abc"))
+        await asyncio.sleep(0.01)
+        # Only the batcher references the batch task while it is in flight
+        assert len(batcher._tasks) == 1
+        gc.collect()
+        result = await asyncio.wait_for(query, 1)
+        assert not batcher._tasks
+        return result
+
+    assert asyncio.run(run()) == [3.0, 0.0]
+
+
+def test_errors_reach_every_caller() -> None:
+    class Failing(RecordingEmbeddings):
+        async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+            raise RuntimeError("provider down")
+
+    async def run() -> list:
+        batcher = QueryEmbeddingBatcher(Failing(), max_wait_ms=5)
+        return await asyncio.gather(
+            batcher.aembed_query("a"), batcher.aembed_query("b"), return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+@pytest.mark.parametrize("batching", [False, True])
+def test_vector_store_search_with_batching(
+    vector_store: VectorStore, batching: bool
+) -> None:
+    if batching:
+        vector_store.enable_query_batching(max_wait_ms=5)
+
+    async def run() -> list:
+        return await asyncio.gather(
+            *(vector_store.asearch(f"gene {i}", k=3) for i in range(4))
+        )
+
+    results = asyncio.run(run())
+    expected = [vector_store.search(f"gene {i}", k=3) for i in range(4)]
+    assert [[d.id for d in r] for r in results] == [[d.id for d in r] for r in expected]
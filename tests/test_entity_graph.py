@@ -0,0 +1,91 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+from langchain_core.documents import Document
+
+from labrag.agents import followups
+from labrag.ingestion.loaders.vector_store import VectorStore
+
+ENTITIES = [
+    ["gene:PPP3CA", "population:Kokama"],
+    ["gene:PPP3CA", "disease:Chagas disease"],
+    ["gene:CFH", "population:Aymara"],
+    ["method:FST"],
+]
+
+
+def tagged_chunks(n: int = 40) -> list[Document]:
+    return [
+        Document(
+            page_content=f"chunk {i}",
+            metadata={
+                "source": f"paper{i % 4}.pdf",
+                "page": 1,
+                "chunk_index": i,
+                "entities": ENTITIES[i % 4],
+            },
+        )
+        for i in range(n)
+    ]
+
+
+@pytest.fixture
+def graph_store(tmp_path: Path, stub_providers: None) -> VectorStore:
+    store = VectorStore(str(tmp_path / "vector_store"))
+    store.add_documents(tagged_chunks())
+    store.enable_entity_graph()
+    return store
+
+
+@pytest.mark.parametrize(
+    ("query", "relational"),
+    [
+        ("Which genes were studied?", False),
+        ("What methods did they use?", False),
+        ("What is PPP3CA?", False),
+        ("Which populations carry PPP3CA variants?", True),
+        ("How do PPP3CA and CFH differ?", True),
+        ("Which genes appear in both the paper and the media coverage?", True),
+        ("Compare the methods used", True),
+        ("Is this in both papers?", False),
+    ],
+)
+def test_only_relational_questions_use_the_graph(
+    graph_store: VectorStore, query: str, relational: bool
+) -> None:
+    graph = graph_store.entity_graph
+    assert (graph.search(query, 6) is not None) == relational
+
+
+def test_graph_chunks_cover_each_entity_and_source(graph_store: VectorStore) -> None:
+    hits = graph_store.entity_graph.search("Which populations carry PPP3CA?", 6)
+    assert hits.entities == ["PPP3CA"]
+    # PPP3CA is in two sources; one chunk of each covers it
+    assert {doc.metadata["source"] for doc in hits.docs} == {"paper0.pdf", "paper1.pdf"}
+    assert len(hits.docs) == 2
+
+
+def search(store: VectorStore, query: str, k: int) -> followups.SearchResult:
+    async def run() -> followups.SearchResult:
+        vector = await store.aembed_query(query)
+        return await followups.search(store, vector, k, query)
+
+    return asyncio.run(run())
+
+
+def test_graph_chunks_are_added_to_the_full_vector_results(
+    graph_store: VectorStore,
+) -> None:
+    k = 10
+    plain = search(graph_store, "Which genes were studied?", k)
+    assert len(plain.docs) == k and plain.graph_docs == 0 and not plain.entities
+
+    query = "Which populations carry PPP3CA variants?"
+    result = search(graph_store, query, k)
+    assert result.entities == ["PPP3CA"]
+    vector = [doc for doc, _ in graph_store.search_with_scores(query, k=k)]
+    # Every vector result is kept, after the graph chunks
+    assert all(doc in result.docs for doc in vector)
+    assert result.graph_docs == len(result.docs) - k > 0
+    assert result.docs[0].metadata["entities"][0] == "gene:PPP3CA"
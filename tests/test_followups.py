@@ -0,0 +1,72 @@
+import asyncio
+
+from langchain_core.documents import Document
+from langchain_core.messages import HumanMessage
+
+from labrag.agents.followups import (
+    choose_mode,
+    cosine_similarity,
+    merge_results,
+    retrieve_for_turn,
+)
+from labrag.agents.state import RetrievalMemory, SessionState
+from labrag.ingestion.loaders.vector_store import VectorStore
+from labrag.metrics import metrics
+from tests.conftest import make_chunks
+
+
+def session(docs: list[Document], vector: list[float], k: int = 10) -> SessionState:
+    return SessionState(
+        messages=[HumanMessage(content="q")],
+        docs=docs,
+        retrieval=RetrievalMemory(query_vector=vector, k=k, snapshot="s1"),
+    )
+
+
+def test_choose_mode() -> None:
+    state = session(make_chunks(10), [1.0, 0.0])
+    assert choose_mode(state, [1.0, 0.05], 10, "s1")[0] == "reuse"
+    assert choose_mode(state, [1.0, 0.7], 10, "s1")[0] == "extend"
+    assert choose_mode(state, [0.0, 1.0], 10, "s1")[0] == "refresh"
+    # More documents than last time, or a reloaded index
+    assert choose_mode(state, [1.0, 0.0], 20, "s1")[0] == "extend"
+    assert choose_mode(state, [1.0, 0.0], 10, "s2") == ("refresh", None)
+    assert choose_mode(SessionState(messages=[]), [1.0], 10, "s1")[0] == "refresh"
+
+
+def test_cosine_similarity() -> None:
+    assert cosine_similarity([1, 0], [2, 0]) == 1.0
+    assert cosine_similarity([1, 0], [0, 0]) == 0.0
+    assert cosine_similarity([1, 0], [1, 0, 0]) == 0.0
+
+
+def test_merge_results() -> None:
+    fresh, previous = make_chunks(4)[2:], make_chunks(4)
+    merged = merge_results(fresh, previous, k=3)
+    assert [d.metadata["chunk_index"] for d in merged] == [2, 3, 0]
+
+
+def test_follow_up_reuses_the_previous_turn(vector_store: VectorStore) -> None:
+    question = "gene 3 in population 1"
+
+    async def main() -> None:
+        first = await retrieve_for_turn(
+            SessionState(messages=[]), vector_store, question, 10
+        )
+        assert first.mode == "refresh" and len(first.docs) == 10
+
+        state = SessionState(messages=[], docs=first.docs, retrieval=first.memory)
+        again = await retrieve_for_turn(state, vector_store, question, 10)
+        assert again.mode == "reuse"
+        assert again.docs == first.docs
+        assert again.scores == first.scores
+
+        # A new snapshot invalidates the session's results
+        vector_store.add_documents(make_chunks(2, sources=1))
+        after_reload = await retrieve_for_turn(state, vector_store, question, 10)
+        assert after_reload.mode == "refresh"
+
+    asyncio.run(main())
+    counters = metrics.counters()
+    assert counters["retrieval.reuse"] == 1
+    assert counters["retrieval.refresh"] == 2
@@ -0,0 +1,77 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from labrag.agents.followups import search
+from labrag.ingestion.loaders.chunker import MarkdownChunker
+from labrag.ingestion.loaders.document_loader import DocumentLoader
+from labrag.ingestion.loaders.vector_store import VectorStore
+from labrag.ingestion.parsers.models import PDFParseResult
+
+SENTENCE = "Variant {i} of gene {g} was found in {p} carriers on page {page}."
+
+
+def pdf(source: str, pages: int = 3, chunks_per_page: int = 4) -> PDFParseResult:
+    chunks = [
+        {
+            "content": " ".join(
+                SENTENCE.format(i=i, g=c, p=page * 10, page=page) for i in range(8)
+            ),
+            "page": page,
+        }
+        for page in range(1, pages + 1)
+        for c in range(chunks_per_page)
+    ]
+    return PDFParseResult(
+        content="",
+        chunks=chunks,
+        metadata={"source": source, "source_type": "pdf"},
+    )
+
+
+@pytest.fixture
+def parent_store(tmp_path: Path, stub_providers: None) -> VectorStore:
+    store = VectorStore(str(tmp_path / "vector_store"))
+    loader = DocumentLoader(None, child_chunker=MarkdownChunker(60, 0))
+    for source in ("a.pdf", "b.pdf"):
+        documents, parents = loader.build_documents(pdf(source))
+        vectors = store.embeddings.embed_documents([d.page_content for d in documents])
+        store.add_embedded_documents(documents, vectors, True, parents)
+    return store
+
+
+def test_children_point_to_their_page() -> None:
+    loader = DocumentLoader(None, child_chunker=MarkdownChunker(60, 0))
+    documents, parents = loader.build_documents(pdf("a.pdf"))
+    assert [p.metadata["page"] for p in parents] == [1, 2, 3]
+    assert len(documents) > len(parents)
+    by_id = {p.id: p for p in parents}
+    for doc in documents:
+        parent = by_id[doc.metadata["parent_id"]]
+        assert doc.page_content in parent.page_content
+        assert doc.metadata["page"] == parent.metadata["page"]
+
+
+def test_search_returns_each_parent_once(parent_store: VectorStore) -> None:
+    assert parent_store.has_parents
+
+    async def run() -> list:
+        vector = await parent_store.aembed_query("gene 2 in 20 carriers on page 2")
+        return (await search(parent_store, vector, k=3)).docs
+
+    docs = asyncio.run(run())
+    assert len(docs) == 3
+    assert all(doc.id.startswith("parent-") for doc in docs)
+    assert len({doc.id for doc in docs}) == 3
+
+
+def test_parents_survive_a_reload_and_go_with_their_source(
+    parent_store: VectorStore,
+) -> None:
+    reloaded = VectorStore(str(parent_store.store_path))
+    assert reloaded.has_parents
+    reloaded.delete_source("a.pdf")
+    ids = set(reloaded.vector_store.docstore._dict)
+    assert not any(doc_id.endswith("-a.pdf") for doc_id in ids)
+    assert "parent-0-b.pdf" in ids
@@ -0,0 +1,112 @@
+import asyncio
+import threading
+import time
+from pathlib import Path
+
+import yaml
+
+from labrag.benchmarks.stubs import FakePDFParser, FakeURLParser
+from labrag.ingestion.artifacts import ArtifactStore
+from labrag.ingestion.knowledge_base import KnowledgeBaseBuilder
+from labrag.ingestion.parsers.cache import DocumentCache
+from labrag.ingestion.parsers.models import PDFParseResult
+from labrag.ingestion.sync import source_id
+
+
+class PoolPDFParser(FakePDFParser):
+    """Blocking parser recording its concurrency; fails the first `failures`
+    attempts of each file named in `flaky`"""
+
+    def __init__(
+        self, seconds: float = 0.05, flaky: dict[str, int] | None = None
+    ) -> None:
+        super().__init__(chunks_per_document=4, words_per_chunk=30)
+        self.seconds = seconds
+        self.flaky = dict(flaky or {})
+        self.lock = threading.Lock()
+        self.in_flight = self.peak = 0
+        self.attempts: dict[str, int] = {}
+
+    def parse(self, pdf_path: str | Path) -> PDFParseResult:
+        name = Path(pdf_path).name
+        with self.lock:
+            self.attempts[name] = self.attempts.get(name, 0) + 1
+            if self.attempts[name] <= self.flaky.get(name, 0):
+                raise ConnectionError("LandingAI returned 503")
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        try:
+            time.sleep(self.seconds)
+            return super().parse(pdf_path)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+def build(
+    tmp_path: Path, parser: PoolPDFParser, names: list[str], **ingestion: object
+) -> KnowledgeBaseBuilder:
+    papers = tmp_path / "papers"
+    papers.mkdir()
+    for name in names:
+        (papers / name).write_bytes(name.encode())
+    config = {
+        "data_sources": {"papers_dir": str(papers), "media_urls": []},
+        "vector_store": {"store_path": str(tmp_path / "vector_store")},
+        "ingestion": {
+            "progress_interval_seconds": 0,
+            "retry_base_delay_seconds": 0.01,
+            **ingestion,
+        },
+    }
+    config_path = tmp_path / "config.yml"
+    config_path.write_text(yaml.safe_dump(config))
+    builder = KnowledgeBaseBuilder(
+        config,
+        parser,
+        FakeURLParser(100),
+        DocumentCache(tmp_path / "cache.db"),
+        ArtifactStore(tmp_path / "artifacts"),
+    )
+    asyncio.run(builder.build_from_config(str(config_path)))
+    return builder
+
+
+def indexed_sources(builder: KnowledgeBaseBuilder) -> set[str]:
+    store = builder.vector_store.vector_store
+    return {doc.metadata["source"] for doc in store.docstore._dict.values()}
+
+
+def test_parses_run_on_a_bounded_pool(tmp_path: Path, stub_providers: None) -> None:
+    names = [f"{i}.pdf" for i in range(8)]
+    parser = PoolPDFParser()
+    builder = build(tmp_path, parser, names, pdf_workers=3)
+
+    assert parser.peak == 3
+    assert indexed_sources(builder) == set(names)
+
+
+def test_failed_parses_are_retried(tmp_path: Path, stub_providers: None) -> None:
+    parser = PoolPDFParser(seconds=0, flaky={"flaky.pdf": 1, "broken.pdf": 99})
+    builder = build(
+        tmp_path, parser, ["ok.pdf", "flaky.pdf", "broken.pdf"], pdf_attempts=2
+    )
+
+    assert parser.attempts == {"ok.pdf": 1, "flaky.pdf": 2, "broken.pdf": 2}
+    assert indexed_sources(builder) == {"ok.pdf", "flaky.pdf"}
+    # The file that kept failing is recorded, so the next sync retries it
+    broken = str(tmp_path / "papers" / "broken.pdf")
+    assert builder.cache.get_document(source_id(broken))["status"] == "failed"
+
+
+def test_slow_parses_time_out(tmp_path: Path, stub_providers: None) -> None:
+    parser = PoolPDFParser(seconds=0.5)
+    start = time.perf_counter()
+    builder = build(
+        tmp_path, parser, ["slow.pdf"], pdf_attempts=2, pdf_timeout_seconds=0.05
+    )
+
+    assert parser.attempts == {"slow.pdf": 2}
+    assert builder.vector_store.vector_store is None
+    # The build gave up on the timeouts rather than waiting for the parses
+    assert time.perf_counter() - start < 2 * parser.seconds + 0.5
@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+
+from labrag.ingestion.pipeline import Pipeline, Stage
+
+
+def run(pipeline: Pipeline, items: list, timeout: float = 5.0) -> list:
+    async def main() -> list:
+        return await asyncio.wait_for(pipeline.run(items), timeout)
+
+    return asyncio.run(main())
+
+
+def test_items_flow_through_every_stage() -> None:
+    async def double(x: int) -> int:
+        await asyncio.sleep(0.001 * (x % 3))
+        return 2 * x
+
+    async def increment(x: int) -> int:
+        return x + 1
+
+    pipeline = Pipeline(
+        [Stage("double", double, workers=3), Stage("increment", increment)],
+        report_interval=0,
+    )
+    assert sorted(run(pipeline, list(range(20)))) == [2 * x + 1 for x in range(20)]
+    assert [s.processed for s in pipeline.stages] == [20, 20]
+
+
+def test_failed_items_are_dropped_and_reported() -> None:
+    errors = []
+
+    async def check(x: int) -> int | None:
+        if x == 3:
+            raise ValueError("bad item")
+        return None if x == 5 else x
+
+    pipeline = Pipeline(
+        [Stage("check", check, workers=2)],
+        report_interval=0,
+        on_error=lambda item, stage, error: errors.append((item, stage, str(error))),
+    )
+    assert sorted(run(pipeline, list(range(8)))) == [0, 1, 2, 4, 6, 7]
+    assert errors == [(3, "check", "bad item")]
+    assert pipeline.stages[0].dropped == 2
+
+
+def test_queues_bound_items_in_flight() -> None:
+    in_flight, peak = 0, 0
+
+    async def produce(x: int) -> int:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        return x
+
+    async def consume(x: int) -> int:
+        nonlocal in_flight
+        await asyncio.sleep(0.002)
+        in_flight -= 1
+        return x
+
+    pipeline = Pipeline(
+        [
+            Stage("produce", produce, workers=4, queue_size=2),
+            Stage("consume", consume, workers=1, queue_size=2),
+        ],
+        report_interval=0,
+    )
+    assert len(run(pipeline, list(range(50)))) == 50
+    # The consumer's queue, its worker and the producers' pending puts
+    assert peak <= 2 + 1 + 4
+
+
+def test_callback_errors_cancel_the_run() -> None:
+    async def slow(x: int) -> int:
+        await asyncio.sleep(0.01)
+        return x
+
+    def on_stage(item: int, stage: str, seconds: float) -> None:
+        if item == 2:
+            raise RuntimeError("progress callback failed")
+
+    pipeline = Pipeline(
+        [
+            Stage("first", slow, workers=2, queue_size=1),
+            Stage("second", slow, workers=1, queue_size=1),
+        ],
+        report_interval=0,
+        on_stage=on_stage,
+    )
+
+    async def main() -> None:
+        with pytest.raises(RuntimeError, match="progress callback"):
+            await asyncio.wait_for(pipeline.run(list(range(100))), 5)
+        # No stage worker is left behind
+        others = asyncio.all_tasks() - {asyncio.current_task()}
+        assert not others
+
+    asyncio.run(main())
+
+
+def test_empty_input() -> None:
+    async def fail(x: int) -> int:
+        raise AssertionError
+
+    assert run(Pipeline([Stage("s", fail)], report_interval=0), []) == []
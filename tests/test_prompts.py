@@ -0,0 +1,75 @@
+import random
+
+from langchain_core.documents import Document
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from labrag.agents.prompts import (
+    build_prompt,
+    cached_token_ratios,
+    order_documents,
+    record_prompt_usage,
+)
+from labrag.agents.utils import format_document_context
+from labrag.benchmarks.stubs import PromptPrefixCache
+from tests.conftest import make_chunks
+
+
+def prompt_text(docs: list[Document], history: str, message: str) -> str:
+    context = format_document_context(order_documents(docs))
+    messages = build_prompt("research_synthesis_prompt", history, message, context)
+    return "\n".join(m.content for m in messages)
+
+
+def test_order_ignores_scores() -> None:
+    docs = make_chunks(12, sources=3)
+    shuffled = random.Random(0).sample(docs, len(docs))
+    assert order_documents(shuffled) == order_documents(docs)
+    ordered = order_documents(docs)
+    keys = [(d.metadata["source"], d.metadata["chunk_index"]) for d in ordered]
+    assert keys == sorted(keys)
+
+
+def test_order_falls_back_to_the_position_in_the_id() -> None:
+    docs = [
+        Document(id=f"{i}-a.pdf", page_content="x", metadata={"source": "a.pdf"})
+        for i in (10, 2, 1)
+    ]
+    assert [d.id for d in order_documents(docs)] == ["1-a.pdf", "2-a.pdf", "10-a.pdf"]
+
+
+def test_stable_parts_come_first() -> None:
+    system, user = build_prompt("research_fast_prompt", "user: hi", "and?", "DOCS")
+    assert isinstance(system, SystemMessage) and isinstance(user, HumanMessage)
+    content = user.content
+    assert content.index("DOCS") < content.index("user: hi") < content.index("and?")
+    # Prompts without documents keep the same layout
+    _, user = build_prompt("research_fast_prompt", "user: hi", "and?")
+    assert "RETRIEVED DOCUMENTS" not in user.content
+
+
+def test_follow_up_reuses_the_cached_prefix() -> None:
+    cache = PromptPrefixCache()
+    docs = make_chunks(200, sources=4)
+    first = prompt_text(docs, "", "Which genes were studied?")
+    cache.lookup(first)
+    # The follow-up reuses the documents, ranked differently
+    reranked = random.Random(1).sample(docs, len(docs))
+    follow_up = prompt_text(reranked, "user: Which genes?", "And the methods?")
+    shared = first.index("**CONVERSATION HISTORY")
+    assert follow_up[:shared] == first[:shared]
+    # Cached up to the last 128-token step within the shared prefix
+    assert cache.lookup(follow_up) == shared // (128 * 4) * 128
+
+
+def test_cached_token_ratios() -> None:
+    usage = {
+        "input_tokens": 2000,
+        "output_tokens": 10,
+        "total_tokens": 2010,
+        "input_token_details": {"cache_read": 1500},
+    }
+    record_prompt_usage(
+        "research_synthesis_prompt", AIMessage("{}", usage_metadata=usage)
+    )
+    record_prompt_usage("research_synthesis_prompt", AIMessage("{}"))
+    assert cached_token_ratios() == {"research_synthesis_prompt": 0.75}
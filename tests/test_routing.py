@@ -0,0 +1,66 @@
+import asyncio
+
+import numpy as np
+
+from labrag.ingestion.loaders.vector_store import VectorStore
+from labrag.metrics import metrics
+from tests.conftest import make_chunks
+
+QUERY = "gene 3 in population 1"
+
+
+def asearch(store: VectorStore, query: str, k: int) -> list[tuple]:
+    async def run() -> list[tuple]:
+        vector = await store.aembed_query(query)
+        return await store.asearch_with_scores_by_vector(vector, k)
+
+    return asyncio.run(run())
+
+
+def test_one_centroid_per_source(vector_store: VectorStore) -> None:
+    vector_store.enable_routing(top_documents=2, min_documents=3)
+    router = vector_store.router
+    assert sorted(router.sources) == [f"paper{i}.pdf" for i in range(5)]
+    assert [len(rows) for rows in router.rows] == [12] * 5
+    assert np.allclose(np.linalg.norm(router.centroids, axis=1), 1)
+
+
+def test_routed_search_only_scores_the_closest_sources(
+    vector_store: VectorStore,
+) -> None:
+    vector_store.enable_routing(top_documents=2, min_documents=3)
+    results = asearch(vector_store, QUERY, 6)
+    assert metrics.latency_summary()["vector_store.routed_search"]["count"] == 1
+
+    query = np.asarray(vector_store.embeddings.embed_query(QUERY), dtype=np.float32)
+    top = vector_store.router.sources[vector_store.router.rank_documents(query, 2)]
+    assert {doc.metadata["source"] for doc, _ in results} <= set(top)
+    scores = [score for _, score in results]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_routing_every_source_matches_the_flat_search(
+    vector_store: VectorStore,
+) -> None:
+    flat = asearch(vector_store, QUERY, 5)
+    vector_store.enable_routing(top_documents=5, min_documents=1)
+    routed = asearch(vector_store, QUERY, 5)
+    assert [doc.page_content for doc, _ in routed] == [
+        doc.page_content for doc, _ in flat
+    ]
+    assert np.allclose([s for _, s in routed], [s for _, s in flat], atol=1e-5)
+
+
+def test_small_indexes_are_searched_flat(vector_store: VectorStore) -> None:
+    vector_store.enable_routing(top_documents=2, min_documents=50)
+    asearch(vector_store, QUERY, 5)
+    assert "vector_store.routed_search" not in metrics.latency_summary()
+
+
+def test_router_follows_index_changes(vector_store: VectorStore) -> None:
+    vector_store.enable_routing(top_documents=2, min_documents=3)
+    assert vector_store.router.document_count == 5
+    vector_store.add_documents(make_chunks(8, sources=8))
+    assert vector_store.router.document_count == 8
+    vector_store.delete_source("paper7.pdf")
+    assert vector_store.router.document_count == 7
@@ -0,0 +1,125 @@
+import asyncio
+import json
+from typing import Any
+
+import httpx
+from fastapi.testclient import TestClient
+from slack_bolt.adapter.starlette.async_handler import AsyncSlackRequestHandler
+
+from labrag.integrations.slack.app import (
+    PLACEHOLDER_TEXT,
+    EventDeduplicator,
+    SlackResponder,
+    create_app,
+    create_service,
+)
+
+
+class FakeSlackClient:
+    """Records the placeholder posts and their updates"""
+
+    def __init__(self) -> None:
+        self.posted: list[dict[str, Any]] = []
+        self.updated: list[dict[str, Any]] = []
+
+    async def chat_postMessage(self, **kwargs: Any) -> dict[str, str]:  # noqa: ANN401, N802
+        self.posted.append(kwargs)
+        return {"ts": f"reply-{len(self.posted)}"}
+
+    async def chat_update(self, **kwargs: Any) -> None:  # noqa: ANN401
+        self.updated.append(kwargs)
+
+
+def make_responder(
+    starting: int = 0, seconds: float = 0.0, concurrency: int = 16
+) -> tuple[SlackResponder, list[dict]]:
+    """A responder whose API answers 503 `starting` times, then echoes"""
+    requests: list[dict] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        requests.append(body)
+        if len(requests) <= starting:
+            return httpx.Response(503, headers={"Retry-After": "0"})
+        await asyncio.sleep(seconds)
+        return httpx.Response(200, json={"response": f"re: {body['message']}"})
+
+    client = httpx.AsyncClient(
+        base_url="http://api", transport=httpx.MockTransport(handler)
+    )
+    responder = SlackResponder(concurrency=concurrency, http_client=client)
+    return responder, requests
+
+
+def event(ts: str, text: str = "<@U1> hello") -> dict[str, str]:
+    return {"channel": "C1", "ts": ts, "text": text}
+
+
+def test_dispatch_returns_before_the_answer() -> None:
+    responder, requests = make_responder(seconds=0.2)
+    slack = FakeSlackClient()
+
+    async def main() -> None:
+        assert responder.dispatch({"event_id": "E1"}, event("1.0"), slack)
+        # Acknowledged: nothing has been asked yet
+        assert responder.in_flight == 1
+        assert not requests
+        await responder.aclose()
+
+    asyncio.run(main())
+    assert slack.posted[0]["text"] == PLACEHOLDER_TEXT
+    assert slack.updated[0]["ts"] == "reply-1"
+    assert slack.updated[0]["text"] == "re: hello"
+    assert requests[0]["session_id"] == "slack_C1_1.0"
+
+
+def test_redelivered_events_are_ignored() -> None:
+    responder, requests = make_responder()
+    slack = FakeSlackClient()
+
+    async def main() -> None:
+        assert responder.dispatch({"event_id": "E1"}, event("1.0"), slack)
+        assert not responder.dispatch({"event_id": "E1"}, event("1.0"), slack)
+        await responder.aclose()
+
+    asyncio.run(main())
+    assert len(requests) == 1
+    assert len(slack.updated) == 1
+
+
+def test_retries_while_the_api_is_starting() -> None:
+    responder, requests = make_responder(starting=2)
+    slack = FakeSlackClient()
+    asyncio.run(responder.answer(event("1.0"), slack))
+    assert len(requests) == 3
+    assert slack.updated[0]["text"] == "re: hello"
+
+
+def test_api_errors_reach_the_user() -> None:
+    responder, _ = make_responder(starting=10)
+    slack = FakeSlackClient()
+    asyncio.run(responder.answer(event("1.0"), slack))
+    assert slack.updated[0]["text"].startswith("Error processing")
+
+
+def test_deduplicator_forgets_old_events() -> None:
+    deduplicator = EventDeduplicator(ttl_seconds=0)
+    assert not deduplicator.seen("E1")
+    assert not deduplicator.seen("E1")
+    deduplicator = EventDeduplicator(max_size=2)
+    for event_id in ("E1", "E2", "E3"):
+        assert not deduplicator.seen(event_id)
+    assert deduplicator.seen("E3")
+    assert not deduplicator.seen("E1")
+
+
+def test_service_health_and_url_verification() -> None:
+    responder, _ = make_responder()
+    slack_app = create_app(responder, token="xoxb-test", signing_secret="secret")
+    service = create_service(AsyncSlackRequestHandler(slack_app), responder)
+    with TestClient(service) as client:
+        health = client.get("/slack/health").json()
+        assert health == {"status": "healthy", "in_flight": 0}
+        challenge = {"type": "url_verification", "challenge": "c1"}
+        response = client.post("/slack/events", json=challenge)
+        assert response.json() == {"challenge": "c1"}
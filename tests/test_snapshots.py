@@ -0,0 +1,62 @@
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from labrag.ingestion.loaders.snapshots import SnapshotStore
+from labrag.ingestion.loaders.vector_store import VectorStore
+from tests.conftest import make_chunks
+
+
+def test_saves_are_numbered_snapshots(vector_store: VectorStore) -> None:
+    first = vector_store.snapshot
+    vector_store.add_documents(make_chunks(4, sources=1))
+
+    snapshots = vector_store.snapshots
+    assert snapshots.names() == [first, vector_store.snapshot]
+    assert snapshots.current == vector_store.snapshot
+    assert snapshots.previous() == first
+    assert snapshots.manifest(vector_store.snapshot)["chunks"] == 64
+
+
+def test_rollback_restores_the_previous_snapshot(vector_store: VectorStore) -> None:
+    first = vector_store.snapshot
+    vector_store.add_documents(make_chunks(4, sources=1))
+
+    assert vector_store.rollback() == first
+    assert vector_store.chunk_count == 60
+    assert VectorStore(str(vector_store.store_path)).chunk_count == 60
+
+
+def test_save_refuses_to_overwrite_another_writers_commit(
+    vector_store: VectorStore,
+) -> None:
+    other = VectorStore(str(vector_store.store_path))
+    other.add_documents(make_chunks(4, sources=1))
+
+    with pytest.raises(RuntimeError, match="another writer"):
+        vector_store.add_documents(make_chunks(2, sources=1))
+    assert vector_store.snapshots.current == other.snapshot
+
+    vector_store.refresh()
+    vector_store.add_documents(make_chunks(2, sources=1))
+    assert vector_store.chunk_count == 66
+
+
+def test_lock_is_exclusive(tmp_path: Path) -> None:
+    # Separate stores open the lock file separately, like separate processes
+    first, second = SnapshotStore(tmp_path), SnapshotStore(tmp_path)
+    order = []
+
+    def wait_for_lock() -> None:
+        with second.lock():
+            order.append("second")
+
+    with first.lock():
+        thread = threading.Thread(target=wait_for_lock)
+        thread.start()
+        time.sleep(0.1)
+        order.append("first")
+    thread.join(5)
+    assert order == ["first", "second"]
@@ -0,0 +1,115 @@
+import asyncio
+import subprocess
+import sys
+import threading
+import time
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+
+from labrag.api import main
+from labrag.api.resources import ApiResources
+
+
+class FakeStore:
+    """The parts of VectorStore the readiness report and warmup read"""
+
+    snapshot = "snap-1"
+    chunk_count = 60
+    embedding_model = "fake-embeddings"
+    dimensions = 32
+    route_documents = None
+    entity_graph = None
+    vector_store = None
+
+    def __init__(self, embeddings: Any = None) -> None:  # noqa: ANN401
+        self.embeddings = embeddings
+
+
+def patch_load(
+    monkeypatch: pytest.MonkeyPatch, loaded: threading.Event | None = None
+) -> None:
+    def load(self: ApiResources) -> None:
+        if loaded is not None:
+            loaded.wait(5)
+        self.vector_store, self.graph = FakeStore(), object()
+
+    monkeypatch.setattr(ApiResources, "_load", load)
+    monkeypatch.setattr(main, "WARMUP", False)
+    monkeypatch.setattr(main, "INDEX_RELOAD_SECONDS", 0)
+
+
+def wait_ready(client: TestClient, timeout: float = 5) -> dict:
+    start = time.perf_counter()
+    while (response := client.get("/api/ready")).status_code != 200:
+        assert time.perf_counter() - start < timeout, response.json()
+        time.sleep(0.01)
+    return response.json()
+
+
+def test_health_answers_while_loading(monkeypatch: pytest.MonkeyPatch) -> None:
+    loaded = threading.Event()
+    patch_load(monkeypatch, loaded)
+
+    with TestClient(main.app) as client:
+        assert client.get("/api/health").status_code == 200
+        ready = client.get("/api/ready")
+        assert ready.status_code == 503
+        assert ready.json()["status"] == "starting"
+        chat = client.post("/api/chat/", json={"message": "hi", "session_id": "s"})
+        assert chat.status_code == 503
+        assert chat.headers["Retry-After"] == "5"
+
+        loaded.set()
+        report = wait_ready(client)
+        assert report["status"] == "ready"
+        assert report["index"]["chunks"] == 60
+        assert report["load_seconds"] is not None
+
+
+def test_failed_load_is_reported(monkeypatch: pytest.MonkeyPatch) -> None:
+    def load(self: ApiResources) -> None:
+        raise FileNotFoundError("vector_store/CURRENT")
+
+    patch_load(monkeypatch)
+    monkeypatch.setattr(ApiResources, "_load", load)
+
+    with TestClient(main.app) as client:
+        start = time.perf_counter()
+        while (report := client.get("/api/ready").json())["status"] == "starting":
+            assert time.perf_counter() - start < 5
+            time.sleep(0.01)
+        assert report["status"] == "failed"
+        assert "vector_store/CURRENT" in report["error"]
+        assert client.get("/api/health").status_code == 200
+
+
+def test_warmup_failures_are_not_fatal(monkeypatch: pytest.MonkeyPatch) -> None:
+    class DownEmbeddings:
+        async def aembed_query(self, text: str) -> list[float]:
+            raise ConnectionError("provider unreachable")
+
+    resources = ApiResources(reload_seconds=0, ingest_worker=False)
+    monkeypatch.setattr(
+        ApiResources,
+        "_load",
+        lambda self: setattr(self, "vector_store", FakeStore(DownEmbeddings())),
+    )
+    asyncio.run(resources.start())
+    assert resources.status == "ready"
+    assert not resources.warm
+    assert resources.warmup_seconds is not None
+
+
+def test_importing_the_app_loads_nothing_heavy() -> None:
+    code = (
+        "import sys, labrag.api.main; "
+        "heavy = ['labrag.ingestion.loaders.vector_store', 'labrag.agents.graph', "
+        "'faiss', 'langgraph']; "
+        "print([m for m in heavy if m in sys.modules])"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert out.stdout.strip() == "[]"
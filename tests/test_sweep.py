@@ -0,0 +1,135 @@
+import faiss
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+from labrag.benchmarks import sweep
+from labrag.benchmarks.stubs import FakePDFParser, fake_text
+from labrag.benchmarks.sweep import (
+    EvalQuestion,
+    SweepConfig,
+    build_index,
+    chunk_corpus,
+    pareto_frontier,
+    run_sweep,
+    score_ranking,
+)
+from labrag.ingestion.parsers.models import URLParseResult
+
+
+def doc(source: str, page: int | None = None, text: str = "") -> Document:
+    metadata = {"source": source} if page is None else {"source": source, "page": page}
+    return Document(page_content=text, metadata=metadata)
+
+
+def test_score_ranking() -> None:
+    ranked = [
+        doc("a.pdf", 1),
+        doc("b.pdf", 2),
+        doc("https://x.org", text="The CRISPR screen found"),
+    ]
+    labels = [
+        {"source": "b.pdf", "page": 2},
+        {"source": "https://x.org", "text": "crispr screen"},
+        {"source": "c.pdf"},
+    ]
+    assert score_ranking(ranked, labels, k=3) == pytest.approx((2 / 3, 1 / 2))
+    assert score_ranking(ranked, labels, k=1) == (0.0, 0.0)
+    # The page has to match too
+    assert score_ranking(ranked, [{"source": "a.pdf", "page": 2}], k=3) == (0, 0)
+
+
+def test_pareto_frontier() -> None:
+    rows = [
+        {"id": 1, "recall": 0.9, "query_p50_ms": 2.0, "context_chars": 900},
+        {"id": 2, "recall": 0.8, "query_p50_ms": 1.0, "context_chars": 500},
+        {"id": 3, "recall": 0.8, "query_p50_ms": 2.0, "context_chars": 900},
+        {"id": 4, "recall": 0.7, "query_p50_ms": 1.0, "context_chars": 500},
+    ]
+    assert [r["id"] for r in pareto_frontier(rows)] == [1, 2]
+
+
+@pytest.mark.parametrize("index_type", ["flat", "hnsw", "ivf"])
+def test_build_index_finds_the_nearest_vector(index_type: str) -> None:
+    vectors = np.random.default_rng(0).normal(size=(200, 16)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    index = build_index(index_type, vectors)
+    assert index.ntotal == 200
+    _, ids = index.search(vectors[:5], 1)
+    assert ids[:, 0].tolist() == [0, 1, 2, 3, 4]
+
+
+def corpus() -> list:
+    pdfs = [FakePDFParser(8, 60).parse(f"paper{i}.pdf") for i in range(3)]
+    url = URLParseResult(
+        content=fake_text("page", 800),
+        raw_content="",
+        metadata={"source": "https://x.org", "title": "X"},
+    )
+    return [*pdfs, url]
+
+
+def test_chunk_corpus_by_page() -> None:
+    docs = chunk_corpus(corpus(), 200, 0, pdf_chunking="recursive")
+    pdf_docs = [d for d in docs if d.metadata["source"].endswith(".pdf")]
+    assert {d.metadata["page"] for d in pdf_docs} == {1, 2}
+    assert all(len(d.page_content) <= 200 for d in docs)
+
+
+def test_run_sweep_covers_the_grid(stub_providers: None) -> None:
+    questions = [
+        EvalQuestion(question="gene expression", relevant=[{"source": "paper1.pdf"}]),
+        EvalQuestion(question="population", relevant=[{"source": "https://x.org"}]),
+    ]
+    config = SweepConfig(
+        chunk_sizes=[300, 1000],
+        chunk_overlaps=[0, 500],
+        embedding_dims=[16],
+        index_types=["flat", "hnsw"],
+        ks=[2, 50],
+        query_repeats=1,
+    )
+    report = run_sweep(corpus(), questions, config)
+
+    # An overlap as large as the chunk size is skipped
+    assert len(report["rows"]) == 3 * 2 * 2
+    assert {(r["chunk_size"], r["chunk_overlap"]) for r in report["rows"]} == {
+        (300, 0),
+        (1000, 0),
+        (1000, 500),
+    }
+    # With k past the corpus size every labelled source is found
+    assert all(r["recall"] == 1.0 for r in report["rows"] if r["k"] == 50)
+    assert report["frontier"]
+    assert all(r in report["rows"] for r in report["frontier"])
+
+
+def test_each_k_is_searched_and_timed(
+    stub_providers: None, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    searched: list[int] = []
+
+    class RecordingIndex:
+        def __init__(self, index: faiss.Index) -> None:
+            self.index = index
+
+        def search(self, vectors: np.ndarray, k: int) -> tuple:
+            searched.append(k)
+            return self.index.search(vectors, k)
+
+    monkeypatch.setattr(
+        sweep, "build_index", lambda *args: RecordingIndex(build_index(*args))
+    )
+    monkeypatch.setattr(faiss, "serialize_index", lambda index: np.zeros(1))
+    questions = [EvalQuestion(question="gene", relevant=[{"source": "paper1.pdf"}])]
+    config = SweepConfig(
+        chunk_sizes=[300],
+        chunk_overlaps=[0],
+        embedding_dims=[16],
+        index_types=["flat"],
+        ks=[2, 20],
+        query_repeats=3,
+    )
+    rows = run_sweep(corpus(), questions, config)["rows"]
+    assert searched == [2, 2, 2, 20, 20, 20]
+    assert [row["k"] for row in rows] == [2, 20]
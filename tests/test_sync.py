@@ -0,0 +1,186 @@
+import asyncio
+import os
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+import yaml
+
+from labrag.benchmarks.stubs import FakePDFParser, FakeURLParser
+from labrag.ingestion.artifacts import ArtifactStore
+from labrag.ingestion.knowledge_base import KnowledgeBaseBuilder
+from labrag.ingestion.loaders.vector_store import VectorStore
+from labrag.ingestion.parsers.cache import DocumentCache
+from labrag.ingestion.parsers.models import PDFParseResult
+from labrag.ingestion.sync import (
+    append_url,
+    file_sha256,
+    plan_sync,
+    read_url_list,
+    source_id,
+)
+
+
+@pytest.fixture
+def cache(tmp_path: Path) -> Iterator[DocumentCache]:
+    cache = DocumentCache(tmp_path / "cache.db")
+    yield cache
+    cache.close()
+
+
+def write(path: Path, data: bytes) -> str:
+    path.write_bytes(data)
+    return str(path)
+
+
+def record(cache: DocumentCache, path: str) -> None:
+    stat = os.stat(path)
+    cache.add_document(
+        source_id(path),
+        path,
+        "pdf",
+        content_hash=file_sha256(path),
+        size_bytes=stat.st_size,
+        mtime=stat.st_mtime,
+    )
+
+
+def actions(plan: object) -> set[tuple]:
+    return {(a.action, Path(a.source).name) for a in plan.actions}
+
+
+def test_plan_sync(tmp_path: Path, cache: DocumentCache) -> None:
+    same = write(tmp_path / "same.pdf", b"same")
+    touched = write(tmp_path / "touched.pdf", b"touched")
+    changed = write(tmp_path / "changed.pdf", b"v1")
+    moved = write(tmp_path / "old-name.pdf", b"moved")
+    gone = write(tmp_path / "gone.pdf", b"gone")
+    for path in (same, touched, changed, moved, gone):
+        record(cache, path)
+    cache.add_document(source_id("https://a.org"), "https://a.org", "url")
+
+    os.utime(touched, (1, 1))
+    write(Path(changed), b"v2")
+    os.rename(moved, tmp_path / "new-name.pdf")
+    os.remove(gone)
+    new = write(tmp_path / "new.pdf", b"new")
+
+    pdfs = [same, touched, changed, str(tmp_path / "new-name.pdf"), new]
+    plan = plan_sync(cache, pdfs, ["https://a.org", "https://b.org"])
+    assert actions(plan) == {
+        ("touch", "touched.pdf"),
+        ("update", "changed.pdf"),
+        ("rename", "new-name.pdf"),
+        ("remove", "gone.pdf"),
+        ("add", "new.pdf"),
+        ("add", "b.org"),
+    }
+    rename = next(a for a in plan.actions if a.action == "rename")
+    assert rename.previous_source == moved
+    assert plan.unchanged == 2
+    assert "1 rename" in plan.describe()
+
+
+def test_failed_sources_are_retried(tmp_path: Path, cache: DocumentCache) -> None:
+    path = write(tmp_path / "a.pdf", b"a")
+    cache.mark_failed(source_id(path), path, "pdf", "parse: timeout")
+    cache.mark_failed(source_id("https://a.org"), "https://a.org", "url", "500")
+    plan = plan_sync(cache, [path], ["https://a.org"])
+    assert {a.reason for a in plan.actions} == {"previous attempt failed"}
+    assert len(plan.actions) == 2
+
+
+def test_url_list(tmp_path: Path) -> None:
+    path = tmp_path / "urls.txt"
+    path.write_text("# sources\nhttps://a.org\n\n")
+    assert append_url(path, "https://b.org")
+    assert not append_url(path, "https://a.org")
+    assert read_url_list(path) == ["https://a.org", "https://b.org"]
+
+
+class SwitchablePDFParser(FakePDFParser):
+    """Fails for the files named in `failing`"""
+
+    def __init__(self) -> None:
+        super().__init__(chunks_per_document=4, words_per_chunk=20)
+        self.failing: set[str] = set()
+
+    def parse(self, pdf_path: str | Path) -> PDFParseResult:
+        if Path(pdf_path).name in self.failing:
+            raise ConnectionError("LandingAI returned 503")
+        result = super().parse(pdf_path)
+        # Chunks follow the file's content, so an update changes them
+        content = Path(pdf_path).read_text()
+        for chunk in result.chunks:
+            chunk["content"] = f"{content}: {chunk['content']}"
+        return result
+
+
+def make_builder(tmp_path: Path) -> tuple[KnowledgeBaseBuilder, Path, str]:
+    papers = tmp_path / "papers"
+    papers.mkdir()
+    config = {
+        "data_sources": {"papers_dir": str(papers), "media_urls": []},
+        "vector_store": {"store_path": str(tmp_path / "vector_store")},
+        "ingestion": {
+            "progress_interval_seconds": 0,
+            "pdf_attempts": 1,
+            "retry_base_delay_seconds": 0,
+        },
+    }
+    config_path = tmp_path / "config.yml"
+    config_path.write_text(yaml.safe_dump(config))
+    builder = KnowledgeBaseBuilder(
+        config,
+        SwitchablePDFParser(),
+        FakeURLParser(100),
+        DocumentCache(tmp_path / "cache.db"),
+        ArtifactStore(tmp_path / "artifacts"),
+    )
+    return builder, papers, str(config_path)
+
+
+def chunk_texts(store: VectorStore, source: str) -> set[str]:
+    return {
+        doc.page_content.split(":")[0]
+        for doc in store.vector_store.docstore._dict.values()
+        if doc.metadata["source"] == source
+    }
+
+
+def test_updated_pdfs_are_replaced_in_one_commit(
+    tmp_path: Path, stub_providers: None
+) -> None:
+    builder, papers, config_path = make_builder(tmp_path)
+    (papers / "a.pdf").write_text("v1")
+    asyncio.run(builder.sync_from_config(config_path))
+    snapshots = builder.vector_store.snapshots
+    committed = len(snapshots.names())
+
+    (papers / "a.pdf").write_text("v2")
+    asyncio.run(builder.sync_from_config(config_path))
+    assert chunk_texts(builder.vector_store, "a.pdf") == {"v2"}
+    # No snapshot without the file was committed in between
+    assert len(snapshots.names()) == committed + 1
+
+
+def test_failed_update_keeps_the_indexed_version(
+    tmp_path: Path, stub_providers: None
+) -> None:
+    builder, papers, config_path = make_builder(tmp_path)
+    (papers / "a.pdf").write_text("v1")
+    asyncio.run(builder.sync_from_config(config_path))
+
+    (papers / "a.pdf").write_text("v2")
+    builder.pdf_parser.failing.add("a.pdf")
+    asyncio.run(builder.sync_from_config(config_path))
+    assert chunk_texts(builder.vector_store, "a.pdf") == {"v1"}
+    reloaded = VectorStore(str(tmp_path / "vector_store"))
+    assert chunk_texts(reloaded, "a.pdf") == {"v1"}
+    # The failure is recorded, so the next sync retries the file
+    row = builder.cache.get_document(source_id(str(papers / "a.pdf")))
+    assert row["status"] == "failed"
+
+    builder.pdf_parser.failing.clear()
+    asyncio.run(builder.sync_from_config(config_path))
+    assert chunk_texts(builder.vector_store, "a.pdf") == {"v2"}
@@ -0,0 +1,81 @@
+import asyncio
+import itertools
+import threading
+import time
+from types import SimpleNamespace
+from urllib.parse import urlparse
+
+from labrag.ingestion.parsers.url_parser import URLParser
+
+
+class RecordingFirecrawl:
+    """Scrapes slowly, recording concurrency and start times per domain"""
+
+    def __init__(self, seconds: float = 0.05, failures: int = 0) -> None:
+        self.seconds = seconds
+        self.failures = failures
+        self.lock = threading.Lock()
+        self.in_flight = self.peak = 0
+        self.domain_in_flight: dict[str, int] = {}
+        self.domain_peak: dict[str, int] = {}
+        self.starts: dict[str, list[float]] = {}
+        self.calls = 0
+
+    def scrape_url(self, url: str, **kwargs: object) -> SimpleNamespace:
+        domain = urlparse(url).netloc
+        with self.lock:
+            self.calls += 1
+            if self.calls <= self.failures:
+                raise ConnectionError("502 Bad Gateway")
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            count = self.domain_in_flight.get(domain, 0) + 1
+            self.domain_in_flight[domain] = count
+            self.domain_peak[domain] = max(self.domain_peak.get(domain, 0), count)
+            self.starts.setdefault(domain, []).append(time.monotonic())
+        time.sleep(self.seconds)
+        with self.lock:
+            self.in_flight -= 1
+            self.domain_in_flight[domain] -= 1
+        return SimpleNamespace(markdown=f"# {url}\n\nBody.", metadata={"title": url})
+
+
+def scrape_all(parser: URLParser, urls: list[str]) -> list:
+    async def main() -> list:
+        return await asyncio.gather(
+            *(parser.parse(url, clean_article=False) for url in urls)
+        )
+
+    return asyncio.run(main())
+
+
+def test_scrapes_are_bounded_globally_and_per_domain() -> None:
+    parser = URLParser(max_concurrency=3, domain_delay_seconds=0)
+    firecrawl = parser.firecrawl = RecordingFirecrawl()
+    urls = [f"https://site{i % 4}.org/{i}" for i in range(12)]
+
+    results = scrape_all(parser, urls)
+    assert [r.metadata["source"] for r in results] == urls
+    assert firecrawl.peak == 3
+    assert max(firecrawl.domain_peak.values()) == 1
+
+
+def test_scrapes_of_a_domain_are_spaced() -> None:
+    parser = URLParser(
+        max_concurrency=4, per_domain_concurrency=4, domain_delay_seconds=0.1
+    )
+    firecrawl = parser.firecrawl = RecordingFirecrawl(seconds=0)
+    scrape_all(parser, [f"https://site.org/{i}" for i in range(3)])
+
+    starts = firecrawl.starts["site.org"]
+    gaps = [b - a for a, b in itertools.pairwise(starts)]
+    assert all(gap >= 0.09 for gap in gaps)
+
+
+def test_failed_scrapes_are_retried() -> None:
+    parser = URLParser(attempts=3, retry_base_delay_seconds=0.01)
+    firecrawl = parser.firecrawl = RecordingFirecrawl(seconds=0, failures=2)
+
+    (result,) = scrape_all(parser, ["https://site.org/a"])
+    assert result.raw_content.startswith("# https://site.org/a")
+    assert firecrawl.calls == 3
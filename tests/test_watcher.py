@@ -0,0 +1,138 @@
+import asyncio
+import time
+from collections.abc import Callable
+from pathlib import Path
+from types import SimpleNamespace
+
+import yaml
+
+from labrag.benchmarks.stubs import FakePDFParser, FakeURLParser
+from labrag.ingestion.artifacts import ArtifactStore
+from labrag.ingestion.knowledge_base import KnowledgeBaseBuilder
+from labrag.ingestion.parsers.cache import DocumentCache
+from labrag.ingestion.watcher import SourceWatcher
+
+
+def write_config(tmp_path: Path) -> tuple[Path, dict]:
+    papers = tmp_path / "papers"
+    papers.mkdir()
+    config = {
+        "data_sources": {"papers_dir": str(papers), "media_urls": []},
+        "vector_store": {"store_path": str(tmp_path / "vector_store")},
+        "ingestion": {"progress_interval_seconds": 0},
+    }
+    path = tmp_path / "config.yml"
+    path.write_text(yaml.safe_dump(config))
+    return path, config
+
+
+async def until(predicate: Callable[[], bool], timeout: float = 10) -> None:
+    start = time.perf_counter()
+    while not predicate():
+        assert time.perf_counter() - start < timeout, "timed out"
+        await asyncio.sleep(0.02)
+
+
+class FlakyBuilder:
+    """Builder whose first syncs fail"""
+
+    def __init__(self, failures: int) -> None:
+        self.failures = failures
+        self.calls: list[float] = []
+
+    def refresh(self) -> bool:
+        return False
+
+    async def sync_from_config(self, config_path: str) -> SimpleNamespace:
+        self.calls.append(time.perf_counter())
+        if len(self.calls) <= self.failures:
+            raise RuntimeError("index locked")
+        return SimpleNamespace(actions=[], counts=dict)
+
+
+def test_failed_sync_is_retried_with_backoff(tmp_path: Path) -> None:
+    config_path, _ = write_config(tmp_path)
+    builder = FlakyBuilder(failures=2)
+    watcher = SourceWatcher(
+        builder,
+        str(config_path),
+        debounce_seconds=0.01,
+        poll_seconds=0.01,
+        use_events=False,
+        retry_seconds=0.1,
+    )
+
+    async def main() -> None:
+        stop = asyncio.Event()
+        task = asyncio.create_task(watcher.run(stop))
+        # Nothing changes on disk: the retries alone bring the sync through
+        await until(lambda: watcher.syncs == 1)
+        stop.set()
+        await asyncio.wait_for(task, 5)
+
+    asyncio.run(main())
+    assert len(builder.calls) == 3
+    assert watcher.failures == 0
+    first_delay = builder.calls[1] - builder.calls[0]
+    second_delay = builder.calls[2] - builder.calls[1]
+    assert first_delay >= 0.1
+    assert second_delay >= 0.2
+
+
+def test_stop_interrupts_the_backoff(tmp_path: Path) -> None:
+    config_path, _ = write_config(tmp_path)
+    watcher = SourceWatcher(
+        FlakyBuilder(failures=100),
+        str(config_path),
+        use_events=False,
+        retry_seconds=60,
+    )
+
+    async def main() -> None:
+        stop = asyncio.Event()
+        task = asyncio.create_task(watcher.run(stop))
+        await until(lambda: watcher.failures == 1)
+        stop.set()
+        await asyncio.wait_for(task, 2)
+
+    asyncio.run(main())
+
+
+def test_new_pdfs_are_ingested(tmp_path: Path, stub_providers: None) -> None:
+    config_path, config = write_config(tmp_path)
+    papers = Path(config["data_sources"]["papers_dir"])
+    (papers / "a.pdf").write_bytes(b"a")
+    builder = KnowledgeBaseBuilder(
+        config,
+        FakePDFParser(2, 5),
+        FakeURLParser(100),
+        DocumentCache(tmp_path / "cache.db"),
+        ArtifactStore(tmp_path / "artifacts"),
+    )
+    watcher = SourceWatcher(
+        builder,
+        str(config_path),
+        debounce_seconds=0.05,
+        poll_seconds=0.02,
+        use_events=False,
+    )
+
+    def sources() -> set[str]:
+        store = builder.vector_store.vector_store
+        if store is None:
+            return set()
+        return {doc.metadata["source"] for doc in store.docstore._dict.values()}
+
+    async def main() -> None:
+        stop = asyncio.Event()
+        task = asyncio.create_task(watcher.run(stop))
+        await until(lambda: sources() == {"a.pdf"})
+        for name in ("b.pdf", "c.pdf"):
+            (papers / name).write_bytes(name.encode())
+        await until(lambda: sources() == {"a.pdf", "b.pdf", "c.pdf"})
+        (papers / "a.pdf").unlink()
+        await until(lambda: sources() == {"b.pdf", "c.pdf"})
+        stop.set()
+        await asyncio.wait_for(task, 5)
+
+    asyncio.run(main())